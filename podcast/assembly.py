@@ -1,37 +1,95 @@
 import os
+import sys
+import tempfile
 import subprocess
 from pathlib import Path
 from datetime import datetime
 
-def assemble_episode(audio_dir, output_file="podcast/output/episode.mp3", metadata=None):
+import mp3
+import mp3index
+import mixdown
+from workspace import clip_files, is_buffer
+from jsonlog import log
+
+# "python" concatenates frames in-process (see mp3.py) and falls back to
+# ffmpeg if a clip can't be handled; "ffmpeg" always shells out; "mix"
+# normalizes loudness, adds pauses, intro/outro music and chapters in a
+# single ffmpeg pass (see mixdown.py), falling back to "python".
+ASSEMBLY_ENGINE = os.getenv("PODCAST_ASSEMBLY_ENGINE", "python")
+
+def assemble_episode(clips, output_file="podcast/output/episode.mp3", metadata=None, engine=None, chapters=None):
     """
-    Assembles audio clips from a directory into a single MP3 file.
+    Assembles audio clips into a single MP3 file.
     
     Args:
-        audio_dir (str): Directory containing .mp3 segments.
+        clips (list): The clip manifest: clip file paths and/or in-memory
+            clips (bytes), in playback order (see workspace.py).
         output_file (str): Path for the final output file.
         metadata (dict): Metadata for ID3 tags (title, artist, etc.).
+        engine (str): "python", "ffmpeg" or "mix"; defaults to ASSEMBLY_ENGINE.
+        chapters (list): {"title", "start_line"} dicts, written as ID3
+            chapters by the "mix" engine.
     
     Returns:
         str: Path to the generated file, or None if failed.
     """
-    input_path = Path(audio_dir)
     output_path = Path(output_file)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # 1. List audio files
-    # Assuming files are named line_000.mp3, line_001.mp3, etc.
-    files = sorted([f for f in input_path.glob("*.mp3")])
-    
-    if not files:
-        print(f"No audio files found in {audio_dir}")
+    clips = list(clips or [])
+    if not clips:
+        log("No audio clips to assemble")
         return None
         
-    print(f"Found {len(files)} audio segments to assemble.")
-    
-    # 2. Create file list for ffmpeg
-    list_file_path = input_path / "files.txt"
-    with open(list_file_path, "w") as f:
+    in_memory = sum(is_buffer(clip) for clip in clips)
+    log(f"Found {len(clips)} audio segments to assemble ({in_memory} in memory).")
+
+    engine = engine or ASSEMBLY_ENGINE
+    if engine == "mix":
+        with clip_files(clips) as files:
+            mixed = mixdown.assemble_mix(files, output_path, metadata, chapters)
+        if mixed:
+            index_episode(output_path)
+            return str(output_path)
+        log("Mixdown failed; falling back to plain concatenation", "warning")
+        engine = "python"
+
+    if engine == "python":
+        try:
+            # Reserve the Xing frame so indexing can fill it in place
+            stream = mp3.concat(clips, output_path, metadata, vbr_frame=True)
+            log(f"Successfully created episode: {output_file} ({stream.duration:.1f}s)")
+            index_episode(output_path)
+            return str(output_path)
+        except (mp3.Mp3Error, OSError, ValueError) as e:
+            log(f"In-process assembly failed ({e}); falling back to ffmpeg", "warning")
+
+    with clip_files(clips) as files:
+        result = assemble_with_ffmpeg(files, output_path, metadata)
+    if result:
+        index_episode(output_path)
+    return result
+
+def index_episode(path):
+    """
+    Write a Xing header with a seek table into `path` (see mp3index.py).
+    Returns the Mp3Index, or None if the file couldn't be indexed; the
+    audio is still playable without one.
+    """
+    try:
+        index = mp3index.write_index(path)
+    except (mp3.Mp3Error, OSError, ValueError) as e:
+        log(f"Could not index {path}: {e}", "warning")
+        return None
+    log(f"Indexed {path}: {index.duration:.1f}s, {index.size_bytes} bytes")
+    return index
+
+def assemble_with_ffmpeg(files, output_path, metadata=None):
+    """Concatenate `files` with `ffmpeg -f concat -c copy`."""
+    # 2. Create file list for ffmpeg (next to the output; clips may live anywhere)
+    fd, list_file = tempfile.mkstemp(dir=output_path.parent, prefix="files-", suffix=".txt")
+    list_file_path = Path(list_file)
+    with os.fdopen(fd, "w") as f:
         for file_path in files:
             # escaped_path = str(file_path.absolute()).replace("'", "'\\''")
             f.write(f"file '{file_path.absolute()}'\n")
@@ -60,23 +118,22 @@ def assemble_episode(audio_dir, output_file="podcast/output/episode.mp3", metada
              
     cmd.append(str(output_path.absolute()))
     
-    print(f"Running ffmpeg command: {' '.join(cmd)}")
+    log(f"Running ffmpeg command: {' '.join(cmd)}")
     
     try:
         subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        print(f"Successfully created episode: {output_file}")
-        
-        # Cleanup list file
-        list_file_path.unlink()
-        
+        log(f"Successfully created episode: {output_path}")
         return str(output_path)
     except subprocess.CalledProcessError as e:
-        print(f"Error running ffmpeg: {e}")
-        print(f"Detailed error: {e.stderr.decode()}")
+        log(f"Error running ffmpeg: {e}", "error")
+        log(f"Detailed error: {e.stderr.decode()}", "error")
         return None
     except Exception as e:
-        print(f"Unexpected error during assembly: {e}")
+        log(f"Unexpected error during assembly: {e}", "error")
         return None
+    finally:
+        # Cleanup list file
+        list_file_path.unlink(missing_ok=True)
 
 if __name__ == "__main__":
     # Test execution
@@ -86,4 +143,5 @@ if __name__ == "__main__":
         "album": "Stash Podcast",
         "description": "A test episode generated by the assembly script."
     }
-    assemble_episode("podcast/temp_audio", "podcast/output/test_episode.mp3", test_metadata)
+    # Assemble whatever clips are given on the command line, in that order
+    assemble_episode(sys.argv[1:], "podcast/output/test_episode.mp3", test_metadata)
@@ -0,0 +1 @@
+"""Performance benchmarks for the podcast and TTS pipelines."""
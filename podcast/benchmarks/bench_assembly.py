@@ -0,0 +1,101 @@
+"""
+Benchmark in-process MP3 concatenation (mp3.concat) against the ffmpeg
+subprocess path of assemble_episode.
+
+Builds a directory of synthetic edge-tts-shaped clips (ID3v2 tag, Info
+frame, silent MPEG-2 layer III frames), assembles them both ways, checks the
+audio frames of the two outputs are identical, and prints timings. The
+ffmpeg side is skipped when ffmpeg isn't installed.
+
+Usage:
+  python podcast/benchmarks/bench_assembly.py
+  python podcast/benchmarks/bench_assembly.py --clips 20 80 --seconds 6 --repeat 5
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mp3
+import assembly
+
+METADATA = {"title": "Benchmark", "artist": "Listen Later", "album": "Stash Podcast", "description": "bench"}
+
+
+def edge_header():
+    return mp3.parse_header(int.from_bytes(mp3.build_header(), "big"))
+
+
+def synthetic_clip(seconds, header=None):
+    """An edge-tts-like clip: ID3v2 tag, Info frame, then `seconds` of frames."""
+    header = header or edge_header()
+    info = bytearray(mp3.silent_frame(header))
+    offset = 4 + header.side_info_size()
+    info[offset:offset + 4] = b"Info"
+    tag = mp3.id3_tag({"title": "clip"})
+    return tag + bytes(info) + mp3.silence(seconds, header)
+
+
+def make_clips(directory, count, seconds):
+    directory.mkdir(parents=True, exist_ok=True)
+    data = synthetic_clip(seconds)
+    for i in range(count):
+        (directory / f"line_{i:03d}.mp3").write_bytes(data)
+    return sorted(directory.glob("*.mp3"))
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def audio_frames(path):
+    data = Path(path).read_bytes()
+    return b"".join(data[start:end] for start, end in mp3.scan(data).runs)
+
+
+def compare(clip_dir, out_dir, repeat, have_ffmpeg):
+    files = sorted(clip_dir.glob("*.mp3"))
+    py_out = out_dir / "python.mp3"
+    ff_out = out_dir / "ffmpeg.mp3"
+
+    py_time = best_of(lambda: mp3.concat(files, py_out, METADATA), repeat)
+    line = f"{len(files):>5} clips  python {py_time * 1000:8.2f} ms"
+
+    if have_ffmpeg:
+        ff_time = best_of(lambda: assembly.assemble_with_ffmpeg(files, ff_out, METADATA), repeat)
+        same = audio_frames(py_out) == audio_frames(ff_out)
+        line += f"  ffmpeg {ff_time * 1000:8.2f} ms  speedup {ff_time / py_time:6.1f}x  identical={same}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, nargs="+", default=[10, 40, 160], help="clips per episode")
+    parser.add_argument("--seconds", type=float, default=5.0, help="length of each clip")
+    parser.add_argument("--repeat", type=int, default=3, help="best-of repetitions")
+    args = parser.parse_args()
+
+    have_ffmpeg = shutil.which("ffmpeg") is not None
+    if not have_ffmpeg:
+        print("ffmpeg not found: timing the in-process path only")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for count in args.clips:
+            clip_dir = tmp / f"clips_{count}"
+            make_clips(clip_dir, count, args.seconds)
+            compare(clip_dir, tmp, args.repeat, have_ffmpeg)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark textnorm against the original per-call re.sub chains.
+
+Runs both implementations over every body in podcast/articles.json (or any
+saves export, see export.py) and over synthetic multi-MB markdown bodies,
+checks that their output is identical, and prints timings.
+
+Usage:
+  python podcast/benchmarks/bench_textnorm.py
+  python podcast/benchmarks/bench_textnorm.py --sizes 1 4 16 --repeat 5
+  python podcast/benchmarks/bench_textnorm.py --export podcast/exports/saves.ndjson.gz
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import textnorm
+from export import read_export
+
+ARTICLES_JSON = Path(__file__).resolve().parent.parent / "articles.json"
+
+
+# ---------------------------------------------------------------------------
+# Reference implementations (the code textnorm replaced)
+# ---------------------------------------------------------------------------
+
+def legacy_clean_text(text):
+    if not text:
+        return ""
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def legacy_strip_markdown(text):
+    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
+    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
+    text = re.sub(r'\*([^*]+)\*', r'\1', text)
+    text = re.sub(r'__([^_]+)__', r'\1', text)
+    text = re.sub(r'_([^_]+)_', r'\1', text)
+    text = re.sub(r'```[\s\S]*?```', '', text)
+    text = re.sub(r'`[^`]+`', '', text)
+    text = re.sub(r'^---+$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'!\[[^\]]*\]\([^)]+\)', '', text)
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+# ---------------------------------------------------------------------------
+# Inputs
+# ---------------------------------------------------------------------------
+
+_WORDS = ("the quick brown fox jumps over lazy dog local first software "
+          "stash podcast article reading later listen queue").split()
+
+_MARKDOWN_SNIPPETS = [
+    "## Heading {w}\n",
+    "[{w} link](https://example.com/{w})",
+    "**{w}**",
+    "*{w}*",
+    "__{w}__",
+    "_{w}_",
+    "`{w}()`",
+    "\n```\ncode {w}\n```\n",
+    "\n---\n",
+    "![{w}](https://example.com/{w}.png)",
+    "<span>{w}</span>",
+    "\n\n\n\n",
+]
+
+
+def synthetic_body(size_bytes, seed=0, markup_ratio=0.1):
+    """Generate a markdown-ish article body of roughly `size_bytes`."""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size_bytes:
+        word = rng.choice(_WORDS)
+        if rng.random() < markup_ratio:
+            piece = rng.choice(_MARKDOWN_SNIPPETS).format(w=word)
+        else:
+            piece = word + (". " if rng.random() < 0.08 else " ")
+        parts.append(piece)
+        total += len(piece)
+    return "".join(parts)
+
+
+def article_bodies(export=None):
+    """Article bodies from podcast/articles.json, or streamed from a saves export."""
+    if export:
+        rows = read_export(export)
+    elif ARTICLES_JSON.exists():
+        with open(ARTICLES_JSON) as f:
+            rows = json.load(f)
+    else:
+        return
+    for row in rows:
+        yield row.get("content") or row.get("highlight") or ""
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def best_of(fn, inputs, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in inputs:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(label, inputs, repeat):
+    for text in inputs:
+        assert textnorm.strip_markdown(text) == legacy_strip_markdown(text), f"{label}: strip_markdown mismatch"
+        assert textnorm.clean_text(text) == legacy_clean_text(text), f"{label}: clean_text mismatch"
+
+    total_mb = sum(len(t) for t in inputs) / 1024 / 1024
+    rows = []
+    for name, old, new in [
+        ("strip_markdown", legacy_strip_markdown, textnorm.strip_markdown),
+        ("clean_text", legacy_clean_text, textnorm.clean_text),
+    ]:
+        old_s = best_of(old, inputs, repeat)
+        new_s = best_of(new, inputs, repeat)
+        rows.append((label, name, total_mb, old_s, new_s))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 4], help="synthetic body sizes in MB")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--export", help="saves export to replay instead of podcast/articles.json")
+    args = parser.parse_args()
+
+    rows = []
+    bodies = list(article_bodies(args.export))
+    if bodies:
+        rows += compare(Path(args.export).name[:20] if args.export else "articles.json", bodies, args.repeat)
+    for mb in args.sizes:
+        rows += compare(f"synthetic {mb:g}MB", [synthetic_body(int(mb * 1024 * 1024), seed=int(mb))], args.repeat)
+        rows += compare(f"plain {mb:g}MB", [synthetic_body(int(mb * 1024 * 1024), seed=int(mb), markup_ratio=0)], args.repeat)
+
+    print(f"{'input':<20} {'function':<15} {'MB':>7} {'legacy ms':>10} {'textnorm ms':>12} {'speedup':>8}")
+    for label, name, mb, old_s, new_s in rows:
+        print(f"{label:<20} {name:<15} {mb:>7.2f} {old_s * 1000:>10.1f} {new_s * 1000:>12.1f} {old_s / new_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Seeded synthetic corpus of `saves` rows for benchmarks.
+
+Rows have the same columns as the table (see podcast/articles.json)
+and bodies range from highlight-only saves of a few dozen words up to
+50k-word articles, log-uniformly, with enough markdown and HTML in them to
+exercise textnorm. The same seed always gives the same corpus, so timings
+from different commits are comparable.
+
+Usage:
+  python podcast/benchmarks/corpus.py --count 1000 --output corpus.ndjson.gz
+
+The output is a saves export (see export.py), so bench_textnorm.py --export
+and read_export can replay it.
+"""
+
+import sys
+import math
+import uuid
+import random
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from export import write_page
+
+MIN_WORDS = 20
+MAX_WORDS = 50_000
+HIGHLIGHT_WORDS = 120  # saves at or below this size are highlight-only
+USER_ID = "00000000-0000-4000-8000-000000000001"
+EPOCH = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+_WORDS = ("the quick brown fox jumps over lazy dog local first software stash podcast article "
+          "reading later listen queue network latency compiler memory storage protocol design "
+          "research startup market policy climate energy battery privacy browser kernel").split()
+
+_MARKUP = [
+    "\n\n## {w} {v}\n\n",
+    "[{w} {v}](https://example.com/{w})",
+    "**{w}**",
+    "*{v}*",
+    "__{w}__",
+    "`{w}()`",
+    "\n\n```\n{w} = {v}()\n```\n\n",
+    "\n\n---\n\n",
+    "![{w}](https://cdn.example.com/{v}.png)",
+    "<em>{w}</em>",
+    "\n\n\n\n",
+]
+
+_SITES = ["example.com", "blog.example.org", "news.example.net", "macstories.net", "lwn.net"]
+_SOURCES = ["share-target", "extension", "kindle", "ios-shortcut"]
+
+
+def word_count(rng, min_words=MIN_WORDS, max_words=MAX_WORDS):
+    """Log-uniform between min_words and max_words: many short saves, a few huge ones."""
+    return int(math.exp(rng.uniform(math.log(min_words), math.log(max_words))))
+
+
+def markdown_body(rng, words, markup_ratio=0.08):
+    """`words` words of prose with sentences, paragraphs and scattered markup."""
+    parts = []
+    for i in range(words):
+        word = rng.choice(_WORDS)
+        if rng.random() < markup_ratio:
+            parts.append(rng.choice(_MARKUP).format(w=word, v=rng.choice(_WORDS)))
+        elif rng.random() < 0.07:
+            parts.append(word + (".\n\n" if rng.random() < 0.2 else ". "))
+        else:
+            parts.append(word + " ")
+    return "".join(parts).strip()
+
+
+def save_row(rng, index, words):
+    """One `saves` row with a body of `words` words."""
+    site = rng.choice(_SITES)
+    created = EPOCH + timedelta(minutes=index * 37, seconds=rng.randint(0, 59))
+    title = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 9))).capitalize()
+    highlight_only = words <= HIGHLIGHT_WORDS
+    body = markdown_body(rng, words)
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+        "user_id": USER_ID,
+        "folder_id": None,
+        "url": f"https://{site}/{index}-{title.lower().replace(' ', '-')[:40]}",
+        "title": title,
+        "excerpt": None if highlight_only else body[:200],
+        "content": None if highlight_only else body,
+        "highlight": body if highlight_only else None,
+        "site_name": site,
+        "author": rng.choice([None, "A. Writer", "B. Reporter"]),
+        "published_at": None,
+        "image_url": None,
+        "is_archived": rng.random() < 0.2,
+        "is_favorite": rng.random() < 0.1,
+        "read_at": None,
+        "source": rng.choice(_SOURCES),
+        "audio_url": None,
+        "created_at": created.isoformat(),
+        "updated_at": created.isoformat(),
+    }
+
+
+def generate_saves(count, seed=0, min_words=MIN_WORDS, max_words=MAX_WORDS):
+    """Yield `count` synthetic saves, oldest first."""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield save_row(rng, i, word_count(rng, min_words, max_words))
+
+
+def write_corpus(path, count, seed=0, max_words=MAX_WORDS, page_size=100):
+    """Write a corpus as a saves export, `page_size` rows per gzip member."""
+    page = []
+    with open(path, "wb") as f:
+        for row in generate_saves(count, seed, max_words=max_words):
+            page.append(row)
+            if len(page) == page_size:
+                write_page(f, page)
+                page = []
+        if page:
+            write_page(f, page)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-words", type=int, default=MAX_WORDS)
+    parser.add_argument("--output", default="corpus.ndjson.gz")
+    args = parser.parse_args()
+
+    write_corpus(args.output, args.count, args.seed, args.max_words)
+    print(f"Wrote {args.count} saves to {args.output} ({Path(args.output).stat().st_size / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
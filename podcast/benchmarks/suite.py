@@ -0,0 +1,223 @@
+"""
+Microbenchmark suite for the Python hot paths, with saved baselines.
+
+Times, over a seeded synthetic corpus (see corpus.py):
+  extract_text_for_tts   tts.extract_text_for_tts on every save
+  clean_text             extract.clean_text on every article body
+  script_prompt          script.script_prompt (generate_script's prompt
+                         payload) over episodes of formatted articles
+  assemble_episode       assembly.assemble_episode (python engine) over
+                         synthetic edge-tts clips
+
+`run` writes the results, tagged with the git commit, as JSON. `compare`
+sets two result files side by side and flags every benchmark whose best
+time got slower by more than the threshold; it exits non-zero if any did.
+
+Usage:
+  python podcast/benchmarks/suite.py run [--count 200] [--rounds 5] [--only clean_text ...]
+  python podcast/benchmarks/suite.py run --output before.json
+  python podcast/benchmarks/suite.py compare before.json after.json [--threshold 0.10]
+"""
+
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import contextlib
+from io import StringIO
+from pathlib import Path
+from datetime import datetime, timezone
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT.parent / "tts"))
+
+from benchmarks import corpus
+from benchmarks.bench_assembly import make_clips, METADATA
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_COUNT = 200
+DEFAULT_ROUNDS = 5
+DEFAULT_THRESHOLD = 0.10  # flag benchmarks more than 10% slower than the baseline
+EPISODE_ARTICLES = 5  # articles per script prompt, like fetch_recent_articles
+EPISODE_CLIPS = 60
+CLIP_SECONDS = 4.0
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register `setup(saves, workdir)`, which returns the callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+@benchmark("extract_text_for_tts")
+def bench_extract_text_for_tts(saves, workdir):
+    import tts
+    return lambda: [tts.extract_text_for_tts(save) for save in saves]
+
+
+@benchmark("clean_text")
+def bench_clean_text(saves, workdir):
+    import extract
+    bodies = [save["content"] or save["highlight"] or "" for save in saves]
+    return lambda: [extract.clean_text(body) for body in bodies]
+
+
+@benchmark("script_prompt")
+def bench_script_prompt(saves, workdir):
+    import extract
+    import script
+    articles = [extract.format_article(save) for save in saves]
+    episodes = [articles[i:i + EPISODE_ARTICLES] for i in range(0, len(articles), EPISODE_ARTICLES)]
+    return lambda: [script.script_prompt(episode) for episode in episodes]
+
+
+@benchmark("assemble_episode")
+def bench_assemble_episode(saves, workdir):
+    import assembly
+    clips = make_clips(workdir / "clips", EPISODE_CLIPS, CLIP_SECONDS)
+    output = workdir / "episode.mp3"
+
+    def run():
+        with contextlib.redirect_stdout(StringIO()):
+            if not assembly.assemble_episode(clips, output, METADATA, engine="python"):
+                raise RuntimeError("assemble_episode failed")
+    return run
+
+
+def measure(fn, rounds):
+    """Time `rounds` calls of `fn` after one warm-up call; seconds."""
+    fn()
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"min_s": min(times), "median_s": statistics.median(times), "mean_s": statistics.fmean(times),
+            "rounds": rounds}
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                                cwd=ROOT, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    return result.stdout.strip() or "unknown"
+
+
+def run(count=DEFAULT_COUNT, seed=0, rounds=DEFAULT_ROUNDS, only=None):
+    """Run the suite and return the results document."""
+    saves = list(corpus.generate_saves(count, seed))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, setup in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            workdir = Path(tmp) / name
+            workdir.mkdir()
+            results[name] = measure(setup(saves, workdir), rounds)
+            print(f"{name:<22} best {results[name]['min_s'] * 1000:10.2f} ms  "
+                  f"median {results[name]['median_s'] * 1000:10.2f} ms")
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {"count": count, "seed": seed, "words": sum(len((s["content"] or s["highlight"]).split())
+                                                              for s in saves)},
+        "benchmarks": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare best times benchmark by benchmark. Returns (name, baseline_s,
+    current_s, ratio, status) rows; status is "regression", "faster", "ok",
+    "new" or "missing".
+    """
+    rows = []
+    for name in sorted(set(baseline["benchmarks"]) | set(current["benchmarks"])):
+        old = baseline["benchmarks"].get(name)
+        new = current["benchmarks"].get(name)
+        if old is None or new is None:
+            rows.append((name, old and old["min_s"], new and new["min_s"], None, "new" if old is None else "missing"))
+            continue
+        ratio = new["min_s"] / old["min_s"]
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 - threshold:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, old["min_s"], new["min_s"], ratio, status))
+    return rows
+
+
+def print_comparison(baseline, current, rows):
+    print(f"baseline {baseline['commit']}  vs  current {current['commit']}")
+    if baseline.get("corpus") != current.get("corpus"):
+        print("warning: the two runs used different corpora")
+    print(f"{'benchmark':<22} {'baseline ms':>12} {'current ms':>12} {'change':>8}  status")
+    for name, old, new, ratio, status in rows:
+        old_ms = f"{old * 1000:.2f}" if old is not None else "-"
+        new_ms = f"{new * 1000:.2f}" if new is not None else "-"
+        change = f"{(ratio - 1) * 100:+.1f}%" if ratio is not None else "-"
+        print(f"{name:<22} {old_ms:>12} {new_ms:>12} {change:>8}  {status}")
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the suite and save the results")
+    run_parser.add_argument("--count", type=int, default=DEFAULT_COUNT, help="saves in the corpus")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    run_parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS))
+    run_parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>.json)")
+    run_parser.add_argument("--baseline", help="also compare against this results file")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        current = run(args.count, args.seed, args.rounds, args.only)
+        output = Path(args.output or RESULTS_DIR / f"{current['commit']}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Saved results to {output}")
+        if not args.baseline:
+            return True
+        baseline = load_results(args.baseline)
+    else:
+        baseline, current = load_results(args.baseline), load_results(args.current)
+
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(baseline, current, rows)
+    regressions = [row[0] for row in rows if row[4] == "regression"]
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+    return not regressions
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
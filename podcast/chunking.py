@@ -0,0 +1,77 @@
+"""
+Sentence-aware text chunking for TTS.
+
+Long articles are split into chunks on paragraph and sentence boundaries so
+each chunk can be synthesized as its own (fast, retryable) edge-tts request
+and the clips stitched back together in order. No text is ever dropped.
+"""
+
+import re
+
+# ~3 minutes of speech per chunk: small enough to synthesize quickly and
+# retry cheaply, large enough that chunk seams are rare.
+MAX_CHUNK_CHARS = 3000
+
+_PARAGRAPH_RE = re.compile(r'\n\s*\n')
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+|(?<=[.!?]["\'”’)])\s+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def _split_long(sentence, max_chars):
+    """Split a single over-long sentence on word boundaries."""
+    pieces = []
+    current = []
+    length = 0
+    for word in sentence.split():
+        if current and length + 1 + len(word) > max_chars:
+            pieces.append(" ".join(current))
+            current = []
+            length = 0
+        current.append(word)
+        length += len(word) + (1 if length else 0)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def split_text(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Split `text` into chunks of at most `max_chars` characters.
+
+    Paragraphs are packed together while they fit; a paragraph that is too
+    long is split between sentences, and a sentence that is too long on its
+    own is split between words. Chunks are returned in reading order.
+    """
+    chunks = []
+    current = ""
+
+    def flush():
+        nonlocal current
+        if current:
+            chunks.append(current)
+            current = ""
+
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = _WHITESPACE_RE.sub(" ", paragraph).strip()
+        if not paragraph:
+            continue
+
+        if current and len(current) + 2 + len(paragraph) <= max_chars:
+            current += "\n\n" + paragraph
+            continue
+        flush()
+        if len(paragraph) <= max_chars:
+            current = paragraph
+            continue
+
+        for sentence in _SENTENCE_RE.split(paragraph):
+            for piece in ([sentence] if len(sentence) <= max_chars else _split_long(sentence, max_chars)):
+                if current and len(current) + 1 + len(piece) <= max_chars:
+                    current += " " + piece
+                else:
+                    flush()
+                    current = piece
+        flush()
+
+    flush()
+    return chunks
@@ -1,35 +1,29 @@
 import os
-import requests
 import json
 from dotenv import load_dotenv
+from supabase_http import SupabaseClient
+from pagination import iter_rows, FetchError
+from export import EXPORT_COLUMNS
 
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
-def get_headers():
-    return {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json"
-    }
+client = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
 
 def list_all_articles():
-    url = f"{SUPABASE_URL}/rest/v1/saves"
-    params = {
-        "select": "*",
-        "order": "created_at.desc"
-    }
-    
-    response = requests.get(url, headers=get_headers(), params=params)
-    if response.status_code == 200:
-        data = response.json()
-        with open("articles.json", "w") as f:
-            json.dump(data, f, indent=2)
-        print(f"Saved {len(data)} articles to articles.json")
-    else:
-        print(f"Error: {response.status_code} - {response.text}")
+    # Paged, so PostgREST's row cap can't truncate the fixture. For large
+    # tables use export.py, which streams to compressed NDJSON instead.
+    try:
+        data = list(iter_rows("/rest/v1/saves", None, {}, ",".join(EXPORT_COLUMNS), session=client))
+    except FetchError as e:
+        print(f"Error: {e}")
+        return
+
+    with open("articles.json", "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"Saved {len(data)} articles to articles.json")
 
 if __name__ == "__main__":
     list_all_articles()
@@ -0,0 +1,174 @@
+"""
+Content-addressed on-disk cache for synthesized TTS clips.
+
+Clips are keyed by a hash of everything that affects the audio (text, voice,
+rate, volume and output format), so re-running a podcast or regenerating an
+article reuses every unchanged clip instead of calling edge-tts again.
+
+Shared by podcast/script.py and tts/tts.py.
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+import edge_tts
+
+# edge-tts always requests this format; part of the key so a future change
+# to the output format can never serve stale clips.
+OUTPUT_FORMAT = "audio-24khz-48kbitrate-mono-mp3"
+
+DEFAULT_CACHE_DIR = Path(os.getenv("STASH_TTS_CACHE_DIR", Path.home() / ".cache" / "stash" / "tts-clips"))
+DEFAULT_MAX_BYTES = int(os.getenv("STASH_TTS_CACHE_MAX_MB", "500")) * 1024 * 1024
+
+
+def clip_key(text, voice, rate="+0%", volume="+0%", output_format=OUTPUT_FORMAT):
+    """Return the cache key for a clip."""
+    h = hashlib.sha256()
+    for part in (text, voice, rate, volume, output_format):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ClipCache:
+    """
+    Directory of clips named by key, capped at `max_bytes`.
+
+    Recency is tracked through file mtimes (touched on every hit), and the
+    least recently used clips are evicted once the cap is exceeded. Writes go
+    to a temp file in the cache directory and are renamed into place, so a
+    crashed or concurrent writer never leaves a truncated clip behind.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes = None  # computed lazily on first write
+
+    def path_for(self, key):
+        return self.cache_dir / key[:2] / f"{key}.mp3"
+
+    def get(self, key, dest):
+        """Copy the cached clip to `dest`. Returns False on a miss."""
+        path = self.path_for(key)
+        try:
+            shutil.copyfile(path, dest)
+            os.utime(path)  # mark as recently used
+            return True
+        except FileNotFoundError:
+            return False
+
+    def read(self, key):
+        """Return the cached clip's bytes, or None on a miss."""
+        path = self.path_for(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # mark as recently used
+            return data
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, src):
+        """Atomically store the clip at `src` (a path, or the clip's bytes) under `key`."""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                if isinstance(src, (bytes, bytearray)):
+                    tmp.write(src)
+                else:
+                    with open(src, "rb") as f:
+                        shutil.copyfileobj(f, tmp)
+            size = os.path.getsize(tmp_path)
+            existing = path.stat().st_size if path.exists() else 0
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += size - existing
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        return [p for p in self.cache_dir.glob("*/*.mp3") if p.is_file()]
+
+    def _scan_size(self):
+        total = 0
+        for p in self._entries():
+            try:
+                total += p.stat().st_size
+            except FileNotFoundError:
+                pass
+        return total
+
+    def _evict(self):
+        """Remove least recently used clips until the cache fits its cap."""
+        entries = []
+        for p in self._entries():
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in entries:
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+        self._total_bytes = total
+
+
+async def synthesize(text, voice, output_path, rate="+0%", volume="+0%", cache=None):
+    """
+    Write the clip for `text` to `output_path`, reusing `cache` when possible.
+
+    Returns True if the clip came from the cache.
+    """
+    key = clip_key(text, voice, rate, volume)
+    if cache is not None and cache.get(key, output_path):
+        return True
+
+    communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume)
+    await communicate.save(str(output_path))
+
+    if cache is not None:
+        cache.put(key, output_path)
+    return False
+
+
+async def synthesize_bytes(text, voice, rate="+0%", volume="+0%", cache=None):
+    """
+    Like synthesize, but return the clip's bytes instead of writing a file,
+    for clips that are assembled straight from memory.
+    """
+    key = clip_key(text, voice, rate, volume)
+    if cache is not None:
+        data = cache.read(key)
+        if data is not None:
+            return data
+
+    data = bytearray()
+    communicate = edge_tts.Communicate(text, voice, rate=rate, volume=volume)
+    async for message in communicate.stream():
+        if message["type"] == "audio":
+            data += message["data"]
+    data = bytes(data)
+
+    if cache is not None:
+        cache.put(key, data)
+    return data
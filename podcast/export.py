@@ -0,0 +1,211 @@
+"""
+Incremental, streaming export of saves to gzip-compressed NDJSON.
+
+    python podcast/export.py [--output podcast/exports/saves.ndjson.gz] [--full]
+
+The export pages through `saves` ordered by (updated_at, id) (keyset
+pagination, see pagination.py) and writes one JSON object per line. Each
+page is appended as its own gzip member, and a checkpoint next to the export
+records the last (updated_at, id) written together with the export's size
+at that point. So memory use is bounded by one page, and an interrupted run
+loses at most the page it was writing. The next run truncates any partial
+page, then appends only rows changed since the checkpoint.
+
+`updated_at` is the writing transaction's start time, so a slow transaction
+can commit a row older than rows already exported. Each run therefore
+re-reads EXPORT_OVERLAP behind the checkpoint (like the mirror's
+SYNC_OVERLAP), and the checkpoint remembers the (updated_at, id) of the rows
+written in that window so they are not appended twice.
+
+An export is an append log: a save that changes after it was exported is
+appended again with its new `updated_at`, and the newest line for an id
+wins. `read_export` streams the rows back in constant memory (multi-member
+gzip reads as one stream), stopping at the checkpointed size so a reader
+never sees a page that is still being written.
+"""
+
+import os
+import sys
+import gzip
+import json
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import timedelta
+from dotenv import load_dotenv
+
+from mirror import parse_timestamp
+from pagination import iter_rows, FetchError
+from supabase_http import SupabaseClient, SupabaseError
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+USER_ID = os.getenv("USER_ID")
+
+DEFAULT_EXPORT = Path(__file__).parent / "exports" / "saves.ndjson.gz"
+EXPORT_PAGE_SIZE = 1000
+COMPRESS_LEVEL = 6
+# The columns of `saves` (as in podcast/articles.json), without the derived
+# `fts` tsvector and the columns that only exist after optional migrations
+EXPORT_COLUMNS = ("id", "user_id", "folder_id", "url", "title", "excerpt", "content", "highlight", "site_name",
+                  "author", "published_at", "image_url", "is_archived", "is_favorite", "read_at", "source",
+                  "audio_url", "created_at", "updated_at")
+# Re-read rows this far behind the checkpoint, for transactions that
+# committed after newer rows were exported
+EXPORT_OVERLAP = timedelta(seconds=60)
+
+
+def checkpoint_path(path):
+    path = Path(path)
+    return path.with_name(path.name + ".checkpoint.json")
+
+
+def load_checkpoint(path):
+    """The export's checkpoint ({"updated_at", "id", "rows", "bytes", "recent"}), or None."""
+    try:
+        with open(checkpoint_path(path)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_checkpoint(path, checkpoint):
+    """Atomically replace the checkpoint."""
+    target = checkpoint_path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            json.dump(checkpoint, tmp)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        os.replace(tmp_path, target)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def write_page(f, rows):
+    """Append `rows` to the open export file as one gzip member."""
+    with gzip.GzipFile(fileobj=f, mode="wb", compresslevel=COMPRESS_LEVEL, mtime=0) as member:
+        for row in rows:
+            member.write(json.dumps(row, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+            member.write(b"\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def export_saves(path, session, user_id=None, page_size=EXPORT_PAGE_SIZE, full=False):
+    """
+    Append every save changed since the last checkpoint to the export at
+    `path` (everything on the first run, or with `full`, which starts a new
+    export, as does a file shorter than its checkpoint). Returns the number
+    of rows appended.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    size = path.stat().st_size if path.exists() else 0
+    checkpoint = None if full else load_checkpoint(path)
+    if checkpoint is None or checkpoint["bytes"] > size:
+        # A new export, or the file lost pages its checkpoint vouches for:
+        # record the empty export first so the checkpoint never outlives it
+        checkpoint = {"updated_at": None, "id": None, "rows": 0, "bytes": 0, "recent": []}
+        save_checkpoint(path, checkpoint)
+
+    filters = {"user_id": f"eq.{user_id}"} if user_id else {}
+    if checkpoint["updated_at"]:
+        since = parse_timestamp(checkpoint["updated_at"]) - EXPORT_OVERLAP
+        filters["updated_at"] = f"gte.{since.isoformat()}"
+    written = {tuple(key) for key in checkpoint.get("recent", [])}
+    rows = iter_rows("/rest/v1/saves", None, filters, ",".join(EXPORT_COLUMNS), page_size, descending=False,
+                     session=session, key_column="updated_at")
+
+    count = 0
+    with open(path, "r+b" if path.exists() else "w+b") as f:
+        # Drop whatever an interrupted run wrote after its last checkpoint
+        f.truncate(checkpoint["bytes"])
+        f.seek(checkpoint["bytes"])
+        page = []
+        for row in rows:
+            if (row["updated_at"], row["id"]) in written:
+                continue  # already exported by an earlier run (overlap window)
+            page.append(row)
+            if len(page) < page_size:
+                continue
+            count += _commit_page(path, f, page, checkpoint)
+            page = []
+        if page:
+            count += _commit_page(path, f, page, checkpoint)
+    return count
+
+
+def _commit_page(path, f, page, checkpoint):
+    write_page(f, page)
+    keys = [(row["updated_at"], row["id"]) for row in page]
+    if checkpoint["updated_at"]:
+        keys.append((checkpoint["updated_at"], checkpoint["id"]))
+    # A late commit can carry an older updated_at, so the cursor never moves back
+    updated_at, last_id = max(keys, key=lambda key: (parse_timestamp(key[0]), key[1]))
+    cutoff = parse_timestamp(updated_at) - EXPORT_OVERLAP
+    recent = {tuple(key) for key in checkpoint.get("recent", [])} | set(keys)
+    checkpoint.update(updated_at=updated_at, id=last_id, rows=checkpoint["rows"] + len(page), bytes=f.tell(),
+                      recent=sorted(key for key in recent if parse_timestamp(key[0]) >= cutoff))
+    save_checkpoint(path, checkpoint)
+    return len(page)
+
+
+class _Prefix:
+    """Read-only view of the first `limit` bytes of a binary file."""
+
+    def __init__(self, f, limit):
+        self.f = f
+        self.remaining = limit
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def read_export(path):
+    """
+    Yield the rows of an export in the order they were written, holding one
+    line in memory at a time. Stops at the checkpointed size when there is
+    a checkpoint (plain .ndjson.gz files without one are read to the end).
+    """
+    checkpoint = load_checkpoint(path)
+    with open(path, "rb") as f:
+        source = _Prefix(f, checkpoint["bytes"]) if checkpoint else f
+        with gzip.GzipFile(fileobj=source, mode="rb") as stream:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export saves to gzip-compressed NDJSON, incrementally.")
+    parser.add_argument("--output", default=str(DEFAULT_EXPORT), help="export file (default: %(default)s)")
+    parser.add_argument("--full", action="store_true", help="start a new export instead of appending changes")
+    parser.add_argument("--page-size", type=int, default=EXPORT_PAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    if not all([SUPABASE_URL, SUPABASE_KEY]):
+        print("Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
+        return False
+    client = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
+    try:
+        count = export_saves(args.output, client, USER_ID, args.page_size, args.full)
+    except (FetchError, SupabaseError) as e:
+        print(f"Error exporting saves: {e}")
+        return False
+    checkpoint = load_checkpoint(args.output)
+    print(f"Appended {count} saves to {args.output} "
+          f"({checkpoint['rows']} rows, {checkpoint['bytes'] / 1024:.0f} KB in total)")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
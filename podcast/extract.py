@@ -1,7 +1,13 @@
 import os
-import requests
+import sqlite3
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from itertools import islice
+import textnorm
+from pagination import iter_rows, FetchError, DEFAULT_PAGE_SIZE
+from supabase_http import SupabaseClient, SupabaseError
+from mirror import Mirror
+from jsonlog import log
 
 # Load environment variables
 load_dotenv()
@@ -10,57 +16,56 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY") # Use service role key for backend extraction
 USER_ID = os.getenv("USER_ID")
 
-def get_headers():
-    return {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json"
-    }
+ARTICLE_COLUMNS = "id,title,content,excerpt,site_name,created_at"
+
+# "api" reads articles from Supabase; "mirror" reads the local full-text
+# mirror instead (see mirror.py; refresh it with `search_db.py sync`)
+ARTICLE_SOURCE = os.getenv("STASH_ARTICLE_SOURCE", "api")
+
+# Shared pooled client (keep-alive, timeouts, retries)
+client = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
 
 def clean_text(text):
-    """Basic cleaning of article content."""
-    import re
-    if not text:
-        return ""
-    # Remove excessive newlines
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    # Remove common artifacts if any (can be expanded)
-    return text.strip()
+    """Basic cleaning of article content (see textnorm.py)."""
+    return textnorm.clean_text(text)
 
-def fetch_recent_articles(days=7, limit=5):
-    """Fetch unarchived articles from the last X days."""
+def format_article(article):
+    """Shape a raw `saves` row for the script generator."""
+    content = article.get("content") or article.get("excerpt") or ""
+    return {
+        "id": article["id"],
+        "title": article["title"],
+        "site_name": article.get("site_name") or "Unknown",
+        "content": clean_text(content[:5000]), # Limit to 5k chars per article for context window
+        "created_at": article["created_at"]
+    }
+
+def iter_recent_articles(days=7, page_size=DEFAULT_PAGE_SIZE, columns=ARTICLE_COLUMNS):
+    """Lazily yield unarchived articles from the last X days, newest first."""
     lookback_date = (datetime.now() - timedelta(days=days)).isoformat()
     
-    url = f"{SUPABASE_URL}/rest/v1/saves"
-    params = {
-        "select": "id,title,content,excerpt,site_name,created_at",
+    filters = {
         "user_id": f"eq.{USER_ID}",
         "is_archived": "eq.false",
         "created_at": f"gt.{lookback_date}",
-        "order": "created_at.desc",
-        "limit": limit
     }
-    
-    response = requests.get(url, headers=get_headers(), params=params)
-    
-    if response.status_code != 200:
-        print(f"Error fetching articles: {response.status_code} - {response.text}")
+    for article in iter_rows("/rest/v1/saves", None, filters, columns, page_size, session=client):
+        yield format_article(article)
+
+def fetch_recent_articles(days=7, limit=5, source=None):
+    """Fetch unarchived articles from the last X days."""
+    if (source or ARTICLE_SOURCE) == "mirror":
+        try:
+            with Mirror() as mirror:
+                return [format_article(row) for row in mirror.recent(days, limit, USER_ID)]
+        except sqlite3.Error as e:
+            log(f"Error reading articles from the mirror: {e}", "error")
+            return []
+    try:
+        return list(islice(iter_recent_articles(days, page_size=limit), limit))
+    except (FetchError, SupabaseError) as e:
+        log(f"Error fetching articles: {e}", "error")
         return []
-    
-    articles = response.json()
-    formatted_articles = []
-    
-    for article in articles:
-        content = article.get("content") or article.get("excerpt") or ""
-        formatted_articles.append({
-            "id": article["id"],
-            "title": article["title"],
-            "site_name": article.get("site_name") or "Unknown",
-            "content": clean_text(content[:5000]), # Limit to 5k chars per article for context window
-            "created_at": article["created_at"]
-        })
-        
-    return formatted_articles
 
 if __name__ == "__main__":
     if not all([SUPABASE_URL, SUPABASE_KEY, USER_ID]):
@@ -0,0 +1,207 @@
+"""
+Buffered JSON-lines logging with a background writer.
+
+`log(msg)` prints the message to stdout as before and, when a log file is
+configured, queues a record for a writer thread:
+
+    {"ts": "2026-10-17T08:00:00.123+00:00", "level": "info", "msg": "...",
+     "save_id": "...", "stage": "upload"}
+
+Callers never touch the disk. The writer drains the queue in batches,
+writes each batch with one call, flushes every FLUSH_INTERVAL and fsyncs
+every FSYNC_INTERVAL and on close (atexit), and rotates the file once it
+passes MAX_BYTES (`tts.log` -> `tts.log.1` ... `.BACKUP_COUNT`). The queue is
+bounded: if the disk can't keep up, records are dropped rather than
+blocking the caller, and the writer logs how many were lost.
+
+Fields like `save_id` and `stage` come from `context()`, which sets them for
+the current task or thread (contextvars), so nested calls such as the
+assembly or clip cache code pick them up without passing them around.
+
+The default logger only echoes to stdout; an entry point that wants a file
+calls `configure(path)` (tts.py does, PODCAST_LOG_FILE does for the podcast
+pipeline).
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+QUEUE_SIZE = 10_000  # records buffered before new ones are dropped
+BATCH_SIZE = 500  # records written per write() call at most
+FLUSH_INTERVAL = 0.5  # seconds between flushes while records keep arriving
+FSYNC_INTERVAL = 5.0  # seconds between fsyncs
+MAX_BYTES = 10 * 1024 * 1024  # rotate once the file passes this size
+BACKUP_COUNT = 3  # rotated files kept
+
+_context = contextvars.ContextVar("jsonlog_context", default={})
+_STOP = object()
+
+
+@contextmanager
+def context(**fields):
+    """Add `fields` (e.g. save_id, stage) to every record logged inside the block."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class JsonLog:
+    """One log destination: stdout echo plus an optional JSON-lines file."""
+
+    def __init__(self, path=None, echo=True, timestamps=False, max_bytes=None, backups=None,
+                 queue_size=None, flush_interval=None, fsync_interval=None):
+        self.path = Path(path) if path else None
+        self.echo = echo
+        self.timestamps = timestamps
+        self.max_bytes = max_bytes or MAX_BYTES
+        self.backups = BACKUP_COUNT if backups is None else backups
+        self.flush_interval = flush_interval or FLUSH_INTERVAL
+        self.fsync_interval = FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        self.queue = queue.Queue(maxsize=queue_size or QUEUE_SIZE)
+        self.dropped = 0
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def log(self, msg, level="info", **fields):
+        now = time.time()
+        if self.echo:
+            prefix = time.strftime("[%Y-%m-%d %H:%M:%S] ", time.localtime(now)) if self.timestamps else ""
+            print(prefix + str(msg), flush=True)
+        if self.path is None:
+            return
+        record = {"ts": datetime.fromtimestamp(now, timezone.utc).isoformat(timespec="milliseconds"),
+                  "level": level, "msg": str(msg), **_context.get(), **fields}
+        self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is written and fsynced."""
+        if self.thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self):
+        """Write and fsync what is queued, then stop the writer."""
+        if self.thread is None:
+            return
+        try:
+            self.queue.put(_STOP, timeout=5.0)
+        except queue.Full:
+            pass  # the writer is gone; nothing left to wait for
+        self.thread.join(5.0)
+        self.thread = None
+
+    # -- writer thread ----------------------------------------------------
+
+    def _start(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.thread = threading.Thread(target=self._run, name="jsonlog-writer", daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        f = open(self.path, "a", encoding="utf-8")
+        last_sync = time.monotonic()
+        dirty = False
+        try:
+            while True:
+                try:
+                    first = self.queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    first = None
+                batch = [] if first is None else [first]
+                while first is not None and len(batch) < BATCH_SIZE:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                records = [item for item in batch if isinstance(item, dict)]
+                with self.lock:
+                    dropped, self.dropped = self.dropped, 0
+                if dropped:
+                    records.append(self._dropped_record(dropped))
+                if records:
+                    f.write("".join(json.dumps(r, default=str, ensure_ascii=False) + "\n" for r in records))
+                    dirty = True
+
+                waiters = [item for item in batch if isinstance(item, threading.Event)]
+                stop = any(item is _STOP for item in batch)
+                if dirty and (stop or waiters or not records or time.monotonic() - last_sync >= self.fsync_interval):
+                    f.flush()
+                    os.fsync(f.fileno())
+                    last_sync, dirty = time.monotonic(), False
+                elif records:
+                    f.flush()
+                for waiter in waiters:
+                    waiter.set()
+                if stop:
+                    return
+                if f.tell() >= self.max_bytes:
+                    f = self._rotate(f)
+        except OSError as e:
+            print(f"Log writer for {self.path} stopped: {e}", file=sys.stderr)
+        finally:
+            f.close()
+
+    def _dropped_record(self, count):
+        return {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), "level": "warning",
+                "msg": f"Dropped {count} log records (writer queue full)"}
+
+    def _rotate(self, f):
+        f.flush()
+        os.fsync(f.fileno())
+        f.close()
+        for i in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{i}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.backups:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        return open(self.path, "a", encoding="utf-8")
+
+
+_default = JsonLog(os.getenv("PODCAST_LOG_FILE"))
+
+
+def configure(path=None, **options):
+    """Replace the default logger (closing the old one); returns the new one."""
+    global _default
+    old, _default = _default, JsonLog(path, **options)
+    old.close()
+    return _default
+
+
+def log(msg, level="info", **fields):
+    """Log through the default logger."""
+    _default.log(msg, level, **fields)
+
+
+def flush(timeout=5.0):
+    return _default.flush(timeout)
@@ -0,0 +1,97 @@
+"""
+Incremental parsing of a streamed JSON array.
+
+The script model returns one JSON array of `{speaker, text}` objects. When
+the response is streamed, JsonArrayParser is fed the text as it arrives and
+hands back each element as soon as its closing brace is seen, so the caller
+can act on early lines while later ones are still being generated.
+
+Anything before the opening `[` or after the closing `]` (such as a
+```json code fence) is ignored, matching script.parse_script.
+"""
+
+import json
+
+_WHITESPACE = " \t\r\n"
+
+
+class JsonArrayParser:
+    """Feed text chunks in; get completed array elements out."""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"  # start -> element -> separator -> ... -> done
+        self.count = 0
+
+    @property
+    def done(self):
+        return self._state == "done"
+
+    def feed(self, text):
+        """Add `text` and return the list of elements completed by it."""
+        self._buffer += text
+        items = []
+        while self._step(items):
+            pass
+        # Drop consumed text so the buffer only ever holds one partial element
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        return items
+
+    def close(self):
+        """Check the stream ended with a complete array."""
+        if not self.done:
+            raise ValueError(f"JSON array truncated after {self.count} elements")
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+            self._pos += 1
+        return self._pos < len(self._buffer)
+
+    def _step(self, items):
+        """Advance by one token if possible. Returns False when more input is needed."""
+        if self._state == "done":
+            return False
+
+        if self._state == "start":
+            start = self._buffer.find("[", self._pos)
+            if start == -1:
+                self._pos = len(self._buffer)
+                return False
+            self._pos = start + 1
+            self._state = "first"
+            return True
+
+        if not self._skip_whitespace():
+            return False
+        char = self._buffer[self._pos]
+
+        if self._state in ("first", "separator") and char == "]":
+            self._pos += 1
+            self._state = "done"
+            return True
+
+        if self._state == "separator":
+            if char != ",":
+                raise ValueError(f"Expected ',' or ']' after element {self.count}, got {char!r}")
+            self._pos += 1
+            self._state = "element"
+            return True
+
+        # "first" or "element": an element starts here
+        if char != "{":
+            raise ValueError(f"Expected an object at element {self.count}, got {char!r}")
+        if "}" not in self._buffer[self._pos:]:
+            return False  # can't be complete yet; don't pay for a failed decode
+        try:
+            item, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return False  # incomplete: wait for more text
+        items.append(item)
+        self.count += 1
+        self._pos = end
+        self._state = "separator"
+        return True
@@ -0,0 +1,175 @@
+"""
+Persisted run manifests, so a failed podcast run can be resumed.
+
+Every run gets a directory under RUNS_DIR holding manifest.json. After each
+pipeline stage succeeds, the manifest records its outputs (the articles, the
+script, clip paths, the assembled file, the episode id...) together with:
+
+  - a digest of every input the stage consumed, and
+  - a sha256 checksum of every file the stage produced.
+
+`script.py --resume <run-id>` reloads the manifest, and a stage is skipped
+when its recorded inputs still match the current ones and its files are
+still on disk unchanged (a stage that kept clips in memory always re-runs;
+the clip cache makes that cheap). Anything downstream of a stage that does re-run
+sees different input digests and re-runs too.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+from workspace import is_buffer
+
+RUNS_DIR = Path(os.getenv("PODCAST_RUNS_DIR", "podcast/runs"))
+MANIFEST_NAME = "manifest.json"
+
+
+def _json_default(value):
+    """JSON stand-in for values json can't encode; in-memory clips become their digest."""
+    if is_buffer(value):
+        return {"sha256": hashlib.sha256(value).hexdigest(), "size_bytes": len(value)}
+    return str(value)
+
+
+def value_digest(value):
+    """Stable digest of a JSON-serializable value."""
+    data = json.dumps(value, sort_keys=True, separators=(",", ":"), default=_json_default)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _entries(value):
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _paths(value):
+    """File paths held by an output value (a path or a clip manifest, see workspace.py)."""
+    return [str(v) for v in _entries(value) if not is_buffer(v)]
+
+
+def new_run_id():
+    return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+def _run_order(run_id):
+    """Sort key for run ids: start time, then the -N suffix of runs started in the same second."""
+    day, _, rest = run_id.partition("-")
+    clock, _, suffix = rest.partition("-")
+    return day, clock, int(suffix) if suffix.isdigit() else 1
+
+
+class RunManifest:
+    """The on-disk record of one pipeline run."""
+
+    def __init__(self, run_id, runs_dir=None, data=None):
+        self.run_id = run_id
+        self.run_dir = Path(runs_dir or RUNS_DIR) / run_id
+        self.path = self.run_dir / MANIFEST_NAME
+        self.data = data or {"run_id": run_id, "created_at": datetime.now().isoformat(), "stages": {}}
+
+    @classmethod
+    def create(cls, runs_dir=None, options=None):
+        """
+        Start a new run. Its directory is claimed atomically, so a run started
+        in the same second as another gets a -2, -3... suffix instead of
+        overwriting that run's manifest and workspace.
+        """
+        runs_dir = Path(runs_dir or RUNS_DIR)
+        runs_dir.mkdir(parents=True, exist_ok=True)
+        base = run_id = new_run_id()
+        attempt = 1
+        while True:
+            try:
+                (runs_dir / run_id).mkdir()
+                break
+            except FileExistsError:
+                attempt += 1
+                run_id = f"{base}-{attempt}"
+        manifest = cls(run_id, runs_dir)
+        manifest.data["options"] = options or {}
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, run_id, runs_dir=None):
+        """Load a run's manifest; `run_id` may be "latest". Returns None if missing."""
+        runs_dir = Path(runs_dir or RUNS_DIR)
+        if run_id == "latest":
+            runs = sorted((p.parent.name for p in runs_dir.glob(f"*/{MANIFEST_NAME}")), key=_run_order)
+            if not runs:
+                return None
+            run_id = runs[-1]
+        try:
+            with open(runs_dir / run_id / MANIFEST_NAME) as f:
+                return cls(run_id, runs_dir, json.load(f))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    @property
+    def options(self):
+        return self.data.get("options", {})
+
+    def save(self):
+        """Atomically rewrite manifest.json."""
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.run_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp:
+                json.dump(self.data, tmp, indent=2, default=_json_default)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def record(self, stage, inputs, outputs, files=()):
+        """Record a successful stage. `files` names the outputs that are file paths."""
+        self.data["stages"][stage] = {
+            "inputs": {name: value_digest(value) for name, value in inputs.items()},
+            "outputs": outputs,
+            "files": {
+                path: file_checksum(path)
+                for name in files
+                for path in _paths(outputs.get(name))
+            },
+            # Clips kept in memory die with the process, so such a stage always re-runs
+            "in_memory": any(is_buffer(v) for name in files for v in _entries(outputs.get(name))),
+            "completed_at": datetime.now().isoformat(),
+        }
+        self.save()
+
+    def restore(self, stage, inputs):
+        """
+        Return the recorded outputs of `stage` if they are still valid for
+        these `inputs`, else None.
+        """
+        entry = self.data["stages"].get(stage)
+        if not entry or entry.get("in_memory"):
+            return None
+        if entry["inputs"] != {name: value_digest(value) for name, value in inputs.items()}:
+            return None
+        for path, checksum in entry["files"].items():
+            try:
+                if file_checksum(path) != checksum:
+                    return None
+            except FileNotFoundError:
+                return None
+        return entry["outputs"]
+
+    def forget(self, stage):
+        if self.data["stages"].pop(stage, None) is not None:
+            self.save()
@@ -0,0 +1,285 @@
+"""
+Counters, gauges and histograms for the TTS daemon and the podcast pipeline,
+in Prometheus text format.
+
+Every stage (fetch, clean, synthesize, upload, renditions, update for
+tts.py; the pipeline stages for script.py) is timed into
+`stash_stage_seconds` and its failures counted in
+`stash_stage_failures_total`, both labelled with `component` and `stage`.
+The work a stage got through is counted in `stash_stage_bytes_total`,
+`stash_stage_words_total` and `stash_stage_audio_seconds_total`, so rates
+like synthesis seconds per minute of audio or upload throughput are one
+PromQL division away:
+
+    rate(stash_stage_seconds_sum{stage="synthesize"}[5m])
+      / rate(stash_stage_audio_seconds_total{stage="synthesize"}[5m]) * 60
+
+There is no dependency on prometheus_client. `MetricsServer` serves
+`GET /metrics` from a long-running process (the TTS daemon); a one-shot run
+like the podcast pipeline writes the same text with `Registry.write`,
+e.g. for node_exporter's textfile collector.
+"""
+
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Stage durations run from milliseconds (a REST call) to minutes (synthesis)
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """One metric family: a value per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def get(self, **labels):
+        return self.values.get(self._key(labels), 0)
+
+    def samples(self):
+        """(suffix, label values, extra labels, value) for each exposed sample."""
+        with self.lock:
+            return [("", key, (), value) for key, value in sorted(self.values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only go up")
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self.values[key] = (counts, total + value)
+
+    def get(self, **labels):
+        """(observation count, sum) for the given labels."""
+        counts, total = self.values.get(self._key(labels), ([0] * len(self.buckets), 0.0))
+        return counts[-1], total
+
+    def samples(self):
+        with self.lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self.values.items())
+        samples = []
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets, counts):
+                samples.append(("_bucket", key, (("le", _format_value(bound)),), count))
+            samples.append(("_sum", key, (), total))
+            samples.append(("_count", key, (), counts[-1]))
+        return samples
+
+
+class Registry:
+    """A named set of metrics, rendered together."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _add(self, metric):
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name!r} is already registered differently")
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        """The whole registry in Prometheus text exposition format."""
+        return "".join(metric.render() + "\n" for metric in self.metrics.values())
+
+    def write(self, path):
+        """Atomically write render() to `path` (a .prom file for a textfile collector)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.render())
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+
+REGISTRY = Registry()
+
+STAGE_LABELS = ("component", "stage")
+STAGE_SECONDS = REGISTRY.histogram("stash_stage_seconds", "Time spent in each stage", STAGE_LABELS)
+STAGE_FAILURES = REGISTRY.counter("stash_stage_failures_total", "Stage runs that failed", STAGE_LABELS)
+STAGE_BYTES = REGISTRY.counter("stash_stage_bytes_total", "Bytes produced or transferred by each stage",
+                               STAGE_LABELS)
+STAGE_WORDS = REGISTRY.counter("stash_stage_words_total", "Words processed by each stage", STAGE_LABELS)
+STAGE_AUDIO_SECONDS = REGISTRY.counter("stash_stage_audio_seconds_total", "Seconds of audio produced by each stage",
+                                       STAGE_LABELS)
+
+
+@contextmanager
+def track(component, stage):
+    """Time the block into STAGE_SECONDS; an exception also counts as a failure."""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_FAILURES.inc(component=component, stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, component=component, stage=stage)
+
+
+def observe_stage(component, stage, seconds, failed=False):
+    """Record a stage timed elsewhere (e.g. by the pipeline)."""
+    STAGE_SECONDS.observe(seconds, component=component, stage=stage)
+    if failed:
+        STAGE_FAILURES.inc(component=component, stage=stage)
+
+
+def fail(component, stage):
+    """Count a failure that was handled inside the stage instead of raised."""
+    STAGE_FAILURES.inc(component=component, stage=stage)
+
+
+def count(component, stage, bytes=0, words=0, audio_seconds=0):
+    """Add to the work counters of a stage."""
+    if bytes:
+        STAGE_BYTES.inc(bytes, component=component, stage=stage)
+    if words:
+        STAGE_WORDS.inc(words, component=component, stage=stage)
+    if audio_seconds:
+        STAGE_AUDIO_SECONDS.inc(audio_seconds, component=component, stage=stage)
+
+
+class MetricsServer:
+    """
+    Minimal HTTP endpoint: GET /metrics returns the registry in Prometheus
+    text format. Meant to be bound to localhost and scraped by a local
+    Prometheus or agent.
+    """
+
+    def __init__(self, host="127.0.0.1", port=9464, registry=None, path="/metrics"):
+        self.host = host
+        self.port = port
+        self.registry = registry or REGISTRY
+        self.path = path
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Report the real port when bound to port 0
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            status, body = await self._respond(reader)
+        except (asyncio.IncompleteReadError, ValueError, asyncio.TimeoutError):
+            status, body = 400, b""
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}[status]
+        content_type = f"Content-Type: {CONTENT_TYPE}\r\n" if status == 200 else ""
+        writer.write(f"HTTP/1.1 {status} {reason}\r\n{content_type}Content-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, reader):
+        request_line = await asyncio.wait_for(reader.readline(), 10)
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        while True:
+            line = await asyncio.wait_for(reader.readline(), 10)
+            if line in (b"\r\n", b"\n", b""):
+                break
+
+        if path.split("?", 1)[0] != self.path:
+            return 404, b""
+        if method != "GET":
+            return 405, b""
+        return 200, self.registry.render().encode("utf-8")
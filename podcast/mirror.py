@@ -0,0 +1,266 @@
+"""
+Local SQLite mirror of the `saves` table with an FTS5 full-text index.
+
+Searching used to mean downloading every row and scanning it in Python. The
+mirror keeps a copy of the saves in a local SQLite file instead and brings
+it up to date incrementally: `sync` asks PostgREST only for rows whose
+`updated_at` is at or after the stored cursor (keyset-paginated, see
+pagination.py), upserts them and advances the cursor in the same
+transaction as each batch, so an interrupted sync just continues where it
+stopped. The `update_updated_at` trigger bumps `updated_at` on every
+change, so edits are picked up too; deletions are only seen by `prune`.
+
+`saves_fts` indexes title, excerpt, content and highlight and is ranked
+with bm25 weights mirroring the `fts` column in supabase/schema.sql (title
+A, excerpt and highlight B, content C, at ts_rank's default weights). The
+index is an external-content FTS5 table kept in step with `saves` by
+triggers, so the text is stored only once.
+
+The podcast pipeline (extract.py) and the TTS worker can read from the
+mirror instead of the API; `search_db.py` is the command-line front end.
+"""
+
+import os
+import re
+import sqlite3
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+
+from pagination import iter_rows
+
+DEFAULT_DB_PATH = Path(os.getenv("STASH_MIRROR_DB", Path.home() / ".cache" / "stash" / "mirror.db"))
+
+MIRROR_COLUMNS = ("id", "user_id", "url", "title", "excerpt", "content", "highlight", "site_name", "author",
+                  "is_archived", "is_favorite", "audio_url", "created_at", "updated_at")
+SYNC_PAGE_SIZE = 500
+# Re-read rows this far behind the cursor: updated_at is the writing
+# transaction's start time, so a slow transaction can commit a row that is
+# older than rows already synced. Upserts make re-reading harmless.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+# bm25 weights per indexed column, in FTS column order: A=1.0, B=0.4, C=0.2
+FTS_WEIGHTS = {"title": 1.0, "excerpt": 0.4, "content": 0.2, "highlight": 0.4}
+
+SCHEMA = """
+create table if not exists saves (
+  id text primary key,
+  user_id text,
+  url text,
+  title text,
+  excerpt text,
+  content text,
+  highlight text,
+  site_name text,
+  author text,
+  is_archived integer not null default 0,
+  is_favorite integer not null default 0,
+  audio_url text,
+  created_at text,
+  updated_at text,
+  content_length integer generated always as (
+    length(coalesce(nullif(content, ''), highlight, ''))
+  ) stored
+);
+create index if not exists saves_created_at_idx on saves (user_id, created_at);
+
+create virtual table if not exists saves_fts using fts5(
+  title, excerpt, content, highlight,
+  content='saves', content_rowid='rowid', tokenize='porter unicode61'
+);
+
+create trigger if not exists saves_fts_insert after insert on saves begin
+  insert into saves_fts (rowid, title, excerpt, content, highlight)
+  values (new.rowid, new.title, new.excerpt, new.content, new.highlight);
+end;
+create trigger if not exists saves_fts_delete after delete on saves begin
+  insert into saves_fts (saves_fts, rowid, title, excerpt, content, highlight)
+  values ('delete', old.rowid, old.title, old.excerpt, old.content, old.highlight);
+end;
+create trigger if not exists saves_fts_update after update on saves begin
+  insert into saves_fts (saves_fts, rowid, title, excerpt, content, highlight)
+  values ('delete', old.rowid, old.title, old.excerpt, old.content, old.highlight);
+  insert into saves_fts (rowid, title, excerpt, content, highlight)
+  values (new.rowid, new.title, new.excerpt, new.content, new.highlight);
+end;
+
+create table if not exists sync_state (
+  key text primary key,
+  value text
+);
+"""
+
+_UPSERT = (
+    f"insert into saves ({', '.join(MIRROR_COLUMNS)}) values ({', '.join('?' for _ in MIRROR_COLUMNS)}) "
+    f"on conflict (id) do update set "
+    + ", ".join(f"{c} = excluded.{c}" for c in MIRROR_COLUMNS if c != "id")
+)
+
+
+def parse_timestamp(value):
+    """Parse a PostgREST timestamptz (any number of fractional digits, "Z" or offset)."""
+    match = re.match(r"(.*T\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:?\d\d)?$", value)
+    if not match:
+        raise ValueError(f"Unrecognized timestamp: {value!r}")
+    base, fraction, offset = match.groups()
+    fraction = (fraction or "0")[:6].ljust(6, "0")
+    offset = "+00:00" if offset in (None, "Z") else offset
+    return datetime.fromisoformat(f"{base}.{fraction}{offset}")
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query matching every word, like
+    plainto_tsquery: each word is quoted (so FTS5 operators and punctuation
+    are taken literally) and a trailing * keeps a prefix search.
+    """
+    terms = re.findall(r"\w+\*?", text)
+    return " ".join(f'"{t.rstrip("*")}"' + ("*" if t.endswith("*") else "") for t in terms)
+
+
+class Mirror:
+    """One mirror database file. Usable as a context manager."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or DEFAULT_DB_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("pragma journal_mode = wal")
+        self.db.execute("pragma synchronous = normal")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- sync -------------------------------------------------------------
+
+    def cursor(self):
+        """The (updated_at, id) of the newest row synced, or None before the first sync."""
+        rows = dict(self.db.execute("select key, value from sync_state where key in ('updated_at', 'id')").fetchall())
+        if "updated_at" not in rows:
+            return None
+        return rows["updated_at"], rows["id"]
+
+    def reset(self):
+        """Forget the sync cursor, so the next sync re-reads every row."""
+        with self.db:
+            self.db.execute("delete from sync_state")
+
+    def upsert(self, rows):
+        """Insert or replace `rows` (PostgREST save dicts) without committing."""
+        self.db.executemany(_UPSERT, [
+            tuple(int(bool(row.get(c))) if c in ("is_archived", "is_favorite") else row.get(c)
+                  for c in MIRROR_COLUMNS)
+            for row in rows
+        ])
+
+    def _commit_batch(self, rows):
+        with self.db:
+            self.upsert(rows)
+            last = rows[-1]
+            self.db.executemany("insert or replace into sync_state (key, value) values (?, ?)",
+                                [("updated_at", last["updated_at"]), ("id", last["id"])])
+
+    def sync(self, session, user_id=None, page_size=SYNC_PAGE_SIZE):
+        """
+        Pull every save changed since the last sync through `session` (a
+        SupabaseClient). Returns the number of rows written.
+        """
+        filters = {"user_id": f"eq.{user_id}"} if user_id else {}
+        cursor = self.cursor()
+        if cursor:
+            since = parse_timestamp(cursor[0]) - SYNC_OVERLAP
+            filters["updated_at"] = f"gte.{since.isoformat()}"
+
+        rows = iter_rows("/rest/v1/saves", None, filters, ",".join(MIRROR_COLUMNS), page_size,
+                         descending=False, session=session, key_column="updated_at")
+        count = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == page_size:
+                self._commit_batch(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            self._commit_batch(batch)
+            count += len(batch)
+        return count
+
+    def prune(self, session, user_id=None, page_size=SYNC_PAGE_SIZE):
+        """
+        Delete local rows that no longer exist upstream (a sync never sees
+        deletions). Only ids are fetched. Returns the number of rows removed.
+        """
+        filters = {"user_id": f"eq.{user_id}"} if user_id else {}
+        live = {row["id"] for row in iter_rows("/rest/v1/saves", None, filters, "id", page_size,
+                                               descending=False, session=session)}
+        query = "select id from saves" + (" where user_id = ?" if user_id else "")
+        local = {row["id"] for row in self.db.execute(query, (user_id,) if user_id else ())}
+        gone = sorted(local - live)
+        with self.db:
+            self.db.executemany("delete from saves where id = ?", [(i,) for i in gone])
+        return len(gone)
+
+    # -- reads ------------------------------------------------------------
+
+    def search(self, query, limit=20, user_id=None, include_archived=False):
+        """
+        Ranked full-text search. Returns dicts with id, title, site_name,
+        url, created_at, a highlighted `snippet` and the bm25 `rank` (lower
+        is better), best match first.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS.values())
+        sql = f"""
+            select s.id, s.title, s.site_name, s.url, s.created_at,
+                   snippet(saves_fts, -1, '[', ']', '...', 12) as snippet,
+                   bm25(saves_fts, {weights}) as rank
+            from saves_fts join saves s on s.rowid = saves_fts.rowid
+            where saves_fts match ?
+        """
+        params = [match]
+        if user_id:
+            sql += " and s.user_id = ?"
+            params.append(user_id)
+        if not include_archived:
+            sql += " and not s.is_archived"
+        sql += " order by rank limit ?"
+        params.append(limit)
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def recent(self, days=7, limit=5, user_id=None):
+        """Unarchived saves from the last `days` days, newest first (like extract.iter_recent_articles)."""
+        lookback = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        sql = "select * from saves where not is_archived and created_at > ?"
+        params = [lookback]
+        if user_id:
+            sql += " and user_id = ?"
+            params.append(user_id)
+        sql += " order by created_at desc, id desc limit ?"
+        params.append(limit)
+        return [dict(row) for row in self.db.execute(sql, params)]
+
+    def pending_audio(self, min_chars, user_id=None, exclude_ids=(), limit=None):
+        """Unarchived saves without audio and with at least `min_chars` of text, oldest first."""
+        sql = "select * from saves where audio_url is null and not is_archived and content_length >= ?"
+        params = [min_chars]
+        if user_id:
+            sql += " and user_id = ?"
+            params.append(user_id)
+        if exclude_ids:
+            sql += f" and id not in ({', '.join('?' for _ in exclude_ids)})"
+            params.extend(sorted(exclude_ids))
+        sql += " order by created_at, id"
+        if limit:
+            sql += " limit ?"
+            params.append(limit)
+        return [dict(row) for row in self.db.execute(sql, params)]
@@ -0,0 +1,317 @@
+"""
+Single-pass episode mixdown: loudness normalization, pauses, intro/outro
+music and chapters in one ffmpeg run.
+
+Doing these as separate steps would decode and re-encode the episode once
+per step. Here every clip is an input of one `filter_complex` graph:
+
+  clip -> loudnorm (two-pass values) -> resample -> pad with a pause -+
+  clip -> ...                                                         +-> concat -> delay -+
+  ...                                                                                      +-> amix -> MP3
+  intro music (fades out under the first lines) ---------------------------------------------+
+  outro music (fades in under the last line) ------------------------------------------------+
+
+so the audio is decoded and encoded exactly once. Chapters are passed to
+the same run as an ffmetadata input and written as ID3 CHAP frames.
+
+The first loudnorm pass (measuring each clip) is what makes the second one
+accurate, and it costs a decode per clip. Measurements are cached by clip
+content, so lines that repeat across episodes (and the clip cache makes
+identical lines byte-identical) are only ever measured once.
+"""
+
+import os
+import json
+import math
+import hashlib
+import tempfile
+import subprocess
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import mp3
+from jsonlog import log
+
+# EBU R128 targets; -16 LUFS is the usual podcast level
+LOUDNESS_TARGET = {"I": -16.0, "TP": -1.5, "LRA": 11.0}
+LOUDNESS_CONCURRENCY = 4  # clips measured in parallel
+LOUDNESS_KEYS = ("input_i", "input_tp", "input_lra", "input_thresh", "target_offset")
+
+LINE_PAUSE = 0.35  # seconds of silence between lines
+INTRO_LEAD = 4.0  # seconds of intro music before the first line
+MUSIC_FADE = 3.0  # seconds the intro fades out / the outro fades in under speech
+MUSIC_VOLUME = 0.35
+SAMPLE_RATE = 24000  # edge-tts output rate
+OUTPUT_BITRATE = "64k"
+
+INTRO_MUSIC = os.getenv("PODCAST_INTRO_MUSIC")
+OUTRO_MUSIC = os.getenv("PODCAST_OUTRO_MUSIC")
+
+DEFAULT_CACHE_DIR = Path(os.getenv("STASH_LOUDNESS_CACHE_DIR", Path.home() / ".cache" / "stash" / "loudness"))
+
+
+def loudness_key(path, target=None):
+    """Cache key: the clip's bytes plus the targets the measurement was made for."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            h.update(chunk)
+    h.update(json.dumps(target or LOUDNESS_TARGET, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+class LoudnessCache:
+    """Directory of loudnorm measurements stored as small JSON files, named by key."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def path_for(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """Return the cached measurement, or None on a miss."""
+        try:
+            with open(self.path_for(key)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key, measurement):
+        """Atomically store `measurement` under `key`."""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp:
+                json.dump(measurement, tmp)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+
+def loudnorm_args(target=None):
+    target = target or LOUDNESS_TARGET
+    return f"I={target['I']}:TP={target['TP']}:LRA={target['LRA']}"
+
+
+def parse_loudnorm(stderr):
+    """Pull the measurement JSON that `loudnorm=print_format=json` prints last."""
+    start, end = stderr.rfind("{"), stderr.rfind("}")
+    if start == -1 or end < start:
+        return None
+    try:
+        values = json.loads(stderr[start:end + 1])
+        return {key: float(values[key]) for key in LOUDNESS_KEYS}
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def measure_loudness(path, target=None):
+    """First loudnorm pass over one clip. Returns the measurement dict, or None."""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-nostats",
+        "-i", str(path),
+        "-af", f"loudnorm={loudnorm_args(target)}:print_format=json",
+        "-f", "null", "-",
+    ]
+    try:
+        result = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except (subprocess.CalledProcessError, OSError) as e:
+        log(f"Could not measure loudness of {path}: {e}", "warning")
+        return None
+    return parse_loudnorm(result.stderr.decode("utf-8", "replace"))
+
+
+def measure_clips(paths, cache=None, concurrency=LOUDNESS_CONCURRENCY, target=None):
+    """
+    Loudness measurements for every clip, in order (None where measuring
+    failed). Identical clips are measured once, cached ones not at all, and
+    the rest concurrently.
+    """
+    keys = [loudness_key(path, target) for path in paths]
+    unique = dict(zip(keys, paths))
+
+    def measure(key):
+        if cache:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        measurement = measure_loudness(unique[key], target)
+        if cache and measurement is not None:
+            try:
+                cache.put(key, measurement)
+            except OSError as e:
+                log(f"Could not cache loudness of {unique[key]}: {e}", "warning")
+        return measurement
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        measured = dict(zip(unique, pool.map(measure, unique)))
+    return [measured[key] for key in keys]
+
+
+def clip_filter(index, measurement, pause, target=None):
+    """Filter chain for one clip input, ending at label [cN]."""
+    if measurement and all(math.isfinite(measurement[key]) for key in LOUDNESS_KEYS):
+        loudnorm = (
+            f"loudnorm={loudnorm_args(target)}"
+            f":measured_I={measurement['input_i']}:measured_TP={measurement['input_tp']}"
+            f":measured_LRA={measurement['input_lra']}:measured_thresh={measurement['input_thresh']}"
+            f":offset={measurement['target_offset']}:linear=true"
+        )
+    elif measurement:
+        loudnorm = "anull"  # digital silence: nothing to normalize
+    else:
+        loudnorm = f"loudnorm={loudnorm_args(target)}"  # unmeasured: one-pass dynamic mode
+    chain = f"[{index}:a]{loudnorm},aresample={SAMPLE_RATE},aformat=channel_layouts=mono"
+    if pause:
+        chain += f",apad=pad_dur={pause}"
+    return chain + f"[c{index}]"
+
+
+def build_filter_graph(measurements, durations, intro=False, outro=False, pause=LINE_PAUSE, target=None):
+    """
+    The filter_complex for `len(measurements)` clip inputs, followed by the
+    intro and outro music inputs when present. `durations` are the clip
+    lengths in seconds, used to place the outro. The graph ends at [out].
+    """
+    count = len(measurements)
+    chains = [
+        clip_filter(i, m, pause if i < count - 1 else 0, target)
+        for i, m in enumerate(measurements)
+    ]
+    chains.append("".join(f"[c{i}]" for i in range(count)) + f"concat=n={count}:v=0:a=1[speech]")
+    if not (intro or outro):
+        chains.append("[speech]anull[out]")
+        return ";".join(chains)
+
+    music = f"aresample={SAMPLE_RATE},aformat=channel_layouts=mono,volume={MUSIC_VOLUME}"
+    lead = INTRO_LEAD if intro else 0.0
+    mix = ["[voice]"]
+    chains.append(f"[speech]adelay={round(lead * 1000)}:all=1[voice]")
+    music_input = count
+    if intro:
+        chains.append(
+            f"[{music_input}:a]{music},atrim=end={lead + MUSIC_FADE},"
+            f"afade=t=out:st={lead}:d={MUSIC_FADE}[intro]"
+        )
+        mix.append("[intro]")
+        music_input += 1
+    if outro:
+        speech_end = lead + sum(durations) + pause * (count - 1)
+        start = max(0.0, speech_end - MUSIC_FADE)
+        chains.append(
+            f"[{music_input}:a]{music},afade=t=in:d={MUSIC_FADE},adelay={round(start * 1000)}:all=1[outro]"
+        )
+        mix.append("[outro]")
+    chains.append("".join(mix) + f"amix=inputs={len(mix)}:duration=longest:normalize=0[out]")
+    return ";".join(chains)
+
+
+def chapter_times(chapters, durations, lead=0.0, pause=LINE_PAUSE):
+    """
+    (title, start_ms, end_ms) for each chapter. A chapter starts at its
+    `start_line`; the first one also covers the intro, and the last one
+    runs to the end of the speech.
+    """
+    starts, t = [], lead
+    for duration in durations:
+        starts.append(t)
+        t += duration + pause
+    end = t - pause if durations else lead
+
+    chapters = [c for c in chapters if 0 <= c["start_line"] < len(durations)]
+    times = []
+    for i, chapter in enumerate(chapters):
+        start = 0.0 if i == 0 else starts[chapter["start_line"]]
+        stop = starts[chapters[i + 1]["start_line"]] if i + 1 < len(chapters) else end
+        if stop > start:
+            times.append((chapter["title"], round(start * 1000), round(stop * 1000)))
+    return times
+
+
+def _escape(value):
+    """Escape a value for an ffmetadata file."""
+    value = str(value)
+    for char in ("\\", "=", ";", "#", "\n"):
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def ffmetadata(metadata=None, chapters=()):
+    """An ffmetadata file: ID3 text fields plus [CHAPTER] sections (times in ms)."""
+    metadata = metadata or {}
+    lines = [";FFMETADATA1"]
+    for key, field in (("title", "title"), ("artist", "artist"), ("album", "album"), ("description", "comment")):
+        if metadata.get(key):
+            lines.append(f"{field}={_escape(metadata[key])}")
+    for title, start, end in chapters:
+        lines += ["", "[CHAPTER]", "TIMEBASE=1/1000", f"START={start}", f"END={end}", f"title={_escape(title)}"]
+    return "\n".join(lines) + "\n"
+
+
+def assemble_mix(files, output_path, metadata=None, chapters=None, intro=None, outro=None, cache=None):
+    """
+    Normalize, space, score and chapter `files` into `output_path` with one
+    ffmpeg run. `chapters` is a list of {"title", "start_line"} dicts (line
+    = index into `files`). `intro`/`outro` default to PODCAST_INTRO_MUSIC /
+    PODCAST_OUTRO_MUSIC and are skipped if missing. Returns the output path,
+    or None if failed.
+    """
+    output_path = Path(output_path)
+    intro = intro or INTRO_MUSIC
+    outro = outro or OUTRO_MUSIC
+    intro = intro if intro and Path(intro).exists() else None
+    outro = outro if outro and Path(outro).exists() else None
+
+    try:
+        durations = [mp3.scan_file(path).duration for path in files]
+    except (mp3.Mp3Error, OSError) as e:
+        log(f"Could not read clip durations: {e}", "warning")
+        return None
+
+    measurements = measure_clips(files, cache if cache is not None else LoudnessCache())
+    log(f"Measured loudness of {len(files)} clips")
+    graph = build_filter_graph(measurements, durations, intro=bool(intro), outro=bool(outro))
+    times = chapter_times(chapters or [], durations, lead=INTRO_LEAD if intro else 0.0)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output_path.parent) as tmp:
+        meta_path = Path(tmp) / "metadata.txt"
+        meta_path.write_text(ffmetadata(metadata, times), encoding="utf-8")
+        tmp_output = Path(tmp) / output_path.name
+
+        cmd = ["ffmpeg", "-y", "-hide_banner"]
+        for path in files:
+            cmd += ["-i", str(path)]
+        for music in (intro, outro):
+            if music:
+                cmd += ["-i", str(music)]
+        meta_input = len(files) + bool(intro) + bool(outro)
+        cmd += [
+            "-f", "ffmetadata", "-i", str(meta_path),
+            "-filter_complex", graph,
+            "-map", "[out]",
+            "-map_metadata", str(meta_input),
+            "-map_chapters", str(meta_input),
+            "-c:a", "libmp3lame", "-b:a", OUTPUT_BITRATE, "-ar", str(SAMPLE_RATE), "-ac", "1",
+            "-id3v2_version", "3",
+            str(tmp_output),
+        ]
+
+        log(f"Mixing {len(files)} clips ({len(times)} chapters) in one ffmpeg pass...")
+        try:
+            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            os.replace(tmp_output, output_path)
+        except subprocess.CalledProcessError as e:
+            log(f"Error running ffmpeg: {e}", "error")
+            log(f"Detailed error: {e.stderr.decode()[-2000:]}", "error")
+            return None
+        except OSError as e:
+            log(f"Unexpected error during mixdown: {e}", "error")
+            return None
+
+    log(f"Successfully created episode: {output_path}")
+    return str(output_path)
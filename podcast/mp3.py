@@ -0,0 +1,399 @@
+"""
+MPEG audio frame scanning and in-process MP3 concatenation.
+
+An MP3 file is a sequence of self-describing frames, optionally wrapped in
+tags (ID3v2 at the front, ID3v1/APEv2 at the back) and preceded by a
+Xing/Info/VBRI frame that carries no audio. Concatenating clips therefore
+needs no decoding. We strip each clip's tags and VBR header frame, check
+that every frame header is valid and consistent, and copy the runs of
+frames into the output straight from an mmap. This is the same stream
+`ffmpeg -f concat -c copy` produces, without needing ffmpeg or spawning a
+process.
+"""
+
+import os
+import mmap
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from contextlib import contextmanager
+
+# kbps, indexed by [version is MPEG-1][layer][bitrate index]
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {
+    "1": (44100, 48000, 32000),
+    "2": (22050, 24000, 16000),
+    "2.5": (11025, 12000, 8000),
+}
+_VERSIONS = {0: "2.5", 2: "2", 3: "1"}  # 1 is reserved
+_LAYERS = {1: 3, 2: 2, 3: 1}  # 0 is reserved
+
+MONO = 3  # channel mode
+
+# Xing/Info tag (flags, frame and byte counts, TOC, quality) plus the LAME
+# extension, as written by mp3index
+VBR_HEADER_BYTES = 156
+
+
+class Mp3Error(Exception):
+    """Raised for input that is not a usable MPEG audio stream."""
+
+
+class FrameHeader:
+    """A decoded 4-byte MPEG audio frame header."""
+
+    __slots__ = ("version", "layer", "bitrate", "sample_rate", "padding", "channel_mode",
+                 "protected", "length", "samples")
+
+    def __init__(self, version, layer, bitrate, sample_rate, padding, channel_mode, protected):
+        self.version = version
+        self.layer = layer
+        self.bitrate = bitrate  # kbps
+        self.sample_rate = sample_rate
+        self.padding = padding
+        self.channel_mode = channel_mode
+        self.protected = protected  # a 16-bit CRC follows the header
+
+        if layer == 1:
+            self.length = (12 * bitrate * 1000 // sample_rate + padding) * 4
+            self.samples = 384
+        elif layer == 2 or version == "1":
+            self.length = 144 * bitrate * 1000 // sample_rate + padding
+            self.samples = 1152
+        else:  # layer III, MPEG-2/2.5
+            self.length = 72 * bitrate * 1000 // sample_rate + padding
+            self.samples = 576
+
+    @property
+    def channels(self):
+        return 1 if self.channel_mode == MONO else 2
+
+    @property
+    def stream_key(self):
+        """Properties every frame of one playable stream must share."""
+        return (self.version, self.layer, self.sample_rate, self.channels)
+
+    def side_info_size(self):
+        """Bytes between the header (and CRC) and the start of a Xing tag."""
+        if self.layer != 3:
+            return 0
+        if self.version == "1":
+            return 17 if self.channel_mode == MONO else 32
+        return 9 if self.channel_mode == MONO else 17
+
+
+@lru_cache(maxsize=1024)
+def parse_header(value):
+    """Decode a 32-bit frame header; None if it isn't a valid one."""
+    if value >> 21 != 0x7FF:
+        return None
+    version = _VERSIONS.get((value >> 19) & 3)
+    layer = _LAYERS.get((value >> 17) & 3)
+    bitrate_index = (value >> 12) & 0xF
+    rate_index = (value >> 10) & 3
+    # Free-format (0) and "bad" (15) bitrates can't be framed without decoding
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    return FrameHeader(
+        version,
+        layer,
+        _BITRATES[(version == "1", layer)][bitrate_index],
+        _SAMPLE_RATES[version][rate_index],
+        (value >> 9) & 1,
+        (value >> 6) & 3,
+        not (value >> 16) & 1,
+    )
+
+
+def build_header(version="2", layer=3, bitrate=48, sample_rate=24000, channel_mode=MONO, padding=0):
+    """Encode a frame header (no CRC) as 4 bytes; the inverse of parse_header."""
+    value = (0x7FF << 21
+             | {v: k for k, v in _VERSIONS.items()}[version] << 19
+             | {v: k for k, v in _LAYERS.items()}[layer] << 17
+             | 1 << 16
+             | _BITRATES[(version == "1", layer)].index(bitrate) << 12
+             | _SAMPLE_RATES[version].index(sample_rate) << 10
+             | padding << 9
+             | channel_mode << 6)
+    return value.to_bytes(4, "big")
+
+
+def silent_frame(header):
+    """
+    One frame of digital silence matching `header`'s stream. For layer III
+    an all-zero side info means no coded data, which decodes to silence.
+    """
+    data = build_header(header.version, header.layer, header.bitrate, header.sample_rate, header.channel_mode)
+    return data + bytes(parse_header(int.from_bytes(data, "big")).length - 4)
+
+
+def info_frame(header):
+    """
+    An empty "Info" frame for `header`'s stream, at the lowest bitrate that
+    leaves room for a full Xing/LAME header (see mp3index). Players treat it
+    as a header, decoders as one frame of silence.
+    """
+    offset = 4 + header.side_info_size()
+    for bitrate in _BITRATES[(header.version == "1", header.layer)][1:]:
+        data = build_header(header.version, header.layer, bitrate, header.sample_rate, header.channel_mode)
+        length = parse_header(int.from_bytes(data, "big")).length
+        if length >= offset + VBR_HEADER_BYTES:
+            break
+    frame = bytearray(data + bytes(length - 4))
+    frame[offset:offset + 4] = b"Info"
+    return bytes(frame)
+
+
+def silence(seconds, header):
+    """Silent frames lasting at least `seconds`, compatible with `header`."""
+    frame = silent_frame(header)
+    count = max(1, -(-round(seconds * header.sample_rate) // header.samples))
+    return frame * count
+
+
+def header_at(buf, pos):
+    if pos + 4 > len(buf) or buf[pos] != 0xFF:
+        return None
+    return parse_header(int.from_bytes(buf[pos:pos + 4], "big"))
+
+
+def syncsafe(data):
+    """Decode a 4-byte ID3v2 syncsafe integer."""
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def tag_bounds(buf):
+    """(start, end) of `buf` with leading ID3v2 and trailing ID3v1/APEv2 tags removed."""
+    start, end = 0, len(buf)
+    # ID3v2 tags may be repeated (some encoders prepend a second one)
+    while end - start >= 10 and buf[start:start + 3] == b"ID3":
+        footer = 10 if buf[start + 5] & 0x10 else 0
+        start += 10 + syncsafe(buf[start + 6:start + 10]) + footer
+    if end - start >= 128 and buf[end - 128:end - 125] == b"TAG":
+        end -= 128
+    if end - start >= 32 and buf[end - 32:end - 24] == b"APETAGEX":
+        size = int.from_bytes(buf[end - 20:end - 16], "little")
+        flags = int.from_bytes(buf[end - 12:end - 8], "little")
+        end -= size + (32 if flags & 0x80000000 else 0)
+    return min(start, end), end
+
+
+def vbr_tag(buf, pos, header):
+    """Return b"Xing", b"Info" or b"VBRI" if the frame at `pos` is a VBR header frame."""
+    offset = pos + 4 + (2 if header.protected else 0) + header.side_info_size()
+    tag = bytes(buf[offset:offset + 4])
+    if tag in (b"Xing", b"Info"):
+        return tag
+    if bytes(buf[pos + 36:pos + 40]) == b"VBRI":
+        return b"VBRI"
+    return None
+
+
+class Mp3Stream:
+    """Where the audio frames of one MP3 buffer are, and what they add up to."""
+
+    def __init__(self):
+        self.header = None  # first audio frame's header
+        self.runs = []  # [start, end) byte ranges of consecutive audio frames
+        self.frames = []  # (offset, length) of every frame, when requested
+        self.frame_count = 0
+        self.samples = 0
+        self.audio_bytes = 0
+        self.skipped_bytes = 0  # junk between frames
+        self.vbr_tag = None
+        self.vbr_frame = None  # (offset, length) of the Xing/Info/VBRI frame
+
+    @property
+    def sample_rate(self):
+        return self.header.sample_rate if self.header else None
+
+    @property
+    def duration(self):
+        return self.samples / self.header.sample_rate if self.header else 0.0
+
+
+def scan(buf, keep_frames=False):
+    """
+    Walk every frame in `buf` (bytes or an mmap).
+
+    Tags and the leading Xing/Info/VBRI frame are excluded from the audio
+    runs. Junk between frames is skipped, but re-synchronising only accepts
+    a header that is followed by another valid frame (or the end of the
+    data), so stray 0xFF bytes are not mistaken for frames. Every frame must
+    match the first frame's version, layer, sample rate and channel count.
+    """
+    stream = Mp3Stream()
+    start, end = tag_bounds(buf)
+    pos = start
+    run_start = None
+    in_sync = False
+
+    while pos + 4 <= end:
+        header = header_at(buf, pos)
+        if header and pos + header.length <= end:
+            next_pos = pos + header.length
+            if not in_sync:
+                # Require a second frame to confirm the sync point
+                follower = header_at(buf, next_pos)
+                if next_pos != end and not (follower and follower.stream_key == header.stream_key):
+                    header = None
+            if header:
+                if stream.header is None:
+                    stream.header = header
+                    tag = vbr_tag(buf, pos, header)
+                    if tag:
+                        stream.vbr_tag = tag
+                        stream.vbr_frame = (pos, header.length)
+                        pos, in_sync = next_pos, True
+                        continue
+                elif header.stream_key != stream.header.stream_key:
+                    raise Mp3Error(
+                        f"frame at byte {pos} is {header.stream_key}, stream is {stream.header.stream_key}"
+                    )
+                if run_start is None:
+                    run_start = pos
+                if keep_frames:
+                    stream.frames.append((pos, header.length))
+                stream.frame_count += 1
+                stream.samples += header.samples
+                stream.audio_bytes += header.length
+                pos, in_sync = next_pos, True
+                continue
+
+        # Lost sync: close the current run and look for the next candidate
+        if run_start is not None:
+            stream.runs.append((run_start, pos))
+            run_start = None
+        in_sync = False
+        nxt = buf.find(b"\xff", pos + 1, end)
+        nxt = end if nxt == -1 else nxt
+        stream.skipped_bytes += nxt - pos
+        pos = nxt
+
+    if run_start is not None:
+        stream.runs.append((run_start, pos))
+    stream.skipped_bytes += max(0, end - pos)
+    return stream
+
+
+def scan_file(path, keep_frames=False):
+    """scan() a file through an mmap."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise Mp3Error(f"{path} is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return scan(mm, keep_frames)
+
+
+# ---------------------------------------------------------------------------
+# ID3v2.3 tags
+# ---------------------------------------------------------------------------
+
+def _syncsafe_bytes(n):
+    return bytes(((n >> 21) & 0x7F, (n >> 14) & 0x7F, (n >> 7) & 0x7F, n & 0x7F))
+
+
+def id3_frame(frame_id, data):
+    return frame_id.encode("ascii") + len(data).to_bytes(4, "big") + b"\x00\x00" + data
+
+
+def id3_text_frame(frame_id, text):
+    return id3_frame(frame_id, b"\x01" + str(text).encode("utf-16"))  # UTF-16 with BOM
+
+
+def id3_comment_frame(text, lang="eng"):
+    return id3_frame("COMM", b"\x01" + lang.encode("ascii") + "".encode("utf-16") + b"\x00\x00"
+                     + str(text).encode("utf-16"))
+
+
+# metadata key -> ID3 frame; same keys assemble_episode passes to ffmpeg
+_TEXT_FRAMES = {"title": "TIT2", "artist": "TPE1", "album": "TALB"}
+
+
+def id3_tag(metadata=None, extra_frames=()):
+    """Build an ID3v2.3 tag from `metadata` (title/artist/album/description)."""
+    metadata = metadata or {}
+    frames = [id3_text_frame(frame_id, metadata[key]) for key, frame_id in _TEXT_FRAMES.items() if metadata.get(key)]
+    if metadata.get("description"):
+        frames.append(id3_comment_frame(metadata["description"]))
+    frames.extend(extra_frames)
+    if not frames:
+        return b""
+    body = b"".join(frames)
+    return b"ID3\x03\x00\x00" + _syncsafe_bytes(len(body)) + body
+
+
+# ---------------------------------------------------------------------------
+# Concatenation
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def open_clip(clip, name=None):
+    """
+    A buffer over one clip: the clip itself if it is already bytes (a clip
+    kept in memory), else an mmap of the file at `clip`.
+    """
+    if isinstance(clip, (bytes, bytearray, memoryview)):
+        if not len(clip):
+            raise Mp3Error(f"{name or 'in-memory clip'} is empty")
+        yield clip
+        return
+    with open(clip, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise Mp3Error(f"{name or clip} is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def concat(paths, output_path, metadata=None, vbr_frame=False):
+    """
+    Concatenate MP3 clips into `output_path` without decoding.
+
+    `paths` may mix file paths and in-memory clips (bytes). Each file is
+    mmapped and its audio frame runs are written straight from the mapping
+    (or from the bytes). All clips must share version, layer, sample rate and
+    channel count (edge-tts clips always do). With `vbr_frame`, an empty
+    Info frame is reserved ahead of the audio so mp3index.write_index can
+    fill it in place. The output is written to a temp file and renamed into
+    place. Returns the Mp3Stream totals of the output; raises Mp3Error for
+    unusable clips.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    total = Mp3Stream()
+
+    fd, tmp_path = tempfile.mkstemp(dir=output_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(id3_tag(metadata))
+            for i, path in enumerate(paths):
+                name = f"clip {i}" if isinstance(path, (bytes, bytearray, memoryview)) else path
+                with open_clip(path, name) as buf:
+                    stream = scan(buf)
+                    if not stream.frame_count:
+                        raise Mp3Error(f"{name} has no MPEG audio frames")
+                    if total.header and stream.header.stream_key != total.header.stream_key:
+                        raise Mp3Error(f"{name} is {stream.header.stream_key}, "
+                                       f"earlier clips are {total.header.stream_key}")
+                    if total.header is None and vbr_frame:
+                        out.write(info_frame(stream.header))
+                    total.header = total.header or stream.header
+                    with memoryview(buf) as view:
+                        for start, end in stream.runs:
+                            out.write(view[start:end])
+                total.frame_count += stream.frame_count
+                total.samples += stream.samples
+                total.audio_bytes += stream.audio_bytes
+                total.skipped_bytes += stream.skipped_bytes
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return total
@@ -0,0 +1,215 @@
+"""
+Duration, size and seek table of an MP3, computed from frame headers alone.
+
+Every MPEG audio frame header states the frame's length and sample count,
+so walking the headers (mp3.scan) gives the exact duration and the byte
+offset of every frame without decoding anything. From that we build the
+100-entry Xing TOC, which maps "n% of the way through" to a byte position,
+and write it into a Xing/Info header frame (with a LAME extension) at the
+front of the audio. Players then show the right duration straight away and
+turn a seek into a single HTTP byte-range request that lands on the right
+frame, instead of guessing from the average bitrate.
+
+  index = index_file("episode.mp3")   # read only
+  index = write_index("episode.mp3")  # add or refresh the Xing header
+"""
+
+import os
+import mmap
+import tempfile
+from pathlib import Path
+
+import mp3
+from mp3 import Mp3Error
+
+FRAMES_FLAG, BYTES_FLAG, TOC_FLAG, QUALITY_FLAG = 0x1, 0x2, 0x4, 0x8
+ENCODER = b"Stash".ljust(9, b"\x00")  # 9-byte encoder field of the LAME extension
+TOC_ENTRIES = 100
+
+
+def crc16(data, crc=0):
+    """CRC-16/ARC, as used by the LAME extension's tag checksum."""
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+class Mp3Index:
+    """
+    What a stream's frame headers add up to. Byte positions in `toc` and
+    `stream_bytes` are relative to the start of the Xing frame, which sits
+    `first_frame_at` bytes before the first audio frame.
+    """
+
+    def __init__(self, stream, size_bytes, first_frame_at=0):
+        if not stream.frame_count:
+            raise Mp3Error("no MPEG audio frames")
+        if len(stream.frames) != stream.frame_count:
+            raise ValueError("Mp3Index needs a stream scanned with keep_frames=True")
+        self.header = stream.header
+        self.frame_count = stream.frame_count
+        self.samples = stream.samples
+        self.duration = stream.duration
+        self.audio_bytes = stream.audio_bytes
+        self.size_bytes = size_bytes
+
+        frames = stream.frames
+        audio_start = frames[0][0]
+        last_offset, last_length = frames[-1]
+        self.stream_bytes = last_offset + last_length - audio_start + first_frame_at
+
+        # Frames of one stream all carry the same number of samples, so
+        # "i% of the duration" is simply "i% of the frames"
+        self.toc = bytes(
+            min(255, (frames[i * self.frame_count // TOC_ENTRIES][0] - audio_start + first_frame_at)
+                * 256 // self.stream_bytes)
+            for i in range(TOC_ENTRIES)
+        )
+
+        # A constant-bitrate frame's length only varies by its padding slot
+        lengths = [length for _, length in frames]
+        self.vbr = max(lengths) - min(lengths) > (4 if self.header.layer == 1 else 1)
+
+    @property
+    def bitrate(self):
+        """Average bitrate in kbps."""
+        return self.audio_bytes * 8 / self.duration / 1000 if self.duration else 0
+
+    def seek_offset(self, seconds):
+        """Byte offset (relative to the Xing frame) to request for `seconds`, via the TOC."""
+        percent = min(TOC_ENTRIES - 1, max(0, int(seconds / self.duration * TOC_ENTRIES))) if self.duration else 0
+        return self.toc[percent] * self.stream_bytes // 256
+
+    def xing_frame(self, header_bytes=None):
+        """
+        The Xing/Info header frame for this stream. `header_bytes` is the
+        4-byte frame header to use (to overwrite an existing frame of the
+        same length); by default the smallest frame that fits is used.
+        """
+        frame = bytearray(mp3.info_frame(self.header))
+        if header_bytes is not None:
+            # Never claim a CRC: it would shift the tag two bytes along
+            value = int.from_bytes(header_bytes, "big") | 1 << 16
+            frame = bytearray(value.to_bytes(4, "big") + bytes(mp3.parse_header(value).length - 4))
+        offset = 4 + self.header.side_info_size()
+        if len(frame) < offset + mp3.VBR_HEADER_BYTES:
+            raise Mp3Error(f"{len(frame)}-byte frame is too small for a Xing header")
+
+        xing = b"".join([
+            b"Xing" if self.vbr else b"Info",
+            (FRAMES_FLAG | BYTES_FLAG | TOC_FLAG | QUALITY_FLAG).to_bytes(4, "big"),
+            self.frame_count.to_bytes(4, "big"),
+            self.stream_bytes.to_bytes(4, "big"),
+            self.toc,
+            (0).to_bytes(4, "big"),  # quality: unknown
+        ])
+        lame = b"".join([
+            ENCODER,
+            bytes([0x00 if self.vbr else 0x01]),  # tag revision 0; VBR method unknown, or CBR
+            bytes(9),  # lowpass, replay gain
+            bytes([0, min(255, round(self.bitrate))]),  # encoding flags; (average) bitrate
+            bytes(3),  # encoder delay and padding: unknown after concatenation
+            bytes(4),  # misc, MP3 gain, preset
+            self.stream_bytes.to_bytes(4, "big"),  # music length
+            bytes(2),  # music CRC: not computed (it would mean reading every byte)
+        ])
+        frame[offset:offset + len(xing) + len(lame)] = xing + lame
+        end = offset + len(xing) + len(lame)
+        frame[end:end + 2] = crc16(frame[:end]).to_bytes(2, "big")
+        return bytes(frame)
+
+
+def read_xing(frame, header=None):
+    """
+    Decode the Xing/Info header in `frame` (the bytes of one frame). Returns
+    a dict of the fields present, or None if the frame has no Xing header.
+    """
+    header = header or mp3.parse_header(int.from_bytes(frame[:4], "big"))
+    pos = 4 + (2 if header.protected else 0) + header.side_info_size()
+    tag = bytes(frame[pos:pos + 4])
+    if tag not in (b"Xing", b"Info"):
+        return None
+    flags = int.from_bytes(frame[pos + 4:pos + 8], "big")
+    fields = {"tag": tag}
+    pos += 8
+    if flags & FRAMES_FLAG:
+        fields["frames"] = int.from_bytes(frame[pos:pos + 4], "big")
+        pos += 4
+    if flags & BYTES_FLAG:
+        fields["bytes"] = int.from_bytes(frame[pos:pos + 4], "big")
+        pos += 4
+    if flags & TOC_FLAG:
+        fields["toc"] = bytes(frame[pos:pos + TOC_ENTRIES])
+        pos += TOC_ENTRIES
+    if flags & QUALITY_FLAG:
+        fields["quality"] = int.from_bytes(frame[pos:pos + 4], "big")
+        pos += 4
+    if len(frame) >= pos + 36:
+        fields["encoder"] = bytes(frame[pos:pos + 9]).rstrip(b"\x00")
+        fields["crc_ok"] = crc16(frame[:pos + 34]) == int.from_bytes(frame[pos + 34:pos + 36], "big")
+    return fields
+
+
+def _first_frame_at(stream):
+    """Distance from the existing VBR header frame (if any) to the first audio frame."""
+    if not stream.vbr_frame:
+        return 0
+    return stream.frames[0][0] - stream.vbr_frame[0]
+
+
+def index_file(path):
+    """Index `path` without modifying it."""
+    stream = mp3.scan_file(path, keep_frames=True)
+    return Mp3Index(stream, os.path.getsize(path), _first_frame_at(stream))
+
+
+def write_index(path):
+    """
+    Give `path` a Xing/LAME header frame describing its audio, replacing any
+    existing Xing/Info/VBRI frame. When the existing frame is big enough
+    (mp3.concat reserves one with vbr_frame=True) it is overwritten in
+    place; otherwise the file is rewritten through a temp file. Returns the
+    Mp3Index of the result; raises Mp3Error for files with no audio.
+    """
+    path = Path(path)
+    with open(path, "r+b") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            raise Mp3Error(f"{path} is empty")
+        with mmap.mmap(f.fileno(), 0) as mm:
+            stream = mp3.scan(mm, keep_frames=True)
+            if not stream.frame_count:
+                raise Mp3Error(f"{path} has no MPEG audio frames")
+            audio_start = stream.frames[0][0]
+
+            if stream.vbr_frame:
+                offset, length = stream.vbr_frame
+                index = Mp3Index(stream, size, audio_start - offset)
+                try:
+                    frame = index.xing_frame(bytes(mm[offset:offset + 4]))
+                except Mp3Error:
+                    frame = None  # too small: rewrite below
+                if frame is not None and len(frame) == length:
+                    mm[offset:offset + length] = frame
+                    mm.flush()
+                    return index
+
+            # Insert a new frame where the old one (or the audio) started
+            prefix_end = stream.vbr_frame[0] if stream.vbr_frame else audio_start
+            index = Mp3Index(stream, 0, len(mp3.info_frame(stream.header)))
+            frame = index.xing_frame()
+            index.size_bytes = prefix_end + len(frame) + size - audio_start
+
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as out, memoryview(mm) as view:
+                    out.write(view[:prefix_end])
+                    out.write(frame)
+                    out.write(view[audio_start:])
+                os.replace(tmp_path, path)
+            except BaseException:
+                Path(tmp_path).unlink(missing_ok=True)
+                raise
+    return index
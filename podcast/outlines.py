@@ -0,0 +1,123 @@
+"""
+Per-article segment outlines for map-reduce script generation.
+
+Instead of sending every article body in one giant prompt, each article is
+condensed into a short segment outline by its own (concurrent) Gemini call,
+and only the outlines go into the final dialogue prompt.
+
+Outlines are cached on disk by (article id, content hash, prompt version), so
+an article that appears in several consecutive daily episodes is summarized
+once. Bump OUTLINE_PROMPT_VERSION whenever OUTLINE_PROMPT changes.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+
+OUTLINE_PROMPT_VERSION = "1"
+
+OUTLINE_PROMPT = """
+You prepare segment notes for the hosts of "Listen Later", a conversational daily podcast.
+Condense the article you are given into a segment outline:
+
+- One sentence on what the article is about.
+- The 3-6 most interesting points, facts or arguments, with any concrete numbers or names.
+- One line on why a listener might have saved it, and any open question worth debating.
+
+Write plain text bullet points, at most 200 words. Do not write dialogue.
+"""
+
+OUTLINE_CONCURRENCY = 4  # articles summarized in parallel
+
+DEFAULT_CACHE_DIR = Path(os.getenv("STASH_OUTLINE_CACHE_DIR", Path.home() / ".cache" / "stash" / "outlines"))
+
+
+def content_hash(article):
+    """Hash of everything in the article that the outline depends on."""
+    h = hashlib.sha256()
+    for part in (article.get("title") or "", article.get("site_name") or "", article.get("content") or ""):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def outline_key(article, prompt_version=OUTLINE_PROMPT_VERSION):
+    """Return the cache key for an article's outline."""
+    h = hashlib.sha256()
+    for part in (str(article["id"]), content_hash(article), prompt_version):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class OutlineCache:
+    """Directory of outlines stored as small JSON files, named by key."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def path_for(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """Return the cached outline text, or None on a miss."""
+        try:
+            with open(self.path_for(key)) as f:
+                return json.load(f)["outline"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def put(self, key, outline, article_id=None):
+        """Atomically store `outline` under `key`."""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp:
+                json.dump({"article_id": article_id, "outline": outline}, tmp)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+
+def article_prompt(article):
+    return f"Title: {article['title']}\nSite: {article['site_name']}\n\n{article['content']}"
+
+
+async def summarize_article(model, article, cache=None):
+    """
+    Return the outline for one article, from `cache` when possible.
+
+    `model` is a GenerativeModel configured with OUTLINE_PROMPT. The blocking
+    Gemini call runs on a worker thread so several articles overlap.
+    """
+    key = outline_key(article)
+    if cache:
+        outline = await asyncio.to_thread(cache.get, key)
+        if outline:
+            return outline
+
+    response = await asyncio.to_thread(model.generate_content, article_prompt(article))
+    outline = response.text.strip()
+    if not outline:
+        raise ValueError(f"empty outline for article {article['id']}")
+
+    if cache:
+        await asyncio.to_thread(cache.put, key, outline, article["id"])
+    return outline
+
+
+async def summarize_articles(model, articles, cache=None, concurrency=OUTLINE_CONCURRENCY):
+    """Outline every article concurrently. Returns outlines in article order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(article):
+        async with semaphore:
+            return await summarize_article(model, article, cache)
+
+    return await asyncio.gather(*(run(article) for article in articles))
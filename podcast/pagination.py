@@ -0,0 +1,77 @@
+"""
+Keyset-paginated streaming reads from PostgREST.
+
+Rows are fetched a page at a time ordered by (created_at, id) (or another
+timestamp column, e.g. updated_at for incremental syncs) and each page
+continues strictly after the last key seen, instead of using OFFSET or a
+single hard `limit`. Pages stay cheap however deep into a backlog we are,
+rows inserted or updated mid-scan never shift a page boundary, and callers
+can consume rows lazily with a plain `for` loop.
+"""
+
+import requests
+
+DEFAULT_PAGE_SIZE = 100
+KEY_COLUMN = "created_at"  # default ordering column; "id" breaks ties
+
+
+class FetchError(Exception):
+    """Raised when a page request fails."""
+
+
+def _quote(value):
+    # PostgREST needs values with reserved characters (":", ",", ".") quoted
+    return '"' + str(value).replace('"', '\\"') + '"'
+
+
+def keyset_filter(last_row, descending=True, key_column=KEY_COLUMN):
+    """Build the `or` filter selecting rows strictly after `last_row`."""
+    op = "lt" if descending else "gt"
+    key = _quote(last_row[key_column])
+    row_id = _quote(last_row["id"])
+    return f"({key_column}.{op}.{key},and({key_column}.eq.{key},id.{op}.{row_id}))"
+
+
+def _projection(columns, key_column=KEY_COLUMN):
+    if columns == "*":
+        return columns
+    cols = [c.strip() for c in columns.split(",") if c.strip()]
+    for key in (key_column, "id"):
+        if key not in cols:
+            cols.append(key)
+    return ",".join(cols)
+
+
+def fetch_page(url, headers, filters=None, columns="*", page_size=DEFAULT_PAGE_SIZE,
+               after=None, descending=True, session=None, key_column=KEY_COLUMN):
+    """Fetch one page of rows ordered by (key_column, id)."""
+    direction = "desc" if descending else "asc"
+    params = dict(filters or {})
+    params["select"] = _projection(columns, key_column)
+    params["order"] = f"{key_column}.{direction},id.{direction}"
+    params["limit"] = str(page_size)
+    if after is not None:
+        params["or"] = keyset_filter(after, descending, key_column)
+
+    response = (session or requests).get(url, headers=headers, params=params)
+    if response.status_code != 200:
+        raise FetchError(f"{response.status_code} - {response.text}")
+    return response.json()
+
+
+def iter_rows(url, headers, filters=None, columns="*", page_size=DEFAULT_PAGE_SIZE,
+              after=None, descending=True, session=None, key_column=KEY_COLUMN):
+    """
+    Yield every row matching `filters`, one page at a time.
+
+    `columns` is a PostgREST select list; the key columns are added if
+    missing. `after` resumes a scan from a previously seen row. `session`
+    is anything with a requests-style `get` (e.g. a SupabaseClient).
+    `key_column` is the timestamp column rows are ordered and resumed by.
+    """
+    while True:
+        page = fetch_page(url, headers, filters, columns, page_size, after, descending, session, key_column)
+        yield from page
+        if len(page) < page_size:
+            return
+        after = page[-1]
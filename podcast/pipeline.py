@@ -0,0 +1,244 @@
+"""
+Dependency-driven stage runner for the podcast pipeline.
+
+Each stage declares the named values it needs (`inputs`) and the ones it
+produces (`outputs`). A stage starts as soon as all of its inputs exist, so
+independent stages (e.g. inserting the episode row and synthesizing audio)
+run concurrently instead of in a fixed order.
+
+Following the rest of the pipeline, a stage fails by returning None (or
+raising); everything downstream of a failed stage is skipped, while
+unrelated stages still run. Every stage is timed, and the report shows the
+critical path: the chain of stages that actually determined the run time.
+
+With a RunManifest (see manifest.py) every successful stage is recorded,
+and a resumed run skips stages whose recorded outputs are still valid.
+Stage durations and failures also go to the metrics registry (see
+metrics.py), labelled with the pipeline's `component`.
+"""
+
+import os
+import time
+import asyncio
+import inspect
+
+import jsonlog
+import metrics
+from jsonlog import log
+
+PENDING, RUNNING, DONE, FAILED, SKIPPED = "pending", "running", "done", "failed", "skipped"
+
+
+class Stage:
+    """
+    One unit of work. `func` (sync or async) is called with its inputs as
+    keyword arguments. With a single output its return value is that output;
+    with several it must return a dict keyed by output name, and any output
+    left as None fails the stage. A stage with no outputs fails by returning
+    None or False. `files` names the outputs that are file paths (or lists
+    of paths), so a run manifest can checksum them.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), files=()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.files = tuple(files)
+        self.status = PENDING
+        self.resumed = False
+        self.started = None
+        self.finished = None
+        self.error = None
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return None
+        return self.finished - self.started
+
+    async def call(self, values):
+        kwargs = {name: values[name] for name in self.inputs}
+        # Everything the stage logs is tagged with its name
+        with jsonlog.context(stage=self.name):
+            if inspect.iscoroutinefunction(self.func):
+                return await self.func(**kwargs)
+            # Blocking work (HTTP, ffmpeg) runs on a worker thread
+            return await asyncio.to_thread(self.func, **kwargs)
+
+
+class Pipeline:
+    """A set of stages wired together by the names of their inputs and outputs."""
+
+    def __init__(self, stages=(), manifest=None, component="podcast"):
+        self.stages = []
+        self.manifest = manifest
+        self.component = component
+        self.values = {}
+        self.started = None
+        self.finished = None
+        for stage in stages:
+            self.add(stage)
+
+    def add(self, stage):
+        produced = {name for s in self.stages for name in s.outputs}
+        if produced & set(stage.outputs):
+            raise ValueError(f"Stage {stage.name!r} redefines {sorted(produced & set(stage.outputs))}")
+        self.stages.append(stage)
+        return stage
+
+    def stage(self, name):
+        return next(s for s in self.stages if s.name == name)
+
+    def producer(self, value_name):
+        return next((s for s in self.stages if value_name in s.outputs), None)
+
+    async def run(self, **initial):
+        """
+        Run every stage whose inputs can be satisfied. Returns True if all
+        stages succeeded; the produced values are left in `self.values`.
+        """
+        self.values = dict(initial)
+        self.started = time.perf_counter()
+        running = {}
+
+        try:
+            while True:
+                self._schedule(running)
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    self._record(running.pop(task), task)
+        finally:
+            for task in running:
+                task.cancel()
+
+        self.finished = time.perf_counter()
+        return all(s.status == DONE for s in self.stages)
+
+    def _schedule(self, running):
+        """Start every ready stage and skip every stage that can never run."""
+        changed = True
+        while changed:
+            changed = False
+            for stage in self.stages:
+                if stage.status != PENDING:
+                    continue
+                missing = [name for name in stage.inputs if name not in self.values]
+                if not missing and self._resume(stage):
+                    changed = True
+                elif not missing:
+                    stage.status = RUNNING
+                    stage.started = time.perf_counter()
+                    running[asyncio.create_task(stage.call(self.values))] = stage
+                    changed = True
+                elif any(self._unreachable(name) for name in missing):
+                    stage.status = SKIPPED
+                    log(f"[pipeline] Skipping {stage.name}: missing {', '.join(missing)}", "warning", stage=stage.name)
+                    changed = True
+
+    def _inputs(self, stage):
+        return {name: self.values[name] for name in stage.inputs}
+
+    def _resume(self, stage):
+        """Reuse the stage's outputs from the manifest if they are still valid."""
+        if not self.manifest:
+            return False
+        outputs = self.manifest.restore(stage.name, self._inputs(stage))
+        if outputs is None:
+            return False
+        self.values.update({name: outputs[name] for name in stage.outputs})
+        stage.status, stage.resumed = DONE, True
+        log(f"[pipeline] Resumed {stage.name} from run {self.manifest.run_id}", stage=stage.name)
+        return True
+
+    def _unreachable(self, value_name):
+        producer = self.producer(value_name)
+        return producer is None or producer.status in (FAILED, SKIPPED)
+
+    def _record(self, stage, task):
+        stage.finished = time.perf_counter()
+        try:
+            result = task.result()
+        except Exception as e:
+            stage.status, stage.error = FAILED, e
+            metrics.observe_stage(self.component, stage.name, stage.duration, failed=True)
+            log(f"[pipeline] {stage.name} failed after {stage.duration:.1f}s: {e}", "error", stage=stage.name)
+            return
+
+        if not stage.outputs:
+            values, ok = {}, result is not None and result is not False
+        else:
+            values = {stage.outputs[0]: result} if len(stage.outputs) == 1 else (result or {})
+            ok = all(values.get(name) is not None for name in stage.outputs)
+        # Partial results are kept: consumers of the outputs that were
+        # produced can still run
+        self.values.update({name: values[name] for name in stage.outputs if values.get(name) is not None})
+        metrics.observe_stage(self.component, stage.name, stage.duration, failed=not ok)
+        if not ok:
+            stage.status = FAILED
+            log(f"[pipeline] {stage.name} failed after {stage.duration:.1f}s", "error", stage=stage.name)
+            return
+        stage.status = DONE
+        if self.manifest:
+            outputs = {name: values[name] for name in stage.outputs}
+            try:
+                self.manifest.record(stage.name, self._inputs(stage), outputs, stage.files)
+            except OSError as e:
+                log(f"[pipeline] Could not record {stage.name} in the run manifest: {e}", "warning", stage=stage.name)
+
+    # -- Reporting ----------------------------------------------------------
+
+    def critical_path(self):
+        """Stages on the longest dependency chain, ending at the last to finish."""
+        finished = [s for s in self.stages if s.finished is not None]
+        if not finished:
+            return []
+        stage = max(finished, key=lambda s: s.finished)
+        path = [stage]
+        while True:
+            producers = [self.producer(name) for name in stage.inputs]
+            producers = [p for p in producers if p is not None and p.finished is not None]
+            if not producers:
+                break
+            # The input that arrived last is the one this stage waited on
+            stage = max(producers, key=lambda s: s.finished)
+            path.append(stage)
+        return list(reversed(path))
+
+    def timings(self):
+        """Per-stage (name, status, start offset, duration) in start order."""
+        rows = []
+        for stage in sorted(self.stages, key=lambda s: (s.started is None, s.started or 0)):
+            offset = stage.started - self.started if stage.started is not None else None
+            rows.append((stage.name, "resumed" if stage.resumed else stage.status, offset, stage.duration))
+        return rows
+
+    def report(self):
+        """Human-readable timing table (also usable as GitHub markdown)."""
+        critical = {s.name for s in self.critical_path()}
+        total = (self.finished or time.perf_counter()) - self.started
+        lines = [
+            "| Stage | Status | Start (s) | Duration (s) | Critical |",
+            "| :-- | :-- | --: | --: | :-: |",
+        ]
+        for name, status, offset, duration in self.timings():
+            lines.append("| {} | {} | {} | {} | {} |".format(
+                name,
+                status,
+                f"{offset:.1f}" if offset is not None else "-",
+                f"{duration:.1f}" if duration is not None else "-",
+                "*" if name in critical else "",
+            ))
+        lines.append(f"\nTotal: {total:.1f}s. Critical path: {' -> '.join(s.name for s in self.critical_path())}")
+        return "\n".join(lines)
+
+    def write_summary(self, path=None):
+        """Append the report to the GitHub Actions job summary, if running there."""
+        path = path or os.getenv("GITHUB_STEP_SUMMARY")
+        if not path:
+            return False
+        with open(path, "a") as f:
+            f.write("### Podcast pipeline timings\n\n" + self.report() + "\n")
+        return True
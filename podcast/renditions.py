@@ -0,0 +1,165 @@
+"""
+Extra, cheaper encodings ("renditions") of finished audio.
+
+Episodes and article audio are produced as one edge-tts-quality MP3. For
+listeners on mobile data (and for the storage bucket) smaller encodings are
+often enough: speech stays intelligible at 32 kbps mono MP3, and Opus at
+24 kbps sounds better than that in less space. Each configured target is
+encoded from the finished file in its own worker process, so all targets
+are produced in about the time of the slowest one. Workers are spawned
+rather than forked: the callers run event loops and the log writer thread,
+and a forked copy of those would deadlock or silently lose records, so
+workers only return results and errors and the parent does the logging.
+
+Every rendition is described by a small dict that is stored as-is in the
+`audio_renditions` jsonb column (saves and podcast_episodes):
+
+  {"name": "opus-24k", "mime": "audio/ogg; codecs=\"opus\"", "bitrate": 24,
+   "url": "...", "size_bytes": 812345, "duration_seconds": 271.4}
+
+and the web player picks the smallest one the browser can play, falling
+back to `audio_url` (the original MP3). Durations come from the container
+(MP3 frame headers, the last Ogg granule position), not from decoding.
+"""
+
+import os
+import shutil
+import subprocess
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import mp3
+import mp3index
+from jsonlog import log
+
+TARGETS = {
+    "mp3-32k": {
+        "codec": "libmp3lame", "bitrate": 32, "sample_rate": 22050, "ext": "mp3", "mime": "audio/mpeg",
+    },
+    "opus-24k": {
+        "codec": "libopus", "bitrate": 24, "sample_rate": 24000, "ext": "opus", "mime": 'audio/ogg; codecs="opus"',
+        "args": ["-application", "voip"],
+    },
+}
+
+# Comma-separated names from TARGETS; empty to disable renditions
+RENDITIONS = [name for name in os.getenv("AUDIO_RENDITIONS", "mp3-32k,opus-24k").split(",") if name]
+RENDITION_WORKERS = int(os.getenv("RENDITION_WORKERS", min(4, os.cpu_count() or 1)))
+
+OPUS_RATE = 48000  # Ogg Opus granule positions always count 48 kHz samples
+
+_pool = None
+
+
+def get_pool():
+    """Shared worker process pool (spawned, never forked), created on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=RENDITION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def ogg_opus_duration(path, tail_bytes=65536):
+    """Duration of an Ogg Opus file from its last page's granule position."""
+    with open(path, "rb") as f:
+        head = f.read(512)
+        f.seek(max(0, os.fstat(f.fileno()).st_size - tail_bytes))
+        tail = f.read()
+    opus_head = head.find(b"OpusHead")
+    last_page = tail.rfind(b"OggS")
+    if opus_head == -1 or last_page == -1:
+        raise ValueError(f"{path} is not an Ogg Opus file")
+    pre_skip = int.from_bytes(head[opus_head + 10:opus_head + 12], "little")
+    granule = int.from_bytes(tail[last_page + 6:last_page + 14], "little")
+    return max(0, granule - pre_skip) / OPUS_RATE
+
+
+def duration_of(path, target):
+    """Container-level duration of an encoded file (MP3 output also gets a Xing header)."""
+    if target["ext"] == "mp3":
+        return mp3index.write_index(path).duration
+    return ogg_opus_duration(path)
+
+
+def encode_rendition(source, name, output_dir):
+    """
+    Encode `source` into the TARGETS[name] rendition in `output_dir`.
+    Runs in a worker process, so it never logs. Returns (rendition, error):
+    the rendition dict (with a local "path" instead of a "url") and None,
+    or None and the error message if encoding failed.
+    """
+    target = TARGETS[name]
+    source = Path(source)
+    output = Path(output_dir) / f"{source.stem}.{name}.{target['ext']}"
+    cmd = [
+        "ffmpeg", "-y", "-hide_banner", "-nostats",
+        "-i", str(source),
+        "-vn", "-map_metadata", "0",
+        "-c:a", target["codec"], "-b:a", f"{target['bitrate']}k",
+        "-ar", str(target["sample_rate"]), "-ac", "1",
+        *target.get("args", []),
+        str(output),
+    ]
+    try:
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        duration = duration_of(output, target)
+    except subprocess.CalledProcessError as e:
+        return None, e.stderr.decode(errors="replace")[-500:]
+    except (mp3.Mp3Error, OSError, ValueError) as e:
+        return None, str(e)
+    return {
+        "name": name,
+        "mime": target["mime"],
+        "bitrate": target["bitrate"],
+        "path": str(output),
+        "size_bytes": output.stat().st_size,
+        "duration_seconds": round(duration, 1),
+    }, None
+
+
+def encode_renditions(source, output_dir=None, names=None, pool=None):
+    """
+    Encode `source` into every target in `names` (default RENDITIONS) in
+    parallel on `pool` (default: the shared process pool). Returns the
+    renditions that succeeded, in target order; failures are logged.
+    """
+    names = RENDITIONS if names is None else names
+    names = [name for name in names if name in TARGETS]
+    if not names:
+        return []
+    if not shutil.which("ffmpeg"):
+        log("ffmpeg not found: skipping audio renditions", "warning")
+        return []
+
+    output_dir = Path(output_dir or Path(source).parent)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pool = pool or get_pool()
+    futures = [pool.submit(encode_rendition, str(source), name, str(output_dir)) for name in names]
+    renditions = []
+    for name, future in zip(names, futures):
+        rendition, error = future.result()
+        if error:
+            log(f"Error encoding {name} rendition: {error}", "error")
+        else:
+            renditions.append(rendition)
+    return renditions
+
+
+def storage_name(prefix, rendition):
+    """Object name for a rendition, e.g. episode_<id>.opus-24k.opus."""
+    return f"{prefix}.{rendition['name']}{Path(rendition['path']).suffix}"
+
+
+def publish(renditions, upload):
+    """
+    Upload each rendition with `upload(rendition)` (returning a URL or None)
+    and return the dicts to store in `audio_renditions`: local paths swapped
+    for URLs, failed uploads dropped.
+    """
+    published = []
+    for rendition in renditions:
+        url = upload(rendition)
+        if url:
+            published.append({**{k: v for k, v in rendition.items() if k != "path"}, "url": url})
+    return published
@@ -0,0 +1,346 @@
+"""
+Chunked, resumable (TUS) uploads to Supabase Storage.
+
+Audio is streamed into storage one chunk at a time as it is produced, so a
+long article never has to sit fully in memory or on disk before the first
+byte is uploaded. If a chunk fails mid-flight, the server is asked how much
+it actually received and the upload resumes from that offset instead of
+starting over.
+
+The upload URL and confirmed offset are also saved to a small state file per
+object (under STATE_DIR), so a crashed or restarted process picks the same
+upload back up: `upload_stream` skips the bytes the server already has and
+sends the rest. That is only correct if the source produces the same bytes
+again, so the state also records a fingerprint of the source (e.g. the text
+and voice) and a SHA-256 of the bytes sent. A different fingerprint starts a
+new upload; skipped bytes that hash differently (say, a clip evicted from
+the cache and synthesized again) fail the upload and discard its state
+instead of splicing two sources into one object.
+
+Supabase requires every chunk except the last to be exactly 6 MB.
+"""
+
+import os
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+
+import requests
+
+from supabase_http import DEFAULT_TIMEOUT, UPLOAD_TIMEOUT
+
+CHUNK_SIZE = 6 * 1024 * 1024
+MAX_RETRIES = 5
+RETRY_DELAY = 1.0  # seconds, doubled after each failed attempt
+TUS_VERSION = "1.0.0"
+STATE_DIR = Path(os.getenv("STASH_UPLOAD_STATE_DIR", Path.home() / ".cache" / "stash" / "uploads"))
+
+
+class UploadError(Exception):
+    """Raised when an upload cannot be created or resumed."""
+
+
+def _encode_metadata(metadata):
+    return ",".join(
+        f"{k} {base64.b64encode(v.encode('utf-8')).decode('ascii')}"
+        for k, v in metadata.items()
+    )
+
+
+class ResumableUpload:
+    """
+    A single TUS upload of unknown length (creation-defer-length).
+
+    The total size is only declared on the final PATCH, which lets callers
+    start uploading before synthesis has finished. `state_dir` (STATE_DIR by
+    default) is where the upload URL and offset are kept between processes;
+    a saved upload is only resumed by an upload with the same `fingerprint`.
+    """
+
+    def __init__(self, supabase_url, api_key, bucket, object_name,
+                 content_type="audio/mpeg", upsert=True, session=None, state_dir=None,
+                 timeout=UPLOAD_TIMEOUT, fingerprint=None):
+        self.endpoint = f"{supabase_url}/storage/v1/upload/resumable"
+        self.api_key = api_key
+        self.bucket = bucket
+        self.object_name = object_name
+        self.content_type = content_type
+        self.upsert = upsert
+        self.session = session or requests
+        self.timeout = timeout
+        self.fingerprint = fingerprint
+        self.location = None
+        self.offset = 0
+        # Hash of the bytes the server has confirmed, and of what an earlier
+        # process confirmed when this upload was resumed
+        self.digest = hashlib.sha256()
+        self.resumed_digest = None
+
+        key = hashlib.sha256(f"{supabase_url}\0{bucket}\0{object_name}".encode("utf-8")).hexdigest()
+        self.state_path = Path(state_dir or STATE_DIR) / f"{key}.json"
+
+    def _headers(self, **extra):
+        headers = {
+            "apikey": self.api_key,
+            "Authorization": f"Bearer {self.api_key}",
+            "Tus-Resumable": TUS_VERSION,
+        }
+        headers.update(extra)
+        return headers
+
+    def create(self):
+        """Create the upload on the server and remember its URL."""
+        headers = self._headers(**{
+            "Upload-Defer-Length": "1",
+            "Upload-Metadata": _encode_metadata({
+                "bucketName": self.bucket,
+                "objectName": self.object_name,
+                "contentType": self.content_type,
+            }),
+            "x-upsert": "true" if self.upsert else "false",
+        })
+        response = self.session.post(self.endpoint, headers=headers, timeout=DEFAULT_TIMEOUT)
+        if response.status_code != 201 or "Location" not in response.headers:
+            raise UploadError(f"Could not create upload: {response.status_code} - {response.text}")
+        self.location = response.headers["Location"]
+        self.offset = 0
+        self.digest = hashlib.sha256()
+        self.save_state()
+        return self.location
+
+    def resume(self):
+        """
+        Pick up the upload saved by an earlier process for this object.
+
+        Returns True with `offset` set to what the server already has, or
+        False (forgetting the saved state) when there is nothing to resume.
+        The bytes up to `offset` must then be passed to `replay`.
+        """
+        try:
+            state = json.loads(self.state_path.read_text())
+            self.location = state["location"]
+            saved_offset, saved_digest = state["offset"], state["sha256"]
+        except (OSError, ValueError, KeyError):
+            return False
+        offset, length = None, None
+        if state.get("fingerprint") == self.fingerprint:
+            try:
+                offset, length = self._head()
+            except (UploadError, requests.RequestException, KeyError, ValueError):
+                pass
+        # Start a new upload if it was for another source, has expired or
+        # finished on the server, or holds bytes we have no hash for
+        if offset is None or offset == length or offset != saved_offset:
+            self.location, self.offset = None, 0
+            self.clear_state()
+            return False
+        self.offset = offset
+        self.digest = hashlib.sha256()
+        self.resumed_digest = saved_digest
+        return True
+
+    def open(self):
+        """Resume a saved upload if possible, otherwise create a new one."""
+        if not self.resume():
+            self.create()
+        return self.offset
+
+    def replay(self, data):
+        """Account for bytes of a resumed upload that the server already has."""
+        self.digest.update(data)
+
+    def check_replay(self):
+        """
+        Raise UploadError, forgetting the saved upload, unless the replayed
+        bytes are the ones the earlier process sent.
+        """
+        if self.digest.hexdigest() != self.resumed_digest:
+            self.clear_state()
+            raise UploadError("Source no longer matches the bytes already uploaded; starting over next time")
+
+    def save_state(self):
+        """Atomically record the upload URL, confirmed offset and the hash of the bytes sent."""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"location": self.location, "offset": self.offset,
+                           "sha256": self.digest.hexdigest(), "fingerprint": self.fingerprint,
+                           "bucket": self.bucket, "object": self.object_name}, f)
+            os.replace(tmp_path, self.state_path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def clear_state(self):
+        self.state_path.unlink(missing_ok=True)
+
+    def _head(self):
+        """(offset, declared length or None) as the server sees the upload."""
+        response = self.session.head(self.location, headers=self._headers(), timeout=DEFAULT_TIMEOUT)
+        if response.status_code not in [200, 204]:
+            raise UploadError(f"Upload can no longer be resumed: {response.status_code}")
+        length = response.headers.get("Upload-Length")
+        return int(response.headers["Upload-Offset"]), None if length is None else int(length)
+
+    def server_offset(self):
+        """Ask the server how many bytes it has durably received."""
+        return self._head()[0]
+
+    def send_chunk(self, data, final=False):
+        """
+        Send `data`, which starts at the current offset.
+
+        On failure, re-syncs the offset with the server and resends only the
+        bytes it is missing, backing off between attempts. The confirmed
+        offset is saved after every chunk; the state is removed once the
+        final chunk is in.
+        """
+        start = self.offset
+        end = start + len(data)
+        delay = RETRY_DELAY
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                if attempt:
+                    self.offset = self.server_offset()
+                    if not start <= self.offset <= end:
+                        raise UploadError(
+                            f"Server offset {self.offset} outside chunk {start}-{end}"
+                        )
+                    if self.offset == end and not final:
+                        self.digest.update(data)
+                        self.save_state()
+                        return self.offset
+
+                extra = {
+                    "Upload-Offset": str(self.offset),
+                    "Content-Type": "application/offset+octet-stream",
+                }
+                if final:
+                    extra["Upload-Length"] = str(end)
+                response = self.session.patch(
+                    self.location,
+                    headers=self._headers(**extra),
+                    data=memoryview(data)[self.offset - start:],
+                    timeout=self.timeout,
+                )
+            except requests.RequestException as e:
+                error = e
+            else:
+                if response.status_code == 204:
+                    self.offset = int(response.headers.get("Upload-Offset", end))
+                    if self.offset == end:
+                        self.digest.update(data)
+                        if final:
+                            self.clear_state()
+                        else:
+                            self.save_state()
+                        return self.offset
+                    error = UploadError(f"Short write: {self.offset} of {end}")
+                elif 400 <= response.status_code < 500 and response.status_code not in [409, 423, 429]:
+                    raise UploadError(f"Chunk rejected: {response.status_code} - {response.text}")
+                else:
+                    error = UploadError(f"Chunk failed: {response.status_code} - {response.text}")
+
+            if attempt == MAX_RETRIES:
+                raise UploadError(f"Upload failed after {attempt + 1} attempts: {error}") from error
+            time.sleep(delay)
+            delay *= 2
+
+
+async def _rechunk(chunks, chunk_size):
+    """Regroup arbitrarily sized byte chunks into `chunk_size` pieces."""
+    buf = bytearray()
+    async for chunk in chunks:
+        buf += chunk
+        while len(buf) >= chunk_size:
+            yield bytes(buf[:chunk_size])
+            del buf[:chunk_size]
+    if buf:
+        yield bytes(buf)
+
+
+async def _skip(chunks, upload):
+    """
+    Drop the bytes a resumed `upload` already has from an async iterable of
+    byte chunks, checking that they are the bytes that were sent before.
+    """
+    remaining = upload.offset
+    async for chunk in chunks:
+        if remaining:
+            head = chunk[:remaining]
+            upload.replay(head)
+            remaining -= len(head)
+            if remaining:
+                continue
+            upload.check_replay()
+            chunk = chunk[len(head):]
+            if not chunk:
+                continue
+        yield chunk
+    if remaining:
+        upload.check_replay()  # the source ended before reaching the offset
+
+
+async def upload_stream(upload, chunks, chunk_size=CHUNK_SIZE):
+    """
+    Upload an async iterable of bytes through `upload` with bounded memory.
+
+    The producer fills the next chunk while the previous one is in flight,
+    so at most a few chunks are ever held in memory. When an earlier
+    process's upload is resumed, the bytes the server already has are
+    skipped (raising UploadError if they differ from what was sent). Returns
+    the total size.
+    """
+    skip = await asyncio.to_thread(upload.open)
+    if skip:
+        chunks = _skip(chunks, upload)
+
+    # One chunk of lookahead tells us which chunk is the final one
+    queue = asyncio.Queue(maxsize=1)
+
+    async def produce():
+        try:
+            async for piece in _rechunk(chunks, chunk_size):
+                await queue.put(piece)
+        except Exception as e:
+            # Never finalize a truncated object: hand the error to the consumer
+            await queue.put(e)
+            return
+        await queue.put(None)
+
+    async def next_chunk():
+        item = await queue.get()
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    producer = asyncio.create_task(produce())
+    try:
+        pending = await next_chunk()
+        if pending is None:
+            # Empty stream: still finalize so the object exists
+            await asyncio.to_thread(upload.send_chunk, b"", True)
+        while pending is not None:
+            nxt = await next_chunk()
+            await asyncio.to_thread(upload.send_chunk, pending, nxt is None)
+            pending = nxt
+        await producer
+    finally:
+        producer.cancel()
+    return upload.offset
+
+
+async def iter_file(path, chunk_size=64 * 1024):
+    """Async iterator over a file's bytes."""
+    with open(path, "rb") as f:
+        while True:
+            data = await asyncio.to_thread(f.read, chunk_size)
+            if not data:
+                break
+            yield data
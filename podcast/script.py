@@ -1,15 +1,27 @@
 import os
+import sys
 import json
-import requests
+import argparse
 import google.generativeai as genai
 import asyncio
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
-import edge_tts
 from extract import fetch_recent_articles
 from assembly import assemble_episode
-from supabase import create_client, Client
+from mp3 import Mp3Error
+from mp3index import index_file
+import renditions
+from clip_cache import ClipCache, synthesize, synthesize_bytes
+from outlines import OUTLINE_PROMPT, OutlineCache, summarize_articles
+from jsonstream import JsonArrayParser
+from pipeline import Stage, Pipeline
+from manifest import RunManifest, new_run_id
+from workspace import Workspace, is_buffer
+import metrics
+import jsonlog
+from jsonlog import log
+from supabase_http import SupabaseClient
 
 # Load environment variables
 load_dotenv()
@@ -19,9 +31,29 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 USER_ID = os.getenv("USER_ID")
 
-supabase_client: Client = None
+# Shared pooled client for REST and Storage calls (keep-alive, timeouts, retries)
+supabase_client = None
 if SUPABASE_URL and SUPABASE_KEY:
-    supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase_client = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
+
+# Audio generation settings
+AUDIO_CONCURRENCY = 8  # script lines synthesized in parallel
+AUDIO_MAX_RETRIES = 3  # retries per line before giving up
+AUDIO_RETRY_DELAY = 1.0  # seconds, doubled after each failed attempt
+# Clips up to this size are kept in memory and handed to assembly as bytes
+# instead of being written to the run's workspace; 0 writes every clip
+INLINE_CLIP_BYTES = int(os.getenv("PODCAST_INLINE_CLIP_KB", "0")) * 1024
+
+# Shared on-disk clip cache (see clip_cache.py); set to None to disable
+CLIP_CACHE = ClipCache()
+
+# Write the run's stage metrics here (Prometheus text format, e.g. for
+# node_exporter's textfile collector); unset to skip
+METRICS_FILE = os.getenv("PODCAST_METRICS_FILE")
+
+# Script generation settings
+MODEL_NAME = "gemini-flash-latest"  # Gemini Flash for reliability and speed
+OUTLINE_CACHE = OutlineCache()  # per-article outlines for --map-reduce; None to disable
 
 # System prompt for Alex and Taylor
 SYSTEM_PROMPT = """
@@ -39,36 +71,43 @@ TONE:
 - Avoid sounding like a dry news report. Use "Alex:" and "Taylor:" prefixes for dialogue.
 
 OUTPUT FORMAT:
-Return a JSON array of objects. Each object must have a "speaker" (Alex or Taylor) and "text" (their dialogue line).
+Return a JSON array of objects. Each object must have a "speaker" (Alex or Taylor), "text" (their dialogue line)
+and "article": the 1-based position of the article the line is about in the list you were given, or 0 for the
+opening and sign-off.
 Example:
 [
-  { "speaker": "Alex", "text": "Taylor, did you see this piece on local-first software?" },
-  { "speaker": "Taylor", "text": "I did! It's such a shift from the last decade of cloud-only thinking." }
+  { "speaker": "Alex", "text": "Taylor, did you see this piece on local-first software?", "article": 1 },
+  { "speaker": "Taylor", "text": "I did! It's such a shift from the last decade of cloud-only thinking.", "article": 1 }
 ]
 
 Do not include any other text, markdown, or explanations. Only return the raw JSON array.
 """
 
-def generate_script(articles):
-    """Generate a conversational script based on the provided articles."""
+def configure_gemini(articles):
+    """Configure the Gemini client. Returns False (after explaining why) if we can't proceed."""
     gemini_api_key = os.getenv("GEMINI_API_KEY")
     if not gemini_api_key:
-        print("Error: GEMINI_API_KEY not found. Please set it in your environment.")
-        return None
+        log("Error: GEMINI_API_KEY not found. Please set it in your environment.", "error")
+        return False
 
     if not articles:
-        print("No articles to summarize.")
-        return None
+        log("No articles to summarize.")
+        return False
 
     genai.configure(api_key=gemini_api_key)
-    
-    # Using Gemini Flash for reliability and speed
-    model = genai.GenerativeModel(
-        model_name="gemini-flash-latest",
-        system_instruction=SYSTEM_PROMPT
-    )
+    return True
+
+def parse_script(text):
+    """Parse the model's JSON array, tolerating markdown code fences around it."""
+    content = text.strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return json.loads(content)
 
-    # Prepare article content for the prompt
+def script_prompt(articles):
+    """Prompt carrying the full (cleaned) text of every article."""
     articles_payload = []
     for art in articles:
         articles_payload.append({
@@ -77,67 +116,202 @@ def generate_script(articles):
             "content": art["content"]
         })
 
-    prompt = f"Here are the articles to discuss today:\n\n{json.dumps(articles_payload, indent=2)}"
+    return f"Here are the articles to discuss today:\n\n{json.dumps(articles_payload, indent=2)}"
+
+async def outlines_prompt(articles):
+    """
+    Map phase of map-reduce generation: condense every article into a segment
+    outline, concurrently and through OUTLINE_CACHE (so articles carried over
+    from previous episodes cost nothing), and return the much smaller prompt
+    built from the outlines.
+    """
+    outline_model = genai.GenerativeModel(model_name=MODEL_NAME, system_instruction=OUTLINE_PROMPT)
+    outlines = await summarize_articles(outline_model, articles, OUTLINE_CACHE)
+    log(f"Outlined {len(outlines)} articles")
+
+    outlines_payload = [
+        {"title": art["title"], "site": art["site_name"], "outline": outline}
+        for art, outline in zip(articles, outlines)
+    ]
+    return f"Here are segment outlines of the articles to discuss today:\n\n{json.dumps(outlines_payload, indent=2)}"
+
+def generate_script(articles):
+    """Generate a conversational script based on the provided articles."""
+    if not configure_gemini(articles):
+        return None
+
+    model = genai.GenerativeModel(
+        model_name=MODEL_NAME,
+        system_instruction=SYSTEM_PROMPT
+    )
 
     try:
-        response = model.generate_content(prompt)
-        
-        # Clean up the response text in case Gemini adds markdown code blocks
-        content = response.text.strip()
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.endswith("```"):
-            content = content[:-3]
-        
-        script = json.loads(content)
-        return script
+        response = model.generate_content(script_prompt(articles))
+        return parse_script(response.text)
     except Exception as e:
-        print(f"Error generating script: {e}")
+        log(f"Error generating script: {e}", "error")
         return None
 
-async def generate_audio(script, output_dir="podcast/temp_audio"):
-    """Generate audio files for each line of the script using edge-tts."""
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
-    
-    audio_files = []
-    
-    print(f"Generating audio for {len(script)} lines...")
-    
-    for i, line in enumerate(script):
-        speaker = line.get("speaker", "Alex")
-        text = line.get("text", "")
-        
-        # Select voice based on speaker
-        # Alex: Andrew (Male), Taylor: Ava (Female)
-        voice = "en-US-AndrewNeural" if speaker == "Alex" else "en-US-AvaNeural"
-        
-        filename = output_path / f"line_{i:03d}.mp3"
-        communicate = edge_tts.Communicate(text, voice)
-        
+async def generate_script_map_reduce(articles):
+    """Generate the script from per-article outlines (see outlines_prompt)."""
+    if not configure_gemini(articles):
+        return None
+
+    try:
+        prompt = await outlines_prompt(articles)
+        model = genai.GenerativeModel(model_name=MODEL_NAME, system_instruction=SYSTEM_PROMPT)
+        response = await asyncio.to_thread(model.generate_content, prompt)
+        return parse_script(response.text)
+    except Exception as e:
+        log(f"Error generating script: {e}", "error")
+        return None
+
+async def stream_script(articles, map_reduce=False):
+    """
+    Yield script lines while the model is still writing the rest.
+
+    The response is streamed and parsed incrementally (see jsonstream.py), so
+    each {speaker, text} object is yielded as soon as its closing brace
+    arrives. Yields nothing if Gemini can't be configured; raises on API
+    errors or a malformed/truncated response.
+    """
+    if not configure_gemini(articles):
+        return
+
+    prompt = await outlines_prompt(articles) if map_reduce else script_prompt(articles)
+    model = genai.GenerativeModel(model_name=MODEL_NAME, system_instruction=SYSTEM_PROMPT)
+
+    # The blocking stream is drained one chunk at a time on a worker thread
+    response = await asyncio.to_thread(model.generate_content, prompt, stream=True)
+    chunks = iter(response)
+    parser = JsonArrayParser()
+    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+        for line in parser.feed(chunk.text):
+            if not isinstance(line, dict) or "text" not in line:
+                raise ValueError(f"Malformed script line {parser.count - 1}: {line!r}")
+            yield line
+    parser.close()
+
+def voice_for_speaker(speaker):
+    """Alex: Andrew (Male), Taylor: Ava (Female)."""
+    return "en-US-AndrewNeural" if speaker == "Alex" else "en-US-AvaNeural"
+
+async def synthesize_line(index, line, filename, max_retries=None, retry_delay=None):
+    """
+    Synthesize one script line, retrying with exponential backoff. Returns
+    the clip's path, its bytes if it is small enough to stay in memory
+    (INLINE_CLIP_BYTES), or None if every attempt failed.
+    """
+    max_retries = AUDIO_MAX_RETRIES if max_retries is None else max_retries
+    retry_delay = AUDIO_RETRY_DELAY if retry_delay is None else retry_delay
+    text = line.get("text", "")
+    voice = voice_for_speaker(line.get("speaker", "Alex"))
+
+    for attempt in range(max_retries + 1):
         try:
-            await communicate.save(str(filename))
-            audio_files.append(str(filename))
+            if INLINE_CLIP_BYTES:
+                data = await synthesize_bytes(text, voice, cache=CLIP_CACHE)
+                if len(data) <= INLINE_CLIP_BYTES:
+                    return data
+                await asyncio.to_thread(Path(filename).write_bytes, data)
+            else:
+                await synthesize(text, voice, filename, cache=CLIP_CACHE)
+            return str(filename)
         except Exception as e:
-            print(f"Error generating audio for line {i}: {e}")
+            # Never leave a partial clip behind for assembly to pick up
+            Path(filename).unlink(missing_ok=True)
+            if attempt == max_retries:
+                log(f"Error generating audio for line {index} after {attempt + 1} attempts: {e}", "error")
+                return None
+            delay = retry_delay * (2 ** attempt)
+            log(f"Retrying line {index} in {delay:.1f}s ({e})", "warning")
+            await asyncio.sleep(delay)
+
+async def generate_audio(script, output_dir, concurrency=None):
+    """
+    Generate audio files for each line of the script using edge-tts.
+
+    Up to `concurrency` lines are synthesized at once into `output_dir`
+    (the run's workspace). Clips are named line_NNN.mp3 by script position.
+    Returns the clip manifest for assembly: one path (or in-memory clip) per
+    line, in script order, or None if any line still fails after its retries.
+    """
+    concurrency = concurrency or AUDIO_CONCURRENCY
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
     
-    print(f"Generated {len(audio_files)} audio clips in {output_dir}")
+    log(f"Generating audio for {len(script)} lines ({concurrency} at a time)...")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(i, line):
+        async with semaphore:
+            return await synthesize_line(i, line, output_path / f"line_{i:03d}.mp3")
+
+    audio_files = await asyncio.gather(*(run(i, line) for i, line in enumerate(script)))
+
+    failed = [i for i, path in enumerate(audio_files) if path is None]
+    if failed:
+        log(f"Failed to generate audio for lines: {failed}", "error")
+        return None
+
+    log(f"Generated {len(audio_files)} audio clips in {output_dir} "
+        f"({sum(is_buffer(clip) for clip in audio_files)} kept in memory)")
     return audio_files
 
+async def stream_script_to_audio(articles, output_dir, map_reduce=False, concurrency=None):
+    """
+    Generate the script with stream_script and synthesize each line as soon
+    as it is parsed, so TTS overlaps LLM generation.
+
+    Clips use the same line_NNN.mp3 naming and concurrency bound as
+    generate_audio. Returns (script, audio_files); script is None if
+    generation failed, audio_files is None if any line failed to synthesize.
+    """
+    concurrency = concurrency or AUDIO_CONCURRENCY
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(i, line):
+        async with semaphore:
+            return await synthesize_line(i, line, output_path / f"line_{i:03d}.mp3")
+
+    script = []
+    tasks = []
+    try:
+        async for line in stream_script(articles, map_reduce):
+            tasks.append(asyncio.create_task(run(len(script), line)))
+            script.append(line)
+    except Exception as e:
+        log(f"Error generating script: {e}", "error")
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return None, None
+
+    if not script:
+        return None, None
+
+    log(f"Script complete ({len(script)} lines); waiting for audio...")
+    audio_files = await asyncio.gather(*tasks)
+
+    failed = [i for i, path in enumerate(audio_files) if path is None]
+    if failed:
+        log(f"Failed to generate audio for lines: {failed}", "error")
+        return script, None
+
+    log(f"Generated {len(audio_files)} audio clips in {output_dir} "
+        f"({sum(is_buffer(clip) for clip in audio_files)} kept in memory)")
+    return script, audio_files
+
 def save_to_supabase(script, articles):
     """Save the generated script and metadata to Supabase."""
-    if not all([SUPABASE_URL, SUPABASE_KEY, USER_ID]):
-        print("Error: Missing Supabase credentials. Skipping Supabase save.")
+    if not all([SUPABASE_URL, SUPABASE_KEY, USER_ID]) or not supabase_client:
+        log("Error: Missing Supabase credentials. Skipping Supabase save.", "error")
         return None
 
-    url = f"{SUPABASE_URL}/rest/v1/podcast_episodes"
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=representation"
-    }
-
     # Generate metadata
     article_ids = [art["id"] for art in articles]
     date_str = datetime.now().strftime("%B %d, %Y")
@@ -155,109 +329,268 @@ def save_to_supabase(script, articles):
     }
 
     try:
-        response = requests.post(url, headers=headers, json=payload)
+        response = supabase_client.post(
+            "/rest/v1/podcast_episodes",
+            json=payload,
+            headers={"Prefer": "return=representation"}
+        )
         if response.status_code in [201, 200]:
             created_episode = response.json()[0]
-            print(f"Episode saved to Supabase (ID: {created_episode['id']})")
+            log(f"Episode saved to Supabase (ID: {created_episode['id']})")
             return created_episode["id"]
         else:
-            print(f"Error saving to Supabase: {response.status_code} - {response.text}")
+            log(f"Error saving to Supabase: {response.status_code} - {response.text}", "error")
             return None
     except Exception as e:
-        print(f"Error saving to Supabase: {e}")
+        log(f"Error saving to Supabase: {e}", "error")
         return None
 
 def upload_audio_to_supabase(file_path, episode_id):
     """Uploads the podcast MP3 to Supabase Storage and returns the public URL."""
     if not supabase_client:
-        print("Error: Supabase client not initialized. Cannot upload audio.")
+        log("Error: Supabase client not initialized. Cannot upload audio.", "error")
         return None
 
     filename = f"episode_{episode_id}.mp3"
     
     try:
         with open(file_path, 'rb') as f:
-            supabase_client.storage.from_("podcasts").upload(
-                path=filename,
-                file=f,
-                file_options={"content-type": "audio/mpeg"}
-            )
-        print(f"Uploaded audio to Supabase Storage: {filename}")
-        
-        # Get public URL
-        res = supabase_client.storage.from_("podcasts").get_public_url(filename)
-        return res
+            public_url = supabase_client.upload("podcasts", filename, f, content_type="audio/mpeg")
+        log(f"Uploaded audio to Supabase Storage: {filename}")
+        return public_url
     except Exception as e:
-        print(f"Error uploading audio to Supabase: {e}")
+        log(f"Error uploading audio to Supabase: {e}", "error")
         return None
 
-def update_episode_audio_url(episode_id, audio_url):
-    """Updates the database record with the public audio URL."""
+def upload_renditions_to_supabase(episode_renditions, episode_id):
+    """Uploads every rendition next to the episode MP3; returns the list to store in audio_renditions."""
+    if not supabase_client:
+        return []
+
+    def upload(rendition):
+        filename = renditions.storage_name(f"episode_{episode_id}", rendition)
+        try:
+            with open(rendition["path"], "rb") as f:
+                return supabase_client.upload("podcasts", filename, f, content_type=rendition["mime"])
+        except Exception as e:
+            log(f"Error uploading {filename} to Supabase: {e}", "error")
+            return None
+
+    published = renditions.publish(episode_renditions, upload)
+    log(f"Uploaded {len(published)} audio renditions")
+    return published
+
+def update_episode_audio_url(episode_id, audio_url, episode_stats=None, audio_renditions=None):
+    """Updates the database record with the public audio URL (plus duration/size and renditions, if known)."""
     if not supabase_client:
         return False
         
+    payload = {"audio_url": audio_url, **(episode_stats or {})}
+    if audio_renditions:
+        payload["audio_renditions"] = audio_renditions
     try:
-        supabase_client.table("podcast_episodes").update(
-            {"audio_url": audio_url}
-        ).eq("id", episode_id).execute()
-        print(f"Updated database record for episode {episode_id} with audio URL.")
+        response = supabase_client.patch(
+            "/rest/v1/podcast_episodes",
+            params={"id": f"eq.{episode_id}"},
+            json=payload
+        )
+        if response.status_code not in [200, 204]:
+            log(f"Error updating database with audio URL: {response.status_code} - {response.text}", "error")
+            return False
+        log(f"Updated database record for episode {episode_id} with audio URL.")
         return True
     except Exception as e:
-        print(f"Error updating database with audio URL: {e}")
+        log(f"Error updating database with audio URL: {e}", "error")
         return False
 
 def save_script_locally(script, filename="podcast/script.json"):
     """Save the generated script to a local file."""
     with open(filename, "w") as f:
         json.dump(script, f, indent=2)
-    print(f"Script saved locally to {filename}")
+    log(f"Script saved locally to {filename}")
 
-    print(f"Script saved locally to {filename}")
+def episode_metadata(articles):
+    """ID3 tags for the assembled episode."""
+    return {
+        "title": f"Listen Later: {datetime.now().strftime('%B %d, %Y')}",
+        "artist": "Listen Later",
+        "album": "Stash Podcast",
+        "description": "Discussing: " + ", ".join([art["title"] for art in articles])
+    }
 
-async def main():
-    # Integration test: Fetch articles and generate script
-    print("Fetching articles...")
-    articles = fetch_recent_articles(limit=3) # Limit to 3 for testing
-    
-    if articles:
-        print(f"Generating script for {len(articles)} articles...")
-        script = generate_script(articles)
-        
+def episode_stats(episode_file):
+    """duration_seconds/size_bytes for podcast_episodes, read from the MP3 frame headers."""
+    try:
+        index = index_file(episode_file)
+    except (Mp3Error, OSError, ValueError) as e:
+        log(f"Could not read duration of {episode_file}: {e}", "warning")
+        return {}
+    return {"duration_seconds": round(index.duration), "size_bytes": index.size_bytes}
+
+def episode_chapters(script, articles):
+    """
+    One chapter per article segment: a new chapter starts wherever the
+    script's "article" field moves to a different article.
+    """
+    chapters = []
+    current = None
+    for i, line in enumerate(script):
+        number = line.get("article")
+        if not isinstance(number, int) or not 1 <= number <= len(articles) or number == current:
+            continue
+        chapters.append({"title": articles[number - 1]["title"], "start_line": i})
+        current = number
+    return chapters
+
+def script_words(script):
+    return sum(len(line["text"].split()) for line in script)
+
+def file_size(path):
+    """Size of `path` for the metrics, 0 if it can't be read."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def clips_size(clips):
+    return sum(len(clip) if is_buffer(clip) else file_size(clip) for clip in clips)
+
+def build_pipeline(map_reduce=False, stream=False, manifest=None, workspace=None):
+    """
+    Wire the episode stages together by their inputs and outputs (see
+    pipeline.py). The episode row is inserted while audio is synthesized,
+    and upload starts as soon as assembly and the insert have both finished.
+    With a `manifest`, completed stages are recorded and valid ones skipped.
+    Clips go to `workspace` (default: a fresh one for the manifest's run).
+    """
+    workspace = workspace or Workspace(manifest.run_id if manifest else new_run_id())
+    def fetch():
+        articles = fetch_recent_articles(limit=3) # Limit to 3 for testing
+        if not articles:
+            log("No recent articles found to process.")
+            return None
+        log(f"Generating script for {len(articles)} articles...")
+        metrics.count("podcast", "fetch", words=sum(len(art["content"].split()) for art in articles))
+        return articles
+
+    async def write_script(articles):
+        if map_reduce:
+            script = await generate_script_map_reduce(articles)
+        else:
+            script = await asyncio.to_thread(generate_script, articles)
         if script:
-            save_script_locally(script)
-            episode_id = save_to_supabase(script, articles)
-            
-            print("\nPreview of first 3 lines:")
+            metrics.count("podcast", "script", words=script_words(script))
+            log("Preview of first 3 lines:")
             for line in script[:3]:
-                print(f"{line['speaker']}: {line['text']}")
-                
-            # Generate Audio
-            await generate_audio(script)
-
-            # Assemble Episode
-            print("Assembling episode...")
-            metadata = {
-                "title": f"Listen Later: {datetime.now().strftime('%B %d, %Y')}",
-                "artist": "Listen Later",
-                "album": "Stash Podcast",
-                "description": "Discussing: " + ", ".join([art["title"] for art in articles])
-            }
-            final_audio = assemble_episode("podcast/temp_audio", "podcast/output/episode.mp3", metadata)
-            
-            if final_audio:
-                print(f"Podcast generated successfully: {final_audio}")
-                if episode_id:
-                    print("Uploading audio to Supabase...")
-                    audio_url = upload_audio_to_supabase("podcast/output/episode.mp3", episode_id)
-                    if audio_url:
-                        update_episode_audio_url(episode_id, audio_url)
-            else:
-                print("Failed to assemble episode.")
-            
-        else:
-            print("Failed to generate script.")
+                log(f"{line['speaker']}: {line['text']}")
+        return script
+
+    async def synthesize_script(script):
+        audio_files = await generate_audio(script, workspace.clips_dir)
+        if audio_files:
+            metrics.count("podcast", "audio", bytes=clips_size(audio_files), words=script_words(script))
+        return audio_files
+
+    async def stream_script_and_audio(articles):
+        # Audio is synthesized line by line while the script streams in
+        script, audio_files = await stream_script_to_audio(articles, workspace.clips_dir, map_reduce)
+        if script and audio_files:
+            metrics.count("podcast", "script+audio", bytes=clips_size(audio_files), words=script_words(script))
+        return {"script": script, "audio_files": audio_files}
+
+    def save_locally(script):
+        save_script_locally(script)
+        return "podcast/script.json"
+
+    def assemble(audio_files, script, articles):
+        log("Assembling episode...")
+        final_audio = assemble_episode(audio_files, "podcast/output/episode.mp3", episode_metadata(articles),
+                                       chapters=episode_chapters(script, articles))
+        if not final_audio:
+            return None
+        log(f"Podcast generated successfully: {final_audio}")
+        stats = episode_stats(final_audio)
+        metrics.count("podcast", "assemble", bytes=stats.get("size_bytes", 0),
+                      audio_seconds=stats.get("duration_seconds", 0))
+        return {"episode_file": final_audio, "episode_stats": stats}
+
+    def upload(episode_file, episode_id):
+        log("Uploading audio to Supabase...")
+        audio_url = upload_audio_to_supabase(episode_file, episode_id)
+        if audio_url:
+            metrics.count("podcast", "upload", bytes=file_size(episode_file))
+        return audio_url
+
+    def encode_renditions(episode_file):
+        # Runs alongside the main upload; an empty list just means no extras
+        return renditions.encode_renditions(episode_file)
+
+    stages = [Stage("fetch", fetch, outputs=["articles"])]
+    if stream:
+        stages.append(Stage("script+audio", stream_script_and_audio, ["articles"], ["script", "audio_files"],
+                            files=["audio_files"]))
     else:
-        print("No recent articles found to process.")
+        stages.append(Stage("script", write_script, ["articles"], ["script"]))
+        stages.append(Stage("audio", synthesize_script, ["script"], ["audio_files"], files=["audio_files"]))
+    stages += [
+        Stage("save_local", save_locally, ["script"], ["script_file"], files=["script_file"]),
+        Stage("save_episode", save_to_supabase, ["script", "articles"], ["episode_id"]),
+        Stage("assemble", assemble, ["audio_files", "script", "articles"], ["episode_file", "episode_stats"],
+              files=["episode_file"]),
+        Stage("upload", upload, ["episode_file", "episode_id"], ["audio_url"]),
+        Stage("renditions", encode_renditions, ["episode_file"], ["episode_renditions"]),
+        Stage("upload_renditions", upload_renditions_to_supabase, ["episode_renditions", "episode_id"],
+              ["audio_renditions"]),
+        Stage("update_url", update_episode_audio_url,
+              ["episode_id", "audio_url", "episode_stats", "audio_renditions"]),
+    ]
+    return Pipeline(stages, manifest)
+
+async def main(map_reduce=False, stream=False, resume=None):
+    if resume:
+        manifest = RunManifest.load(resume)
+        if not manifest:
+            log(f"Error: no run manifest found for '{resume}'.", "error")
+            return False
+        # Same stage layout as the original run, so its records line up
+        map_reduce = manifest.options.get("map_reduce", map_reduce)
+        stream = manifest.options.get("stream", stream)
+        log(f"Resuming run {manifest.run_id}...")
+    else:
+        manifest = RunManifest.create(options={"map_reduce": map_reduce, "stream": stream})
+        log(f"Run {manifest.run_id} (resume with --resume {manifest.run_id})")
+
+    # Keyed by run id, so a resumed run finds its clips again
+    workspace = Workspace(manifest.run_id)
+    pipeline = build_pipeline(map_reduce, stream, manifest, workspace)
+    with jsonlog.context(run_id=manifest.run_id):
+        log("Fetching articles...")
+        ok = await pipeline.run()
+
+    print("\n" + pipeline.report())
+    pipeline.write_summary()
+    if METRICS_FILE:
+        try:
+            metrics.REGISTRY.write(METRICS_FILE)
+        except OSError as e:
+            log(f"Could not write metrics to {METRICS_FILE}: {e}", "warning")
+    if ok:
+        workspace.cleanup()
+    elif "articles" not in pipeline.values:
+        # Nothing to make an episode from; there is no failure to resume
+        return None
+    return ok
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Generate the Listen Later podcast episode.")
+    parser.add_argument("--map-reduce", action="store_true",
+                        help="outline each article separately (cached), then write the script from the outlines")
+    parser.add_argument("--stream", action="store_true",
+                        help="stream the script from Gemini and synthesize lines as they arrive")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="resume a failed run (or 'latest'), skipping stages whose outputs are still valid")
+    args = parser.parse_args()
+
+    ok = asyncio.run(main(map_reduce=args.map_reduce, stream=args.stream, resume=args.resume))
+    # Non-zero only when a run failed partway, so CI can retry it with --resume
+    sys.exit(1 if ok is False else 0)
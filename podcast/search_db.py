@@ -1,30 +1,84 @@
+"""
+Search saved articles offline through the local mirror (see mirror.py).
+
+    python podcast/search_db.py sync [--full] [--prune]
+    python podcast/search_db.py search "query words" [--limit N] [--archived]
+
+`sync` brings the mirror up to date with Supabase; only rows changed since
+the last sync are downloaded. `search` never touches the network: it runs
+a ranked FTS5 query against the mirror.
+"""
+
 import os
-from supabase import create_client
-
-def main():
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-    supabase = create_client(url, key)
-
-    # Get all tables
-    res = supabase.rpc("get_tables").execute()
-    # Actually, rpc get_tables might not exist. 
-    # Let's use the list from previous list_tables call.
-    tables = [
-        "saves", "folders", "podcast_episodes", "users" # Add more if needed
-    ]
-
-    for table in tables:
-        print(f"Searching in {table}...")
-        try:
-            # Simple select everything and check in python to avoids complex ILIKE for all columns
-            res = supabase.table(table).select("*").execute()
-            for row in res.data:
-                row_str = str(row)
-                if "Stealth" in row_str:
-                    print(f"Found match in {table}: {row}")
-        except Exception as e:
-            print(f"Error searching {table}: {e}")
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+from mirror import Mirror
+from pagination import FetchError
+from supabase_http import SupabaseClient, SupabaseError
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+USER_ID = os.getenv("USER_ID")
+
+
+def sync(mirror, full=False, prune=False):
+    if not all([SUPABASE_URL, SUPABASE_KEY]):
+        print("Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set to sync")
+        return False
+    client = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
+    if full:
+        mirror.reset()
+    started = time.perf_counter()
+    try:
+        count = mirror.sync(client, USER_ID)
+        removed = mirror.prune(client, USER_ID) if prune else 0
+    except (FetchError, SupabaseError) as e:
+        print(f"Error syncing mirror: {e}")
+        return False
+    cursor = mirror.cursor()
+    print(f"Synced {count} saves ({removed} removed) in {time.perf_counter() - started:.1f}s; "
+          f"up to date as of {cursor[0] if cursor else 'never'}")
+    return True
+
+
+def search(mirror, query, limit=20, include_archived=False):
+    started = time.perf_counter()
+    results = mirror.search(query, limit, USER_ID, include_archived)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for i, result in enumerate(results, 1):
+        print(f"{i}. {result['title'] or '(untitled)'} ({result['site_name'] or 'Unknown'})")
+        print(f"   {result['snippet']}")
+        if result["url"]:
+            print(f"   {result['url']}")
+    print(f"{len(results)} results in {elapsed_ms:.1f} ms")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search saves through a local full-text mirror.")
+    parser.add_argument("--db", help="mirror database file (default: $STASH_MIRROR_DB or ~/.cache/stash/mirror.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser("sync", help="pull saves changed since the last sync")
+    sync_parser.add_argument("--full", action="store_true", help="re-read every save")
+    sync_parser.add_argument("--prune", action="store_true", help="also drop saves deleted upstream")
+
+    search_parser = commands.add_parser("search", help="ranked full-text search, offline")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=20)
+    search_parser.add_argument("--archived", action="store_true", help="include archived saves")
+
+    args = parser.parse_args(argv)
+    with Mirror(args.db) as mirror:
+        if args.command == "sync":
+            return sync(mirror, args.full, args.prune)
+        return search(mirror, args.query, args.limit, args.archived)
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,174 @@
+"""
+Shared pooled HTTP client for Supabase REST, RPC and Storage calls.
+
+One `requests.Session` per client keeps TLS connections alive between calls
+(sized for the worker pools that share it), every request gets a timeout,
+and transient failures (connection errors, timeouts, 429 and 5xx) are
+retried with full-jitter exponential backoff. Non-idempotent requests are
+only retried when the caller says they are safe to repeat.
+
+Async callers use the `a*` variants, which run the same pooled request on a
+worker thread so the event loop never blocks on the network.
+"""
+
+import time
+import random
+import asyncio
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+UPLOAD_TIMEOUT = (5, 300)
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 10.0
+POOL_SIZE = 16
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "PATCH"}
+
+
+class SupabaseError(Exception):
+    """Raised when a request fails after all retries."""
+
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Full-jitter exponential backoff for the given (0-based) retry."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class SupabaseClient:
+    """Pooled client bound to one Supabase project and API key."""
+
+    def __init__(self, url, key, timeout=DEFAULT_TIMEOUT, max_retries=MAX_RETRIES, pool_size=POOL_SIZE):
+        self.url = (url or "").rstrip("/")
+        self.key = key
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def headers(self, extra=None):
+        headers = {
+            "apikey": self.key,
+            "Authorization": f"Bearer {self.key}",
+            "Content-Type": "application/json",
+        }
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def _url(self, path):
+        return path if path.startswith(("http://", "https://")) else f"{self.url}{path}"
+
+    def request(self, method, path, params=None, json=None, data=None, headers=None,
+                timeout=None, retry=None):
+        """
+        Send a request, retrying transient failures.
+
+        `path` is either relative to the project URL ("/rest/v1/saves") or
+        absolute. `retry` defaults to True for idempotent methods. Returns
+        the final response (which may still be an error status); raises
+        SupabaseError only when no response could be obtained.
+        """
+        method = method.upper()
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        attempts = self.max_retries + 1 if retry else 1
+
+        for attempt in range(attempts):
+            if attempt and hasattr(data, "seek"):
+                data.seek(0)
+            try:
+                response = self.session.request(
+                    method,
+                    self._url(path),
+                    params=params,
+                    json=json,
+                    data=data,
+                    headers=self.headers(headers),
+                    timeout=timeout or self.timeout,
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == attempts - 1:
+                    raise SupabaseError(f"{method} {path} failed: {e}") from e
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                return response
+
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else backoff_delay(attempt)
+            time.sleep(min(delay, BACKOFF_CAP))
+
+    def get(self, path, params=None, headers=None, **kwargs):
+        return self.request("GET", path, params=params, headers=headers, **kwargs)
+
+    def post(self, path, json=None, headers=None, **kwargs):
+        return self.request("POST", path, json=json, headers=headers, **kwargs)
+
+    def patch(self, path, json=None, headers=None, **kwargs):
+        return self.request("PATCH", path, json=json, headers=headers, **kwargs)
+
+    # -- REST / RPC helpers -------------------------------------------------
+
+    def rpc(self, function, args=None, retry=False):
+        """Call a Postgres function exposed through PostgREST."""
+        response = self.post(f"/rest/v1/rpc/{function}", json=args or {}, retry=retry)
+        if response.status_code not in [200, 204]:
+            raise SupabaseError(f"RPC {function} failed: {response.status_code} - {response.text}", response)
+        return response.json() if response.content else None
+
+    # -- Storage ------------------------------------------------------------
+
+    def upload(self, bucket, path, data, content_type="application/octet-stream", upsert=True):
+        """
+        Upload `data` (bytes or a binary file object, streamed from disk) to
+        Storage and return the object's public URL.
+        """
+        response = self.request(
+            "POST",
+            f"/storage/v1/object/{bucket}/{path}",
+            data=data,
+            headers={"Content-Type": content_type, "x-upsert": "true" if upsert else "false"},
+            timeout=UPLOAD_TIMEOUT,
+            retry=upsert,  # only an upsert is safe to repeat
+        )
+        if response.status_code not in [200, 201]:
+            raise SupabaseError(f"Storage upload failed: {response.status_code} - {response.text}", response)
+        return self.public_url(bucket, path)
+
+    def public_url(self, bucket, path):
+        return f"{self.url}/storage/v1/object/public/{bucket}/{path}"
+
+    # -- Async variants -----------------------------------------------------
+
+    async def arequest(self, method, path, **kwargs):
+        return await asyncio.to_thread(self.request, method, path, **kwargs)
+
+    async def aget(self, path, params=None, headers=None, **kwargs):
+        return await asyncio.to_thread(self.get, path, params, headers, **kwargs)
+
+    async def apost(self, path, json=None, headers=None, **kwargs):
+        return await asyncio.to_thread(self.post, path, json, headers, **kwargs)
+
+    async def apatch(self, path, json=None, headers=None, **kwargs):
+        return await asyncio.to_thread(self.patch, path, json, headers, **kwargs)
+
+    async def arpc(self, function, args=None, retry=False):
+        return await asyncio.to_thread(self.rpc, function, args, retry)
+
+    async def aupload(self, bucket, path, data, content_type="application/octet-stream", upsert=True):
+        return await asyncio.to_thread(self.upload, bucket, path, data, content_type, upsert)
+
+    def close(self):
+        self.session.close()
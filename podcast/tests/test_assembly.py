@@ -2,7 +2,11 @@
 Tests for podcast/assembly.py
 
 These tests validate that assemble_episode:
-  - Handles empty directories gracefully
+  - Assembles exactly the clips it is given, in order, from disk or memory
+  - Concatenates valid clips in-process without calling ffmpeg
+  - Writes a Xing header with a seek table into the output
+  - Falls back to ffmpeg when a clip can't be handled in-process
+  - Handles an empty clip list gracefully
   - Builds the correct ffmpeg command with metadata
   - Returns the output path on success
   - Returns None when ffmpeg fails (CalledProcessError)
@@ -19,12 +23,23 @@ import subprocess
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
 import assembly
+import mp3
+import mp3index
+
+
+def silent_clip(frames):
+    h = mp3.parse_header(int.from_bytes(mp3.build_header(), "big"))
+    return mp3.silent_frame(h) * frames
+
+
+def clips_in(directory):
+    return sorted(str(p) for p in Path(directory).glob("*.mp3"))
 
 
 class TestAssembleEpisode:
     def test_returns_none_when_no_audio_files(self, tmp_path):
-        """Should return None and print message when directory has no .mp3 files."""
-        result = assembly.assemble_episode(str(tmp_path), str(tmp_path / "out.mp3"))
+        """Should return None and print message when there are no clips."""
+        result = assembly.assemble_episode([], str(tmp_path / "out.mp3"))
         assert result is None
 
     def test_calls_ffmpeg_with_correct_base_args(self, tmp_path):
@@ -36,7 +51,7 @@ class TestAssembleEpisode:
 
         with patch("assembly.subprocess.run") as mock_run:
             mock_run.return_value = MagicMock(returncode=0)
-            result = assembly.assemble_episode(str(tmp_path), output)
+            result = assembly.assemble_episode(clips_in(tmp_path), output)
 
         assert result is not None
         args = mock_run.call_args[0][0]  # The command list
@@ -54,7 +69,7 @@ class TestAssembleEpisode:
 
         with patch("assembly.subprocess.run") as mock_run:
             mock_run.return_value = MagicMock(returncode=0)
-            assembly.assemble_episode(str(tmp_path), output, metadata=metadata)
+            assembly.assemble_episode(clips_in(tmp_path), output, metadata=metadata)
 
         args = mock_run.call_args[0][0]
         args_str = " ".join(args)
@@ -69,7 +84,7 @@ class TestAssembleEpisode:
 
         with patch("assembly.subprocess.run") as mock_run:
             mock_run.return_value = MagicMock(returncode=0)
-            result = assembly.assemble_episode(str(tmp_path), output)
+            result = assembly.assemble_episode(clips_in(tmp_path), output)
 
         assert result == output
 
@@ -82,7 +97,7 @@ class TestAssembleEpisode:
             mock_run.side_effect = subprocess.CalledProcessError(
                 returncode=1, cmd="ffmpeg", stderr=b"Error"
             )
-            result = assembly.assemble_episode(str(tmp_path), output)
+            result = assembly.assemble_episode(clips_in(tmp_path), output)
 
         assert result is None
 
@@ -93,6 +108,97 @@ class TestAssembleEpisode:
 
         with patch("assembly.subprocess.run") as mock_run:
             mock_run.return_value = MagicMock(returncode=0)
-            assembly.assemble_episode(str(tmp_path), nested_output)
+            assembly.assemble_episode(clips_in(tmp_path), nested_output)
 
         assert Path(nested_output).parent.exists()
+
+
+    def test_ffmpeg_gets_in_memory_clips_as_files(self, tmp_path):
+        (tmp_path / "line_000.mp3").write_bytes(b"on disk")
+        listed = []
+
+        def fake_run(cmd, **kwargs):
+            list_file = cmd[cmd.index("-i") + 1]
+            for line in Path(list_file).read_text().splitlines():
+                listed.append(Path(line[len("file '"):-1]).read_bytes())
+            return MagicMock(returncode=0)
+
+        with patch("assembly.subprocess.run", side_effect=fake_run):
+            result = assembly.assemble_episode([str(tmp_path / "line_000.mp3"), b"in memory"],
+                                               str(tmp_path / "out.mp3"), engine="ffmpeg")
+
+        assert result == str(tmp_path / "out.mp3")
+        assert listed == [b"on disk", b"in memory"]
+        assert list(tmp_path.glob("*.txt")) == []
+
+
+class TestInProcessEngine:
+    def test_concatenates_without_ffmpeg(self, tmp_path):
+        (tmp_path / "line_000.mp3").write_bytes(silent_clip(3))
+        (tmp_path / "line_001.mp3").write_bytes(silent_clip(4))
+        output = tmp_path / "out" / "episode.mp3"
+
+        with patch("assembly.subprocess.run") as mock_run:
+            result = assembly.assemble_episode(clips_in(tmp_path), str(output), {"title": "Ep"}, engine="python")
+
+        mock_run.assert_not_called()
+        assert result == str(output)
+        stream = mp3.scan(output.read_bytes())
+        assert stream.frame_count == 7
+        assert stream.vbr_tag == b"Info"
+
+    def test_writes_seek_table(self, tmp_path):
+        (tmp_path / "line_000.mp3").write_bytes(silent_clip(30))
+        (tmp_path / "line_001.mp3").write_bytes(silent_clip(70))
+        output = tmp_path / "episode.mp3"
+
+        assembly.assemble_episode(clips_in(tmp_path), str(output), engine="python")
+
+        data = output.read_bytes()
+        offset, length = mp3.scan(data).vbr_frame
+        fields = mp3index.read_xing(data[offset:offset + length])
+        assert fields["frames"] == 100
+        assert len(fields["toc"]) == 100
+
+    def test_falls_back_to_ffmpeg_for_unusable_clips(self, tmp_path):
+        (tmp_path / "line_000.mp3").write_bytes(b"not audio")
+        output = str(tmp_path / "out.mp3")
+
+        with patch("assembly.subprocess.run") as mock_run:
+            mock_run.return_value = MagicMock(returncode=0)
+            result = assembly.assemble_episode(clips_in(tmp_path), output, engine="python")
+
+        mock_run.assert_called_once()
+        assert result == output
+
+    def test_ffmpeg_engine_skips_in_process_path(self, tmp_path):
+        (tmp_path / "line_000.mp3").write_bytes(silent_clip(3))
+
+        with patch("assembly.subprocess.run") as mock_run, patch("assembly.mp3.concat") as mock_concat:
+            mock_run.return_value = MagicMock(returncode=0)
+            assembly.assemble_episode(clips_in(tmp_path), str(tmp_path / "out.mp3"), engine="ffmpeg")
+
+        mock_concat.assert_not_called()
+        mock_run.assert_called_once()
+
+    def test_only_listed_clips_are_assembled(self, tmp_path):
+        # A leftover clip from a longer earlier run must not leak in
+        (tmp_path / "line_000.mp3").write_bytes(silent_clip(3))
+        (tmp_path / "line_001.mp3").write_bytes(silent_clip(5))
+        output = tmp_path / "out" / "episode.mp3"
+
+        assembly.assemble_episode([str(tmp_path / "line_000.mp3")], str(output), engine="python")
+
+        assert mp3.scan(output.read_bytes()).frame_count == 3
+
+    def test_concatenates_in_memory_clips(self, tmp_path):
+        (tmp_path / "line_001.mp3").write_bytes(silent_clip(4))
+        output = tmp_path / "episode.mp3"
+
+        with patch("assembly.subprocess.run") as mock_run:
+            result = assembly.assemble_episode([silent_clip(3), str(tmp_path / "line_001.mp3"), silent_clip(2)],
+                                               str(output), engine="python")
+
+        mock_run.assert_not_called()
+        assert result == str(output)
+        assert mp3.scan(output.read_bytes()).frame_count == 9
@@ -0,0 +1,91 @@
+"""
+Tests for podcast/benchmarks/corpus.py and podcast/benchmarks/suite.py
+
+Covers:
+  - corpus: seeded and reproducible, `saves` row shape, highlight-only to
+    50k-word bodies, written as a readable export
+  - suite: every benchmark runs on a tiny corpus, results document shape,
+    compare flags regressions/improvements/new/missing, compare exit status
+"""
+
+import sys
+import os
+import json
+import random
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from benchmarks import corpus, suite
+from export import read_export
+
+
+class TestCorpus:
+    def test_same_seed_same_corpus(self):
+        assert list(corpus.generate_saves(5, seed=3)) == list(corpus.generate_saves(5, seed=3))
+        assert list(corpus.generate_saves(5, seed=3)) != list(corpus.generate_saves(5, seed=4))
+
+    def test_row_shape_matches_fixture(self):
+        with open(os.path.join(os.path.dirname(__file__), "..", "articles.json")) as f:
+            fixture = json.load(f)[0]
+        row = next(corpus.generate_saves(1))
+        assert set(row) == set(fixture) - {"fts"}
+
+    def test_body_sizes(self):
+        rng = random.Random(0)
+        counts = [corpus.word_count(rng) for _ in range(2000)]
+        assert min(counts) >= corpus.MIN_WORDS
+        assert max(counts) <= corpus.MAX_WORDS
+        assert max(counts) > 20_000
+
+        highlight = corpus.save_row(rng, 0, 40)
+        article = corpus.save_row(rng, 1, 5000)
+        assert highlight["content"] is None and len(highlight["highlight"].split()) >= 30
+        assert article["highlight"] is None and len(article["content"].split()) >= 4500
+
+    def test_write_corpus_is_an_export(self, tmp_path):
+        path = tmp_path / "corpus.ndjson.gz"
+        corpus.write_corpus(path, 7, seed=1, max_words=300, page_size=3)
+        assert list(read_export(path)) == list(corpus.generate_saves(7, seed=1, max_words=300))
+
+
+def result(**best):
+    return {"commit": "abc", "corpus": {"count": 1}, "benchmarks": {
+        name: {"min_s": s, "median_s": s, "mean_s": s, "rounds": 1} for name, s in best.items()}}
+
+
+class TestSuite:
+    def test_run_every_benchmark(self, capsys):
+        results = suite.run(count=6, rounds=1)
+
+        assert set(results["benchmarks"]) == set(suite.BENCHMARKS)
+        for timing in results["benchmarks"].values():
+            assert 0 < timing["min_s"] <= timing["median_s"]
+        assert results["corpus"]["count"] == 6
+        assert results["commit"]
+
+    def test_compare(self):
+        baseline = result(a=1.0, b=1.0, c=1.0, gone=1.0)
+        current = result(a=1.05, b=1.5, c=0.5, added=1.0)
+
+        rows = {row[0]: row for row in suite.compare(baseline, current, threshold=0.1)}
+
+        assert rows["a"][4] == "ok"
+        assert rows["b"][4] == "regression" and rows["b"][3] == pytest.approx(1.5)
+        assert rows["c"][4] == "faster"
+        assert rows["added"][4] == "new"
+        assert rows["gone"][4] == "missing"
+
+    def test_compare_command_fails_on_regression(self, tmp_path, capsys):
+        (tmp_path / "before.json").write_text(json.dumps(result(a=1.0)))
+        (tmp_path / "after.json").write_text(json.dumps(result(a=1.3)))
+
+        assert suite.main(["compare", str(tmp_path / "before.json"), str(tmp_path / "after.json")]) is False
+        assert "1 regression(s)" in capsys.readouterr().out
+        assert suite.main(["compare", str(tmp_path / "before.json"), str(tmp_path / "after.json"),
+                           "--threshold", "0.5"]) is True
+
+    def test_run_command_saves_results(self, tmp_path):
+        output = tmp_path / "results.json"
+        assert suite.main(["run", "--count", "3", "--rounds", "1", "--only", "clean_text", "--output", str(output)])
+        assert set(json.loads(output.read_text())["benchmarks"]) == {"clean_text"}
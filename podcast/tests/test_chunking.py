@@ -0,0 +1,62 @@
+"""
+Tests for podcast/chunking.py
+
+These tests validate that split_text:
+  - Never drops or reorders text
+  - Respects the chunk size limit
+  - Prefers paragraph, then sentence, then word boundaries
+"""
+
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chunking import split_text
+
+
+def _words(text):
+    return text.split()
+
+
+class TestSplitText:
+    def test_short_text_is_single_chunk(self):
+        assert split_text("Title.\n\nA short body.") == ["Title.\n\nA short body."]
+
+    def test_empty_text_has_no_chunks(self):
+        assert split_text("   \n\n  ") == []
+
+    def test_packs_paragraphs_up_to_limit(self):
+        text = "\n\n".join(["a" * 40, "b" * 40, "c" * 40])
+        chunks = split_text(text, max_chars=90)
+        assert chunks == ["a" * 40 + "\n\n" + "b" * 40, "c" * 40]
+
+    def test_splits_long_paragraph_between_sentences(self):
+        sentences = [f"Sentence number {i} ends here." for i in range(20)]
+        chunks = split_text(" ".join(sentences), max_chars=100)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert len(chunk) <= 100
+            assert chunk.endswith("ends here.")
+
+    def test_splits_overlong_sentence_between_words(self):
+        sentence = " ".join(["word"] * 100)
+        chunks = split_text(sentence, max_chars=50)
+
+        assert all(len(c) <= 50 for c in chunks)
+        assert _words(" ".join(chunks)) == _words(sentence)
+
+    @pytest.mark.parametrize("max_chars", [30, 200, 3000])
+    def test_never_drops_or_reorders_words(self, max_chars):
+        paragraphs = [
+            " ".join(f"P{p} sentence {s} has words! Really?" for s in range(15))
+            for p in range(10)
+        ]
+        text = "Title.\n\n" + "\n\n\n".join(paragraphs)
+
+        chunks = split_text(text, max_chars=max_chars)
+
+        assert _words(" ".join(chunks)) == _words(text)
+        assert all(len(c) <= max_chars for c in chunks)
@@ -0,0 +1,169 @@
+"""
+Tests for podcast/clip_cache.py
+
+Covers:
+  - clip_key: every synthesis parameter changes the key
+  - ClipCache: hit/miss, atomic writes and LRU eviction under the size cap
+  - synthesize / synthesize_bytes: cache hits skip edge-tts entirely
+edge-tts is mocked; no network calls are made.
+"""
+
+import sys
+import os
+import time
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import clip_cache
+from clip_cache import ClipCache, clip_key
+
+
+# ---------------------------------------------------------------------------
+# clip_key
+# ---------------------------------------------------------------------------
+
+class TestClipKey:
+    def test_is_stable(self):
+        assert clip_key("hello", "en-US-AvaNeural") == clip_key("hello", "en-US-AvaNeural")
+
+    @pytest.mark.parametrize("kwargs", [
+        {"text": "hello!"},
+        {"voice": "en-US-AndrewNeural"},
+        {"rate": "+10%"},
+        {"volume": "-10%"},
+        {"output_format": "audio-48khz-96kbitrate-mono-mp3"},
+    ])
+    def test_each_parameter_changes_key(self, kwargs):
+        base = {"text": "hello", "voice": "en-US-AvaNeural", "rate": "+0%", "volume": "+0%"}
+        assert clip_key(**{**base, **kwargs}) != clip_key(**base)
+
+    def test_fields_cannot_run_together(self):
+        assert clip_key("ab", "c") != clip_key("a", "bc")
+
+
+# ---------------------------------------------------------------------------
+# ClipCache
+# ---------------------------------------------------------------------------
+
+class TestClipCache:
+    def _clip(self, tmp_path, name, size):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        return path
+
+    def test_miss_returns_false(self, tmp_path):
+        cache = ClipCache(tmp_path / "cache")
+        assert cache.get("0" * 64, tmp_path / "out.mp3") is False
+        assert not (tmp_path / "out.mp3").exists()
+
+    def test_put_then_get_round_trips(self, tmp_path):
+        cache = ClipCache(tmp_path / "cache")
+        src = self._clip(tmp_path, "src.mp3", 10)
+        key = clip_key("hello", "voice")
+
+        cache.put(key, src)
+
+        assert cache.get(key, tmp_path / "out.mp3") is True
+        assert (tmp_path / "out.mp3").read_bytes() == src.read_bytes()
+
+    def test_put_and_read_bytes(self, tmp_path):
+        cache = ClipCache(tmp_path / "cache")
+        key = clip_key("hello", "voice")
+        assert cache.read(key) is None
+
+        cache.put(key, b"audio")
+
+        assert cache.read(key) == b"audio"
+        assert cache.get(key, tmp_path / "out.mp3") is True
+
+    def test_leaves_no_temp_files(self, tmp_path):
+        cache = ClipCache(tmp_path / "cache")
+        cache.put(clip_key("a", "v"), self._clip(tmp_path, "a.mp3", 10))
+        assert list((tmp_path / "cache").rglob("*.tmp")) == []
+
+    def test_failed_write_keeps_previous_clip(self, tmp_path):
+        cache = ClipCache(tmp_path / "cache")
+        key = clip_key("a", "v")
+        cache.put(key, self._clip(tmp_path, "a.mp3", 10))
+
+        with patch("clip_cache.os.replace", side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                cache.put(key, self._clip(tmp_path, "b.mp3", 20))
+
+        assert cache.path_for(key).stat().st_size == 10
+        assert list((tmp_path / "cache").rglob("*.tmp")) == []
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ClipCache(tmp_path / "cache", max_bytes=25)
+        keys = [clip_key(str(i), "v") for i in range(3)]
+
+        cache.put(keys[0], self._clip(tmp_path, "0.mp3", 10))
+        cache.put(keys[1], self._clip(tmp_path, "1.mp3", 10))
+        # Age both entries, then touch key 0 so key 1 becomes the LRU entry
+        for key in keys[:2]:
+            os.utime(cache.path_for(key), (time.time() - 100, time.time() - 100))
+        assert cache.get(keys[0], tmp_path / "hit.mp3")
+
+        cache.put(keys[2], self._clip(tmp_path, "2.mp3", 10))
+
+        assert cache.path_for(keys[0]).exists()
+        assert not cache.path_for(keys[1]).exists()
+        assert cache.path_for(keys[2]).exists()
+
+
+# ---------------------------------------------------------------------------
+# synthesize
+# ---------------------------------------------------------------------------
+
+class TestSynthesize:
+    @pytest.mark.asyncio
+    async def test_second_call_is_served_from_cache(self, tmp_path):
+        cache = ClipCache(tmp_path / "cache")
+
+        async def fake_save(path):
+            with open(path, "wb") as f:
+                f.write(b"audio")
+
+        communicate = MagicMock()
+        communicate.return_value.save = AsyncMock(side_effect=fake_save)
+
+        with patch("clip_cache.edge_tts.Communicate", communicate):
+            first = await clip_cache.synthesize("hi", "v", tmp_path / "1.mp3", cache=cache)
+            second = await clip_cache.synthesize("hi", "v", tmp_path / "2.mp3", cache=cache)
+
+        assert (first, second) == (False, True)
+        assert communicate.call_count == 1
+        assert (tmp_path / "2.mp3").read_bytes() == b"audio"
+
+    @pytest.mark.asyncio
+    async def test_works_without_cache(self, tmp_path):
+        communicate = MagicMock()
+        communicate.return_value.save = AsyncMock()
+
+        with patch("clip_cache.edge_tts.Communicate", communicate):
+            hit = await clip_cache.synthesize("hi", "v", tmp_path / "1.mp3", rate="+5%")
+
+        assert hit is False
+        communicate.assert_called_once_with("hi", "v", rate="+5%", volume="+0%")
+
+    @pytest.mark.asyncio
+    async def test_synthesize_bytes_streams_and_caches(self, tmp_path):
+        cache = ClipCache(tmp_path / "cache")
+
+        async def fake_stream():
+            yield {"type": "audio", "data": b"au"}
+            yield {"type": "WordBoundary", "offset": 0}
+            yield {"type": "audio", "data": b"dio"}
+
+        communicate = MagicMock()
+        communicate.return_value.stream = fake_stream
+
+        with patch("clip_cache.edge_tts.Communicate", communicate):
+            first = await clip_cache.synthesize_bytes("hi", "v", cache=cache)
+            second = await clip_cache.synthesize_bytes("hi", "v", cache=cache)
+
+        assert first == second == b"audio"
+        assert communicate.call_count == 1
+        assert list(tmp_path.glob("*.mp3")) == []
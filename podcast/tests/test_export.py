@@ -0,0 +1,211 @@
+"""
+Tests for podcast/export.py
+
+Covers:
+  - export_saves: pages through saves by (updated_at, id), one gzip member
+    per page, checkpoint after every page; later runs append only changes,
+    re-reading an overlap window for late commits without duplicating rows;
+    an interrupted run keeps its committed pages and the next run drops the
+    partial tail; --full (or a file shorter than its checkpoint) starts
+    over, even when there are no rows; only real columns are selected
+  - main: summary line, including a first run that finds nothing
+  - read_export: streams rows back, stops at the checkpointed size
+PostgREST is mocked with an in-memory table; no network calls are made.
+"""
+
+import sys
+import os
+import gzip
+import json
+import pytest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import export
+from export import export_saves, read_export, load_checkpoint, checkpoint_path, main
+from mirror import parse_timestamp
+from pagination import FetchError
+
+
+def save(i, updated, seconds=0, **fields):
+    row = {"id": f"id-{i:02d}", "user_id": "u1", "title": f"Save {i}", "content": "café " * i,
+           "updated_at": f"2026-10-17T08:{updated:02d}:{seconds:02d}+00:00"}
+    row.update(fields)
+    return row
+
+
+class FakeSaves:
+    """A `saves` table behind a PostgREST-style `get`, ordered by (updated_at, id)."""
+
+    def __init__(self, rows, fail_after=None):
+        self.rows = {row["id"]: row for row in rows}
+        self.requests = []
+        self.fail_after = fail_after
+
+    def get(self, url, headers=None, params=None):
+        self.requests.append(params)
+        if self.fail_after is not None and len(self.requests) > self.fail_after:
+            return MagicMock(status_code=503, text="unavailable")
+        rows = sorted(self.rows.values(), key=lambda r: (r["updated_at"], r["id"]))
+        if "user_id" in params:
+            rows = [r for r in rows if r["user_id"] == params["user_id"][3:]]
+        if "updated_at" in params:
+            since = parse_timestamp(params["updated_at"][4:])
+            rows = [r for r in rows if parse_timestamp(r["updated_at"]) >= since]
+        if "or" in params:
+            key = params["or"].split('updated_at.gt."')[1].split('"')[0]
+            last_id = params["or"].split('id.gt."')[1].split('"')[0]
+            rows = [r for r in rows if (r["updated_at"], r["id"]) > (key, last_id)]
+        return MagicMock(status_code=200, json=MagicMock(return_value=rows[:int(params["limit"])]))
+
+
+@pytest.fixture
+def upstream():
+    return FakeSaves([save(i, i) for i in range(5)])
+
+
+class TestExportSaves:
+    def test_first_export(self, tmp_path, upstream):
+        path = tmp_path / "exports" / "saves.ndjson.gz"
+
+        assert export_saves(path, upstream, "u1", page_size=2) == 5
+
+        assert [r["id"] for r in read_export(path)] == [f"id-{i:02d}" for i in range(5)]
+        assert upstream.requests[0]["order"] == "updated_at.asc,id.asc"
+        assert upstream.requests[0]["user_id"] == "eq.u1"
+        assert "or" not in upstream.requests[0] and "updated_at" not in upstream.requests[0]
+        checkpoint = load_checkpoint(path)
+        assert (checkpoint["updated_at"], checkpoint["id"], checkpoint["rows"]) == (save(4, 4)["updated_at"], "id-04", 5)
+        assert checkpoint["bytes"] == path.stat().st_size
+
+    def test_one_gzip_member_per_page(self, tmp_path, upstream):
+        path = tmp_path / "saves.ndjson.gz"
+        export_saves(path, upstream, page_size=2)
+        assert path.read_bytes().count(b"\x1f\x8b\x08") == 3
+
+    def test_later_runs_append_only_changes(self, tmp_path, upstream):
+        path = tmp_path / "saves.ndjson.gz"
+        export_saves(path, upstream)
+        upstream.rows["id-01"] = save(1, 30, title="Renamed")
+        upstream.rows["id-05"] = save(5, 31)
+        upstream.requests.clear()
+
+        assert export_saves(path, upstream) == 2
+
+        # Re-reads a minute behind the checkpoint (08:04) but skips what it already wrote
+        assert upstream.requests[0]["updated_at"] == "gte.2026-10-17T08:03:00+00:00"
+        rows = list(read_export(path))
+        assert [r["id"] for r in rows] == ["id-00", "id-01", "id-02", "id-03", "id-04", "id-01", "id-05"]
+        assert rows[5]["title"] == "Renamed"
+        assert load_checkpoint(path)["rows"] == 7
+
+    def test_late_commit_with_older_updated_at_is_exported(self, tmp_path, upstream):
+        path = tmp_path / "saves.ndjson.gz"
+        export_saves(path, upstream)
+        # Committed after id-04 was exported, but its transaction started earlier
+        upstream.rows["id-07"] = save(7, 3, seconds=30)
+
+        assert export_saves(path, upstream) == 1
+
+        assert [r["id"] for r in read_export(path)][-1] == "id-07"
+        checkpoint = load_checkpoint(path)
+        assert checkpoint["id"] == "id-04"  # the cursor never moves back
+        assert ["2026-10-17T08:03:30+00:00", "id-07"] in checkpoint["recent"]
+        assert export_saves(path, upstream) == 0
+
+    def test_selects_real_columns_only(self, tmp_path, upstream):
+        export_saves(tmp_path / "saves.ndjson.gz", upstream)
+
+        columns = upstream.requests[0]["select"].split(",")
+        assert "fts" not in columns and "*" not in columns
+        assert set(export.EXPORT_COLUMNS) <= set(columns)
+
+    def test_no_changes_appends_nothing(self, tmp_path, upstream):
+        path = tmp_path / "saves.ndjson.gz"
+        export_saves(path, upstream)
+        size = path.stat().st_size
+
+        assert export_saves(path, upstream) == 0
+        assert path.stat().st_size == size
+
+    def test_interrupted_export_resumes(self, tmp_path):
+        path = tmp_path / "saves.ndjson.gz"
+        upstream = FakeSaves([save(i, i) for i in range(6)], fail_after=1)
+
+        with pytest.raises(FetchError):
+            export_saves(path, upstream, page_size=3)
+        assert [r["id"] for r in read_export(path)] == ["id-00", "id-01", "id-02"]
+
+        # A half-written page after the checkpoint is dropped on the next run
+        with open(path, "ab") as f:
+            f.write(gzip.compress(b'{"id": "partial"}\n')[:10])
+        upstream.fail_after = None
+
+        assert export_saves(path, upstream, page_size=3) == 3
+        assert [r["id"] for r in read_export(path)] == [f"id-{i:02d}" for i in range(6)]
+
+    def test_full_starts_over(self, tmp_path, upstream):
+        path = tmp_path / "saves.ndjson.gz"
+        export_saves(path, upstream)
+
+        assert export_saves(path, upstream, full=True) == 5
+        assert len(list(read_export(path))) == 5
+
+    def test_full_with_no_rows_resets_checkpoint(self, tmp_path, upstream):
+        path = tmp_path / "saves.ndjson.gz"
+        export_saves(path, upstream)
+
+        assert export_saves(path, FakeSaves([]), full=True) == 0
+        assert load_checkpoint(path)["bytes"] == path.stat().st_size == 0
+
+        assert export_saves(path, upstream) == 5
+        assert [r["id"] for r in read_export(path)] == [f"id-{i:02d}" for i in range(5)]
+
+    def test_file_shorter_than_checkpoint_starts_over(self, tmp_path, upstream):
+        path = tmp_path / "saves.ndjson.gz"
+        export_saves(path, upstream)
+        path.write_bytes(b"")
+
+        assert export_saves(path, upstream) == 5
+        assert [r["id"] for r in read_export(path)] == [f"id-{i:02d}" for i in range(5)]
+
+
+class TestReadExport:
+    def test_stops_at_checkpoint(self, tmp_path, upstream):
+        path = tmp_path / "saves.ndjson.gz"
+        export_saves(path, upstream, page_size=2)
+        with open(path, "ab") as f:
+            f.write(gzip.compress(b'{"id": "in-progress"}\n'))
+
+        assert "in-progress" not in [r["id"] for r in read_export(path)]
+
+    def test_plain_file_without_checkpoint(self, tmp_path):
+        path = tmp_path / "fixture.ndjson.gz"
+        path.write_bytes(gzip.compress(b'{"id": "a"}\n\n') + gzip.compress(json.dumps({"id": "b"}).encode()))
+
+        assert not checkpoint_path(path).exists()
+        assert [r["id"] for r in read_export(path)] == ["a", "b"]
+
+    def test_is_lazy(self, tmp_path, upstream):
+        path = tmp_path / "saves.ndjson.gz"
+        export_saves(path, upstream)
+        rows = read_export(path)
+        assert next(rows)["id"] == "id-00"
+        rows.close()
+
+
+class TestMain:
+    def test_requires_credentials(self, monkeypatch, capsys):
+        monkeypatch.setattr("export.SUPABASE_URL", None)
+        assert main(["--output", "unused"]) is False
+        assert "must be set" in capsys.readouterr().out
+
+    def test_first_run_without_rows(self, monkeypatch, capsys, tmp_path):
+        monkeypatch.setattr("export.SUPABASE_URL", "https://example.supabase.co")
+        monkeypatch.setattr("export.SUPABASE_KEY", "key")
+        monkeypatch.setattr("export.SupabaseClient", lambda url, key: FakeSaves([]))
+
+        assert main(["--output", str(tmp_path / "saves.ndjson.gz")]) is True
+        assert "Appended 0 saves" in capsys.readouterr().out
+        assert load_checkpoint(tmp_path / "saves.ndjson.gz")["rows"] == 0
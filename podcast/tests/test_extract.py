@@ -2,12 +2,15 @@
 Tests for podcast/extract.py
 
 These tests validate the text cleaning logic and the article-fetching pipeline
-without making real network calls to Supabase. All HTTP requests are mocked.
+without making real network calls to Supabase. All HTTP requests are mocked
+at the shared client.
 """
 
 import sys
 import os
+import functools
 import pytest
+from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
 
 # Ensure the podcast directory is on the path so we can import modules
@@ -73,7 +76,7 @@ class TestFetchRecentArticles:
         mock_response.status_code = 200
         mock_response.json.return_value = [MOCK_ARTICLE]
 
-        with patch("extract.requests.get", return_value=mock_response):
+        with patch.object(extract.client, "get", return_value=mock_response):
             articles = extract.fetch_recent_articles()
 
         assert len(articles) == 1
@@ -89,7 +92,7 @@ class TestFetchRecentArticles:
         mock_response.status_code = 200
         mock_response.json.return_value = [article_no_content]
 
-        with patch("extract.requests.get", return_value=mock_response):
+        with patch.object(extract.client, "get", return_value=mock_response):
             articles = extract.fetch_recent_articles()
 
         assert articles[0]["content"] == "Excerpt text."
@@ -102,7 +105,7 @@ class TestFetchRecentArticles:
         mock_response.status_code = 200
         mock_response.json.return_value = [article_long]
 
-        with patch("extract.requests.get", return_value=mock_response):
+        with patch.object(extract.client, "get", return_value=mock_response):
             articles = extract.fetch_recent_articles()
 
         assert len(articles[0]["content"]) <= 5000
@@ -113,7 +116,7 @@ class TestFetchRecentArticles:
         mock_response.status_code = 500
         mock_response.text = "Internal Server Error"
 
-        with patch("extract.requests.get", return_value=mock_response):
+        with patch.object(extract.client, "get", return_value=mock_response):
             articles = extract.fetch_recent_articles()
 
         assert articles == []
@@ -125,7 +128,23 @@ class TestFetchRecentArticles:
         mock_response.status_code = 200
         mock_response.json.return_value = [article_no_site]
 
-        with patch("extract.requests.get", return_value=mock_response):
+        with patch.object(extract.client, "get", return_value=mock_response):
             articles = extract.fetch_recent_articles()
 
         assert articles[0]["site_name"] == "Unknown"
+
+    def test_reads_from_mirror_without_api_calls(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(extract, "Mirror", functools.partial(extract.Mirror, tmp_path / "mirror.db"))
+        monkeypatch.setattr(extract, "USER_ID", "user-001")
+        created_at = datetime.now(timezone.utc).isoformat()
+        with extract.Mirror() as m:
+            m.upsert([{**MOCK_ARTICLE, "user_id": "user-001", "created_at": created_at, "updated_at": created_at},
+                      {**MOCK_ARTICLE, "id": "other", "user_id": "user-002", "created_at": created_at}])
+            m.db.commit()
+
+        with patch.object(extract.client, "get") as mock_get:
+            articles = extract.fetch_recent_articles(source="mirror")
+
+        mock_get.assert_not_called()
+        assert [a["id"] for a in articles] == ["abc-123"]
+        assert articles[0]["site_name"] == "Test Site"
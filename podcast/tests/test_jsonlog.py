@@ -0,0 +1,154 @@
+"""
+Tests for podcast/jsonlog.py
+
+Covers:
+  - records: JSON lines with level, message, explicit and context fields
+  - echo: stdout lines, optional timestamps, no file without a path
+  - writer: batched writes, fsync on flush/close rather than per line,
+    size-based rotation, dropping (and reporting) records when the queue is full
+  - configure: swapping the default logger closes the old one
+"""
+
+import sys
+import os
+import json
+import asyncio
+import threading
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import jsonlog
+from jsonlog import JsonLog, context
+
+
+def records(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.fixture
+def logger(tmp_path):
+    log = JsonLog(tmp_path / "run.log", echo=False)
+    yield log
+    log.close()
+
+
+class TestRecords:
+    def test_fields(self, logger, tmp_path):
+        logger.log("hello")
+        logger.log("boom", "error", save_id="s1")
+        logger.close()
+
+        first, second = records(tmp_path / "run.log")
+        assert first["msg"] == "hello" and first["level"] == "info"
+        assert first["ts"].endswith("+00:00")
+        assert second == {"ts": second["ts"], "level": "error", "msg": "boom", "save_id": "s1"}
+
+    def test_context_fields(self, logger, tmp_path):
+        with context(save_id="s1"):
+            with context(stage="upload"):
+                logger.log("inner")
+            logger.log("outer")
+        logger.log("none")
+        logger.close()
+
+        assert [{k: r.get(k) for k in ("save_id", "stage")} for r in records(tmp_path / "run.log")] == [
+            {"save_id": "s1", "stage": "upload"},
+            {"save_id": "s1", "stage": None},
+            {"save_id": None, "stage": None},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_context_is_per_task(self, logger, tmp_path):
+        async def work(save_id):
+            with context(save_id=save_id):
+                await asyncio.sleep(0.01)
+                await asyncio.to_thread(logger.log, "done")
+
+        await asyncio.gather(work("a"), work("b"))
+        logger.close()
+
+        assert sorted(r["save_id"] for r in records(tmp_path / "run.log")) == ["a", "b"]
+
+
+class TestEcho:
+    def test_echo(self, capsys, tmp_path):
+        JsonLog(echo=True).log("plain")
+        JsonLog(echo=True, timestamps=True).log("stamped")
+
+        out = capsys.readouterr().out.splitlines()
+        assert out[0] == "plain"
+        assert out[1].startswith("[") and out[1].endswith("] stamped")
+
+    def test_no_file_without_path(self, tmp_path):
+        log = JsonLog(echo=False)
+        log.log("nowhere")
+        assert log.thread is None
+        assert log.flush() is True
+
+
+class TestWriter:
+    def test_fsync_is_batched(self, tmp_path, monkeypatch):
+        syncs = []
+        real_fsync = os.fsync
+        monkeypatch.setattr(jsonlog.os, "fsync", lambda fd: (syncs.append(fd), real_fsync(fd)))
+        log = JsonLog(tmp_path / "run.log", echo=False, fsync_interval=3600)
+
+        for i in range(200):
+            log.log(f"line {i}")
+        assert log.flush()
+        log.close()
+
+        assert len(records(tmp_path / "run.log")) == 200
+        assert 1 <= len(syncs) <= 3
+
+    def test_rotation(self, tmp_path):
+        log = JsonLog(tmp_path / "run.log", echo=False, max_bytes=2000, backups=2)
+        for i in range(100):
+            log.log(f"line {i:03d} " + "x" * 50)
+            if i % 10 == 9:
+                log.flush()
+        log.close()
+
+        files = sorted(p.name for p in tmp_path.iterdir())
+        assert files == ["run.log", "run.log.1", "run.log.2"]
+        assert all(p.stat().st_size < 2000 + 1000 for p in tmp_path.iterdir())
+        # Oldest rotated file first; only the most recent records are kept
+        kept = [r["msg"][:8] for name in ("run.log.2", "run.log.1", "run.log") for r in records(tmp_path / name)]
+        assert kept == sorted(kept) and kept[-1] == "line 099"
+        assert len(kept) < 100
+
+    def test_full_queue_drops_instead_of_blocking(self, tmp_path, monkeypatch):
+        log = JsonLog(tmp_path / "run.log", echo=False, queue_size=5)
+        release = threading.Event()
+        real_run = log._run
+        monkeypatch.setattr(log, "_run", lambda: (release.wait(5), real_run()))
+
+        for i in range(20):
+            log.log(f"line {i}")
+        assert log.dropped == 15
+        release.set()
+        log.close()
+
+        written = records(tmp_path / "run.log")
+        assert [r["msg"] for r in written[:5]] == [f"line {i}" for i in range(5)]
+        assert written[-1]["level"] == "warning" and "Dropped 15" in written[-1]["msg"]
+
+    def test_close_is_idempotent(self, logger):
+        logger.log("x")
+        logger.close()
+        logger.close()
+        assert logger.thread is None
+
+
+class TestConfigure:
+    def test_configure_replaces_default(self, tmp_path):
+        first = jsonlog.configure(tmp_path / "a.log", echo=False)
+        jsonlog.log("to a")
+        second = jsonlog.configure(tmp_path / "b.log", echo=False)
+        jsonlog.log("to b")
+        jsonlog.configure(None)
+
+        assert first.thread is None and second.thread is None
+        assert records(tmp_path / "a.log")[0]["msg"] == "to a"
+        assert records(tmp_path / "b.log")[0]["msg"] == "to b"
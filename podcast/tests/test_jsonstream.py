@@ -0,0 +1,74 @@
+"""
+Tests for podcast/jsonstream.py
+
+Covers:
+  - JsonArrayParser: elements emitted as soon as they close, for any chunking
+  - code fences and whitespace around the array
+  - strings containing brackets, braces and escaped quotes
+  - truncated and malformed input
+"""
+
+import sys
+import os
+import json
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from jsonstream import JsonArrayParser
+
+
+LINES = [
+    {"speaker": "Alex", "text": "Taylor, did you see this piece on local-first software?"},
+    {"speaker": "Taylor", "text": "Tricky {braces}, [brackets], \"quotes\" and a \\ backslash."},
+    {"speaker": "Alex", "text": "Unicode too: café — \U0001F3A7"},
+]
+
+
+def parse_in_chunks(text, size):
+    parser = JsonArrayParser()
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(parser.feed(text[i:i + size]))
+    parser.close()
+    return items
+
+
+class TestJsonArrayParser:
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+    def test_any_chunking_gives_same_result(self, size):
+        assert parse_in_chunks(json.dumps(LINES, indent=2), size) == LINES
+
+    def test_emits_element_as_soon_as_it_closes(self):
+        parser = JsonArrayParser()
+        first = json.dumps(LINES[0])
+        assert parser.feed("[" + first[:-1]) == []
+        assert parser.feed("}") == [LINES[0]]
+        assert parser.feed(", {\"speaker\": \"Taylor\"") == []
+
+    def test_ignores_code_fences(self):
+        text = "```json\n" + json.dumps(LINES) + "\n```"
+        assert parse_in_chunks(text, 5) == LINES
+
+    def test_empty_array(self):
+        assert parse_in_chunks("[ ]", 1) == []
+
+    def test_truncated_array_raises_on_close(self):
+        parser = JsonArrayParser()
+        items = parser.feed(json.dumps(LINES)[:-30])
+        assert items == LINES[:2]
+        with pytest.raises(ValueError, match="truncated after 2"):
+            parser.close()
+
+    def test_missing_separator_raises(self):
+        with pytest.raises(ValueError):
+            JsonArrayParser().feed('[{"a": 1} {"b": 2}]')
+
+    def test_non_object_element_raises(self):
+        with pytest.raises(ValueError):
+            JsonArrayParser().feed('["just a string"]')
+
+    def test_text_after_array_is_ignored(self):
+        parser = JsonArrayParser()
+        assert parser.feed('[{"a": 1}] trailing [{"b": 2}]') == [{"a": 1}]
+        assert parser.done
@@ -0,0 +1,112 @@
+"""
+Tests for podcast/manifest.py
+
+Covers:
+  - RunManifest: create/load round trip, distinct ids within one second, "latest",
+    missing runs
+  - record/restore: input digests and file checksums decide validity; stages
+    that kept clips in memory always re-run
+"""
+
+import sys
+import os
+import json
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from manifest import RunManifest, value_digest
+
+
+class TestValueDigest:
+    def test_key_order_and_tuples_do_not_matter(self):
+        assert value_digest({"a": 1, "b": (1, 2)}) == value_digest({"b": [1, 2], "a": 1})
+
+    def test_in_memory_clips_digest_by_content(self):
+        assert value_digest([b"clip"]) == value_digest([b"clip"])
+        assert value_digest([b"clip"]) != value_digest([b"other"])
+
+    def test_content_matters(self):
+        assert value_digest([{"id": "1"}]) != value_digest([{"id": "2"}])
+
+
+class TestRunManifest:
+    def test_create_and_load(self, tmp_path):
+        created = RunManifest.create(tmp_path, options={"stream": True})
+        loaded = RunManifest.load(created.run_id, tmp_path)
+
+        assert loaded.run_id == created.run_id
+        assert loaded.options == {"stream": True}
+
+    def test_load_latest(self, tmp_path):
+        RunManifest("20260101-080000", tmp_path).save()
+        RunManifest("20260102-080000", tmp_path).save()
+        assert RunManifest.load("latest", tmp_path).run_id == "20260102-080000"
+
+    def test_runs_in_the_same_second_get_distinct_ids(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("manifest.new_run_id", lambda: "20260102-080000")
+        runs = [RunManifest.create(tmp_path, options={"n": n}) for n in range(11)]
+
+        assert [r.run_id for r in runs[:3]] == ["20260102-080000", "20260102-080000-2", "20260102-080000-3"]
+        assert RunManifest.load("20260102-080000", tmp_path).options == {"n": 0}
+        assert RunManifest.load("latest", tmp_path).run_id == "20260102-080000-11"
+
+    def test_load_missing(self, tmp_path):
+        assert RunManifest.load("nope", tmp_path) is None
+        assert RunManifest.load("latest", tmp_path) is None
+
+    def test_manifest_is_plain_json(self, tmp_path):
+        m = RunManifest("run", tmp_path)
+        m.record("fetch", {}, {"articles": [{"id": "1"}]})
+        data = json.loads(m.path.read_text())
+        assert data["stages"]["fetch"]["outputs"] == {"articles": [{"id": "1"}]}
+        assert not list(m.run_dir.glob("*.tmp"))
+
+
+class TestRecordRestore:
+    def test_restore_with_same_inputs(self, tmp_path):
+        m = RunManifest("run", tmp_path)
+        m.record("script", {"articles": [{"id": "1"}]}, {"script": ["line"]})
+
+        reloaded = RunManifest.load("run", tmp_path)
+        assert reloaded.restore("script", {"articles": [{"id": "1"}]}) == {"script": ["line"]}
+
+    def test_changed_inputs_invalidate(self, tmp_path):
+        m = RunManifest("run", tmp_path)
+        m.record("script", {"articles": [{"id": "1"}]}, {"script": ["line"]})
+        assert m.restore("script", {"articles": [{"id": "2"}]}) is None
+
+    def test_unknown_stage(self, tmp_path):
+        assert RunManifest("run", tmp_path).restore("audio", {}) is None
+
+    def test_files_are_checksummed(self, tmp_path):
+        clips = [tmp_path / "a.mp3", tmp_path / "b.mp3"]
+        for clip in clips:
+            clip.write_bytes(b"audio")
+        m = RunManifest("run", tmp_path / "runs")
+        m.record("audio", {}, {"audio_files": [str(c) for c in clips]}, files=["audio_files"])
+
+        assert m.restore("audio", {}) is not None
+
+        clips[1].write_bytes(b"changed")
+        assert m.restore("audio", {}) is None
+
+        clips[1].unlink()
+        assert m.restore("audio", {}) is None
+
+    def test_in_memory_clips_are_not_restored(self, tmp_path):
+        clip = tmp_path / "a.mp3"
+        clip.write_bytes(b"audio")
+        m = RunManifest("run", tmp_path / "runs")
+        m.record("audio", {}, {"audio_files": [str(clip), b"inline"]}, files=["audio_files"])
+
+        recorded = json.loads(m.path.read_text())["stages"]["audio"]
+        assert list(recorded["files"]) == [str(clip)]
+        assert recorded["outputs"]["audio_files"][1]["size_bytes"] == 6
+        assert RunManifest.load("run", tmp_path / "runs").restore("audio", {}) is None
+
+    def test_forget(self, tmp_path):
+        m = RunManifest("run", tmp_path)
+        m.record("fetch", {}, {"articles": []})
+        m.forget("fetch")
+        assert m.restore("fetch", {}) is None
@@ -0,0 +1,146 @@
+"""
+Tests for podcast/metrics.py
+
+Covers:
+  - Counter / Gauge / Histogram: per-label values, cumulative buckets,
+    label validation
+  - Registry: Prometheus text rendering, escaping, re-registration, write
+  - track / count: stage timing, failures and work counters
+  - MetricsServer: GET /metrics over a real socket, 404 and 405
+"""
+
+import sys
+import os
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import metrics
+from metrics import Registry, MetricsServer
+
+
+@pytest.fixture
+def registry():
+    return Registry()
+
+
+class TestMetrics:
+    def test_counter(self, registry):
+        saves = registry.counter("saves_total", "Saves", ("result",))
+        saves.inc(result="done")
+        saves.inc(2, result="done")
+        saves.inc(result="failed")
+
+        assert saves.get(result="done") == 3
+        assert saves.get(result="skipped") == 0
+        with pytest.raises(ValueError):
+            saves.inc(-1, result="done")
+
+    def test_labels_must_match(self, registry):
+        saves = registry.counter("saves_total", "Saves", ("result",))
+        with pytest.raises(ValueError):
+            saves.inc(stage="fetch")
+        with pytest.raises(ValueError):
+            saves.inc()
+
+    def test_gauge(self, registry):
+        depth = registry.gauge("queue_depth", "Queue depth")
+        depth.set(5)
+        depth.dec(2)
+        depth.inc()
+        assert depth.get() == 4
+
+    def test_histogram_buckets_are_cumulative(self, registry):
+        seconds = registry.histogram("stage_seconds", "Seconds", ("stage",), buckets=(1, 5))
+        for value in (0.5, 2, 10):
+            seconds.observe(value, stage="upload")
+
+        assert seconds.get(stage="upload") == (3, 12.5)
+        text = registry.render()
+        assert 'stage_seconds_bucket{stage="upload",le="1"} 1' in text
+        assert 'stage_seconds_bucket{stage="upload",le="5"} 2' in text
+        assert 'stage_seconds_bucket{stage="upload",le="+Inf"} 3' in text
+        assert 'stage_seconds_sum{stage="upload"} 12.5' in text
+        assert 'stage_seconds_count{stage="upload"} 3' in text
+
+
+class TestRegistry:
+    def test_render(self, registry):
+        registry.counter("saves_total", "Saves processed", ("result",)).inc(result='say "hi"\n')
+        registry.gauge("queue_depth", "Queue depth").set(2)
+
+        assert registry.render() == (
+            "# HELP saves_total Saves processed\n"
+            "# TYPE saves_total counter\n"
+            'saves_total{result="say \\"hi\\"\\n"} 1\n'
+            "# HELP queue_depth Queue depth\n"
+            "# TYPE queue_depth gauge\n"
+            "queue_depth 2\n"
+        )
+
+    def test_reregistering_returns_the_same_metric(self, registry):
+        a = registry.counter("saves_total", "Saves", ("result",))
+        assert registry.counter("saves_total", "Saves", ("result",)) is a
+        with pytest.raises(ValueError):
+            registry.gauge("saves_total", "Saves", ("result",))
+
+    def test_write(self, registry, tmp_path):
+        registry.gauge("queue_depth", "Queue depth").set(1)
+        path = tmp_path / "textfile" / "podcast.prom"
+
+        registry.write(path)
+
+        assert path.read_text() == registry.render()
+        assert list(path.parent.iterdir()) == [path]
+
+
+class TestStageHelpers:
+    def test_track_times_and_counts_failures(self):
+        before = metrics.STAGE_SECONDS.get(component="test", stage="track")
+        failures = metrics.STAGE_FAILURES.get(component="test", stage="track")
+
+        with metrics.track("test", "track"):
+            pass
+        with pytest.raises(RuntimeError):
+            with metrics.track("test", "track"):
+                raise RuntimeError("boom")
+
+        assert metrics.STAGE_SECONDS.get(component="test", stage="track")[0] == before[0] + 2
+        assert metrics.STAGE_FAILURES.get(component="test", stage="track") == failures + 1
+
+    def test_count(self):
+        words = metrics.STAGE_WORDS.get(component="test", stage="count")
+        metrics.count("test", "count", bytes=10, words=3, audio_seconds=1.5)
+        metrics.count("test", "count", words=2)
+
+        assert metrics.STAGE_WORDS.get(component="test", stage="count") == words + 5
+        assert metrics.STAGE_AUDIO_SECONDS.get(component="test", stage="count") >= 1.5
+
+
+async def request(port, method="GET", path="/metrics"):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return head.decode(), body.decode()
+
+
+class TestMetricsServer:
+    @pytest.mark.asyncio
+    async def test_serves_registry(self, registry):
+        registry.gauge("queue_depth", "Queue depth").set(3)
+        server = MetricsServer(port=0, registry=registry)
+        await server.start()
+        try:
+            head, body = await request(server.port)
+            assert head.startswith("HTTP/1.1 200 OK")
+            assert f"Content-Type: {metrics.CONTENT_TYPE}" in head
+            assert body == registry.render()
+
+            assert (await request(server.port, path="/other"))[0].startswith("HTTP/1.1 404")
+            assert (await request(server.port, method="POST"))[0].startswith("HTTP/1.1 405")
+        finally:
+            await server.stop()
@@ -0,0 +1,201 @@
+"""
+Tests for podcast/mirror.py
+
+Covers:
+  - sync: first sync pulls everything; later syncs only ask for rows changed
+    since the cursor (minus the overlap), edits replace rows and their index
+    entries, an interrupted sync keeps the batches it committed
+  - prune: rows deleted upstream are dropped
+  - search: weighted ranking, stemming, literal punctuation, archived and
+    per-user filtering
+  - recent / pending_audio: the reads extract.py and tts.py use
+  - parse_timestamp / fts_query helpers
+PostgREST is mocked with an in-memory table; no network calls are made.
+"""
+
+import sys
+import os
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mirror
+from mirror import Mirror, fts_query, parse_timestamp
+from pagination import FetchError
+
+
+def ts(minutes):
+    return (datetime(2026, 10, 17, tzinfo=timezone.utc) + timedelta(minutes=minutes)).isoformat()
+
+
+def save(i, updated, **fields):
+    row = {"id": f"id-{i:02d}", "user_id": "u1", "title": f"Save {i}", "excerpt": "", "content": "",
+           "highlight": None, "url": f"https://example.com/{i}", "site_name": "Example", "author": None,
+           "is_archived": False, "is_favorite": False, "audio_url": None,
+           "created_at": ts(updated), "updated_at": ts(updated)}
+    row.update(fields)
+    return row
+
+
+class FakeSaves:
+    """A `saves` table behind a PostgREST-style `get`, ordered by (updated_at, id)."""
+
+    def __init__(self, rows, fail_after=None):
+        self.rows = {row["id"]: row for row in rows}
+        self.requests = []
+        self.fail_after = fail_after
+
+    def get(self, url, headers=None, params=None):
+        self.requests.append(params)
+        if self.fail_after is not None and len(self.requests) > self.fail_after:
+            return MagicMock(status_code=503, text="unavailable")
+        key = params["order"].split(".")[0]
+        rows = sorted(self.rows.values(), key=lambda r: (r[key], r["id"]))
+        if "user_id" in params:
+            rows = [r for r in rows if r["user_id"] == params["user_id"][3:]]
+        if "updated_at" in params:
+            since = parse_timestamp(params["updated_at"][4:])
+            rows = [r for r in rows if parse_timestamp(r["updated_at"]) >= since]
+        if "or" in params:
+            last = next(r for r in self.rows.values() if f'id.gt."{r["id"]}"' in params["or"])
+            rows = [r for r in rows if (r[key], r["id"]) > (last[key], last["id"])]
+        columns = params["select"].split(",")
+        return MagicMock(status_code=200, json=MagicMock(
+            return_value=[{c: r[c] for c in columns} for r in rows[:int(params["limit"])]]))
+
+
+@pytest.fixture
+def db(tmp_path):
+    with Mirror(tmp_path / "mirror.db") as m:
+        yield m
+
+
+class TestSync:
+    def test_first_sync_pulls_everything(self, db):
+        upstream = FakeSaves([save(i, i) for i in range(5)])
+
+        assert db.sync(upstream, "u1", page_size=2) == 5
+
+        assert db.cursor() == (ts(4), "id-04")
+        assert "updated_at" not in upstream.requests[0]
+        assert upstream.requests[0]["order"] == "updated_at.asc,id.asc"
+        assert upstream.requests[0]["user_id"] == "eq.u1"
+
+    def test_incremental_sync_asks_only_for_recent_changes(self, db):
+        upstream = FakeSaves([save(i, i * 10) for i in range(5)])
+        db.sync(upstream)
+        upstream.rows["id-01"] = save(1, 100, title="Renamed")
+        upstream.requests.clear()
+
+        # id-04 is re-read because it falls inside the overlap window
+        assert db.sync(upstream) == 2
+
+        since = parse_timestamp(upstream.requests[0]["updated_at"][4:])
+        assert since == parse_timestamp(ts(40)) - mirror.SYNC_OVERLAP
+        assert [r["title"] for r in db.search("renamed")] == ["Renamed"]
+        assert db.search("save 1") == []  # old title is gone from the index
+        assert db.cursor() == (ts(100), "id-01")
+
+    def test_interrupted_sync_keeps_committed_batches(self, db):
+        upstream = FakeSaves([save(i, i) for i in range(6)], fail_after=1)
+
+        with pytest.raises(FetchError):
+            db.sync(upstream, page_size=3)
+
+        assert db.cursor() == (ts(2), "id-02")
+        assert db.db.execute("select count(*) from saves").fetchone()[0] == 3
+
+    def test_reset_forgets_cursor(self, db):
+        db.sync(FakeSaves([save(1, 1)]))
+        db.reset()
+        assert db.cursor() is None
+
+    def test_prune_drops_deleted_saves(self, db):
+        upstream = FakeSaves([save(i, i) for i in range(3)])
+        db.sync(upstream)
+        del upstream.rows["id-01"]
+
+        assert db.prune(upstream, "u1") == 1
+
+        assert [r["id"] for r in db.recent(days=3650, limit=10)] == ["id-02", "id-00"]
+        assert upstream.requests[-1]["select"] == "id,created_at"
+
+
+class TestSearch:
+    @pytest.fixture
+    def saved(self, db):
+        db.upsert([
+            save(1, 1, title="Stealth aircraft design", content="Radar cross sections."),
+            save(2, 2, title="Gardening", content="Notes on stealth " * 3 + "and tomatoes."),
+            save(3, 3, title="Stealth startups", is_archived=True),
+            save(4, 4, title="Stealth mode", user_id="u2"),
+            save(5, 5, title="Compilers", highlight="Running a C++ parser"),
+        ])
+        db.db.commit()
+        return db
+
+    def test_title_matches_rank_above_body_matches(self, saved):
+        results = saved.search("stealth", user_id="u1")
+
+        assert [r["id"] for r in results] == ["id-01", "id-02"]
+        assert results[0]["rank"] < results[1]["rank"]
+        assert "[Stealth]" in results[0]["snippet"]
+
+    def test_archived_and_other_users(self, saved):
+        assert len(saved.search("stealth", user_id="u1", include_archived=True)) == 3
+        assert len(saved.search("stealth")) == 3
+
+    def test_stemming_and_prefix(self, saved):
+        assert [r["id"] for r in saved.search("designs")] == ["id-01"]
+        assert [r["id"] for r in saved.search("garden*")] == ["id-02"]
+
+    def test_punctuation_is_literal(self, saved):
+        assert [r["id"] for r in saved.search('C++ "parser" (')] == ["id-05"]
+        assert saved.search("  -- ") == []
+
+    def test_limit(self, saved):
+        assert len(saved.search("stealth", limit=1)) == 1
+
+
+class TestReads:
+    def test_recent_is_newest_unarchived_first(self, db):
+        now = datetime.now(timezone.utc)
+        rows = [
+            save(1, 0, created_at=(now - timedelta(days=1)).isoformat()),
+            save(2, 0, created_at=(now - timedelta(days=2)).isoformat()),
+            save(3, 0, created_at=(now - timedelta(days=1, hours=1)).isoformat(), is_archived=True),
+            save(4, 0, created_at=(now - timedelta(days=30)).isoformat()),
+        ]
+        db.upsert(rows)
+
+        assert [r["id"] for r in db.recent(days=7, limit=5, user_id="u1")] == ["id-01", "id-02"]
+        assert [r["id"] for r in db.recent(days=7, limit=1)] == ["id-01"]
+
+    def test_pending_audio(self, db):
+        db.upsert([
+            save(1, 1, content="x" * 200),
+            save(2, 2, content="x" * 200, audio_url="https://cdn/2.mp3"),
+            save(3, 3, content="", highlight="short"),
+            save(4, 4, content="", highlight="y" * 150),
+            save(5, 5, content="x" * 200),
+        ])
+
+        assert [r["id"] for r in db.pending_audio(100)] == ["id-01", "id-04", "id-05"]
+        assert [r["id"] for r in db.pending_audio(100, exclude_ids={"id-01"}, limit=1)] == ["id-04"]
+
+
+class TestHelpers:
+    @pytest.mark.parametrize("value", ["2026-10-17T08:00:00.12+00:00", "2026-10-17T08:00:00.120000Z",
+                                       "2026-10-17T08:00:00.1200001+00:00"])
+    def test_parse_timestamp(self, value):
+        assert parse_timestamp(value) == datetime(2026, 10, 17, 8, 0, 0, 120000, tzinfo=timezone.utc)
+
+    def test_parse_timestamp_rejects_garbage(self):
+        with pytest.raises(ValueError):
+            parse_timestamp("yesterday")
+
+    def test_fts_query(self):
+        assert fts_query('rust "async" OR web*') == '"rust" "async" "OR" "web"*'
+        assert fts_query("!!") == ""
@@ -0,0 +1,185 @@
+"""
+Tests for podcast/mixdown.py
+
+Covers:
+  - parse_loudnorm / measure_clips: first-pass measurements, cached by clip content
+  - build_filter_graph: per-clip loudnorm, pauses, intro/outro mixing
+  - chapter_times / ffmetadata: chapter placement and escaping
+  - assemble_mix: a single ffmpeg run with every clip, music and chapter input
+All subprocess calls are mocked so no real ffmpeg is needed.
+"""
+
+import sys
+import os
+import subprocess
+import pytest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mp3
+import mixdown
+
+LOUDNORM_STDERR = """
+[Parsed_loudnorm_0 @ 0x55d0c8a1e2c0]
+{
+	"input_i" : "-23.54",
+	"input_tp" : "-5.12",
+	"input_lra" : "3.20",
+	"input_thresh" : "-34.10",
+	"output_i" : "-16.02",
+	"output_tp" : "-1.50",
+	"output_lra" : "2.90",
+	"output_thresh" : "-26.60",
+	"normalization_type" : "dynamic",
+	"target_offset" : "0.02"
+}
+"""
+
+MEASUREMENT = {"input_i": -23.54, "input_tp": -5.12, "input_lra": 3.2, "input_thresh": -34.1, "target_offset": 0.02}
+
+
+def edge_header():
+    return mp3.parse_header(int.from_bytes(mp3.build_header(), "big"))
+
+
+def write_clips(directory, seconds):
+    paths = []
+    for i, length in enumerate(seconds):
+        path = directory / f"line_{i:03d}.mp3"
+        path.write_bytes(mp3.silence(length, edge_header()))
+        paths.append(path)
+    return paths
+
+
+class TestMeasurements:
+    def test_parse_loudnorm(self):
+        assert mixdown.parse_loudnorm(LOUDNORM_STDERR) == MEASUREMENT
+
+    def test_parse_loudnorm_without_json(self):
+        assert mixdown.parse_loudnorm("Error opening input") is None
+
+    def test_measures_each_clip_once(self, tmp_path):
+        clips = write_clips(tmp_path, [1.0, 2.0])
+        cache = mixdown.LoudnessCache(tmp_path / "cache")
+        result = MagicMock(stderr=LOUDNORM_STDERR.encode())
+
+        with patch("mixdown.subprocess.run", return_value=result) as mock_run:
+            first = mixdown.measure_clips(clips, cache)
+            second = mixdown.measure_clips(clips, cache)
+
+        assert first == second == [MEASUREMENT, MEASUREMENT]
+        assert mock_run.call_count == 2
+        assert "loudnorm=I=-16.0:TP=-1.5:LRA=11.0:print_format=json" in mock_run.call_args[0][0]
+
+    def test_identical_clips_are_measured_once(self, tmp_path):
+        a, b = write_clips(tmp_path, [1.0, 1.0])
+        assert mixdown.loudness_key(a) == mixdown.loudness_key(b)
+        assert mixdown.loudness_key(a) != mixdown.loudness_key(a, {"I": -19.0, "TP": -1.5, "LRA": 11.0})
+
+        with patch("mixdown.subprocess.run", return_value=MagicMock(stderr=LOUDNORM_STDERR.encode())) as mock_run:
+            assert mixdown.measure_clips([a, b]) == [MEASUREMENT, MEASUREMENT]
+        assert mock_run.call_count == 1
+
+    def test_failed_measurement_is_not_cached(self, tmp_path):
+        clips = write_clips(tmp_path, [1.0])
+        cache = mixdown.LoudnessCache(tmp_path / "cache")
+
+        with patch("mixdown.subprocess.run", side_effect=OSError("no ffmpeg")):
+            assert mixdown.measure_clips(clips, cache) == [None]
+
+        assert cache.get(mixdown.loudness_key(clips[0])) is None
+
+
+class TestFilterGraph:
+    def test_speech_only(self):
+        graph = mixdown.build_filter_graph([MEASUREMENT, None], [1.0, 2.0])
+        chains = graph.split(";")
+
+        assert chains[0].startswith("[0:a]loudnorm=I=-16.0:TP=-1.5:LRA=11.0:measured_I=-23.54")
+        assert "linear=true" in chains[0]
+        assert chains[0].endswith(f"apad=pad_dur={mixdown.LINE_PAUSE}[c0]")
+        assert chains[1] == "[1:a]loudnorm=I=-16.0:TP=-1.5:LRA=11.0,aresample=24000,aformat=channel_layouts=mono[c1]"
+        assert chains[2] == "[c0][c1]concat=n=2:v=0:a=1[speech]"
+        assert chains[-1] == "[speech]anull[out]"
+
+    def test_silent_clip_is_not_normalized(self):
+        silent = dict(MEASUREMENT, input_i=float("-inf"))
+        assert mixdown.build_filter_graph([silent], [1.0]).startswith("[0:a]anull,")
+
+    def test_intro_and_outro(self):
+        graph = mixdown.build_filter_graph([MEASUREMENT, MEASUREMENT], [10.0, 20.0], intro=True, outro=True)
+
+        lead_ms = round(mixdown.INTRO_LEAD * 1000)
+        assert f"[speech]adelay={lead_ms}:all=1[voice]" in graph
+        assert "[2:a]" in graph and "afade=t=out" in graph
+        outro_start = mixdown.INTRO_LEAD + 30.0 + mixdown.LINE_PAUSE - mixdown.MUSIC_FADE
+        assert f"adelay={round(outro_start * 1000)}:all=1[outro]" in graph
+        assert graph.endswith("[voice][intro][outro]amix=inputs=3:duration=longest:normalize=0[out]")
+
+
+class TestChapters:
+    def test_chapter_times(self):
+        chapters = [{"title": "One", "start_line": 1}, {"title": "Two", "start_line": 3}]
+        times = mixdown.chapter_times(chapters, [1.0, 2.0, 3.0, 4.0], lead=4.0, pause=0.5)
+
+        # Line starts: 4.0, 5.5, 8.0, 11.5; speech ends at 15.5
+        assert times == [("One", 0, 11500), ("Two", 11500, 15500)]
+
+    def test_out_of_range_chapters_are_dropped(self):
+        times = mixdown.chapter_times([{"title": "X", "start_line": 9}], [1.0])
+        assert times == []
+
+    def test_ffmetadata_escapes_values(self):
+        text = mixdown.ffmetadata({"title": "A=B; #1", "description": "x"}, [("Ch\\1", 0, 1000)])
+
+        assert text.startswith(";FFMETADATA1\n")
+        assert "title=A\\=B\\; \\#1\n" in text
+        assert "comment=x\n" in text
+        assert "[CHAPTER]\nTIMEBASE=1/1000\nSTART=0\nEND=1000\ntitle=Ch\\\\1\n" in text
+
+
+class TestAssembleMix:
+    def test_single_ffmpeg_run_with_all_inputs(self, tmp_path):
+        (tmp_path / "clips").mkdir()
+        clips = write_clips(tmp_path / "clips", [1.0, 1.0, 1.0])
+        intro = tmp_path / "intro.mp3"
+        intro.write_bytes(b"music")
+        output = tmp_path / "out" / "episode.mp3"
+        cache = mixdown.LoudnessCache(tmp_path / "cache")
+        commands = []
+
+        def fake_run(cmd, **kwargs):
+            commands.append(cmd)
+            if "-filter_complex" in cmd:
+                meta = cmd[cmd.index("ffmetadata") + 2]
+                commands.append(open(meta).read())
+                open(cmd[-1], "wb").write(b"mixed")
+            return MagicMock(stderr=LOUDNORM_STDERR.encode())
+
+        with patch("mixdown.subprocess.run", side_effect=fake_run):
+            result = mixdown.assemble_mix(clips, output, {"title": "Ep"},
+                                          [{"title": "Article One", "start_line": 0}], intro=intro, cache=cache)
+
+        assert result == str(output)
+        assert output.read_bytes() == b"mixed"
+        *measure, mix, metadata = commands
+        assert len(measure) == 1  # the three clips are identical
+        assert mix.count("-i") == 5  # 3 clips, intro, metadata
+        assert mix[mix.index("-map_chapters") + 1] == "4"
+        assert "[3:a]" in mix[mix.index("-filter_complex") + 1]
+        assert "title=Article One" in metadata
+
+    def test_returns_none_when_ffmpeg_fails(self, tmp_path):
+        clips = write_clips(tmp_path, [1.0])
+
+        def fake_run(cmd, **kwargs):
+            if "-filter_complex" in cmd:
+                raise subprocess.CalledProcessError(1, cmd, stderr=b"boom")
+            return MagicMock(stderr=LOUDNORM_STDERR.encode())
+
+        with patch("mixdown.subprocess.run", side_effect=fake_run):
+            result = mixdown.assemble_mix(clips, tmp_path / "episode.mp3", cache=mixdown.LoudnessCache(tmp_path / "c"))
+
+        assert result is None
+        assert not (tmp_path / "episode.mp3").exists()
@@ -0,0 +1,155 @@
+"""
+Tests for podcast/mp3.py
+
+Covers:
+  - parse_header/build_header: frame sizes and durations for common formats
+  - scan: tag stripping, Xing/Info frames, junk between frames, inconsistent streams
+  - concat: frame-exact output, ID3 tags, errors for unusable clips
+Clips are synthesized from silent frames, so no encoder is needed.
+"""
+
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mp3
+from mp3 import Mp3Error
+
+
+def header(**kwargs):
+    return mp3.parse_header(int.from_bytes(mp3.build_header(**kwargs), "big"))
+
+
+EDGE = header()  # edge-tts: MPEG-2 layer III, 24 kHz, 48 kbps, mono
+
+
+def id3v2(body=b"\x00" * 20):
+    return b"ID3\x04\x00\x00" + mp3._syncsafe_bytes(len(body)) + body
+
+
+def info_frame(h=EDGE):
+    """A frame carrying an Info tag where the Xing header lives."""
+    frame = bytearray(mp3.silent_frame(h))
+    offset = 4 + h.side_info_size()
+    frame[offset:offset + 4] = b"Info"
+    return bytes(frame)
+
+
+def clip(frames=10, h=EDGE, tags=True):
+    data = mp3.silent_frame(h) * frames
+    if tags:
+        data = id3v2() + info_frame(h) + data + b"TAG" + b"\x00" * 125
+    return data
+
+
+class TestHeaders:
+    @pytest.mark.parametrize("kwargs,length,samples", [
+        ({}, 144, 576),
+        ({"version": "1", "bitrate": 128, "sample_rate": 44100, "channel_mode": 0}, 417, 1152),
+        ({"version": "1", "bitrate": 128, "sample_rate": 44100, "channel_mode": 0, "padding": 1}, 418, 1152),
+        ({"version": "2", "layer": 2, "bitrate": 64, "sample_rate": 22050}, 417, 1152),
+        ({"version": "1", "layer": 1, "bitrate": 32, "sample_rate": 32000}, 48, 384),
+    ])
+    def test_frame_length_and_samples(self, kwargs, length, samples):
+        h = header(**kwargs)
+        assert (h.length, h.samples) == (length, samples)
+
+    def test_round_trip(self):
+        h = header(version="2.5", bitrate=32, sample_rate=8000, channel_mode=1)
+        assert (h.version, h.layer, h.bitrate, h.sample_rate, h.channels) == ("2.5", 3, 32, 8000, 2)
+
+    @pytest.mark.parametrize("value", [0, 0xFFE00000, 0xFFFBF000, 0xFFFB0C00])
+    def test_invalid_headers(self, value):
+        # reserved version/layer, bad bitrate (15), reserved sample rate (3)
+        assert mp3.parse_header(value) is None
+
+
+class TestScan:
+    def test_plain_frames(self):
+        stream = mp3.scan(clip(10, tags=False))
+        assert stream.frame_count == 10
+        assert stream.runs == [(0, 1440)]
+        assert stream.duration == pytest.approx(10 * 576 / 24000)
+
+    def test_strips_tags_and_info_frame(self):
+        data = clip(10)
+        stream = mp3.scan(data)
+        start = len(id3v2()) + EDGE.length
+        assert stream.vbr_tag == b"Info"
+        assert stream.frame_count == 10
+        assert stream.runs == [(start, start + 1440)]
+        assert stream.skipped_bytes == 0
+
+    def test_skips_junk_between_frames(self):
+        frame = mp3.silent_frame(EDGE)
+        data = frame * 3 + b"\x00\xff\xff junk" + frame * 4
+        stream = mp3.scan(data, keep_frames=True)
+        assert stream.frame_count == 7
+        assert len(stream.runs) == 2
+        assert stream.skipped_bytes == 8
+        assert [offset for offset, _ in stream.frames][3] == 3 * 144 + 8
+
+    def test_rejects_mixed_sample_rates(self):
+        data = clip(3, tags=False) + clip(3, header(sample_rate=22050), tags=False)
+        with pytest.raises(Mp3Error):
+            mp3.scan(data)
+
+    def test_no_frames(self):
+        assert mp3.scan(b"not an mp3 at all").frame_count == 0
+
+
+class TestConcat:
+    def test_concatenates_audio_frames_only(self, tmp_path):
+        paths = []
+        for i, frames in enumerate([5, 7, 3]):
+            path = tmp_path / f"line_{i:03d}.mp3"
+            path.write_bytes(clip(frames))
+            paths.append(path)
+        out = tmp_path / "out" / "episode.mp3"
+
+        total = mp3.concat(paths, out)
+
+        assert total.frame_count == 15
+        assert out.read_bytes() == mp3.silent_frame(EDGE) * 15
+        assert not list(out.parent.glob("*.tmp"))
+
+    def test_writes_id3_tags(self, tmp_path):
+        path = tmp_path / "a.mp3"
+        path.write_bytes(clip(2))
+        out = tmp_path / "episode.mp3"
+        metadata = {"title": "Listen Later", "artist": "Alex & Taylor", "album": "Stash", "description": "Café news"}
+
+        mp3.concat([path], out, metadata)
+
+        data = out.read_bytes()
+        assert data.startswith(b"ID3\x03\x00")
+        tag_len = mp3.syncsafe(data[6:10]) + 10
+        for key in ("TIT2", "TPE1", "TALB", "COMM"):
+            assert key.encode() in data[:tag_len]
+        assert "Café news".encode("utf-16-le") in data[:tag_len]
+        stream = mp3.scan(data)
+        assert stream.runs[0][0] == tag_len
+        assert stream.frame_count == 2
+
+    def test_mismatched_clips_raise(self, tmp_path):
+        a, b = tmp_path / "a.mp3", tmp_path / "b.mp3"
+        a.write_bytes(clip(2))
+        b.write_bytes(clip(2, header(sample_rate=16000)))
+        with pytest.raises(Mp3Error):
+            mp3.concat([a, b], tmp_path / "out.mp3")
+        assert not (tmp_path / "out.mp3").exists()
+
+    def test_empty_clip_raises(self, tmp_path):
+        (tmp_path / "a.mp3").touch()
+        with pytest.raises(Mp3Error):
+            mp3.concat([tmp_path / "a.mp3"], tmp_path / "out.mp3")
+
+
+class TestSilence:
+    def test_matches_stream_and_duration(self):
+        data = mp3.silence(0.5, EDGE)
+        stream = mp3.scan(data)
+        assert stream.header.stream_key == EDGE.stream_key
+        assert 0.5 <= stream.duration < 0.5 + 576 / 24000
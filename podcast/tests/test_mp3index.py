@@ -0,0 +1,185 @@
+"""
+Tests for podcast/mp3index.py
+
+Covers:
+  - Mp3Index: duration, sizes, TOC and CBR/VBR detection from frame headers
+  - xing_frame/read_xing: round trip, LAME tag CRC, reuse of an existing frame header
+  - write_index: in place over a reserved frame, rewriting when there is no room,
+    audio frames left untouched
+Streams are synthesized from silent frames, so no encoder is needed.
+"""
+
+import sys
+import os
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mp3
+import mp3index
+from mp3 import Mp3Error
+
+
+def header(**kwargs):
+    return mp3.parse_header(int.from_bytes(mp3.build_header(**kwargs), "big"))
+
+
+EDGE = header()  # MPEG-2 layer III, 24 kHz, 48 kbps, mono
+
+
+def audio(data):
+    return b"".join(data[start:end] for start, end in mp3.scan(data).runs)
+
+
+def xing_of(data):
+    offset, length = mp3.scan(data).vbr_frame
+    return mp3index.read_xing(data[offset:offset + length])
+
+
+class TestMp3Index:
+    def test_duration_and_sizes(self):
+        data = mp3.silent_frame(EDGE) * 250
+        index = mp3index.Mp3Index(mp3.scan(data, keep_frames=True), len(data))
+
+        assert index.frame_count == 250
+        assert index.duration == pytest.approx(250 * 576 / 24000)
+        assert index.size_bytes == index.audio_bytes == index.stream_bytes == len(data)
+        assert index.bitrate == pytest.approx(48)
+        assert not index.vbr
+
+    def test_toc_is_monotonic_and_proportional_for_cbr(self):
+        data = mp3.silent_frame(EDGE) * 1000
+        index = mp3index.Mp3Index(mp3.scan(data, keep_frames=True), len(data))
+
+        assert len(index.toc) == 100
+        assert list(index.toc) == sorted(index.toc)
+        assert index.toc[0] == 0
+        assert index.toc[50] == 128
+
+    def test_toc_follows_frame_sizes_for_vbr(self):
+        # First half at 8 kbps, second half at 160 kbps: half the duration is
+        # only a small fraction of the bytes
+        low, high = header(bitrate=8), header(bitrate=160)
+        data = mp3.silent_frame(low) * 100 + mp3.silent_frame(high) * 100
+        index = mp3index.Mp3Index(mp3.scan(data, keep_frames=True), len(data))
+
+        assert index.vbr
+        assert index.toc[50] == 100 * low.length * 256 // len(data)
+        assert index.seek_offset(index.duration / 2) <= 100 * low.length
+
+    def test_requires_frame_offsets(self):
+        with pytest.raises(ValueError):
+            mp3index.Mp3Index(mp3.scan(mp3.silent_frame(EDGE) * 3), 0)
+
+
+class TestXingFrame:
+    def test_round_trip(self):
+        data = mp3.silent_frame(EDGE) * 40
+        index = mp3index.Mp3Index(mp3.scan(data, keep_frames=True), len(data))
+        fields = mp3index.read_xing(index.xing_frame())
+
+        assert fields["tag"] == b"Info"
+        assert fields["frames"] == 40
+        assert fields["bytes"] == len(data)
+        assert fields["toc"] == index.toc
+        assert fields["encoder"] == b"Stash"
+        assert fields["crc_ok"]
+
+    def test_frame_is_big_enough_and_decodes_as_stream_frame(self):
+        for h in (EDGE, header(version="1", bitrate=128, sample_rate=44100, channel_mode=0)):
+            frame = mp3.info_frame(h)
+            parsed = mp3.parse_header(int.from_bytes(frame[:4], "big"))
+            assert parsed.stream_key == h.stream_key
+            assert len(frame) == parsed.length >= 4 + h.side_info_size() + mp3.VBR_HEADER_BYTES
+
+    def test_reuses_header_without_crc(self):
+        data = mp3.silent_frame(EDGE) * 10
+        index = mp3index.Mp3Index(mp3.scan(data, keep_frames=True), len(data))
+        protected = int.from_bytes(mp3.build_header(bitrate=96), "big") & ~(1 << 16)
+
+        frame = index.xing_frame(protected.to_bytes(4, "big"))
+
+        assert not mp3.parse_header(int.from_bytes(frame[:4], "big")).protected
+        assert len(frame) == header(bitrate=96).length
+
+    def test_too_small_header(self):
+        data = mp3.silent_frame(EDGE) * 10
+        index = mp3index.Mp3Index(mp3.scan(data, keep_frames=True), len(data))
+        with pytest.raises(Mp3Error):
+            index.xing_frame(mp3.build_header(bitrate=8))
+
+    def test_no_xing_header(self):
+        assert mp3index.read_xing(mp3.silent_frame(EDGE)) is None
+
+
+class TestWriteIndex:
+    def test_fills_reserved_frame_in_place(self, tmp_path):
+        clip = tmp_path / "line_000.mp3"
+        clip.write_bytes(mp3.silent_frame(EDGE) * 30)
+        episode = tmp_path / "episode.mp3"
+        mp3.concat([clip, clip], episode, {"title": "Ep"}, vbr_frame=True)
+        before = episode.read_bytes()
+
+        index = mp3index.write_index(episode)
+
+        after = episode.read_bytes()
+        assert len(after) == len(before) == index.size_bytes
+        assert audio(after) == audio(before)
+        fields = xing_of(after)
+        assert fields["frames"] == 60
+        assert fields["bytes"] == index.stream_bytes == len(mp3.info_frame(EDGE)) + 60 * EDGE.length
+        assert fields["crc_ok"]
+
+    def test_inserts_frame_when_there_is_none(self, tmp_path):
+        path = tmp_path / "clip.mp3"
+        tag = mp3.id3_tag({"title": "Clip"})
+        path.write_bytes(tag + mp3.silent_frame(EDGE) * 20)
+
+        index = mp3index.write_index(path)
+
+        data = path.read_bytes()
+        assert data.startswith(tag)
+        assert len(data) == index.size_bytes == len(tag) + len(mp3.info_frame(EDGE)) + 20 * EDGE.length
+        assert audio(data) == mp3.silent_frame(EDGE) * 20
+        assert xing_of(data)["frames"] == 20
+
+    def test_replaces_small_info_frame(self, tmp_path):
+        small = bytearray(mp3.silent_frame(EDGE))  # 144 bytes: no room for the LAME tag
+        offset = 4 + EDGE.side_info_size()
+        small[offset:offset + 4] = b"Info"
+        path = tmp_path / "clip.mp3"
+        path.write_bytes(bytes(small) + mp3.silent_frame(EDGE) * 5)
+
+        mp3index.write_index(path)
+
+        data = path.read_bytes()
+        assert mp3.scan(data).vbr_frame[0] == 0
+        assert xing_of(data)["frames"] == 5
+        assert audio(data) == mp3.silent_frame(EDGE) * 5
+
+    def test_rewriting_is_idempotent(self, tmp_path):
+        path = tmp_path / "clip.mp3"
+        path.write_bytes(mp3.silent_frame(EDGE) * 20)
+        mp3index.write_index(path)
+        first = path.read_bytes()
+
+        mp3index.write_index(path)
+
+        assert path.read_bytes() == first
+
+    def test_index_file_matches(self, tmp_path):
+        path = tmp_path / "clip.mp3"
+        path.write_bytes(mp3.silent_frame(EDGE) * 20)
+        written = mp3index.write_index(path)
+
+        read = mp3index.index_file(path)
+
+        assert (read.duration, read.size_bytes, read.stream_bytes, read.toc) == \
+            (written.duration, written.size_bytes, written.stream_bytes, written.toc)
+
+    def test_rejects_non_mp3(self, tmp_path):
+        path = tmp_path / "notes.mp3"
+        path.write_bytes(b"not audio at all")
+        with pytest.raises(Mp3Error):
+            mp3index.write_index(path)
+        assert path.read_bytes() == b"not audio at all"
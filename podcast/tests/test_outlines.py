@@ -0,0 +1,120 @@
+"""
+Tests for podcast/outlines.py
+
+Covers:
+  - outline_key: changes with article id, content and prompt version only
+  - OutlineCache: round trips, misses and corrupt entries
+  - summarize_articles: order, bounded concurrency and cache reuse
+Gemini calls are mocked.
+"""
+
+import sys
+import os
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import outlines
+from outlines import OutlineCache, outline_key, summarize_articles
+
+
+ARTICLE = {"id": "1", "title": "Local-first", "site_name": "Site A", "content": "Body text."}
+
+
+class FakeModel:
+    """Blocking generate_content that records calls and peak concurrency."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.prompts = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return MagicMock(text=f"  - notes on {prompt.splitlines()[0]}\n")
+
+
+class TestOutlineKey:
+    def test_stable(self):
+        assert outline_key(ARTICLE) == outline_key(dict(ARTICLE))
+
+    def test_changes_with_content_and_id(self):
+        assert outline_key({**ARTICLE, "content": "Edited."}) != outline_key(ARTICLE)
+        assert outline_key({**ARTICLE, "id": "2"}) != outline_key(ARTICLE)
+
+    def test_changes_with_prompt_version(self):
+        assert outline_key(ARTICLE, "2") != outline_key(ARTICLE, "1")
+
+    def test_ignores_unrelated_fields(self):
+        assert outline_key({**ARTICLE, "created_at": "2026-01-01"}) == outline_key(ARTICLE)
+
+
+class TestOutlineCache:
+    def test_round_trip(self, tmp_path):
+        cache = OutlineCache(tmp_path)
+        cache.put("ab" * 32, "outline text", "1")
+        assert cache.get("ab" * 32) == "outline text"
+
+    def test_miss(self, tmp_path):
+        assert OutlineCache(tmp_path).get("cd" * 32) is None
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        cache = OutlineCache(tmp_path)
+        path = cache.path_for("ef" * 32)
+        path.parent.mkdir(parents=True)
+        path.write_text("{not json")
+        assert cache.get("ef" * 32) is None
+
+    def test_no_temp_files_left(self, tmp_path):
+        cache = OutlineCache(tmp_path)
+        cache.put("ab" * 32, "outline")
+        assert not list(tmp_path.rglob("*.tmp"))
+
+
+class TestSummarizeArticles:
+    @pytest.mark.asyncio
+    async def test_returns_outlines_in_article_order(self):
+        articles = [{**ARTICLE, "id": str(i), "title": f"T{i}"} for i in range(5)]
+        model = FakeModel()
+
+        result = await summarize_articles(model, articles)
+
+        assert result == [f"- notes on Title: T{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_bounds_concurrency(self):
+        articles = [{**ARTICLE, "id": str(i)} for i in range(6)]
+        model = FakeModel(delay=0.02)
+
+        await summarize_articles(model, articles, concurrency=2)
+
+        assert model.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_skip_the_model(self, tmp_path):
+        cache = OutlineCache(tmp_path)
+        model = FakeModel()
+
+        first = await summarize_articles(model, [ARTICLE], cache)
+        second = await summarize_articles(model, [ARTICLE], cache)
+
+        assert first == second
+        assert len(model.prompts) == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_outline_is_an_error(self):
+        model = MagicMock()
+        model.generate_content.return_value.text = "   "
+        with pytest.raises(ValueError):
+            await outlines.summarize_article(model, ARTICLE)
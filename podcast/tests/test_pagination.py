@@ -0,0 +1,105 @@
+"""
+Tests for podcast/pagination.py
+
+These tests validate keyset pagination:
+  - Query construction (ordering, projection, keyset filter)
+  - Lazily walking every page until a short page
+  - Error handling for failed page requests
+HTTP is mocked with an in-memory table; no network calls are made.
+"""
+
+import sys
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pagination
+from pagination import iter_rows, fetch_page, keyset_filter, FetchError
+
+
+ROWS = [
+    {"id": f"id-{i:02d}", "created_at": f"2026-01-{(i // 3) + 1:02d}T00:00:00+00:00"}
+    for i in range(10)
+]
+
+
+def fake_get(url, headers, params):
+    """Serve ROWS ordered by (created_at, id) honouring the keyset filter."""
+    descending = params["order"].startswith("created_at.desc")
+    rows = sorted(ROWS, key=lambda r: (r["created_at"], r["id"]), reverse=descending)
+    if "or" in params:
+        # Recover the cursor from the filter built by keyset_filter
+        cursor = next(r for r in ROWS if keyset_filter(r, descending) == params["or"])
+        key = (cursor["created_at"], cursor["id"])
+        rows = [r for r in rows if ((r["created_at"], r["id"]) < key if descending else (r["created_at"], r["id"]) > key)]
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = rows[:int(params["limit"])]
+    return response
+
+
+class TestKeysetFilter:
+    def test_quotes_timestamp_and_id(self):
+        f = keyset_filter({"created_at": "2026-01-28T06:44:59.38+00:00", "id": "abc"})
+        assert f == ('(created_at.lt."2026-01-28T06:44:59.38+00:00",'
+                     'and(created_at.eq."2026-01-28T06:44:59.38+00:00",id.lt."abc"))')
+
+    def test_ascending_uses_gt(self):
+        assert "created_at.gt." in keyset_filter({"created_at": "t", "id": "i"}, descending=False)
+
+
+    def test_other_key_column(self):
+        f = keyset_filter({"updated_at": "t", "id": "i"}, descending=False, key_column="updated_at")
+        assert f == '(updated_at.gt."t",and(updated_at.eq."t",id.gt."i"))'
+
+
+class TestFetchPage:
+    def test_adds_key_columns_to_projection(self):
+        with patch("pagination.requests.get", side_effect=fake_get) as mock_get:
+            fetch_page("https://x/rest/v1/saves", {}, columns="title,content", page_size=3)
+
+        params = mock_get.call_args[1]["params"]
+        assert params["select"] == "title,content,created_at,id"
+        assert params["order"] == "created_at.desc,id.desc"
+        assert params["limit"] == "3"
+        assert "or" not in params
+
+    def test_orders_by_key_column(self):
+        with patch("pagination.requests.get", side_effect=fake_get) as mock_get:
+            fetch_page("https://x", {}, columns="title", descending=False, key_column="updated_at")
+
+        params = mock_get.call_args[1]["params"]
+        assert params["select"] == "title,updated_at,id"
+        assert params["order"] == "updated_at.asc,id.asc"
+
+    def test_raises_on_error(self):
+        response = MagicMock(status_code=500, text="boom")
+        with patch("pagination.requests.get", return_value=response):
+            with pytest.raises(FetchError):
+                fetch_page("https://x", {})
+
+
+class TestIterRows:
+    @pytest.mark.parametrize("descending", [True, False])
+    @pytest.mark.parametrize("page_size", [1, 3, 4, 10, 50])
+    def test_yields_every_row_once_in_order(self, page_size, descending):
+        with patch("pagination.requests.get", side_effect=fake_get):
+            rows = list(iter_rows("https://x", {}, page_size=page_size, descending=descending))
+
+        expected = sorted(ROWS, key=lambda r: (r["created_at"], r["id"]), reverse=descending)
+        assert rows == expected
+
+    def test_is_lazy(self):
+        with patch("pagination.requests.get", side_effect=fake_get) as mock_get:
+            rows = iter_rows("https://x", {}, page_size=3)
+            assert mock_get.call_count == 0
+            next(rows)
+            assert mock_get.call_count == 1
+
+    def test_passes_filters_through(self):
+        with patch("pagination.requests.get", side_effect=fake_get) as mock_get:
+            list(iter_rows("https://x", {}, filters={"user_id": "eq.u1"}, page_size=100))
+
+        assert mock_get.call_args[1]["params"]["user_id"] == "eq.u1"
@@ -0,0 +1,202 @@
+"""
+Tests for podcast/pipeline.py
+
+Covers:
+  - stages start as soon as their inputs exist and independent stages overlap
+  - sync stages run on worker threads, async stages on the loop
+  - failures (None or exceptions) skip only downstream stages
+  - timings and critical path reporting, GitHub job summary output
+  - stage durations and failures recorded in the metrics registry
+  - log records from inside a stage are tagged with its name
+"""
+
+import sys
+import os
+import time
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import json
+import jsonlog
+import metrics
+from pipeline import Stage, Pipeline, DONE, FAILED, SKIPPED
+
+
+def sleeper(value, delay):
+    async def run(**kwargs):
+        await asyncio.sleep(delay)
+        return value
+    return run
+
+
+class TestRun:
+    @pytest.mark.asyncio
+    async def test_passes_values_between_stages(self):
+        pipeline = Pipeline([
+            Stage("a", lambda: 2, outputs=["x"]),
+            Stage("b", lambda x: x * 10, ["x"], ["y"]),
+            Stage("c", lambda x, y: x + y, ["x", "y"], ["z"]),
+        ])
+
+        assert await pipeline.run() is True
+        assert pipeline.values == {"x": 2, "y": 20, "z": 22}
+
+    @pytest.mark.asyncio
+    async def test_initial_values_satisfy_inputs(self):
+        pipeline = Pipeline([Stage("double", lambda n: n * 2, ["n"], ["m"])])
+        assert await pipeline.run(n=4)
+        assert pipeline.values["m"] == 8
+
+    @pytest.mark.asyncio
+    async def test_independent_stages_overlap(self):
+        pipeline = Pipeline([
+            Stage("root", lambda: "r", outputs=["root"]),
+            Stage("slow_a", sleeper("a", 0.1), ["root"], ["a"]),
+            Stage("slow_b", sleeper("b", 0.1), ["root"], ["b"]),
+            Stage("join", lambda a, b: a + b, ["a", "b"], ["ab"]),
+        ])
+
+        start = time.perf_counter()
+        assert await pipeline.run()
+        elapsed = time.perf_counter() - start
+
+        assert pipeline.values["ab"] == "ab"
+        assert elapsed < 0.18  # ~0.1s, not 0.2s
+
+    @pytest.mark.asyncio
+    async def test_sync_stages_do_not_block_the_loop(self):
+        pipeline = Pipeline([
+            Stage("blocking", lambda: time.sleep(0.1) or "done", outputs=["x"]),
+            Stage("async", sleeper("y", 0.1), outputs=["y"]),
+        ])
+
+        start = time.perf_counter()
+        await pipeline.run()
+        assert time.perf_counter() - start < 0.18
+
+    @pytest.mark.asyncio
+    async def test_failure_skips_only_downstream(self, capsys):
+        ran = []
+        pipeline = Pipeline([
+            Stage("root", lambda: 1, outputs=["root"]),
+            Stage("bad", lambda root: None, ["root"], ["bad"]),
+            Stage("after_bad", lambda bad: ran.append("after_bad") or 1, ["bad"], ["x"]),
+            Stage("after_x", lambda x: ran.append("after_x") or 1, ["x"], ["y"]),
+            Stage("good", lambda root: ran.append("good") or 1, ["root"], ["good"]),
+        ])
+
+        assert await pipeline.run() is False
+        assert ran == ["good"]
+        assert pipeline.stage("bad").status == FAILED
+        assert pipeline.stage("after_bad").status == SKIPPED
+        assert pipeline.stage("after_x").status == SKIPPED
+        assert pipeline.stage("good").status == DONE
+
+    @pytest.mark.asyncio
+    async def test_exception_fails_stage(self):
+        def boom():
+            raise RuntimeError("boom")
+
+        pipeline = Pipeline([Stage("boom", boom, outputs=["x"])])
+        assert await pipeline.run() is False
+        assert isinstance(pipeline.stage("boom").error, RuntimeError)
+
+    @pytest.mark.asyncio
+    async def test_partial_outputs_are_kept(self):
+        pipeline = Pipeline([
+            Stage("both", lambda: {"a": 1, "b": None}, outputs=["a", "b"]),
+            Stage("uses_a", lambda a: a + 1, ["a"], ["c"]),
+            Stage("uses_b", lambda b: b, ["b"], ["d"]),
+        ])
+
+        await pipeline.run()
+
+        assert pipeline.stage("both").status == FAILED
+        assert pipeline.values["c"] == 2
+        assert pipeline.stage("uses_b").status == SKIPPED
+
+    @pytest.mark.asyncio
+    async def test_output_less_stage_fails_on_false(self):
+        pipeline = Pipeline([Stage("update", lambda: False)])
+        assert await pipeline.run() is False
+
+    @pytest.mark.asyncio
+    async def test_stage_metrics(self):
+        def boom():
+            raise RuntimeError("boom")
+
+        pipeline = Pipeline([
+            Stage("ok", lambda: 1, outputs=["x"]),
+            Stage("none", lambda: None, outputs=["y"]),
+            Stage("boom", boom, outputs=["z"]),
+        ], component="pipeline-test")
+        await pipeline.run()
+
+        for name, failures in [("ok", 0), ("none", 1), ("boom", 1)]:
+            assert metrics.STAGE_SECONDS.get(component="pipeline-test", stage=name)[0] >= 1
+            assert metrics.STAGE_FAILURES.get(component="pipeline-test", stage=name) >= failures
+
+    @pytest.mark.asyncio
+    async def test_stage_logs_are_tagged(self, tmp_path):
+        jsonlog.configure(tmp_path / "run.log", echo=False)
+        try:
+            pipeline = Pipeline([
+                Stage("sync", lambda: jsonlog.log("in sync") or 1, outputs=["x"]),
+                Stage("fails", lambda x: None, ["x"], ["y"]),
+            ])
+            await pipeline.run()
+        finally:
+            jsonlog.configure(None)
+
+        records = [json.loads(line) for line in (tmp_path / "run.log").read_text().splitlines()]
+        assert [(r["stage"], r["level"]) for r in records] == [("sync", "info"), ("fails", "error")]
+
+    def test_duplicate_outputs_rejected(self):
+        pipeline = Pipeline([Stage("a", lambda: 1, outputs=["x"])])
+        with pytest.raises(ValueError):
+            pipeline.add(Stage("b", lambda: 2, outputs=["x"]))
+
+
+class TestReporting:
+    async def _run(self):
+        pipeline = Pipeline([
+            Stage("fetch", sleeper("f", 0.01), outputs=["f"]),
+            Stage("short", sleeper("s", 0.01), ["f"], ["s"]),
+            Stage("long", sleeper("l", 0.08), ["f"], ["l"]),
+            Stage("finish", sleeper("done", 0.01), ["s", "l"], ["done"]),
+        ])
+        await pipeline.run()
+        return pipeline
+
+    @pytest.mark.asyncio
+    async def test_critical_path_follows_slowest_inputs(self):
+        pipeline = await self._run()
+        assert [s.name for s in pipeline.critical_path()] == ["fetch", "long", "finish"]
+
+    @pytest.mark.asyncio
+    async def test_timings_in_start_order(self):
+        pipeline = await self._run()
+        rows = pipeline.timings()
+        assert rows[0][0] == "fetch"
+        assert rows[-1][0] == "finish"
+        assert all(status == DONE and duration > 0 for _, status, _, duration in rows)
+
+    @pytest.mark.asyncio
+    async def test_report_and_summary(self, tmp_path, monkeypatch):
+        pipeline = await self._run()
+        summary = tmp_path / "summary.md"
+        monkeypatch.setenv("GITHUB_STEP_SUMMARY", str(summary))
+
+        assert pipeline.write_summary()
+
+        text = summary.read_text()
+        assert "| long | done |" in text
+        assert "Critical path: fetch -> long -> finish" in text
+
+    @pytest.mark.asyncio
+    async def test_summary_skipped_outside_actions(self, monkeypatch):
+        monkeypatch.delenv("GITHUB_STEP_SUMMARY", raising=False)
+        pipeline = await self._run()
+        assert pipeline.write_summary() is False
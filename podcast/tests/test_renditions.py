@@ -0,0 +1,166 @@
+"""
+Tests for podcast/renditions.py
+
+Covers:
+  - encode_renditions: one ffmpeg encode per configured target, run on the pool,
+    failures dropped, skipped entirely without ffmpeg
+  - encode_rendition: size and container duration of the output; errors are
+    returned to the parent (which logs them) rather than logged in the worker
+  - get_pool: workers are spawned, not forked from the threaded parent
+  - ogg_opus_duration: granule position minus pre-skip
+  - publish / storage_name: upload results replace local paths
+ffmpeg is mocked (the fake writes a plausible output file); a thread pool
+stands in for the process pool so the mock applies.
+"""
+
+import sys
+import os
+import subprocess
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import mp3
+import renditions
+
+
+def ogg_page(granule, payload=b""):
+    return b"OggS\x00\x00" + granule.to_bytes(8, "little") + bytes(13) + payload
+
+
+def opus_file(seconds, pre_skip=312):
+    head = b"OpusHead\x01\x01" + pre_skip.to_bytes(2, "little") + (48000).to_bytes(4, "little") + bytes(3)
+    return ogg_page(0, head) + ogg_page(0, b"OpusTags") + ogg_page(int(seconds * 48000) + pre_skip)
+
+
+def fake_ffmpeg(cmd, **kwargs):
+    """Write something shaped like the requested output."""
+    output = cmd[-1]
+    if output.endswith(".mp3"):
+        header = mp3.parse_header(int.from_bytes(mp3.build_header(bitrate=32, sample_rate=22050), "big"))
+        data = mp3.silence(3.0, header)
+    else:
+        data = opus_file(3.0)
+    with open(output, "wb") as f:
+        f.write(data)
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "episode.mp3"
+    path.write_bytes(b"original")
+    return path
+
+
+class TestEncodeRenditions:
+    def test_encodes_every_target(self, source, pool):
+        with patch("renditions.shutil.which", return_value="/usr/bin/ffmpeg"), \
+             patch("renditions.subprocess.run", side_effect=fake_ffmpeg) as mock_run:
+            result = renditions.encode_renditions(source, names=["mp3-32k", "opus-24k"], pool=pool)
+
+        assert [r["name"] for r in result] == ["mp3-32k", "opus-24k"]
+        assert mock_run.call_count == 2
+        mp3_out, opus_out = result
+        assert mp3_out["path"].endswith("episode.mp3-32k.mp3")
+        assert mp3_out["mime"] == "audio/mpeg"
+        assert mp3_out["duration_seconds"] == pytest.approx(3.0, abs=0.1)
+        assert mp3_out["size_bytes"] == os.path.getsize(mp3_out["path"])
+        assert opus_out["duration_seconds"] == 3.0
+        assert opus_out["mime"].startswith("audio/ogg")
+
+    def test_ffmpeg_arguments(self, source, pool):
+        with patch("renditions.shutil.which", return_value="/usr/bin/ffmpeg"), \
+             patch("renditions.subprocess.run", side_effect=fake_ffmpeg) as mock_run:
+            renditions.encode_renditions(source, names=["opus-24k"], pool=pool)
+
+        cmd = mock_run.call_args[0][0]
+        assert cmd[cmd.index("-c:a") + 1] == "libopus"
+        assert cmd[cmd.index("-b:a") + 1] == "24k"
+        assert cmd[cmd.index("-ac") + 1] == "1"
+
+    def test_failed_target_is_dropped_and_logged_by_parent(self, source, pool, monkeypatch):
+        def run(cmd, **kwargs):
+            if "libopus" in cmd:
+                raise subprocess.CalledProcessError(1, cmd, stderr=b"Unknown encoder 'libopus'")
+            fake_ffmpeg(cmd)
+
+        logged = []
+        monkeypatch.setattr(renditions, "log", lambda msg, level="info": logged.append((level, msg)))
+        with patch("renditions.shutil.which", return_value="/usr/bin/ffmpeg"), \
+             patch("renditions.subprocess.run", side_effect=run):
+            result = renditions.encode_renditions(source, names=["mp3-32k", "opus-24k"], pool=pool)
+
+        assert [r["name"] for r in result] == ["mp3-32k"]
+        assert logged == [("error", "Error encoding opus-24k rendition: Unknown encoder 'libopus'")]
+
+    def test_encode_rendition_returns_errors(self, source, tmp_path):
+        with patch("renditions.subprocess.run", side_effect=FileNotFoundError("ffmpeg")):
+            assert renditions.encode_rendition(str(source), "mp3-32k", str(tmp_path)) == (None, "ffmpeg")
+
+    def test_skipped_without_ffmpeg(self, source, pool):
+        with patch("renditions.shutil.which", return_value=None), \
+             patch("renditions.subprocess.run") as mock_run:
+            assert renditions.encode_renditions(source, names=["mp3-32k"], pool=pool) == []
+        mock_run.assert_not_called()
+
+    def test_unknown_and_empty_targets(self, source, pool):
+        with patch("renditions.subprocess.run") as mock_run:
+            assert renditions.encode_renditions(source, names=["flac-lossless"], pool=pool) == []
+            assert renditions.encode_renditions(source, names=[], pool=pool) == []
+        mock_run.assert_not_called()
+
+
+class TestPool:
+    def test_workers_are_spawned(self, source, tmp_path, monkeypatch):
+        monkeypatch.setattr(renditions, "_pool", None)
+        monkeypatch.setattr(renditions, "RENDITION_WORKERS", 1)
+        pool = renditions.get_pool()
+        try:
+            assert pool._mp_context.get_start_method() == "spawn"
+            # A real worker process: "original" is not audio, so the encode fails
+            # and the error comes back to the parent instead of being lost
+            rendition, error = pool.submit(renditions.encode_rendition, str(source), "mp3-32k",
+                                           str(tmp_path)).result(timeout=60)
+            assert rendition is None and error
+        finally:
+            pool.shutdown()
+
+
+class TestOggOpusDuration:
+    def test_duration_from_last_granule(self, tmp_path):
+        path = tmp_path / "a.opus"
+        path.write_bytes(opus_file(12.5, pre_skip=3840))
+        assert renditions.ogg_opus_duration(path) == 12.5
+
+    def test_not_ogg(self, tmp_path):
+        path = tmp_path / "a.opus"
+        path.write_bytes(b"nothing here")
+        with pytest.raises(ValueError):
+            renditions.ogg_opus_duration(path)
+
+
+class TestPublish:
+    def test_swaps_paths_for_urls_and_drops_failures(self):
+        encoded = [
+            {"name": "mp3-32k", "mime": "audio/mpeg", "path": "/tmp/s1.mp3-32k.mp3", "size_bytes": 10},
+            {"name": "opus-24k", "mime": "audio/ogg", "path": "/tmp/s1.opus-24k.opus", "size_bytes": 8},
+        ]
+        uploaded = []
+
+        def upload(rendition):
+            uploaded.append(renditions.storage_name("s1", rendition))
+            return None if rendition["name"] == "mp3-32k" else "https://cdn/s1.opus-24k.opus"
+
+        result = renditions.publish(encoded, upload)
+
+        assert uploaded == ["s1.mp3-32k.mp3", "s1.opus-24k.opus"]
+        assert result == [{"name": "opus-24k", "mime": "audio/ogg", "size_bytes": 8,
+                           "url": "https://cdn/s1.opus-24k.opus"}]
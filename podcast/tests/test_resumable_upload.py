@@ -0,0 +1,299 @@
+"""
+Tests for podcast/resumable_upload.py
+
+Covers:
+  - ResumableUpload.create: TUS creation request with deferred length and metadata
+  - ResumableUpload.send_chunk: offset tracking and resuming from the server's offset
+  - ResumableUpload.open / resume: upload URL and offset persisted per object, picked
+    up by a later process with the same fingerprint, dropped once finished or expired;
+    every request has a timeout
+  - upload_stream: fixed-size chunking, final Upload-Length, no finalize on source errors,
+    and skipping the bytes a resumed upload already has, but only if they hash the same
+HTTP is simulated with an in-memory fake TUS server; no network calls are made.
+"""
+
+import sys
+import os
+import json
+import base64
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import resumable_upload
+from resumable_upload import ResumableUpload, UploadError, upload_stream
+
+
+class FakeTusServer:
+    """Minimal TUS server: POST creates, PATCH appends, HEAD reports offset."""
+
+    def __init__(self, drop_after=None):
+        self.data = bytearray()
+        self.length = None
+        self.created_headers = None
+        self.patches = []
+        self.timeouts = []
+        # Accept this many bytes of the next PATCH, then fail the connection
+        self.drop_after = drop_after
+
+    def _response(self, status, headers=None):
+        response = MagicMock()
+        response.status_code = status
+        response.headers = headers or {}
+        response.text = ""
+        return response
+
+    def post(self, url, headers, timeout=None):
+        self.timeouts.append(timeout)
+        self.created_headers = headers
+        return self._response(201, {"Location": "https://fake/upload/1"})
+
+    def head(self, url, headers, timeout=None):
+        self.timeouts.append(timeout)
+        headers = {"Upload-Offset": str(len(self.data))}
+        if self.length is not None:
+            headers["Upload-Length"] = str(self.length)
+        return self._response(200, headers)
+
+    def patch(self, url, headers, data, timeout=None):
+        self.timeouts.append(timeout)
+        data = bytes(data)
+        assert int(headers["Upload-Offset"]) == len(self.data)
+        self.patches.append((len(data), headers.get("Upload-Length")))
+        if self.drop_after is not None:
+            self.data += data[:self.drop_after]
+            self.drop_after = None
+            raise requests.ConnectionError("connection reset")
+        self.data += data
+        if "Upload-Length" in headers:
+            self.length = int(headers["Upload-Length"])
+        return self._response(204, {"Upload-Offset": str(len(self.data))})
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(resumable_upload, "RETRY_DELAY", 0)
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(resumable_upload, "STATE_DIR", tmp_path / "uploads")
+    return tmp_path / "uploads"
+
+
+# ---------------------------------------------------------------------------
+# ResumableUpload
+# ---------------------------------------------------------------------------
+
+class TestResumableUpload:
+    def test_create_sends_deferred_length_and_metadata(self):
+        server = FakeTusServer()
+        upload = ResumableUpload("https://x.supabase.co", "key", "audio", "s1.mp3", session=server)
+
+        assert upload.create() == "https://fake/upload/1"
+
+        headers = server.created_headers
+        assert headers["Upload-Defer-Length"] == "1"
+        assert headers["Tus-Resumable"] == "1.0.0"
+        pairs = dict(item.split(" ") for item in headers["Upload-Metadata"].split(","))
+        assert base64.b64decode(pairs["bucketName"]) == b"audio"
+        assert base64.b64decode(pairs["objectName"]) == b"s1.mp3"
+
+    def test_create_raises_on_error(self):
+        session = MagicMock()
+        session.post.return_value = MagicMock(status_code=403, headers={}, text="denied")
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=session)
+
+        with pytest.raises(UploadError):
+            upload.create()
+
+    def test_resumes_from_server_offset_after_dropped_connection(self):
+        server = FakeTusServer(drop_after=3)
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+        upload.create()
+
+        upload.send_chunk(b"abcdefgh", final=True)
+
+        assert bytes(server.data) == b"abcdefgh"
+        # Second PATCH only carried the 5 bytes the server was missing
+        assert server.patches == [(8, "8"), (5, "8")]
+
+    def test_every_request_has_a_timeout(self):
+        server = FakeTusServer(drop_after=1)
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server, timeout=(1, 2))
+        upload.create()
+        upload.send_chunk(b"abc", final=True)
+
+        assert len(server.timeouts) == 4
+        assert all(timeout is not None for timeout in server.timeouts)
+        assert (1, 2) in server.timeouts
+
+    def test_rejected_chunk_is_not_retried(self):
+        session = FakeTusServer()
+        session.patch = MagicMock(return_value=MagicMock(status_code=413, headers={}, text="too big"))
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=session)
+        upload.create()
+
+        with pytest.raises(UploadError):
+            upload.send_chunk(b"abc")
+        assert session.patch.call_count == 1
+
+
+class TestResumeAcrossProcesses:
+    def test_state_is_saved_per_object(self, state_dir):
+        server = FakeTusServer()
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+        upload.create()
+        upload.send_chunk(b"abcd")
+
+        state = json.loads(upload.state_path.read_text())
+        assert state["location"] == "https://fake/upload/1" and state["offset"] == 4
+        assert upload.state_path.parent == state_dir
+        other = ResumableUpload("https://x", "key", "audio", "s2.mp3", session=server)
+        assert other.state_path != upload.state_path
+
+    def test_new_process_resumes_from_server_offset(self):
+        server = FakeTusServer()
+        first = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server, fingerprint="f1")
+        first.create()
+        first.send_chunk(b"abcd")
+        server.created_headers = None
+
+        second = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server, fingerprint="f1")
+        assert second.open() == 4
+        assert second.location == "https://fake/upload/1"
+        assert server.created_headers is None  # no new upload was created
+
+    def test_other_fingerprint_starts_over(self):
+        server = FakeTusServer()
+        first = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server, fingerprint="f1")
+        first.create()
+        first.send_chunk(b"abcd")
+
+        second = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server, fingerprint="f2")
+        assert second.resume() is False
+        assert not second.state_path.exists()
+
+    def test_unrecorded_bytes_start_over(self):
+        server = FakeTusServer()
+        first = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+        first.create()
+        first.send_chunk(b"abcd")
+        server.data += b"ef"  # part of a chunk that was in flight when we crashed
+
+        # There is no hash of "ef" to check a replay against
+        assert ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server).resume() is False
+
+    def test_finished_upload_clears_state(self):
+        server = FakeTusServer()
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+        upload.create()
+        upload.send_chunk(b"abcd", final=True)
+
+        assert not upload.state_path.exists()
+        assert ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server).resume() is False
+
+    def test_expired_upload_starts_over(self):
+        server = FakeTusServer()
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+        upload.create()
+        server.head = MagicMock(return_value=MagicMock(status_code=404, headers={}))
+
+        again = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+        assert again.resume() is False
+        assert not again.state_path.exists()
+        assert again.open() == 0
+
+
+# ---------------------------------------------------------------------------
+# upload_stream
+# ---------------------------------------------------------------------------
+
+class TestUploadStream:
+    @pytest.mark.asyncio
+    async def test_rechunks_and_declares_length_on_final_chunk(self):
+        server = FakeTusServer()
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+
+        size = await upload_stream(upload, _chunks(b"ab", b"cdefg", b"hij"), chunk_size=4)
+
+        assert size == 10
+        assert bytes(server.data) == b"abcdefghij"
+        assert server.patches == [(4, None), (4, None), (2, "10")]
+        assert server.length == 10
+
+    @pytest.mark.asyncio
+    async def test_empty_stream_still_finalizes(self):
+        server = FakeTusServer()
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+
+        assert await upload_stream(upload, _chunks(), chunk_size=4) == 0
+        assert server.length == 0
+
+    @pytest.mark.asyncio
+    async def test_source_error_never_finalizes(self):
+        server = FakeTusServer()
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+
+        async def failing():
+            yield b"abcdef"
+            raise ConnectionError("tts dropped")
+
+        with pytest.raises(ConnectionError):
+            await upload_stream(upload, failing(), chunk_size=4)
+
+        assert server.length is None
+        assert all(length is None for _, length in server.patches)
+        # The upload can still be picked up by the next attempt
+        assert upload.state_path.exists()
+
+    @pytest.mark.asyncio
+    async def test_restart_skips_bytes_the_server_has(self):
+        server = FakeTusServer()
+        crashed = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+
+        async def crashing():
+            yield b"abcdefgh"
+            raise ConnectionError("process killed")
+
+        with pytest.raises(ConnectionError):
+            await upload_stream(crashed, crashing(), chunk_size=4)
+        assert bytes(server.data) == b"abcd"
+        server.patches.clear()
+
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+        size = await upload_stream(upload, _chunks(b"ab", b"cdefg", b"hij"), chunk_size=4)
+
+        assert size == 10
+        assert bytes(server.data) == b"abcdefghij"
+        assert server.patches == [(4, None), (2, "10")]
+        assert not upload.state_path.exists()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("replayed", [(b"abXYefgh",), (b"ab",)])
+    async def test_restart_never_splices_different_bytes(self, replayed):
+        server = FakeTusServer()
+        crashed = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+
+        async def crashing():
+            yield b"abcdefgh"
+            raise ConnectionError("process killed")
+
+        with pytest.raises(ConnectionError):
+            await upload_stream(crashed, crashing(), chunk_size=4)
+        server.patches.clear()
+
+        # Re-synthesized audio that differs from (or is shorter than) what was sent
+        upload = ResumableUpload("https://x", "key", "audio", "s1.mp3", session=server)
+        with pytest.raises(UploadError):
+            await upload_stream(upload, _chunks(*replayed), chunk_size=4)
+
+        assert server.patches == [] and server.length is None
+        assert not upload.state_path.exists()  # the next attempt starts a new upload
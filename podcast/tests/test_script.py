@@ -3,24 +3,33 @@ Tests for podcast/script.py
 
 Covers:
   - generate_script: validates Gemini API interaction, JSON parsing, and markdown fencing cleanup
+  - generate_script_map_reduce: per-article outlines feed a single, smaller script prompt
   - save_to_supabase: validates request payload construction and error handling
-  - upload_audio_to_supabase: validates Supabase storage client calls
-  - update_episode_audio_url: validates database update logic
+  - upload_audio_to_supabase: validates shared client storage calls
+  - update_episode_audio_url / upload_renditions_to_supabase: database update and rendition uploads
+  - episode_stats: duration and size read from the assembled MP3
+  - episode_chapters: one chapter per article segment of the script
+  - generate_audio: validates ordered, bounded-concurrency synthesis and per-line retries
+  - stream_script_to_audio: synthesis overlapping a streamed script, truncated streams
 All external API/network calls are fully mocked.
 """
 
 import sys
 import os
 import json
+import asyncio
+import time
 import pytest
+from pathlib import Path
 from unittest.mock import patch, MagicMock, mock_open
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-# Patch out the Supabase client at import time so script.py doesn't try to
-# connect during test collection (SUPABASE_URL / SUPABASE_KEY are unset)
-with patch("script.create_client", return_value=None):
-    import script
+import script
+import clip_cache
+import manifest
+import workspace
+import mp3
 
 
 SAMPLE_SCRIPT = [
@@ -85,6 +94,59 @@ class TestGenerateScript:
         assert result is None
 
 
+class TestGenerateScriptMapReduce:
+    def _models(self):
+        outline_model = MagicMock()
+        outline_model.generate_content.side_effect = lambda prompt: MagicMock(text=f"outline of {prompt.splitlines()[0]}")
+        script_model = MagicMock()
+        script_model.generate_content.return_value.text = json.dumps(SAMPLE_SCRIPT)
+        return outline_model, script_model
+
+    @pytest.mark.asyncio
+    async def test_script_prompt_contains_outlines_not_content(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+        monkeypatch.setattr(script, "OUTLINE_CACHE", script.OutlineCache(tmp_path))
+        outline_model, script_model = self._models()
+
+        with patch("script.genai.configure"), \
+             patch("script.genai.GenerativeModel", side_effect=[outline_model, script_model]):
+            result = await script.generate_script_map_reduce(SAMPLE_ARTICLES)
+
+        assert result == SAMPLE_SCRIPT
+        assert outline_model.generate_content.call_count == 2
+        prompt = script_model.generate_content.call_args[0][0]
+        assert "outline of Title: Article One" in prompt
+        assert "outline of Title: Article Two" in prompt
+        assert "Content A" not in prompt
+
+    @pytest.mark.asyncio
+    async def test_rerun_reuses_cached_outlines(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+        monkeypatch.setattr(script, "OUTLINE_CACHE", script.OutlineCache(tmp_path))
+        outline_model, script_model = self._models()
+
+        for _ in range(2):
+            with patch("script.genai.configure"), \
+                 patch("script.genai.GenerativeModel", side_effect=[outline_model, script_model]):
+                assert await script.generate_script_map_reduce(SAMPLE_ARTICLES) == SAMPLE_SCRIPT
+
+        assert outline_model.generate_content.call_count == 2
+        assert script_model.generate_content.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_returns_none_when_outline_fails(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+        monkeypatch.setattr(script, "OUTLINE_CACHE", None)
+        outline_model, script_model = self._models()
+        outline_model.generate_content.side_effect = Exception("API error")
+
+        with patch("script.genai.configure"), \
+             patch("script.genai.GenerativeModel", side_effect=[outline_model, script_model]):
+            assert await script.generate_script_map_reduce(SAMPLE_ARTICLES) is None
+
+        script_model.generate_content.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # save_to_supabase
 # ---------------------------------------------------------------------------
@@ -98,25 +160,28 @@ class TestSaveToSupabase:
         monkeypatch.setattr(script, "SUPABASE_URL", "https://fake.supabase.co")
         monkeypatch.setattr(script, "SUPABASE_KEY", "fake-key")
         monkeypatch.setattr(script, "USER_ID", "user-001")
+        mock_client = MagicMock()
+        monkeypatch.setattr(script, "supabase_client", mock_client)
+        return mock_client
 
     def test_returns_episode_id_on_success(self, monkeypatch):
-        self._patch_env(monkeypatch)
+        mock_client = self._patch_env(monkeypatch)
         mock_response = MagicMock()
         mock_response.status_code = 201
         mock_response.json.return_value = [{"id": "ep-999"}]
 
-        with patch("script.requests.post", return_value=mock_response):
+        with patch.object(mock_client, "post", return_value=mock_response):
             episode_id = script.save_to_supabase(SAMPLE_SCRIPT, SAMPLE_ARTICLES)
 
         assert episode_id == "ep-999"
 
     def test_returns_none_on_api_error(self, monkeypatch):
-        self._patch_env(monkeypatch)
+        mock_client = self._patch_env(monkeypatch)
         mock_response = MagicMock()
         mock_response.status_code = 400
         mock_response.text = "Bad Request"
 
-        with patch("script.requests.post", return_value=mock_response):
+        with patch.object(mock_client, "post", return_value=mock_response):
             episode_id = script.save_to_supabase(SAMPLE_SCRIPT, SAMPLE_ARTICLES)
 
         assert episode_id is None
@@ -129,12 +194,12 @@ class TestSaveToSupabase:
         assert result is None
 
     def test_payload_contains_correct_article_ids(self, monkeypatch):
-        self._patch_env(monkeypatch)
+        mock_client = self._patch_env(monkeypatch)
         mock_response = MagicMock()
         mock_response.status_code = 201
         mock_response.json.return_value = [{"id": "ep-001"}]
 
-        with patch("script.requests.post", return_value=mock_response) as mock_post:
+        with patch.object(mock_client, "post", return_value=mock_response) as mock_post:
             script.save_to_supabase(SAMPLE_SCRIPT, SAMPLE_ARTICLES)
 
         payload = mock_post.call_args[1]["json"]
@@ -157,12 +222,8 @@ class TestUploadAudioToSupabase:
         fake_mp3 = tmp_path / "episode.mp3"
         fake_mp3.write_bytes(b"fake audio data")
 
-        mock_storage = MagicMock()
-        mock_storage.from_.return_value.upload.return_value = None
-        mock_storage.from_.return_value.get_public_url.return_value = "https://cdn.example.com/ep.mp3"
-
         mock_client = MagicMock()
-        mock_client.storage = mock_storage
+        mock_client.upload.return_value = "https://cdn.example.com/ep.mp3"
 
         original = script.supabase_client
         script.supabase_client = mock_client
@@ -170,6 +231,22 @@ class TestUploadAudioToSupabase:
         script.supabase_client = original
 
         assert result == "https://cdn.example.com/ep.mp3"
+        bucket, filename = mock_client.upload.call_args[0][:2]
+        assert (bucket, filename) == ("podcasts", "episode_ep-001.mp3")
+        assert mock_client.upload.call_args[1]["content_type"] == "audio/mpeg"
+
+    def test_returns_none_when_upload_fails(self, tmp_path):
+        fake_mp3 = tmp_path / "episode.mp3"
+        fake_mp3.write_bytes(b"fake audio data")
+        mock_client = MagicMock()
+        mock_client.upload.side_effect = Exception("Storage upload failed: 500")
+
+        original = script.supabase_client
+        script.supabase_client = mock_client
+        result = script.upload_audio_to_supabase(str(fake_mp3), "ep-001")
+        script.supabase_client = original
+
+        assert result is None
 
 
 # ---------------------------------------------------------------------------
@@ -186,15 +263,463 @@ class TestUpdateEpisodeAudioUrl:
 
     def test_calls_update_with_correct_args(self):
         mock_client = MagicMock()
-        mock_client.table.return_value.update.return_value.eq.return_value.execute.return_value = None
+        mock_client.patch.return_value.status_code = 204
 
         original = script.supabase_client
         script.supabase_client = mock_client
         result = script.update_episode_audio_url("ep-001", "https://cdn.example.com/ep.mp3")
         script.supabase_client = original
 
-        mock_client.table.assert_called_with("podcast_episodes")
-        mock_client.table.return_value.update.assert_called_with(
-            {"audio_url": "https://cdn.example.com/ep.mp3"}
+        mock_client.patch.assert_called_with(
+            "/rest/v1/podcast_episodes",
+            params={"id": "eq.ep-001"},
+            json={"audio_url": "https://cdn.example.com/ep.mp3"}
         )
         assert result is True
+
+    def test_includes_duration_and_size(self):
+        mock_client = MagicMock()
+        mock_client.patch.return_value.status_code = 204
+
+        original = script.supabase_client
+        script.supabase_client = mock_client
+        script.update_episode_audio_url("ep-001", "https://cdn.example.com/ep.mp3",
+                                        {"duration_seconds": 754, "size_bytes": 3010000})
+        script.supabase_client = original
+
+        assert mock_client.patch.call_args.kwargs["json"] == {
+            "audio_url": "https://cdn.example.com/ep.mp3", "duration_seconds": 754, "size_bytes": 3010000,
+        }
+
+    def test_includes_renditions(self):
+        mock_client = MagicMock()
+        mock_client.patch.return_value.status_code = 204
+        rendition = {"name": "opus-24k", "url": "https://cdn.example.com/ep.opus", "size_bytes": 10}
+
+        original = script.supabase_client
+        script.supabase_client = mock_client
+        script.update_episode_audio_url("ep-001", "https://cdn.example.com/ep.mp3", None, [rendition])
+        script.supabase_client = original
+
+        assert mock_client.patch.call_args.kwargs["json"]["audio_renditions"] == [rendition]
+
+    def test_returns_false_on_api_error(self):
+        mock_client = MagicMock()
+        mock_client.patch.return_value.status_code = 400
+
+        original = script.supabase_client
+        script.supabase_client = mock_client
+        result = script.update_episode_audio_url("ep-001", "https://cdn.example.com/ep.mp3")
+        script.supabase_client = original
+
+        assert result is False
+
+
+class TestUploadRenditions:
+    def test_uploads_each_rendition_with_its_type(self, tmp_path):
+        path = tmp_path / "episode.opus-24k.opus"
+        path.write_bytes(b"opus")
+        mock_client = MagicMock()
+        mock_client.upload.return_value = "https://cdn.example.com/episode_ep-1.opus-24k.opus"
+        rendition = {"name": "opus-24k", "mime": "audio/ogg", "path": str(path), "size_bytes": 4}
+
+        original = script.supabase_client
+        script.supabase_client = mock_client
+        result = script.upload_renditions_to_supabase([rendition], "ep-1")
+        script.supabase_client = original
+
+        assert mock_client.upload.call_args[0][:2] == ("podcasts", "episode_ep-1.opus-24k.opus")
+        assert mock_client.upload.call_args.kwargs["content_type"] == "audio/ogg"
+        assert result == [{"name": "opus-24k", "mime": "audio/ogg", "size_bytes": 4,
+                           "url": "https://cdn.example.com/episode_ep-1.opus-24k.opus"}]
+
+
+class TestEpisodeStats:
+    def test_reads_duration_and_size_from_frame_headers(self, tmp_path):
+        header = mp3.parse_header(int.from_bytes(mp3.build_header(), "big"))
+        episode = tmp_path / "episode.mp3"
+        episode.write_bytes(mp3.silence(2.5, header))
+
+        assert script.episode_stats(episode) == {"duration_seconds": 3, "size_bytes": episode.stat().st_size}
+
+    def test_unreadable_file_gives_no_stats(self, tmp_path):
+        assert script.episode_stats(tmp_path / "missing.mp3") == {}
+
+
+class TestEpisodeChapters:
+    def test_new_chapter_when_article_changes(self):
+        lines = [
+            {"speaker": "Alex", "text": "Welcome back!", "article": 0},
+            {"speaker": "Taylor", "text": "First up...", "article": 1},
+            {"speaker": "Alex", "text": "Right.", "article": 1},
+            {"speaker": "Taylor", "text": "Next...", "article": 2},
+            {"speaker": "Alex", "text": "Bye!", "article": 0},
+        ]
+        assert script.episode_chapters(lines, SAMPLE_ARTICLES) == [
+            {"title": "Article One", "start_line": 1},
+            {"title": "Article Two", "start_line": 3},
+        ]
+
+    def test_ignores_missing_and_out_of_range_articles(self):
+        lines = [{"speaker": "Alex", "text": "Hi"}, {"speaker": "Alex", "text": "?", "article": 7}]
+        assert script.episode_chapters(lines, SAMPLE_ARTICLES) == []
+
+
+# ---------------------------------------------------------------------------
+# generate_audio
+# ---------------------------------------------------------------------------
+
+class FakeCommunicate:
+    """Stand-in for edge_tts.Communicate that records calls and can fail."""
+
+    failures = {}
+    active = 0
+    peak = 0
+
+    calls = 0
+
+    def __init__(self, text, voice, **kwargs):
+        self.text = text
+        self.voice = voice
+        FakeCommunicate.calls += 1
+
+    async def save(self, path):
+        cls = FakeCommunicate
+        cls.active += 1
+        cls.peak = max(cls.peak, cls.active)
+        try:
+            await asyncio.sleep(0.01)
+            if cls.failures.get(self.text, 0) > 0:
+                cls.failures[self.text] -= 1
+                raise ConnectionError("transient")
+            with open(path, "w") as f:
+                f.write(f"{self.voice}:{self.text}")
+        finally:
+            cls.active -= 1
+
+    async def stream(self):
+        yield {"type": "audio", "data": f"{self.voice}:{self.text}".encode()}
+
+
+@pytest.fixture
+def fake_communicate(monkeypatch):
+    FakeCommunicate.failures = {}
+    FakeCommunicate.active = 0
+    FakeCommunicate.peak = 0
+    FakeCommunicate.calls = 0
+    monkeypatch.setattr(clip_cache.edge_tts, "Communicate", FakeCommunicate)
+    monkeypatch.setattr(script, "CLIP_CACHE", None)
+    monkeypatch.setattr(script, "AUDIO_RETRY_DELAY", 0)
+    return FakeCommunicate
+
+
+class TestGenerateAudio:
+    LINES = [{"speaker": "Alex" if i % 2 == 0 else "Taylor", "text": f"line {i}"} for i in range(10)]
+
+    @pytest.mark.asyncio
+    async def test_returns_clips_in_script_order(self, tmp_path, fake_communicate):
+        files = await script.generate_audio(self.LINES, str(tmp_path), concurrency=4)
+
+        assert files == [str(tmp_path / f"line_{i:03d}.mp3") for i in range(10)]
+        assert (tmp_path / "line_003.mp3").read_text() == "en-US-AvaNeural:line 3"
+
+    @pytest.mark.asyncio
+    async def test_bounds_concurrency(self, tmp_path, fake_communicate):
+        await script.generate_audio(self.LINES, str(tmp_path), concurrency=3)
+        assert fake_communicate.peak == 3
+
+    @pytest.mark.asyncio
+    async def test_retries_only_failed_lines(self, tmp_path, fake_communicate):
+        fake_communicate.failures = {"line 4": 2}
+
+        files = await script.generate_audio(self.LINES, str(tmp_path), concurrency=4)
+
+        assert len(files) == 10
+        assert fake_communicate.failures == {"line 4": 0}
+
+    @pytest.mark.asyncio
+    async def test_returns_none_when_line_exhausts_retries(self, tmp_path, fake_communicate, monkeypatch):
+        monkeypatch.setattr(script, "AUDIO_MAX_RETRIES", 1)
+        fake_communicate.failures = {"line 2": 5}
+
+        files = await script.generate_audio(self.LINES, str(tmp_path), concurrency=4)
+
+        assert files is None
+        assert not (tmp_path / "line_002.mp3").exists()
+
+    @pytest.mark.asyncio
+    async def test_reuses_cached_clips_on_rerun(self, tmp_path, fake_communicate, monkeypatch):
+        monkeypatch.setattr(script, "CLIP_CACHE", script.ClipCache(tmp_path / "cache"))
+
+        await script.generate_audio(self.LINES, str(tmp_path / "run1"), concurrency=4)
+        await script.generate_audio(self.LINES, str(tmp_path / "run2"), concurrency=4)
+
+        assert fake_communicate.calls == 10
+        assert (tmp_path / "run2" / "line_005.mp3").read_text() == "en-US-AvaNeural:line 5"
+
+
+    @pytest.mark.asyncio
+    async def test_small_clips_stay_in_memory(self, tmp_path, fake_communicate, monkeypatch):
+        # "en-US-AvaNeural:line 1" is 22 bytes, "...AndrewNeural:line 0" 25
+        monkeypatch.setattr(script, "INLINE_CLIP_BYTES", 24)
+
+        files = await script.generate_audio(self.LINES[:2], str(tmp_path), concurrency=2)
+
+        assert files == [str(tmp_path / "line_000.mp3"), b"en-US-AvaNeural:line 1"]
+        assert (tmp_path / "line_000.mp3").read_text() == "en-US-AndrewNeural:line 0"
+        assert not (tmp_path / "line_001.mp3").exists()
+
+
+# ---------------------------------------------------------------------------
+# Streaming script -> audio
+# ---------------------------------------------------------------------------
+
+class FakeStream:
+    """Streamed Gemini response: yields the JSON in small chunks, optionally
+    blocking mid-stream until a condition holds (e.g. a clip exists)."""
+
+    def __init__(self, text, chunk_size=7, wait_for=None, wait_at=None):
+        self.chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        self.wait_for = wait_for
+        self.wait_at = wait_at
+        self.condition_met = None
+
+    def __iter__(self):
+        for i, chunk in enumerate(self.chunks):
+            if self.wait_for and i == self.wait_at:
+                deadline = time.monotonic() + 5
+                while not self.wait_for() and time.monotonic() < deadline:
+                    time.sleep(0.005)
+                self.condition_met = self.wait_for()
+            yield MagicMock(text=chunk)
+
+
+class TestStreamScriptToAudio:
+    LINES = TestGenerateAudio.LINES
+
+    def _model(self, stream):
+        model = MagicMock()
+        model.generate_content.return_value = stream
+        return model
+
+    @pytest.mark.asyncio
+    async def test_synthesis_starts_before_script_finishes(self, tmp_path, fake_communicate, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+        text = "```json\n" + json.dumps(self.LINES) + "\n```"
+        first_clip = tmp_path / "line_000.mp3"
+        # The stream stalls halfway until line 0 has been synthesized
+        stream = FakeStream(text, wait_for=first_clip.exists, wait_at=len(text) // 14)
+        model = self._model(stream)
+
+        with patch("script.genai.configure"), \
+             patch("script.genai.GenerativeModel", return_value=model):
+            lines, files = await script.stream_script_to_audio(SAMPLE_ARTICLES, output_dir=str(tmp_path))
+
+        assert stream.condition_met is True  # line 0 was synthesized mid-stream
+        assert lines == self.LINES
+        assert files == [str(tmp_path / f"line_{i:03d}.mp3") for i in range(10)]
+        assert first_clip.read_text() == "en-US-AndrewNeural:line 0"
+        assert model.generate_content.call_args[1] == {"stream": True}
+
+    @pytest.mark.asyncio
+    async def test_truncated_stream_fails(self, tmp_path, fake_communicate, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+        text = json.dumps(self.LINES)[:-40]
+        model = self._model(FakeStream(text))
+
+        with patch("script.genai.configure"), \
+             patch("script.genai.GenerativeModel", return_value=model):
+            lines, files = await script.stream_script_to_audio(SAMPLE_ARTICLES, output_dir=str(tmp_path))
+
+        assert (lines, files) == (None, None)
+
+    @pytest.mark.asyncio
+    async def test_failed_line_returns_script_without_audio(self, tmp_path, fake_communicate, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "fake-key")
+        monkeypatch.setattr(script, "AUDIO_MAX_RETRIES", 0)
+        fake_communicate.failures = {"line 1": 1}
+        model = self._model(FakeStream(json.dumps(self.LINES)))
+
+        with patch("script.genai.configure"), \
+             patch("script.genai.GenerativeModel", return_value=model):
+            lines, files = await script.stream_script_to_audio(SAMPLE_ARTICLES, output_dir=str(tmp_path))
+
+        assert lines == self.LINES
+        assert files is None
+
+    @pytest.mark.asyncio
+    async def test_no_api_key(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        assert await script.stream_script_to_audio(SAMPLE_ARTICLES, output_dir=str(tmp_path)) == (None, None)
+
+
+# ---------------------------------------------------------------------------
+# build_pipeline / main
+# ---------------------------------------------------------------------------
+
+class TestBuildPipeline:
+    @pytest.fixture
+    def stages(self, monkeypatch, tmp_path):
+        events = []
+        monkeypatch.setattr(manifest, "RUNS_DIR", tmp_path / "runs")
+
+        async def fake_audio(script, output_dir):
+            events.append(("workspace", Path(output_dir).parent.name))
+            events.append("audio start")
+            await asyncio.sleep(0.05)
+            events.append("audio end")
+            return ["line_000.mp3"]
+
+        def fake_save(script, articles):
+            events.append("save_episode")
+            return "ep-1"
+
+        monkeypatch.setattr(script, "fetch_recent_articles", lambda limit: SAMPLE_ARTICLES)
+        monkeypatch.setattr(script, "generate_script", lambda articles: SAMPLE_SCRIPT)
+        monkeypatch.setattr(script, "generate_audio", fake_audio)
+        monkeypatch.setattr(script, "save_script_locally", lambda s: None)
+        monkeypatch.setattr(script, "save_to_supabase", fake_save)
+        monkeypatch.setattr(script, "assemble_episode", lambda d, out, meta, chapters: out)
+        monkeypatch.setattr(script, "episode_stats", lambda path: {"duration_seconds": 90, "size_bytes": 1234})
+        monkeypatch.setattr(script.renditions, "encode_renditions", lambda path: [{"name": "opus-24k"}])
+        monkeypatch.setattr(script, "upload_renditions_to_supabase",
+                            lambda episode_renditions, episode_id: [dict(r, url=f"https://cdn/{episode_id}.{r['name']}")
+                                                                    for r in episode_renditions])
+        monkeypatch.setattr(script, "upload_audio_to_supabase", lambda path, ep: f"https://cdn/{ep}.mp3")
+        update = MagicMock(return_value=True)
+        monkeypatch.setattr(script, "update_episode_audio_url", update)
+        return events, update
+
+    @pytest.mark.asyncio
+    async def test_runs_all_stages_with_db_insert_overlapping_audio(self, stages, monkeypatch):
+        events, update = stages
+        monkeypatch.delenv("GITHUB_STEP_SUMMARY", raising=False)
+
+        assert await script.main() is True
+
+        assert events.index("save_episode") < events.index("audio end")
+        run_id = manifest.RunManifest.load("latest").run_id
+        assert ("workspace", f"stash-podcast-{run_id}") in events
+        update.assert_called_once_with(episode_id="ep-1", audio_url="https://cdn/ep-1.mp3",
+                                       episode_stats={"duration_seconds": 90, "size_bytes": 1234},
+                                       audio_renditions=[{"name": "opus-24k", "url": "https://cdn/ep-1.opus-24k"}])
+
+    @pytest.mark.asyncio
+    async def test_workspace_is_kept_for_resume_and_removed_on_success(self, stages, monkeypatch, tmp_path):
+        monkeypatch.setattr(workspace, "WORKSPACE_ROOT", str(tmp_path / "work"))
+        monkeypatch.delenv("GITHUB_STEP_SUMMARY", raising=False)
+
+        async def audio(script, output_dir):
+            clip = Path(output_dir) / "line_000.mp3"
+            clip.parent.mkdir(parents=True, exist_ok=True)
+            clip.write_bytes(b"clip")
+            return [str(clip)]
+
+        monkeypatch.setattr(script, "generate_audio", audio)
+        monkeypatch.setattr(script, "upload_audio_to_supabase", lambda path, ep: None)
+        assert await script.main() is False
+        assert len(list((tmp_path / "work").iterdir())) == 1
+
+        monkeypatch.setattr(script, "upload_audio_to_supabase", lambda path, ep: f"https://cdn/{ep}.mp3")
+        assert await script.main(resume="latest") is True
+        assert list((tmp_path / "work").iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_no_articles_is_not_a_failure(self, stages, monkeypatch):
+        monkeypatch.delenv("GITHUB_STEP_SUMMARY", raising=False)
+        monkeypatch.setattr(script, "fetch_recent_articles", lambda limit: [])
+
+        assert await script.main() is None
+
+    @pytest.mark.asyncio
+    async def test_failed_insert_still_assembles(self, stages, monkeypatch):
+        monkeypatch.setattr(script, "save_to_supabase", lambda script, articles: None)
+        assembled = []
+        monkeypatch.setattr(script, "assemble_episode", lambda d, out, meta, chapters: assembled.append(out) or out)
+
+        pipeline = script.build_pipeline()
+        assert await pipeline.run() is False
+
+        assert assembled == ["podcast/output/episode.mp3"]
+        assert pipeline.stage("upload").status == "skipped"
+
+
+class TestResume:
+    """A failed run resumed with --resume skips every stage that still holds."""
+
+    @pytest.fixture
+    def run(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(manifest, "RUNS_DIR", tmp_path / "runs")
+        monkeypatch.delenv("GITHUB_STEP_SUMMARY", raising=False)
+        calls = {"fetch": 0, "script": 0, "audio": 0, "save": 0, "upload": 0}
+        clip = tmp_path / "line_000.mp3"
+        episode = tmp_path / "episode.mp3"
+        upload_ok = {"value": False}
+
+        def fetch(limit):
+            calls["fetch"] += 1
+            return SAMPLE_ARTICLES
+
+        def gen_script(articles):
+            calls["script"] += 1
+            return SAMPLE_SCRIPT
+
+        async def audio(script, output_dir):
+            calls["audio"] += 1
+            clip.write_bytes(b"clip")
+            return [str(clip)]
+
+        def save(script, articles):
+            calls["save"] += 1
+            return "ep-1"
+
+        def upload(path, episode_id):
+            calls["upload"] += 1
+            return "https://cdn/ep-1.mp3" if upload_ok["value"] else None
+
+        def assemble(audio_dir, out, meta, chapters):
+            episode.write_bytes(b"episode")
+            return str(episode)
+
+        monkeypatch.setattr(script, "fetch_recent_articles", fetch)
+        monkeypatch.setattr(script, "generate_script", gen_script)
+        monkeypatch.setattr(script, "generate_audio", audio)
+        monkeypatch.setattr(script, "save_script_locally", lambda s: None)
+        monkeypatch.setattr(script, "save_to_supabase", save)
+        monkeypatch.setattr(script, "assemble_episode", assemble)
+        monkeypatch.setattr(script, "upload_audio_to_supabase", upload)
+        monkeypatch.setattr(script.renditions, "encode_renditions", lambda path: [])
+        monkeypatch.setattr(script, "update_episode_audio_url",
+                            lambda episode_id, audio_url, episode_stats, audio_renditions: True)
+        # save_local's output file must exist to be checksummed
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "podcast").mkdir()
+        (tmp_path / "podcast" / "script.json").write_text("[]")
+        return calls, upload_ok, clip
+
+    @pytest.mark.asyncio
+    async def test_resume_only_reruns_failed_stages(self, run):
+        calls, upload_ok, _ = run
+
+        assert await script.main() is False  # upload fails
+        upload_ok["value"] = True
+        assert await script.main(resume="latest") is True
+
+        assert calls == {"fetch": 1, "script": 1, "audio": 1, "save": 1, "upload": 2}
+
+    @pytest.mark.asyncio
+    async def test_changed_clip_invalidates_audio_and_downstream(self, run):
+        calls, upload_ok, clip = run
+
+        await script.main()
+        clip.write_bytes(b"corrupted")
+        upload_ok["value"] = True
+        assert await script.main(resume="latest") is True
+
+        assert calls["audio"] == 2
+        assert calls["script"] == 1
+        assert calls["save"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unknown_run(self, run):
+        assert await script.main(resume="nope") is False
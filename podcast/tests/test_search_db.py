@@ -0,0 +1,59 @@
+"""
+Tests for podcast/search_db.py
+
+Covers:
+  - search: offline ranked results from the mirror, with timing
+  - sync: needs credentials, reports failures, --full resets the cursor
+"""
+
+import sys
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import search_db
+from mirror import Mirror
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "mirror.db"
+    with Mirror(path) as m:
+        m.upsert([{"id": "a", "user_id": "u1", "title": "Stealth aircraft", "url": "https://example.com/a",
+                   "site_name": "Example", "content": "Radar", "updated_at": "2026-10-17T08:00:00+00:00"}])
+        m.db.commit()
+    return path
+
+
+def test_search_prints_ranked_results(db_path, monkeypatch, capsys):
+    monkeypatch.setattr(search_db, "USER_ID", "u1")
+
+    assert search_db.main(["--db", str(db_path), "search", "stealth"]) is True
+
+    out = capsys.readouterr().out
+    assert "1. Stealth aircraft (Example)" in out
+    assert "https://example.com/a" in out
+    assert "1 results in" in out
+
+
+def test_sync_requires_credentials(db_path, monkeypatch, capsys):
+    monkeypatch.setattr(search_db, "SUPABASE_URL", None)
+    assert search_db.main(["--db", str(db_path), "sync"]) is False
+
+
+def test_full_sync_resets_cursor(db_path, monkeypatch):
+    monkeypatch.setattr(search_db, "SUPABASE_URL", "https://x.supabase.co")
+    monkeypatch.setattr(search_db, "SUPABASE_KEY", "key")
+    response = MagicMock(status_code=200, json=MagicMock(return_value=[]))
+    with Mirror(db_path) as m:
+        m._commit_batch([{"id": "a", "updated_at": "2026-10-17T08:00:00+00:00"}])
+
+    with patch("search_db.SupabaseClient") as client:
+        client.return_value.get.return_value = response
+        assert search_db.main(["--db", str(db_path), "sync", "--full", "--prune"]) is True
+
+    params = [c.kwargs["params"] for c in client.return_value.get.call_args_list]
+    assert "updated_at" not in params[0]
+    assert params[1]["select"] == "id,created_at"
@@ -0,0 +1,154 @@
+"""
+Tests for podcast/supabase_http.py
+
+Covers:
+  - Connection pooling: one session shared by every call
+  - Timeouts and auth headers on every request
+  - Retry policy: transient errors/statuses, idempotency, Retry-After
+  - rpc / upload / public_url helpers and the async variants
+The underlying requests.Session is mocked; no network calls are made.
+"""
+
+import sys
+import os
+import io
+import pytest
+import requests
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import supabase_http
+from supabase_http import SupabaseClient, SupabaseError, backoff_delay
+
+
+def _response(status, body=b"[]", headers=None):
+    response = MagicMock()
+    response.status_code = status
+    response.content = body
+    response.text = body.decode()
+    response.headers = headers or {}
+    response.json.return_value = [] if body == b"[]" else {"ok": True}
+    return response
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(supabase_http.time, "sleep", lambda s: None)
+    c = SupabaseClient("https://fake.supabase.co/", "fake-key")
+    c.session.request = MagicMock(return_value=_response(200))
+    return c
+
+
+class TestRequest:
+    def test_builds_url_headers_and_timeout(self, client):
+        client.get("/rest/v1/saves", params={"limit": "1"}, headers={"Prefer": "count=exact"})
+
+        method, url = client.session.request.call_args[0]
+        kwargs = client.session.request.call_args[1]
+        assert (method, url) == ("GET", "https://fake.supabase.co/rest/v1/saves")
+        assert kwargs["headers"]["apikey"] == "fake-key"
+        assert kwargs["headers"]["Authorization"] == "Bearer fake-key"
+        assert kwargs["headers"]["Prefer"] == "count=exact"
+        assert kwargs["timeout"] == supabase_http.DEFAULT_TIMEOUT
+        assert kwargs["params"] == {"limit": "1"}
+
+    def test_accepts_absolute_urls(self, client):
+        client.get("https://other.example.com/x")
+        assert client.session.request.call_args[0][1] == "https://other.example.com/x"
+
+    def test_reuses_one_pooled_session(self, client):
+        session = client.session
+        client.get("/a")
+        client.patch("/b", json={})
+        assert client.session is session
+        assert session.request.call_count == 2
+
+
+class TestRetries:
+    def test_retries_transient_status_then_succeeds(self, client):
+        client.session.request.side_effect = [_response(503), _response(502), _response(200)]
+        assert client.get("/x").status_code == 200
+        assert client.session.request.call_count == 3
+
+    def test_retries_connection_errors(self, client):
+        client.session.request.side_effect = [requests.ConnectionError("reset"), _response(200)]
+        assert client.get("/x").status_code == 200
+
+    def test_raises_after_exhausting_retries_on_errors(self, client):
+        client.session.request.side_effect = requests.Timeout("slow")
+        with pytest.raises(SupabaseError):
+            client.get("/x")
+        assert client.session.request.call_count == supabase_http.MAX_RETRIES + 1
+
+    def test_returns_last_error_response_after_retries(self, client):
+        client.session.request.return_value = _response(500)
+        assert client.get("/x").status_code == 500
+        assert client.session.request.call_count == supabase_http.MAX_RETRIES + 1
+
+    def test_does_not_retry_client_errors(self, client):
+        client.session.request.return_value = _response(400)
+        assert client.get("/x").status_code == 400
+        assert client.session.request.call_count == 1
+
+    def test_post_is_not_retried_by_default(self, client):
+        client.session.request.return_value = _response(503)
+        client.post("/rest/v1/podcast_episodes", json={})
+        assert client.session.request.call_count == 1
+
+    def test_honours_retry_after(self, client, monkeypatch):
+        sleeps = []
+        monkeypatch.setattr(supabase_http.time, "sleep", sleeps.append)
+        client.session.request.side_effect = [_response(429, headers={"Retry-After": "2"}), _response(200)]
+        client.get("/x")
+        assert sleeps == [2.0]
+
+    def test_rewinds_file_bodies_between_attempts(self, client):
+        body = io.BytesIO(b"audio")
+        seen = []
+
+        def fake_request(method, url, data=None, **kwargs):
+            seen.append(data.read())
+            return _response(503) if len(seen) == 1 else _response(200)
+
+        client.session.request.side_effect = fake_request
+        client.request("PUT", "/x", data=body)
+        assert seen == [b"audio", b"audio"]
+
+    def test_backoff_is_jittered_and_capped(self):
+        delays = [backoff_delay(10) for _ in range(50)]
+        assert all(0 <= d <= supabase_http.BACKOFF_CAP for d in delays)
+        assert len(set(delays)) > 1
+
+
+class TestHelpers:
+    def test_rpc_posts_args_and_returns_json(self, client):
+        client.session.request.return_value = _response(200, b'{"ok": true}')
+        assert client.rpc("claim", {"n": 1}) == {"ok": True}
+        method, url = client.session.request.call_args[0]
+        assert (method, url) == ("POST", "https://fake.supabase.co/rest/v1/rpc/claim")
+
+    def test_rpc_raises_on_error(self, client):
+        client.session.request.return_value = _response(404, b"missing")
+        with pytest.raises(SupabaseError):
+            client.rpc("claim")
+
+    def test_upload_returns_public_url(self, client):
+        url = client.upload("audio", "s1.mp3", b"data", content_type="audio/mpeg")
+
+        assert url == "https://fake.supabase.co/storage/v1/object/public/audio/s1.mp3"
+        kwargs = client.session.request.call_args[1]
+        assert kwargs["headers"]["Content-Type"] == "audio/mpeg"
+        assert kwargs["headers"]["x-upsert"] == "true"
+        assert kwargs["timeout"] == supabase_http.UPLOAD_TIMEOUT
+
+    def test_upload_raises_on_error(self, client):
+        client.session.request.return_value = _response(400, b"bad")
+        with pytest.raises(SupabaseError):
+            client.upload("audio", "s1.mp3", b"data")
+
+    @pytest.mark.asyncio
+    async def test_async_variants_use_the_same_session(self, client):
+        response = await client.aget("/x", params={"a": "1"})
+        assert response.status_code == 200
+        assert client.session.request.call_args[1]["params"] == {"a": "1"}
@@ -0,0 +1,81 @@
+"""
+Tests for podcast/textnorm.py
+
+These tests validate that the shared normalizer:
+  - Strips each kind of markdown/HTML formatting
+  - Produces exactly the same output as the original re.sub chains
+    (differential checks against the reference in benchmarks/bench_textnorm.py)
+"""
+
+import sys
+import os
+import gzip
+import json
+import random
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import textnorm
+from benchmarks.bench_textnorm import (
+    legacy_clean_text,
+    legacy_strip_markdown,
+    synthetic_body,
+    article_bodies,
+)
+
+
+class TestStripMarkdown:
+    @pytest.mark.parametrize("raw, expected", [
+        ("## Heading\nbody", "Heading\nbody"),
+        ("see [the docs](https://x.y) now", "see the docs now"),
+        ("**bold** and *italic*", "bold and italic"),
+        ("__bold__ and _italic_", "bold and italic"),
+        ("before\n```\ncode\n```\nafter", "before\n\nafter"),
+        ("call `fn()` here", "call  here"),
+        ("above\n---\nbelow", "above\n\nbelow"),
+        ("<p>para</p>", "para"),
+        ("a\n\n\n\nb", "a\n\nb"),
+    ])
+    def test_strips_formatting(self, raw, expected):
+        assert textnorm.strip_markdown(raw) == expected
+
+    def test_empty_input(self):
+        assert textnorm.strip_markdown("") == ""
+        assert textnorm.strip_markdown(None) == ""
+
+    def test_mid_line_markers_are_kept(self):
+        assert textnorm.strip_markdown("C# is --- not a rule") == "C# is --- not a rule"
+
+
+class TestMatchesLegacy:
+    def test_articles_json(self):
+        bodies = 0
+        for body in article_bodies():
+            bodies += 1
+            assert textnorm.strip_markdown(body) == legacy_strip_markdown(body)
+            assert textnorm.clean_text(body) == legacy_clean_text(body)
+        assert bodies == 10
+
+    def test_replays_an_export(self, tmp_path):
+        # The same rows as a gzip NDJSON export, as written by export.py
+        with open(os.path.join(os.path.dirname(__file__), "..", "articles.json")) as f:
+            rows = json.load(f)
+        export = tmp_path / "saves.ndjson.gz"
+        export.write_bytes(gzip.compress("".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")))
+
+        assert list(article_bodies(export)) == list(article_bodies())
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_synthetic_bodies(self, seed):
+        body = synthetic_body(50_000, seed=seed, markup_ratio=0.3)
+        assert textnorm.strip_markdown(body) == legacy_strip_markdown(body)
+        assert textnorm.clean_text(body) == legacy_clean_text(body)
+
+    def test_random_markup_fuzz(self):
+        rng = random.Random(42)
+        alphabet = "#*_`-[]()!<>\n \tab.:/"
+        for _ in range(5000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+            assert textnorm.strip_markdown(text) == legacy_strip_markdown(text), repr(text)
+            assert textnorm.clean_text(text) == legacy_clean_text(text), repr(text)
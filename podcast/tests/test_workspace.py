@@ -0,0 +1,65 @@
+"""
+Tests for podcast/workspace.py
+
+Covers:
+  - Workspace: one directory per run id under the configured root, cleanup
+  - clip_files: paths pass through, in-memory clips are written out only for
+    the duration of the block
+"""
+
+import sys
+import os
+import pytest
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import workspace
+from workspace import Workspace, clip_files, is_buffer
+
+
+class TestWorkspace:
+    def test_directory_per_run(self, tmp_path):
+        a = Workspace("20261017-080000", tmp_path)
+        b = Workspace("20261018-080000", tmp_path)
+
+        assert a.clips_dir == tmp_path / "stash-podcast-20261017-080000" / "clips"
+        assert a.path != b.path
+
+    def test_root_is_resolved_at_call_time(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(workspace, "WORKSPACE_ROOT", str(tmp_path / "shm"))
+        assert Workspace("run").path.parent == tmp_path / "shm"
+
+    def test_cleanup(self, tmp_path):
+        ws = Workspace("run", tmp_path)
+        ws.clips_dir.mkdir(parents=True)
+        (ws.clips_dir / "line_000.mp3").write_bytes(b"clip")
+
+        ws.cleanup()
+        ws.cleanup()  # already gone
+
+        assert not ws.path.exists()
+
+
+class TestClipFiles:
+    def test_paths_pass_through(self, tmp_path):
+        clips = [str(tmp_path / "a.mp3"), tmp_path / "b.mp3"]
+        with clip_files(clips) as files:
+            assert files == [tmp_path / "a.mp3", tmp_path / "b.mp3"]
+
+    def test_in_memory_clips_are_written_in_order(self, tmp_path):
+        on_disk = tmp_path / "line_001.mp3"
+        on_disk.write_bytes(b"disk")
+
+        with clip_files([b"first", str(on_disk), bytearray(b"third")]) as files:
+            assert [f.read_bytes() for f in files] == [b"first", b"disk", b"third"]
+            assert files[1] == on_disk
+            spilled = files[0]
+
+        assert not spilled.exists()
+        assert on_disk.exists()
+
+    @pytest.mark.parametrize("clip, expected", [(b"x", True), (memoryview(b"x"), True), ("a.mp3", False),
+                                                (Path("a.mp3"), False)])
+    def test_is_buffer(self, clip, expected):
+        assert is_buffer(clip) is expected
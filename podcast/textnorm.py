@@ -0,0 +1,57 @@
+"""
+Shared text normalization for the podcast and TTS pipelines.
+
+All patterns are compiled once at import. Markdown stripping is an ordered
+list of passes; each pass declares the character it needs in order to match
+and is skipped outright when that character is absent. Passes only ever
+remove characters, so a skipped pass can never be needed later. Output is
+byte-for-byte identical to the original per-call `re.sub` chain.
+
+Line-anchored patterns are written to start with a literal character
+(e.g. `#(?<![^\n]#)` instead of `^#` with re.MULTILINE) so the regex engine
+can jump between candidate positions instead of testing every offset.
+"""
+
+import re
+
+_EXCESS_NEWLINES_RE = re.compile(r'\n\n\n+')  # same as \n{3,}, but literal-prefixed
+
+# (trigger, pattern, replacement), applied in order. Order matters: e.g. the
+# link pass runs before the image pass, exactly as the original code did.
+_MARKDOWN_PASSES = [
+    ("#", re.compile(r'#(?<![^\n]#)#{0,5}\s+'), ''),             # headers at line start (keep text)
+    ("](", re.compile(r'\[([^\]]+)\]\([^)]+\)'), r'\1'),         # links, keep text
+    ("**", re.compile(r'\*\*([^*]+)\*\*'), r'\1'),               # bold
+    ("*", re.compile(r'\*([^*]+)\*'), r'\1'),                    # italic
+    ("__", re.compile(r'__([^_]+)__'), r'\1'),                   # bold
+    ("_", re.compile(r'_([^_]+)_'), r'\1'),                      # italic
+    ("```", re.compile(r'```[\s\S]*?```'), ''),                  # code blocks
+    ("`", re.compile(r'`[^`]+`'), ''),                           # inline code
+    ("---", re.compile(r'-(?<![^\n]-)--+(?![^\n])'), ''),        # horizontal rules (whole line)
+    ("![", re.compile(r'!\[[^\]]*\]\([^)]+\)'), ''),             # images
+    ("<", re.compile(r'<[^>]+>'), ''),                           # HTML tags
+]
+
+
+def collapse_whitespace(text):
+    """Collapse runs of 3+ newlines to a paragraph break and trim."""
+    if "\n\n\n" in text:
+        text = _EXCESS_NEWLINES_RE.sub('\n\n', text)
+    return text.strip()
+
+
+def clean_text(text):
+    """Basic cleaning of article content."""
+    if not text:
+        return ""
+    return collapse_whitespace(text)
+
+
+def strip_markdown(text):
+    """Remove markdown/HTML formatting, keeping the readable text."""
+    if not text:
+        return ""
+    for trigger, pattern, replacement in _MARKDOWN_PASSES:
+        if trigger in text:
+            text = pattern.sub(replacement, text)
+    return collapse_whitespace(text)
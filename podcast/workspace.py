@@ -0,0 +1,65 @@
+"""
+Per-run scratch space for podcast clips.
+
+Clips used to go to the fixed podcast/temp_audio/ directory and assembly
+globbed whatever *.mp3 it found there, so a 40-line run after a 60-line run
+silently picked up 20 stale clips. Now every run gets its own directory,
+named after its run id so that `script.py --resume` finds the clips again,
+and clips are handed to assembly as an ordered list (the clip manifest)
+rather than rediscovered from disk.
+
+Each entry of a clip manifest is either a file path or the clip's bytes.
+The in-process assembler reads in-memory clips directly; ffmpeg-based
+engines get them written out by `clip_files` for as long as they need them.
+
+PODCAST_WORKSPACE_DIR picks where run directories live (default: the system
+temp dir). Point it at a tmpfs such as /dev/shm to keep clips in RAM.
+"""
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+WORKSPACE_ROOT = os.getenv("PODCAST_WORKSPACE_DIR") or tempfile.gettempdir()
+
+
+def is_buffer(clip):
+    """True if a clip manifest entry holds the clip's bytes rather than a path."""
+    return isinstance(clip, (bytes, bytearray, memoryview))
+
+
+class Workspace:
+    """The scratch directory of one pipeline run."""
+
+    def __init__(self, run_id, root=None):
+        self.run_id = run_id
+        self.path = Path(root or WORKSPACE_ROOT) / f"stash-podcast-{run_id}"
+
+    @property
+    def clips_dir(self):
+        return self.path / "clips"
+
+    def cleanup(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+@contextmanager
+def clip_files(clips):
+    """
+    Yield a path for every clip in `clips`, in order. In-memory clips are
+    written to a temp directory that is removed when the block exits.
+    """
+    if not any(is_buffer(clip) for clip in clips):
+        yield [Path(clip) for clip in clips]
+        return
+    with tempfile.TemporaryDirectory(prefix="stash-clips-") as tmp:
+        paths = []
+        for i, clip in enumerate(clips):
+            if is_buffer(clip):
+                path = Path(tmp) / f"line_{i:03d}.mp3"
+                path.write_bytes(clip)
+                clip = path
+            paths.append(Path(clip))
+        yield paths
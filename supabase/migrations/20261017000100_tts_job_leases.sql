@@ -0,0 +1,116 @@
+-- Migration: Lease-based TTS job queue
+-- Created at: 2026-10-17
+-- Lets several tts.py workers run at once without synthesizing the same save.
+
+ALTER TABLE saves ADD COLUMN IF NOT EXISTS tts_status TEXT DEFAULT 'pending'
+    CHECK (tts_status IN ('pending', 'processing', 'done', 'skipped', 'failed'));
+ALTER TABLE saves ADD COLUMN IF NOT EXISTS tts_lease_owner TEXT;
+ALTER TABLE saves ADD COLUMN IF NOT EXISTS tts_lease_expires_at TIMESTAMPTZ;
+ALTER TABLE saves ADD COLUMN IF NOT EXISTS tts_attempts INTEGER DEFAULT 0;
+ALTER TABLE saves ADD COLUMN IF NOT EXISTS tts_last_error TEXT;
+
+-- Saves that already have audio are done
+UPDATE saves SET tts_status = 'done' WHERE audio_url IS NOT NULL AND tts_status = 'pending';
+
+CREATE INDEX IF NOT EXISTS saves_tts_queue_idx ON saves(created_at)
+    WHERE tts_status IN ('pending', 'processing');
+
+-- TTS job queue
+-- Workers claim batches atomically; rows locked by another worker's claim are
+-- skipped rather than waited on, so N workers never synthesize the same save.
+-- A job is claimable while pending/processing and its lease (or retry delay)
+-- has expired, so jobs held by a crashed worker are reclaimed automatically;
+-- jobs already out of attempts are parked as 'failed' first.
+create or replace function claim_tts_jobs(
+  worker_id text,
+  batch_size integer default 5,
+  lease_seconds integer default 600,
+  max_attempts integer default 5,
+  user_uuid uuid default null
+)
+returns setof saves as $$
+begin
+  -- A worker that dies on the last attempt never calls fail_tts_job: once its
+  -- lease expires, park the job as 'failed' instead of leaving it queued
+  update saves x
+  set tts_status = 'failed',
+      tts_lease_owner = null,
+      tts_last_error = coalesce(x.tts_last_error, 'Lease expired on the last attempt')
+  where x.tts_status in ('pending', 'processing')
+    and (x.tts_lease_expires_at is null or x.tts_lease_expires_at < now())
+    and x.tts_attempts >= max_attempts
+    and (user_uuid is null or x.user_id = user_uuid);
+
+  return query
+  update saves s
+  set tts_status = 'processing',
+      tts_lease_owner = worker_id,
+      tts_lease_expires_at = now() + make_interval(secs => lease_seconds),
+      tts_attempts = s.tts_attempts + 1
+  where s.id in (
+    select id
+    from saves
+    where audio_url is null
+      and not is_archived
+      and (user_uuid is null or user_id = user_uuid)
+      and tts_status in ('pending', 'processing')
+      and (tts_lease_expires_at is null or tts_lease_expires_at < now())
+      and tts_attempts < max_attempts
+    order by created_at
+    limit batch_size
+    for update skip locked
+  )
+  returning s.*;
+end;
+$$ language plpgsql;
+
+-- Extend the leases a worker still holds; returns the ids it still owns
+create or replace function heartbeat_tts_jobs(worker_id text, save_ids uuid[], lease_seconds integer default 600)
+returns setof uuid as $$
+  update saves
+  set tts_lease_expires_at = now() + make_interval(secs => lease_seconds)
+  where id = any(save_ids)
+    and tts_status = 'processing'
+    and tts_lease_owner = worker_id
+  returning id;
+$$ language sql;
+
+-- Finish a job: with an audio URL it is done, without one it was skipped
+create or replace function complete_tts_job(save_id uuid, worker_id text, result_audio_url text default null)
+returns boolean as $$
+  with updated as (
+    update saves
+    set audio_url = result_audio_url,
+        tts_status = case when result_audio_url is null then 'skipped' else 'done' end,
+        tts_lease_owner = null,
+        tts_lease_expires_at = null,
+        tts_last_error = null
+    where id = save_id
+      and tts_lease_owner = worker_id
+    returning 1
+  )
+  select exists (select 1 from updated);
+$$ language sql;
+
+-- Release a failed job: retried after retry_seconds until max_attempts is
+-- reached, then parked as 'failed' so it is never retried forever
+create or replace function fail_tts_job(
+  save_id uuid,
+  worker_id text,
+  error_message text default null,
+  max_attempts integer default 5,
+  retry_seconds integer default 120
+)
+returns boolean as $$
+  with updated as (
+    update saves
+    set tts_status = case when tts_attempts >= max_attempts then 'failed' else 'pending' end,
+        tts_lease_owner = null,
+        tts_lease_expires_at = now() + make_interval(secs => retry_seconds),
+        tts_last_error = error_message
+    where id = save_id
+      and tts_lease_owner = worker_id
+    returning 1
+  )
+  select exists (select 1 from updated);
+$$ language sql;
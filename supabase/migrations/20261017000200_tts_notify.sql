@@ -0,0 +1,20 @@
+-- Migration: Notify TTS workers on new saves
+-- Created at: 2026-10-17
+
+-- Wake TTS workers as soon as a save needing audio is inserted
+-- (tts.py listens on this channel when TTS_DATABASE_URL is set)
+create or replace function notify_tts_job()
+returns trigger as $$
+begin
+  perform pg_notify('tts_jobs', new.id::text);
+  return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists saves_notify_tts on saves;
+
+create trigger saves_notify_tts
+  after insert on saves
+  for each row
+  when (new.audio_url is null)
+  execute function notify_tts_job();
@@ -0,0 +1,70 @@
+-- Migration: Server-side filtering of saves pending audio
+-- Created at: 2026-10-17
+-- Stores each save's readable length and indexes the pending-audio query so
+-- tts.py filters short saves in Postgres instead of downloading their bodies.
+
+-- Adding a stored generated column rewrites the table once
+ALTER TABLE saves ADD COLUMN IF NOT EXISTS content_length INTEGER
+    GENERATED ALWAYS AS (char_length(coalesce(nullif(content, ''), highlight, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS saves_audio_pending_idx ON saves(user_id, created_at) INCLUDE (content_length)
+    WHERE audio_url IS NULL AND NOT is_archived;
+
+-- Replace the claim function: new signature and a narrower return type, so
+-- drop both the old overload and any earlier version of this one
+DROP FUNCTION IF EXISTS claim_tts_jobs(text, integer, integer, integer, uuid);
+DROP FUNCTION IF EXISTS claim_tts_jobs(text, integer, integer, integer, uuid, integer);
+
+-- TTS job queue
+-- Workers claim batches atomically; rows locked by another worker's claim are
+-- skipped rather than waited on, so N workers never synthesize the same save.
+-- A job is claimable while pending/processing and its lease (or retry delay)
+-- has expired, so jobs held by a crashed worker are reclaimed automatically;
+-- jobs already out of attempts are parked as 'failed' first.
+-- Saves shorter than min_content_length are never claimed (or shipped), and
+-- claimed saves come back with only the columns the worker needs.
+create or replace function claim_tts_jobs(
+  worker_id text,
+  batch_size integer default 5,
+  lease_seconds integer default 600,
+  max_attempts integer default 5,
+  user_uuid uuid default null,
+  min_content_length integer default 100
+)
+returns table(id uuid, title text, content text, highlight text) as $$
+begin
+  -- A worker that dies on the last attempt never calls fail_tts_job: once its
+  -- lease expires, park the job as 'failed' instead of leaving it queued
+  update saves x
+  set tts_status = 'failed',
+      tts_lease_owner = null,
+      tts_last_error = coalesce(x.tts_last_error, 'Lease expired on the last attempt')
+  where x.tts_status in ('pending', 'processing')
+    and (x.tts_lease_expires_at is null or x.tts_lease_expires_at < now())
+    and x.tts_attempts >= max_attempts
+    and (user_uuid is null or x.user_id = user_uuid);
+
+  return query
+  update saves s
+  set tts_status = 'processing',
+      tts_lease_owner = worker_id,
+      tts_lease_expires_at = now() + make_interval(secs => lease_seconds),
+      tts_attempts = s.tts_attempts + 1
+  where s.id in (
+    select q.id
+    from saves q
+    where q.audio_url is null
+      and not q.is_archived
+      and (user_uuid is null or q.user_id = user_uuid)
+      and q.tts_status in ('pending', 'processing')
+      and (q.tts_lease_expires_at is null or q.tts_lease_expires_at < now())
+      and q.tts_attempts < max_attempts
+      and q.content_length >= min_content_length
+    order by q.created_at
+    limit batch_size
+    for update skip locked
+  )
+  -- Only what tts.py reads (PENDING_COLUMNS), not the whole row
+  returning s.id, s.title, s.content, s.highlight;
+end;
+$$ language plpgsql;
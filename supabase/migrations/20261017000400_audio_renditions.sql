@@ -0,0 +1,12 @@
+-- Migration: Audio renditions
+-- Created at: 2026-10-17
+
+-- Cheaper encodings of the same audio (e.g. 32 kbps MP3, 24 kbps Opus), one
+-- object per rendition: {name, mime, bitrate, url, size_bytes, duration_seconds}.
+-- audio_url keeps pointing at the original MP3; players pick the smallest
+-- rendition they can play and fall back to it.
+alter table saves
+  add column if not exists audio_renditions jsonb not null default '[]';
+
+alter table podcast_episodes
+  add column if not exists audio_renditions jsonb not null default '[]';
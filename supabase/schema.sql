@@ -26,6 +26,9 @@ create table saves (
   excerpt text,
   content text, -- full article text
   highlight text, -- if this is a highlight save
+  content_length integer generated always as (
+    char_length(coalesce(nullif(content, ''), highlight, ''))
+  ) stored, -- readable length, so queries can filter without fetching bodies
 
   -- Metadata
   site_name text,
@@ -43,6 +46,15 @@ create table saves (
 
   -- Audio (TTS)
   audio_url text, -- Generated TTS audio file URL
+  audio_renditions jsonb not null default '[]', -- cheaper encodings: [{name, mime, bitrate, url, size_bytes, duration_seconds}]
+
+  -- TTS job queue (lease-based claiming, see claim_tts_jobs)
+  tts_status text default 'pending'
+    check (tts_status in ('pending', 'processing', 'done', 'skipped', 'failed')),
+  tts_lease_owner text, -- worker currently holding the job
+  tts_lease_expires_at timestamp with time zone, -- lease expiry / earliest retry time
+  tts_attempts integer default 0,
+  tts_last_error text,
 
   created_at timestamp with time zone default now(),
   updated_at timestamp with time zone default now()
@@ -73,6 +85,12 @@ create index saves_user_id_idx on saves(user_id);
 create index saves_created_at_idx on saves(created_at desc);
 create index saves_folder_id_idx on saves(folder_id);
 create index saves_is_archived_idx on saves(is_archived);
+create index saves_tts_queue_idx on saves(created_at)
+  where tts_status in ('pending', 'processing');
+-- Saves still needing audio (tts.py's pending query); content_length is
+-- included so the length threshold is checked without touching the heap
+create index saves_audio_pending_idx on saves(user_id, created_at) include (content_length)
+  where audio_url is null and not is_archived;
 create index tags_user_id_idx on tags(user_id);
 create index folders_user_id_idx on folders(user_id);
 
@@ -177,6 +195,127 @@ begin
 end;
 $$ language plpgsql;
 
+-- TTS job queue
+-- Workers claim batches atomically; rows locked by another worker's claim are
+-- skipped rather than waited on, so N workers never synthesize the same save.
+-- A job is claimable while pending/processing and its lease (or retry delay)
+-- has expired, so jobs held by a crashed worker are reclaimed automatically;
+-- jobs already out of attempts are parked as 'failed' first.
+-- Saves shorter than min_content_length are never claimed (or shipped), and
+-- claimed saves come back with only the columns the worker needs.
+create or replace function claim_tts_jobs(
+  worker_id text,
+  batch_size integer default 5,
+  lease_seconds integer default 600,
+  max_attempts integer default 5,
+  user_uuid uuid default null,
+  min_content_length integer default 100
+)
+returns table(id uuid, title text, content text, highlight text) as $$
+begin
+  -- A worker that dies on the last attempt never calls fail_tts_job: once its
+  -- lease expires, park the job as 'failed' instead of leaving it queued
+  update saves x
+  set tts_status = 'failed',
+      tts_lease_owner = null,
+      tts_last_error = coalesce(x.tts_last_error, 'Lease expired on the last attempt')
+  where x.tts_status in ('pending', 'processing')
+    and (x.tts_lease_expires_at is null or x.tts_lease_expires_at < now())
+    and x.tts_attempts >= max_attempts
+    and (user_uuid is null or x.user_id = user_uuid);
+
+  return query
+  update saves s
+  set tts_status = 'processing',
+      tts_lease_owner = worker_id,
+      tts_lease_expires_at = now() + make_interval(secs => lease_seconds),
+      tts_attempts = s.tts_attempts + 1
+  where s.id in (
+    select q.id
+    from saves q
+    where q.audio_url is null
+      and not q.is_archived
+      and (user_uuid is null or q.user_id = user_uuid)
+      and q.tts_status in ('pending', 'processing')
+      and (q.tts_lease_expires_at is null or q.tts_lease_expires_at < now())
+      and q.tts_attempts < max_attempts
+      and q.content_length >= min_content_length
+    order by q.created_at
+    limit batch_size
+    for update skip locked
+  )
+  -- Only what tts.py reads (PENDING_COLUMNS), not the whole row
+  returning s.id, s.title, s.content, s.highlight;
+end;
+$$ language plpgsql;
+
+-- Wake TTS workers as soon as a save needing audio is inserted
+-- (tts.py listens on this channel when TTS_DATABASE_URL is set)
+create or replace function notify_tts_job()
+returns trigger as $$
+begin
+  perform pg_notify('tts_jobs', new.id::text);
+  return new;
+end;
+$$ language plpgsql;
+
+create trigger saves_notify_tts
+  after insert on saves
+  for each row
+  when (new.audio_url is null)
+  execute function notify_tts_job();
+
+-- Extend the leases a worker still holds; returns the ids it still owns
+create or replace function heartbeat_tts_jobs(worker_id text, save_ids uuid[], lease_seconds integer default 600)
+returns setof uuid as $$
+  update saves
+  set tts_lease_expires_at = now() + make_interval(secs => lease_seconds)
+  where id = any(save_ids)
+    and tts_status = 'processing'
+    and tts_lease_owner = worker_id
+  returning id;
+$$ language sql;
+
+-- Finish a job: with an audio URL it is done, without one it was skipped
+create or replace function complete_tts_job(save_id uuid, worker_id text, result_audio_url text default null)
+returns boolean as $$
+  with updated as (
+    update saves
+    set audio_url = result_audio_url,
+        tts_status = case when result_audio_url is null then 'skipped' else 'done' end,
+        tts_lease_owner = null,
+        tts_lease_expires_at = null,
+        tts_last_error = null
+    where id = save_id
+      and tts_lease_owner = worker_id
+    returning 1
+  )
+  select exists (select 1 from updated);
+$$ language sql;
+
+-- Release a failed job: retried after retry_seconds until max_attempts is
+-- reached, then parked as 'failed' so it is never retried forever
+create or replace function fail_tts_job(
+  save_id uuid,
+  worker_id text,
+  error_message text default null,
+  max_attempts integer default 5,
+  retry_seconds integer default 120
+)
+returns boolean as $$
+  with updated as (
+    update saves
+    set tts_status = case when tts_attempts >= max_attempts then 'failed' else 'pending' end,
+        tts_lease_owner = null,
+        tts_lease_expires_at = now() + make_interval(secs => retry_seconds),
+        tts_last_error = error_message
+    where id = save_id
+      and tts_lease_owner = worker_id
+    returning 1
+  )
+  select exists (select 1 from updated);
+$$ language sql;
+
 -- User preferences table (for digest emails, etc.)
 create table user_preferences (
   id uuid default uuid_generate_v4() primary key,
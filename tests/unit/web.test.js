@@ -169,3 +169,38 @@ describe('buildSearchFilter', () => {
     expect(articles.filter(filter)).toHaveLength(0);
   });
 });
+
+describe('pickAudioUrl', () => {
+  /**
+   * Mirrors StashApp.pickAudioUrl: the smallest rendition the browser can
+   * play, falling back to the original audio_url.
+   */
+  function pickAudioUrl(save, canPlayType) {
+    const probe = { canPlayType };
+    const playable = (save.audio_renditions || [])
+      .filter(r => r.url && probe.canPlayType && probe.canPlayType(r.mime) !== '')
+      .sort((a, b) => a.size_bytes - b.size_bytes);
+    return playable.length ? playable[0].url : save.audio_url;
+  }
+
+  const save = {
+    audio_url: 'https://cdn/s1.mp3',
+    audio_renditions: [
+      { name: 'mp3-32k', mime: 'audio/mpeg', url: 'https://cdn/s1.mp3-32k.mp3', size_bytes: 1200000 },
+      { name: 'opus-24k', mime: 'audio/ogg; codecs="opus"', url: 'https://cdn/s1.opus-24k.opus', size_bytes: 900000 },
+    ],
+  };
+
+  test('picks the smallest playable rendition', () => {
+    expect(pickAudioUrl(save, () => 'probably')).toBe('https://cdn/s1.opus-24k.opus');
+  });
+
+  test('skips renditions the browser cannot play', () => {
+    const noOpus = (mime) => (mime.includes('opus') ? '' : 'maybe');
+    expect(pickAudioUrl(save, noOpus)).toBe('https://cdn/s1.mp3-32k.mp3');
+  });
+
+  test('falls back to audio_url without renditions', () => {
+    expect(pickAudioUrl({ audio_url: 'https://cdn/s2.mp3' }, () => 'maybe')).toBe('https://cdn/s2.mp3');
+  });
+});
@@ -0,0 +1,180 @@
+"""
+Tests for tts/triggers.py
+
+Covers:
+  - AdaptivePoller: immediate re-poll on full batches, idle backoff and reset
+  - Wakeup: notifications before/while waiting, timeouts
+  - WebhookTrigger: POST /wakeup over a real socket, auth and error statuses
+  - ListenNotifyTrigger: against a real Postgres (only with TTS_TEST_DATABASE_URL)
+"""
+
+import sys
+import os
+import json
+import asyncio
+import pytest
+import pytest_asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import triggers
+from triggers import AdaptivePoller, Wakeup, WebhookTrigger, ListenNotifyTrigger
+
+
+# ---------------------------------------------------------------------------
+# AdaptivePoller
+# ---------------------------------------------------------------------------
+
+class TestAdaptivePoller:
+    def test_full_batch_polls_again_immediately(self):
+        poller = AdaptivePoller(5, 120)
+        assert poller.next_delay(5, 5) == 0
+
+    def test_partial_batch_uses_min_interval(self):
+        poller = AdaptivePoller(5, 120)
+        assert poller.next_delay(5, 2) == 5
+
+    def test_idle_backs_off_up_to_cap(self):
+        poller = AdaptivePoller(5, 30)
+        delays = [poller.next_delay(5, 0) for _ in range(5)]
+        assert delays == [5, 10, 20, 30, 30]
+
+    def test_work_after_idle_resets(self):
+        poller = AdaptivePoller(5, 120)
+        for _ in range(4):
+            poller.next_delay(5, 0)
+        assert poller.next_delay(5, 1) == 5
+        assert poller.next_delay(5, 0) == 5
+
+    def test_reset(self):
+        poller = AdaptivePoller(5, 120)
+        poller.next_delay(5, 0)
+        poller.next_delay(5, 0)
+        poller.reset()
+        assert poller.next_delay(5, 0) == 5
+
+
+# ---------------------------------------------------------------------------
+# Wakeup
+# ---------------------------------------------------------------------------
+
+class TestWakeup:
+    @pytest.mark.asyncio
+    async def test_times_out_without_notify(self):
+        assert await Wakeup().wait(0.01) == []
+
+    @pytest.mark.asyncio
+    async def test_notify_while_waiting(self):
+        wakeup = Wakeup()
+        asyncio.get_running_loop().call_later(0.01, wakeup.notify, "test")
+        assert await wakeup.wait(5) == ["test"]
+
+    @pytest.mark.asyncio
+    async def test_notify_before_wait_is_not_lost(self):
+        wakeup = Wakeup()
+        wakeup.notify("a")
+        wakeup.notify("b")
+        assert await wakeup.wait(5) == ["a", "b"]
+        # ...and is consumed by that wait
+        assert await wakeup.wait(0.01) == []
+
+
+# ---------------------------------------------------------------------------
+# WebhookTrigger
+# ---------------------------------------------------------------------------
+
+async def send(port, method="POST", path="/wakeup", body=b"", headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}"]
+    lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+    await writer.drain()
+    status_line = await reader.readline()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+@pytest_asyncio.fixture
+async def webhook():
+    wakeup = Wakeup()
+    trigger = WebhookTrigger("127.0.0.1", 0, secret="s3cret")
+    await trigger.start(wakeup)
+    yield trigger, wakeup
+    await trigger.stop()
+
+
+class TestWebhookTrigger:
+    @pytest.mark.asyncio
+    async def test_post_fires_wakeup(self, webhook):
+        trigger, wakeup = webhook
+        body = json.dumps({"type": "INSERT", "record": {"id": "save-1"}}).encode()
+        status = await send(trigger.port, body=body, headers={"X-Webhook-Secret": "s3cret"})
+        assert status == 202
+        assert await wakeup.wait(1) == ["webhook: save-1"]
+
+    @pytest.mark.asyncio
+    async def test_non_json_body_still_wakes(self, webhook):
+        trigger, wakeup = webhook
+        status = await send(trigger.port, body=b"ping", headers={"X-Webhook-Secret": "s3cret"})
+        assert status == 202
+        assert await wakeup.wait(1) == ["webhook"]
+
+    @pytest.mark.asyncio
+    async def test_wrong_secret_rejected(self, webhook):
+        trigger, wakeup = webhook
+        assert await send(trigger.port, headers={"X-Webhook-Secret": "nope"}) == 401
+        assert await send(trigger.port) == 401
+        assert await wakeup.wait(0.01) == []
+
+    @pytest.mark.asyncio
+    async def test_wrong_path_and_method(self, webhook):
+        trigger, wakeup = webhook
+        headers = {"X-Webhook-Secret": "s3cret"}
+        assert await send(trigger.port, path="/other", headers=headers) == 404
+        assert await send(trigger.port, method="GET", headers=headers) == 405
+        assert await wakeup.wait(0.01) == []
+
+    @pytest.mark.asyncio
+    async def test_oversized_body_rejected(self, webhook):
+        trigger, _ = webhook
+        reader, writer = await asyncio.open_connection("127.0.0.1", trigger.port)
+        writer.write(f"POST /wakeup HTTP/1.1\r\nContent-Length: {triggers.MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+        await writer.drain()
+        assert int((await reader.readline()).split()[1]) == 413
+        writer.close()
+
+    @pytest.mark.asyncio
+    async def test_no_secret_configured(self):
+        wakeup = Wakeup()
+        trigger = WebhookTrigger("127.0.0.1", 0)
+        await trigger.start(wakeup)
+        try:
+            assert await send(trigger.port) == 202
+        finally:
+            await trigger.stop()
+
+
+# ---------------------------------------------------------------------------
+# ListenNotifyTrigger (integration, opt-in)
+# ---------------------------------------------------------------------------
+
+TEST_DATABASE_URL = os.getenv("TTS_TEST_DATABASE_URL")
+
+
+@pytest.mark.skipif(triggers.psycopg is None or not TEST_DATABASE_URL,
+                    reason="needs psycopg and TTS_TEST_DATABASE_URL")
+class TestListenNotifyTrigger:
+    @pytest.mark.asyncio
+    async def test_notify_fires_wakeup(self):
+        wakeup = Wakeup()
+        trigger = ListenNotifyTrigger(TEST_DATABASE_URL, channel="tts_jobs_test")
+        await trigger.start(wakeup)
+        try:
+            await asyncio.wait_for(trigger.listening.wait(), 10)
+            assert await wakeup.wait(1) == ["listen: connected"]
+
+            async with await triggers.psycopg.AsyncConnection.connect(TEST_DATABASE_URL, autocommit=True) as conn:
+                await conn.execute("select pg_notify('tts_jobs_test', 'save-1')")
+            assert await wakeup.wait(5) == ["notify: save-1"]
+        finally:
+            await trigger.stop()
@@ -0,0 +1,610 @@
+"""
+Tests for tts/tts.py
+
+Covers:
+  - get_pending_saves: query construction, in-flight exclusion, the length filter (server-side
+    with the migration, client-side without), or an incrementally synced local mirror
+  - process_batch: concurrent processing bounded by MAX_WORKERS
+  - process_save: temp-file and streaming upload paths, best-effort renditions
+  - generate_audio / stream_audio: chunked synthesis stitched in reading order, Xing header indexing
+  - worker: failures are recorded and never stop the pool
+  - iter_pending_saves / backfill: paging through the whole backlog
+  - lease queue: claiming, skipping, completing, failing and heartbeats via RPC
+  - metrics: per-stage timings, work counters and results, /metrics server
+  - logging: JSON-lines records tagged with save id and stage
+All network and edge-tts calls are mocked.
+"""
+
+import sys
+import os
+import json
+import asyncio
+import functools
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import tts
+
+
+LONG_CONTENT = "word " * 100
+
+
+@pytest.fixture(autouse=True)
+def no_leases(monkeypatch):
+    """Plain polling by default; lease tests opt back in."""
+    monkeypatch.setattr(tts, "USE_LEASES", False)
+
+
+# ---------------------------------------------------------------------------
+# get_pending_saves
+# ---------------------------------------------------------------------------
+
+class TestGetPendingSaves:
+    def _response(self, rows):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = rows
+        return mock_response
+
+    def test_length_threshold_is_pushed_into_query(self, monkeypatch):
+        monkeypatch.setattr(tts, "FILTER_CONTENT_LENGTH", True)
+        rows = [{"id": "a", "content": LONG_CONTENT}]
+        with patch.object(tts.client, "get", return_value=self._response(rows)) as mock_get:
+            pending = tts.get_pending_saves()
+
+        assert pending == rows
+        params = mock_get.call_args[1]["params"]
+        assert params["content_length"] == f"gte.{tts.MIN_CONTENT_CHARS}"
+        assert params["audio_url"] == "is.null"
+
+    def test_short_saves_filtered_client_side_without_migration(self):
+        rows = [{"id": "a", "content": LONG_CONTENT}, {"id": "b", "content": "short", "highlight": None}]
+        with patch.object(tts.client, "get", return_value=self._response(rows)) as mock_get:
+            pending = tts.get_pending_saves()
+
+        assert [s["id"] for s in pending] == ["a"]
+        assert "content_length" not in mock_get.call_args[1]["params"]
+
+    def test_selects_only_needed_columns(self):
+        with patch.object(tts.client, "get", return_value=self._response([])) as mock_get:
+            tts.get_pending_saves()
+
+        selected = set(mock_get.call_args[1]["params"]["select"].split(","))
+        assert selected == {"id", "title", "content", "highlight", "created_at"}
+
+    def test_excludes_in_flight_ids(self):
+        with patch.object(tts.client, "get", return_value=self._response([])) as mock_get:
+            tts.get_pending_saves(exclude_ids={"b", "a"})
+
+        params = mock_get.call_args[1]["params"]
+        assert params["id"] == "not.in.(a,b)"
+
+    def test_no_id_filter_without_exclusions(self):
+        with patch.object(tts.client, "get", return_value=self._response([])) as mock_get:
+            tts.get_pending_saves()
+
+        assert "id" not in mock_get.call_args[1]["params"]
+
+
+    def test_reads_from_synced_mirror(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(tts, "USE_MIRROR", True)
+        monkeypatch.setattr(tts, "Mirror", functools.partial(tts.Mirror, tmp_path / "mirror.db"))
+        upstream = [
+            {"id": "a", "user_id": tts.USER_ID, "title": "A", "content": LONG_CONTENT, "highlight": None,
+             "is_archived": False, "audio_url": None,
+             "created_at": "2026-10-17T08:00:00+00:00", "updated_at": "2026-10-17T08:00:00+00:00"},
+            {"id": "b", "user_id": tts.USER_ID, "title": "B", "content": "short", "highlight": None,
+             "is_archived": False, "audio_url": None,
+             "created_at": "2026-10-17T09:00:00+00:00", "updated_at": "2026-10-17T09:00:00+00:00"},
+        ]
+
+        with patch.object(tts.client, "get", return_value=self._response(upstream)) as mock_get:
+            pending = tts.get_pending_saves()
+
+        assert pending == [{"id": "a", "title": "A", "content": LONG_CONTENT, "highlight": None}]
+        assert mock_get.call_args[1]["params"]["order"] == "updated_at.asc,id.asc"
+
+
+# ---------------------------------------------------------------------------
+# process_batch / worker
+# ---------------------------------------------------------------------------
+
+class TestWorkerPool:
+    @pytest.mark.asyncio
+    async def test_process_batch_respects_max_workers(self, monkeypatch):
+        monkeypatch.setattr(tts, "MAX_WORKERS", 2)
+        active = 0
+        peak = 0
+
+        async def fake_process(save):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return True
+
+        monkeypatch.setattr(tts, "process_save", fake_process)
+        results = await tts.process_batch([{"id": str(i)} for i in range(6)])
+
+        assert results == [True] * 6
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_worker_records_failures_and_keeps_running(self, monkeypatch):
+        async def fake_process(save):
+            if save["id"] == "bad":
+                raise RuntimeError("boom")
+            return True
+
+        monkeypatch.setattr(tts, "process_save", fake_process)
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+
+        queue = asyncio.Queue()
+        in_flight = {"bad", "good"}
+        retry_after = {}
+        await queue.put({"id": "bad"})
+        await queue.put({"id": "good"})
+
+        task = asyncio.create_task(tts.worker(queue, in_flight, retry_after))
+        await queue.join()
+        task.cancel()
+
+        assert in_flight == set()
+        assert list(retry_after) == ["bad"]
+
+    @pytest.mark.asyncio
+    async def test_process_save_uploads_and_updates(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+
+        async def fake_generate(text, path):
+            with open(path, "wb") as f:
+                f.write(b"audio")
+
+        monkeypatch.setattr(tts, "generate_audio", fake_generate)
+        monkeypatch.setattr(tts, "encode_renditions", lambda path: [])
+        monkeypatch.setattr(tts, "upload_to_supabase_storage", lambda path, save_id: f"https://cdn/{save_id}.mp3")
+        updated = []
+        monkeypatch.setattr(tts, "update_save_audio_url", lambda save_id, url: updated.append((save_id, url)))
+
+        ok = await tts.process_save({"id": "s1", "title": "T", "content": LONG_CONTENT})
+
+        assert ok is True
+        assert updated == [("s1", "https://cdn/s1.mp3")]
+
+    @pytest.mark.asyncio
+    async def test_process_save_records_stage_metrics(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+
+        async def fake_generate(text, path):
+            with open(path, "wb") as f:
+                f.write(b"audio")
+
+        def failing_update(save_id, url):
+            raise RuntimeError("update failed")
+
+        monkeypatch.setattr(tts, "generate_audio", fake_generate)
+        monkeypatch.setattr(tts, "audio_duration", lambda path: 42.0)
+        monkeypatch.setattr(tts, "encode_renditions", lambda path: [])
+        monkeypatch.setattr(tts, "upload_to_supabase_storage", lambda path, save_id: "https://cdn/s1.mp3")
+        monkeypatch.setattr(tts, "update_save_audio_url", failing_update)
+        stage = functools.partial(dict, component="tts")
+        before = {
+            "clean": tts.metrics.STAGE_WORDS.get(**stage(stage="clean")),
+            "audio": tts.metrics.STAGE_AUDIO_SECONDS.get(**stage(stage="synthesize")),
+            "upload": tts.metrics.STAGE_BYTES.get(**stage(stage="upload")),
+            "synthesize": tts.metrics.STAGE_SECONDS.get(**stage(stage="synthesize"))[0],
+            "update": tts.metrics.STAGE_FAILURES.get(**stage(stage="update")),
+            "failed": tts.SAVES.get(result="failed"),
+        }
+
+        assert await tts.process_save({"id": "s1", "title": "T", "content": LONG_CONTENT}) is False
+
+        assert tts.metrics.STAGE_WORDS.get(**stage(stage="clean")) == before["clean"] + 101
+        assert tts.metrics.STAGE_AUDIO_SECONDS.get(**stage(stage="synthesize")) == before["audio"] + 42.0
+        assert tts.metrics.STAGE_BYTES.get(**stage(stage="upload")) == before["upload"] + 5
+        assert tts.metrics.STAGE_SECONDS.get(**stage(stage="synthesize"))[0] == before["synthesize"] + 1
+        assert tts.metrics.STAGE_FAILURES.get(**stage(stage="update")) == before["update"] + 1
+        assert tts.SAVES.get(result="failed") == before["failed"] + 1
+
+    @pytest.mark.asyncio
+    async def test_process_save_log_records_carry_save_and_stage(self, monkeypatch, tmp_path):
+        async def fake_generate(text, path):
+            with open(path, "wb") as f:
+                f.write(b"audio")
+
+        monkeypatch.setattr(tts, "generate_audio", fake_generate)
+        monkeypatch.setattr(tts, "encode_renditions", lambda path: [])
+        monkeypatch.setattr(tts, "upload_to_supabase_storage", lambda path, save_id: "https://cdn/s1.mp3")
+        monkeypatch.setattr(tts, "update_save_audio_url", lambda save_id, url: None)
+        monkeypatch.setattr(tts, "LOG_FILE", tmp_path / "tts.log")
+        tts.configure_logging()
+        try:
+            assert await tts.process_save({"id": "s1", "title": "T", "content": LONG_CONTENT}) is True
+        finally:
+            tts.jsonlog.configure(None)
+
+        records = [json.loads(line) for line in (tmp_path / "tts.log").read_text().splitlines()]
+        assert {r["save_id"] for r in records} == {"s1"}
+        stages = {r["msg"].strip(): r.get("stage") for r in records}
+        assert stages["Processing: T"] is None
+        assert stages["Generating audio with en-US-AriaNeural..."] == "synthesize"
+        assert stages["Uploading to Supabase Storage..."] == "upload"
+        assert stages["Updating save record..."] == "update"
+
+    @pytest.mark.asyncio
+    async def test_metrics_server_is_optional(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        assert await tts.start_metrics_server() is None
+
+        monkeypatch.setattr(tts, "METRICS_PORT", 0)
+        server = await tts.start_metrics_server()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GET /metrics HTTP/1.1\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+            assert b"stash_tts_queue_depth" in response
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_process_save_publishes_renditions_before_audio_url(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        events = []
+
+        async def fake_generate(text, path):
+            with open(path, "wb") as f:
+                f.write(b"audio")
+
+        encoded = [{"name": "opus-24k", "mime": "audio/ogg", "path": "/tmp/s1.opus-24k.opus", "size_bytes": 3}]
+        monkeypatch.setattr(tts, "generate_audio", fake_generate)
+        monkeypatch.setattr(tts, "encode_renditions", lambda path: encoded)
+        monkeypatch.setattr(tts, "upload_renditions", lambda renditions, save_id: [{"name": "opus-24k", "url": "u"}])
+        monkeypatch.setattr(tts, "update_save_renditions", lambda save_id, r: events.append(("renditions", r)))
+        monkeypatch.setattr(tts, "upload_to_supabase_storage", lambda path, save_id: "https://cdn/s1.mp3")
+        monkeypatch.setattr(tts, "update_save_audio_url", lambda save_id, url: events.append(("audio_url", url)))
+
+        assert await tts.process_save({"id": "s1", "title": "T", "content": LONG_CONTENT}) is True
+
+        assert events == [("renditions", [{"name": "opus-24k", "url": "u"}]), ("audio_url", "https://cdn/s1.mp3")]
+
+    @pytest.mark.asyncio
+    async def test_rendition_failure_does_not_fail_the_save(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+
+        async def fake_generate(text, path):
+            with open(path, "wb") as f:
+                f.write(b"audio")
+
+        def broken(path):
+            raise RuntimeError("encoder crashed")
+
+        monkeypatch.setattr(tts, "generate_audio", fake_generate)
+        monkeypatch.setattr(tts, "encode_renditions", broken)
+        monkeypatch.setattr(tts, "upload_to_supabase_storage", lambda path, save_id: "https://cdn/s1.mp3")
+        updated = []
+        monkeypatch.setattr(tts, "update_save_audio_url", lambda save_id, url: updated.append(url))
+
+        assert await tts.process_save({"id": "s1", "title": "T", "content": LONG_CONTENT}) is True
+        assert updated == ["https://cdn/s1.mp3"]
+
+    @pytest.mark.asyncio
+    async def test_renditions_are_not_timed_as_upload(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+
+        async def fake_generate(text, path):
+            with open(path, "wb") as f:
+                f.write(b"audio")
+
+        def slow_encode(path):
+            time.sleep(0.3)
+            return [{"name": "opus-24k", "mime": "audio/ogg", "path": "/tmp/s1.opus-24k.opus", "size_bytes": 3}]
+
+        monkeypatch.setattr(tts, "generate_audio", fake_generate)
+        monkeypatch.setattr(tts, "encode_renditions", slow_encode)
+        monkeypatch.setattr(tts, "upload_renditions", lambda renditions, save_id: [{"name": "opus-24k", "url": "u"}])
+        monkeypatch.setattr(tts, "update_save_renditions", lambda save_id, r: None)
+        monkeypatch.setattr(tts, "upload_to_supabase_storage", lambda path, save_id: "https://cdn/s1.mp3")
+        monkeypatch.setattr(tts, "update_save_audio_url", lambda save_id, url: None)
+        upload = tts.metrics.STAGE_SECONDS.get(component="tts", stage="upload")
+        renditions = tts.metrics.STAGE_SECONDS.get(component="tts", stage="renditions")
+        rendition_bytes = tts.metrics.STAGE_BYTES.get(component="tts", stage="renditions")
+
+        assert await tts.process_save({"id": "s1", "title": "T", "content": LONG_CONTENT}) is True
+
+        count, seconds = tts.metrics.STAGE_SECONDS.get(component="tts", stage="upload")
+        assert count == upload[0] + 1 and seconds - upload[1] < 0.3
+        count, seconds = tts.metrics.STAGE_SECONDS.get(component="tts", stage="renditions")
+        assert count == renditions[0] + 1 and seconds - renditions[1] >= 0.3
+        assert tts.metrics.STAGE_BYTES.get(component="tts", stage="renditions") == rendition_bytes + 3
+
+    @pytest.mark.asyncio
+    async def test_streamed_upload_time_excludes_synthesis(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        sent = []
+
+        async def slow_stream(text):
+            await asyncio.sleep(0.3)
+            yield b"audio"
+
+        monkeypatch.setattr(tts, "stream_audio", slow_stream)
+        monkeypatch.setattr(tts.ResumableUpload, "open", lambda self: 0)
+        monkeypatch.setattr(tts.ResumableUpload, "send_chunk", lambda self, data, final=False: sent.append(data))
+        before = tts.metrics.STAGE_SECONDS.get(component="tts", stage="upload")
+
+        await tts.stream_to_supabase_storage(LONG_CONTENT, "s1")
+
+        count, seconds = tts.metrics.STAGE_SECONDS.get(component="tts", stage="upload")
+        assert sent == [b"audio"]
+        assert count == before[0] + 1 and seconds - before[1] < 0.3
+
+    @pytest.mark.asyncio
+    async def test_streamed_upload_is_fingerprinted_by_text_and_voice(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        fingerprints = []
+
+        async def stream(text):
+            yield b"audio"
+
+        monkeypatch.setattr(tts, "stream_audio", stream)
+        monkeypatch.setattr(tts.ResumableUpload, "open", lambda self: fingerprints.append(self.fingerprint) or 0)
+        monkeypatch.setattr(tts.ResumableUpload, "send_chunk", lambda self, data, final=False: len(data))
+
+        await tts.stream_to_supabase_storage("first text", "s1")
+        await tts.stream_to_supabase_storage("first text", "s1")
+        await tts.stream_to_supabase_storage("edited text", "s1")
+        monkeypatch.setattr(tts, "VOICE", "en-GB-SoniaNeural")
+        await tts.stream_to_supabase_storage("first text", "s1")
+
+        assert fingerprints[0] == fingerprints[1]
+        assert len(set(fingerprints)) == 3
+
+    @pytest.mark.asyncio
+    async def test_process_save_streams_when_enabled(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        monkeypatch.setattr(tts, "STREAM_UPLOADS", True)
+
+        async def fake_stream(text, save_id):
+            return f"https://cdn/{save_id}.mp3"
+
+        monkeypatch.setattr(tts, "stream_to_supabase_storage", fake_stream)
+        monkeypatch.setattr(tts, "upload_to_supabase_storage", MagicMock(side_effect=AssertionError))
+        updated = []
+        monkeypatch.setattr(tts, "update_save_audio_url", lambda save_id, url: updated.append((save_id, url)))
+
+        ok = await tts.process_save({"id": "s2", "title": "T", "content": LONG_CONTENT})
+
+        assert ok is True
+        assert updated == [("s2", "https://cdn/s2.mp3")]
+
+
+# ---------------------------------------------------------------------------
+# Long-article chunking
+# ---------------------------------------------------------------------------
+
+class TestChunkedSynthesis:
+    def test_extract_text_does_not_truncate(self):
+        content = "Sentence here. " * 5000
+        text = tts.extract_text_for_tts({"title": "Long", "content": content})
+        assert len(text.split()) == 10001
+
+    @pytest.mark.asyncio
+    async def test_generate_audio_stitches_chunks_in_order(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        monkeypatch.setattr(tts, "split_text", lambda text: ["one", "two", "three"])
+        synthesized = []
+
+        async def fake_synthesize(text, voice, path, rate, volume, cache):
+            synthesized.append(text)
+            path.write_text(text)
+            return False
+
+        stitched = {}
+
+        def fake_assemble(clips, output_file):
+            stitched["files"] = [clip.name for clip in clips]
+            return output_file
+
+        monkeypatch.setattr(tts, "synthesize", fake_synthesize)
+        monkeypatch.setattr(tts, "assemble_episode", fake_assemble)
+
+        await tts.generate_audio("ignored", str(tmp_path / "out.mp3"))
+
+        assert sorted(synthesized) == ["one", "three", "two"]
+        assert stitched["files"] == ["chunk_000.mp3", "chunk_001.mp3", "chunk_002.mp3"]
+
+    @pytest.mark.asyncio
+    async def test_generate_audio_indexes_single_chunk(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        monkeypatch.setattr(tts, "split_text", lambda text: ["only"])
+        indexed = []
+
+        async def fake_synthesize(text, voice, path, rate, volume, cache):
+            return False
+
+        monkeypatch.setattr(tts, "synthesize", fake_synthesize)
+        monkeypatch.setattr(tts, "index_episode", indexed.append)
+
+        out = str(tmp_path / "out.mp3")
+        await tts.generate_audio("ignored", out)
+
+        assert indexed == [out]
+
+    @pytest.mark.asyncio
+    async def test_generate_audio_raises_when_stitching_fails(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        monkeypatch.setattr(tts, "split_text", lambda text: ["one", "two"])
+
+        async def fake_synthesize(text, voice, path, rate, volume, cache):
+            path.write_text(text)
+
+        monkeypatch.setattr(tts, "synthesize", fake_synthesize)
+        monkeypatch.setattr(tts, "assemble_episode", lambda clips, output_file: None)
+
+        with pytest.raises(Exception):
+            await tts.generate_audio("ignored", str(tmp_path / "out.mp3"))
+
+    @pytest.mark.asyncio
+    async def test_chunk_audio_goes_through_clip_cache(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(tts, "CLIP_CACHE", tts.ClipCache(tmp_path))
+        calls = []
+
+        class FakeCommunicate:
+            def __init__(self, text, voice, rate, volume):
+                calls.append(text)
+
+            async def stream(self):
+                yield {"type": "audio", "data": b"mp3-bytes"}
+
+        monkeypatch.setattr("clip_cache.edge_tts.Communicate", FakeCommunicate)
+
+        assert await tts.chunk_audio("hello") == b"mp3-bytes"
+        assert await tts.chunk_audio("hello") == b"mp3-bytes"
+        assert calls == ["hello"]
+
+    @pytest.mark.asyncio
+    async def test_stream_audio_yields_chunks_in_order(self, monkeypatch):
+        monkeypatch.setattr(tts, "split_text", lambda text: [f"c{i}" for i in range(6)])
+
+        async def fake_chunk_audio(chunk):
+            # Later chunks finish first
+            await asyncio.sleep(0.01 * (6 - int(chunk[1:])))
+            return chunk.encode()
+
+        monkeypatch.setattr(tts, "chunk_audio", fake_chunk_audio)
+
+        data = [d async for d in tts.stream_audio("ignored")]
+
+        assert data == [f"c{i}".encode() for i in range(6)]
+
+
+# ---------------------------------------------------------------------------
+# Backfill
+# ---------------------------------------------------------------------------
+
+class TestBackfill:
+    def test_iter_pending_saves_pages_oldest_first(self, monkeypatch):
+        captured = {}
+
+        def fake_iter_rows(url, headers, filters, columns, page_size, descending, session=None):
+            captured.update(filters=filters, page_size=page_size, descending=descending)
+            yield {"id": "a", "content": LONG_CONTENT}
+            yield {"id": "short", "content": "short"}
+            yield {"id": "b", "content": LONG_CONTENT}
+
+        monkeypatch.setattr(tts, "iter_rows", fake_iter_rows)
+
+        saves = list(tts.iter_pending_saves(page_size=50))
+
+        assert [s["id"] for s in saves] == ["a", "b"]
+        assert "content_length" not in captured["filters"]
+        assert captured["page_size"] == 50
+        assert captured["descending"] is False
+        assert captured["filters"]["audio_url"] == "is.null"
+
+    @pytest.mark.asyncio
+    async def test_backfill_processes_every_pending_save(self, monkeypatch):
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        monkeypatch.setattr(tts, "iter_pending_saves", lambda: iter([{"id": str(i)} for i in range(12)]))
+        processed = []
+
+        async def fake_process(save):
+            processed.append(save["id"])
+            return True
+
+        monkeypatch.setattr(tts, "process_save", fake_process)
+
+        await tts.backfill()
+
+        assert sorted(processed, key=int) == [str(i) for i in range(12)]
+
+
+# ---------------------------------------------------------------------------
+# Lease-based job queue
+# ---------------------------------------------------------------------------
+
+class TestLeases:
+    @pytest.fixture(autouse=True)
+    def leases(self, monkeypatch):
+        monkeypatch.setattr(tts, "USE_LEASES", True)
+        monkeypatch.setattr(tts, "WORKER_ID", "host-1")
+        monkeypatch.setattr(tts, "log", lambda *args: None)
+        rpc = MagicMock()
+        monkeypatch.setattr(tts.client, "rpc", rpc)
+        return rpc
+
+    def test_claim_sends_worker_and_lease(self, leases):
+        leases.return_value = [{"id": "a", "content": LONG_CONTENT}]
+
+        saves = tts.get_work()
+
+        assert [s["id"] for s in saves] == ["a"]
+        name, args = leases.call_args[0]
+        assert name == "claim_tts_jobs"
+        assert args["worker_id"] == "host-1"
+        assert args["batch_size"] == tts.BATCH_SIZE
+        assert args["lease_seconds"] == tts.LEASE_SECONDS
+        assert "min_content_length" not in args
+
+    def test_claim_skips_short_saves_without_migration(self, leases):
+        leases.side_effect = [[{"id": "a", "content": LONG_CONTENT}, {"id": "b", "content": "short"}], True]
+
+        saves = tts.claim_saves()
+
+        assert [s["id"] for s in saves] == ["a"]
+        assert leases.call_args[0] == ("complete_tts_job",
+                                       {"save_id": "b", "worker_id": "host-1", "result_audio_url": None})
+
+    def test_claim_filters_length_in_postgres(self, leases, monkeypatch):
+        monkeypatch.setattr(tts, "FILTER_CONTENT_LENGTH", True)
+        leases.return_value = [{"id": "a", "content": LONG_CONTENT}]
+
+        assert [s["id"] for s in tts.claim_saves()] == ["a"]
+        assert leases.call_count == 1
+        assert leases.call_args[0][1]["min_content_length"] == tts.MIN_CONTENT_CHARS
+
+    def test_claim_errors_return_empty(self, leases):
+        leases.side_effect = tts.SupabaseError("down")
+        assert tts.claim_saves() == []
+
+    def test_update_completes_under_lease(self, leases):
+        leases.return_value = True
+        tts.update_save_audio_url("a", "https://cdn/a.mp3")
+        assert leases.call_args[0][0] == "complete_tts_job"
+
+    def test_update_raises_when_lease_lost(self, leases):
+        leases.return_value = False
+        with pytest.raises(Exception):
+            tts.update_save_audio_url("a", "https://cdn/a.mp3")
+
+    @pytest.mark.asyncio
+    async def test_failed_save_is_released_with_error(self, leases, monkeypatch):
+        async def broken(text, path):
+            raise RuntimeError("edge-tts 503")
+
+        monkeypatch.setattr(tts, "generate_audio", broken)
+
+        ok = await tts.process_save({"id": "a", "title": "T", "content": LONG_CONTENT})
+
+        assert ok is False
+        name, args = leases.call_args[0]
+        assert name == "fail_tts_job"
+        assert args["error_message"] == "edge-tts 503"
+        assert args["max_attempts"] == tts.MAX_ATTEMPTS
+
+    def test_heartbeat_reports_lost_leases(self, leases):
+        leases.return_value = ["a"]
+        assert tts.heartbeat_leases({"a", "b"}) == {"a"}
+        assert leases.call_args[0][1]["save_ids"] == ["a", "b"]
+
+    def test_iter_claimed_saves_stops_when_queue_is_empty(self, leases):
+        leases.side_effect = [
+            [{"id": "a", "content": LONG_CONTENT}, {"id": "b", "content": LONG_CONTENT}],
+            [{"id": "c", "content": LONG_CONTENT}],
+            [],
+        ]
+        assert [s["id"] for s in tts.iter_claimed_saves()] == ["a", "b", "c"]
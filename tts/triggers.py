@@ -0,0 +1,200 @@
+"""
+Wakeup sources for the TTS daemon.
+
+Instead of sleeping a fixed interval between polls, the daemon waits on a
+`Wakeup` that any trigger source can fire:
+
+  - WebhookTrigger: a tiny HTTP receiver (POST /wakeup) for Supabase database
+    webhooks or anything else that knows a save was inserted.
+  - ListenNotifyTrigger: Postgres LISTEN on the `tts_jobs` channel, fed by the
+    `saves_notify_tts` insert trigger in supabase/schema.sql (needs psycopg).
+
+Between wakeups, AdaptivePoller decides how long to wait: re-poll at once
+when a batch came back full, and back off exponentially while idle.
+"""
+
+import asyncio
+import hmac
+import json
+
+# Optional: only needed for LISTEN/NOTIFY
+try:
+    import psycopg
+except ImportError:
+    psycopg = None
+
+NOTIFY_CHANNEL = "tts_jobs"
+MAX_BODY_BYTES = 64 * 1024
+
+
+class Wakeup:
+    """An event trigger sources set and the poll loop waits on."""
+
+    def __init__(self):
+        self._event = asyncio.Event()
+        self.reasons = []
+
+    def notify(self, reason=""):
+        self.reasons.append(reason)
+        self._event.set()
+
+    async def wait(self, timeout):
+        """
+        Wait up to `timeout` seconds. Returns the reasons for the wakeup, or
+        an empty list on timeout. Wakeups that fired while nobody was
+        waiting are not lost: the next wait returns immediately.
+        """
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+        reasons, self.reasons = self.reasons, []
+        return reasons
+
+
+class AdaptivePoller:
+    """
+    Poll interval that tracks how busy the queue is.
+
+    A full batch means there is probably more work, so poll again right
+    away; a partial batch resets to the minimum interval; an empty poll
+    doubles the interval up to `max_interval`.
+    """
+
+    def __init__(self, min_interval, max_interval, factor=2.0):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.interval = min_interval
+
+    def next_delay(self, batch_size, fetched):
+        if fetched >= batch_size:
+            self.interval = self.min_interval
+            return 0
+        if fetched:
+            self.interval = self.min_interval
+            return self.interval
+        delay = self.interval
+        self.interval = min(self.interval * self.factor, self.max_interval)
+        return delay
+
+    def reset(self):
+        self.interval = self.min_interval
+
+
+class WebhookTrigger:
+    """
+    Minimal HTTP receiver: POST /wakeup fires the wakeup.
+
+    If `secret` is set, requests must carry it in an `X-Webhook-Secret`
+    header. The body is ignored beyond being logged as the reason.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, secret=None, path="/wakeup"):
+        self.host = host
+        self.port = port
+        self.secret = secret
+        self.path = path
+        self.server = None
+        self.wakeup = None
+
+    async def start(self, wakeup):
+        self.wakeup = wakeup
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        # Report the real port when bound to port 0
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            status = await self._respond(reader)
+        except (asyncio.IncompleteReadError, ValueError, asyncio.TimeoutError):
+            status = 400
+        reason = {202: "Accepted", 400: "Bad Request", 401: "Unauthorized",
+                  404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _respond(self, reader):
+        request_line = await asyncio.wait_for(reader.readline(), 10)
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+        headers = {}
+        while True:
+            line = await asyncio.wait_for(reader.readline(), 10)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length", "0"))
+        if length > MAX_BODY_BYTES:
+            return 413
+        body = await asyncio.wait_for(reader.readexactly(length), 10) if length else b""
+
+        if path.split("?", 1)[0] != self.path:
+            return 404
+        if method != "POST":
+            return 405
+        if self.secret and not hmac.compare_digest(headers.get("x-webhook-secret", ""), self.secret):
+            return 401
+
+        try:
+            record = json.loads(body).get("record") or {}
+            reason = f"webhook: {record.get('id', 'save')}"
+        except (ValueError, AttributeError):
+            reason = "webhook"
+        self.wakeup.notify(reason)
+        return 202
+
+
+class ListenNotifyTrigger:
+    """Postgres LISTEN/NOTIFY: every notification on `channel` fires the wakeup."""
+
+    def __init__(self, dsn, channel=NOTIFY_CHANNEL, reconnect_delay=5, max_reconnect_delay=300):
+        if psycopg is None:
+            raise RuntimeError("psycopg not installed. Run: pip install 'psycopg[binary]'")
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.task = None
+        self.listening = asyncio.Event()
+        self.on_error = None
+
+    async def start(self, wakeup):
+        self.task = asyncio.create_task(self._run(wakeup))
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    async def _run(self, wakeup):
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.dsn, autocommit=True) as conn:
+                    await conn.execute(f'LISTEN "{self.channel}"')
+                    self.listening.set()
+                    delay = self.reconnect_delay
+                    # Catch up on anything inserted while we were disconnected
+                    wakeup.notify("listen: connected")
+                    async for notify in conn.notifies():
+                        wakeup.notify(f"notify: {notify.payload}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.listening.clear()
+                if self.on_error:
+                    self.on_error(e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
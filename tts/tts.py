@@ -8,18 +8,25 @@ Usage:
   pip install edge-tts requests
   python tts.py           # Run as daemon (checks every 2 min)
   python tts.py --once    # Run once and exit
+  python tts.py --backfill  # Process the entire pending backlog and exit
+
+Saves are processed by a bounded pool of async workers (MAX_WORKERS) on a
+single event loop, so synthesis, upload and the DB update for different saves
+overlap instead of running back to back.
 """
 
 import os
 import sys
 import asyncio
 import time
+import socket
+import sqlite3
 import tempfile
-import re
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 
-import requests
-
 # Try to import edge_tts
 try:
     import edge_tts
@@ -27,11 +34,36 @@ except ImportError:
     print("Error: edge-tts not installed. Run: pip install edge-tts")
     sys.exit(1)
 
+# Shared helpers live alongside the podcast pipeline
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "podcast"))
+from clip_cache import ClipCache, clip_key, synthesize, synthesize_bytes
+from resumable_upload import ResumableUpload, upload_stream
+from chunking import split_text
+from textnorm import strip_markdown
+from pagination import fetch_page, iter_rows, FetchError
+from supabase_http import SupabaseClient, SupabaseError
+from assembly import assemble_episode, index_episode
+from renditions import encode_renditions, publish, storage_name
+from mirror import Mirror
+from mp3 import Mp3Error
+from mp3index import index_file
+import metrics
+import jsonlog
+
+from triggers import Wakeup, AdaptivePoller, WebhookTrigger, ListenNotifyTrigger
+
 # Configuration - UPDATE THESE VALUES
 SUPABASE_URL = "https://jntnmvxkirrosxjquuoy.supabase.co"
 SUPABASE_KEY = "sb_publishable_56A0I5tN0tvybD2yJ81UKQ_Fn2ibI1s"
 USER_ID = "6c7a3a96-16cd-4702-ac7b-0c7a4a81346d"
-CHECK_INTERVAL = 120  # seconds between checks
+CHECK_INTERVAL = 120  # max seconds between checks when idle (no wakeup source)
+MIN_POLL_INTERVAL = 5  # seconds between checks right after finding work
+MAX_WORKERS = 3  # saves processed concurrently
+CHUNK_CONCURRENCY = 4  # text chunks synthesized concurrently per save
+BATCH_SIZE = 5  # saves fetched per poll
+PAGE_SIZE = 100  # saves fetched per page in --backfill mode
+PENDING_COLUMNS = "id,title,content,highlight"  # only what extract_text_for_tts reads (claim_tts_jobs returns the same)
+MIN_CONTENT_CHARS = 100  # skip highlights-only and empty saves (see FILTER_CONTENT_LENGTH)
 LOG_FILE = Path(__file__).parent / "tts.log"
 
 # TTS Settings
@@ -39,235 +71,674 @@ VOICE = "en-US-AriaNeural"  # Options: en-US-AriaNeural, en-US-GuyNeural, en-GB-
 RATE = "+0%"  # Speed adjustment: -50% to +100%
 VOLUME = "+0%"  # Volume adjustment
 
+# Shared pooled HTTP client (keep-alive, timeouts, retries), sized for the worker pool
+client = SupabaseClient(SUPABASE_URL, SUPABASE_KEY)
+
+# Clip cache shared with the podcast pipeline (set to None to disable)
+CLIP_CACHE = ClipCache()
+
 # Storage bucket name (create this in Supabase dashboard)
 STORAGE_BUCKET = "audio"
 
-def log(msg):
-    """Log message to file and stdout."""
-    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{timestamp}] {msg}"
-    print(line, flush=True)
-    with open(LOG_FILE, "a") as f:
-        f.write(line + "\n")
-        f.flush()
-        os.fsync(f.fileno())
-
-def get_headers():
-    """Get Supabase API headers."""
-    return {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json"
-    }
-
-def get_pending_saves():
-    """Get saves that need TTS audio generation."""
-    url = f"{SUPABASE_URL}/rest/v1/saves"
-    params = {
-        "select": "id,title,content,highlight,site_name",
+# Lease-based job queue (requires supabase/migrations/20261017000100_tts_job_leases.sql).
+# Saves are claimed atomically, so any number of workers on any number of hosts
+# can share one backlog without synthesizing the same article twice. Off by
+# default: without the migration every claim would fail and no save would
+# ever be processed.
+USE_LEASES = False
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+LEASE_SECONDS = 600  # how long a claimed save stays reserved for this worker
+HEARTBEAT_INTERVAL = 60  # seconds between lease renewals
+MAX_ATTEMPTS = 5  # failing saves are parked as 'failed' after this many tries
+
+# Drop short saves in Postgres via the stored content_length column (requires
+# supabase/migrations/20261017000300_saves_content_length.sql), so their bodies
+# are never downloaded. Off by default: without the migration every poll would
+# fail on the unknown column, so short saves are dropped client-side instead.
+FILTER_CONTENT_LENGTH = False
+
+# Wakeup sources: fire as soon as a save is inserted, so polling only has to be
+# a slow safety net. Either or both may be enabled.
+WEBHOOK_PORT = None  # e.g. 8765 to accept POST /wakeup (Supabase database webhook)
+WEBHOOK_HOST = "127.0.0.1"
+WEBHOOK_SECRET = os.getenv("TTS_WEBHOOK_SECRET")  # required X-Webhook-Secret header, if set
+DATABASE_URL = os.getenv("TTS_DATABASE_URL")  # Postgres DSN; enables LISTEN tts_jobs
+IDLE_POLL_INTERVAL = 900  # max seconds between safety-net checks when a wakeup source is active
+
+# Serve per-stage metrics (see podcast/metrics.py) as GET /metrics in
+# Prometheus text format
+METRICS_PORT = None  # e.g. 9464
+METRICS_HOST = "127.0.0.1"
+
+# Without leases, find pending saves in the local full-text mirror (see
+# podcast/mirror.py) instead of querying the API: each poll only pulls the
+# saves changed since the previous one
+USE_MIRROR = False
+
+# Stream audio straight into storage via chunked, resumable uploads instead of
+# writing a temp file and uploading it in one request
+STREAM_UPLOADS = False
+
+QUEUE_DEPTH = metrics.REGISTRY.gauge("stash_tts_queue_depth", "Saves fetched and waiting for a worker")
+IN_FLIGHT = metrics.REGISTRY.gauge("stash_tts_saves_in_flight", "Saves queued or being processed")
+SAVES = metrics.REGISTRY.counter("stash_tts_saves_total", "Saves processed, by result", ("result",))
+
+def log(msg, level="info"):
+    """
+    Log to stdout and, once configure_logging() has run, as a JSON line to
+    LOG_FILE. The file is written by a background thread (see
+    podcast/jsonlog.py), so logging never waits on the disk.
+    """
+    jsonlog.log(msg, level)
+
+def configure_logging():
+    """Send log records to LOG_FILE (JSON lines, buffered, rotated by size)."""
+    jsonlog.configure(LOG_FILE, timestamps=True)
+
+@contextmanager
+def stage(name):
+    """Run a block as one stage of a save: timed, and tagged on log records."""
+    with jsonlog.context(stage=name), metrics.track("tts", name):
+        yield
+
+def pending_filters(exclude_ids=()):
+    """PostgREST filters selecting saves that still need audio."""
+    filters = {
         "user_id": f"eq.{USER_ID}",
         "audio_url": "is.null",  # Only saves without audio
         "is_archived": "eq.false",
-        "order": "created_at.desc",
-        "limit": "5"  # Process 5 at a time
     }
+    if FILTER_CONTENT_LENGTH:
+        # Stored column (see schema.sql): short saves never leave the database
+        filters["content_length"] = f"gte.{MIN_CONTENT_CHARS}"
+    if exclude_ids:
+        filters["id"] = f"not.in.({','.join(sorted(exclude_ids))})"
+    return filters
+
+def has_content(save):
+    """Skip highlights-only and empty saves (very short content)."""
+    content = save.get("content") or save.get("highlight") or ""
+    return len(content) >= MIN_CONTENT_CHARS
 
-    response = requests.get(url, headers=get_headers(), params=params)
+def get_pending_saves(exclude_ids=()):
+    """Get saves that need TTS audio generation.
 
-    if response.status_code != 200:
-        log(f"Error fetching saves: {response.text}")
+    `exclude_ids` skips saves that are already queued or in flight, so the
+    pool can keep polling while earlier saves are still being processed.
+    """
+    try:
+        if USE_MIRROR:
+            return mirror_pending_saves(exclude_ids, BATCH_SIZE)
+        saves = fetch_page("/rest/v1/saves", None, pending_filters(exclude_ids), PENDING_COLUMNS,
+                           BATCH_SIZE, session=client)
+    except (FetchError, SupabaseError, sqlite3.Error) as e:
+        log(f"Error fetching saves: {e}", "error")
+        metrics.fail("tts", "fetch")
         return []
 
-    saves = response.json()
+    return saves if FILTER_CONTENT_LENGTH else [save for save in saves if has_content(save)]
+
+def mirror_pending_saves(exclude_ids=(), limit=None):
+    """Sync the mirror, then read the saves that need audio from it (same filters as pending_filters)."""
+    with Mirror() as mirror:
+        mirror.sync(client, USER_ID)
+        rows = mirror.pending_audio(MIN_CONTENT_CHARS, USER_ID, exclude_ids, limit)
+    return [{column: row[column] for column in PENDING_COLUMNS.split(",")} for row in rows]
+
+def iter_pending_saves(page_size=PAGE_SIZE):
+    """Lazily yield every save that needs audio, oldest first, page by page."""
+    if USE_MIRROR:
+        yield from mirror_pending_saves()
+        return
+    rows = iter_rows("/rest/v1/saves", None, pending_filters(), PENDING_COLUMNS, page_size,
+                     descending=False, session=client)
+    for save in rows:
+        if FILTER_CONTENT_LENGTH or has_content(save):
+            yield save
+
+def claim_saves(limit=BATCH_SIZE):
+    """Atomically claim up to `limit` pending saves for this worker."""
+    params = {
+        "worker_id": WORKER_ID,
+        "batch_size": limit,
+        "lease_seconds": LEASE_SECONDS,
+        "max_attempts": MAX_ATTEMPTS,
+        "user_uuid": USER_ID,
+    }
+    if FILTER_CONTENT_LENGTH:
+        params["min_content_length"] = MIN_CONTENT_CHARS
+    try:
+        saves = client.rpc("claim_tts_jobs", params) or []
+    except SupabaseError as e:
+        log(f"Error claiming saves: {e}", "error")
+        metrics.fail("tts", "fetch")
+        return []
+    if FILTER_CONTENT_LENGTH:
+        return saves
 
-    # Filter to articles with actual content (skip highlights, skip empty)
     pending = []
     for save in saves:
-        content = save.get("content") or save.get("highlight") or ""
-        # Skip very short content
-        if len(content) < 100:
-            continue
-        pending.append(save)
-
+        if has_content(save):
+            pending.append(save)
+        else:
+            complete_save(save["id"])  # nothing to read: mark skipped
     return pending
 
+def iter_claimed_saves():
+    """Keep claiming batches until the queue has nothing left for us."""
+    while True:
+        batch = claim_saves()
+        if not batch:
+            return
+        yield from batch
+
+def heartbeat_leases(save_ids):
+    """Extend our leases; returns the ids we still hold."""
+    try:
+        held = client.rpc("heartbeat_tts_jobs", {
+            "worker_id": WORKER_ID,
+            "save_ids": sorted(save_ids),
+            "lease_seconds": LEASE_SECONDS,
+        }, retry=True) or []
+    except SupabaseError as e:
+        log(f"Error renewing leases: {e}", "error")
+        return set(save_ids)
+    return set(held)
+
+def complete_save(save_id, audio_url=None):
+    """Finish a claimed save (skipped when there is no audio). False if the lease was lost."""
+    return bool(client.rpc("complete_tts_job", {
+        "save_id": save_id,
+        "worker_id": WORKER_ID,
+        "result_audio_url": audio_url,
+    }, retry=True))
+
+def fail_save(save_id, error):
+    """Release a claimed save for a later retry (or park it once out of attempts)."""
+    try:
+        client.rpc("fail_tts_job", {
+            "save_id": save_id,
+            "worker_id": WORKER_ID,
+            "error_message": str(error)[:1000],
+            "max_attempts": MAX_ATTEMPTS,
+            "retry_seconds": CHECK_INTERVAL,
+        }, retry=True)
+    except SupabaseError as e:
+        log(f"Error releasing save {save_id}: {e}", "error")
+
+def get_work(exclude_ids=()):
+    """Next batch of saves to process: claimed under a lease, or plain polled."""
+    with stage("fetch"):
+        if USE_LEASES:
+            return claim_saves()
+        return get_pending_saves(exclude_ids)
+
 def extract_text_for_tts(save):
     """Extract clean text from a save for TTS."""
     content = save.get("content") or save.get("highlight") or ""
     title = save.get("title") or "Article"
 
-    # Remove markdown formatting
-    text = content
-
-    # Remove markdown headers (keep the text)
-    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
-
-    # Remove markdown links, keep text
-    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
-
-    # Remove markdown bold/italic
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text = re.sub(r'\*([^*]+)\*', r'\1', text)
-    text = re.sub(r'__([^_]+)__', r'\1', text)
-    text = re.sub(r'_([^_]+)_', r'\1', text)
-
-    # Remove code blocks
-    text = re.sub(r'```[\s\S]*?```', '', text)
-    text = re.sub(r'`[^`]+`', '', text)
-
-    # Remove horizontal rules
-    text = re.sub(r'^---+$', '', text, flags=re.MULTILINE)
+    # Remove markdown/HTML formatting (shared with the podcast pipeline)
+    text = strip_markdown(content)
 
-    # Remove image markdown
-    text = re.sub(r'!\[[^\]]*\]\([^)]+\)', '', text)
-
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-
-    # Clean up whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    text = text.strip()
-
-    # Prepend title
+    # Prepend title (long articles are chunked at synthesis time, not truncated)
     full_text = f"{title}.\n\n{text}"
 
-    # Limit length (Edge TTS has limits, and long articles = huge files)
-    # ~150 words per minute speaking, limit to ~30 min = 4500 words
-    words = full_text.split()
-    if len(words) > 4500:
-        full_text = ' '.join(words[:4500]) + "... End of article preview."
-        log(f"  Truncated from {len(words)} to 4500 words")
-
     return full_text
 
 async def generate_audio(text, output_path):
-    """Generate audio using Edge TTS."""
-    communicate = edge_tts.Communicate(text, VOICE, rate=RATE, volume=VOLUME)
-    await communicate.save(output_path)
+    """
+    Generate audio using Edge TTS.
+
+    Long text is split on sentence/paragraph boundaries; the chunks are
+    synthesized concurrently (each through the clip cache) and stitched
+    back together in order. The result carries a Xing header (duration and
+    seek table) either way.
+    """
+    chunks = split_text(text)
+    if len(chunks) == 1:
+        if await synthesize(chunks[0], VOICE, output_path, rate=RATE, volume=VOLUME, cache=CLIP_CACHE):
+            log("  Reused cached audio")
+        # Duration and seek table for players (assemble_episode does this for chunked audio)
+        await asyncio.to_thread(index_episode, output_path)
+        return output_path
+
+    log(f"  Synthesizing {len(chunks)} chunks ({CHUNK_CONCURRENCY} at a time)...")
+    chunk_dir = Path(output_path).parent / "chunks"
+    chunk_dir.mkdir(exist_ok=True)
+    semaphore = asyncio.Semaphore(CHUNK_CONCURRENCY)
+
+    async def run(i, chunk):
+        async with semaphore:
+            path = chunk_dir / f"chunk_{i:03d}.mp3"
+            await synthesize(chunk, VOICE, path, rate=RATE, volume=VOLUME, cache=CLIP_CACHE)
+            return path
+
+    paths = await asyncio.gather(*(run(i, chunk) for i, chunk in enumerate(chunks)))
+
+    if not await asyncio.to_thread(assemble_episode, paths, str(output_path)):
+        raise Exception("Failed to stitch audio chunks")
     return output_path
 
 def upload_to_supabase_storage(file_path, save_id):
-    """Upload audio file to Supabase Storage."""
-    # Generate a unique filename
+    """Upload audio file to Supabase Storage (streamed from disk) and return its public URL."""
     filename = f"{save_id}.mp3"
 
-    # Read file
     with open(file_path, "rb") as f:
-        file_data = f.read()
-
-    # Upload to Supabase Storage
-    url = f"{SUPABASE_URL}/storage/v1/object/{STORAGE_BUCKET}/{filename}"
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "audio/mpeg",
-        "x-upsert": "true"  # Overwrite if exists
-    }
-
-    response = requests.post(url, headers=headers, data=file_data)
-
-    if response.status_code not in [200, 201]:
-        raise Exception(f"Storage upload failed: {response.status_code} - {response.text}")
+        # Upsert: overwrite if exists
+        return client.upload(STORAGE_BUCKET, filename, f, content_type="audio/mpeg")
+
+def upload_renditions(audio_renditions, save_id):
+    """Upload renditions next to the save's MP3; returns the list for saves.audio_renditions."""
+    def upload(rendition):
+        with open(rendition["path"], "rb") as f:
+            return client.upload(STORAGE_BUCKET, storage_name(save_id, rendition), f, content_type=rendition["mime"])
+    return publish(audio_renditions, upload)
+
+def update_save_renditions(save_id, audio_renditions):
+    """Record the save's extra encodings (written before audio_url, so players see both at once)."""
+    response = client.patch(
+        "/rest/v1/saves",
+        params={"id": f"eq.{save_id}"},
+        json={"audio_renditions": audio_renditions},
+    )
+    if response.status_code not in [200, 204]:
+        raise Exception(f"Error updating renditions: {response.text}")
+
+async def upload_audio(audio_path, save_id):
+    """Upload the save's MP3; the only work timed as the upload stage."""
+    with stage("upload"):
+        log(f"  Uploading to Supabase Storage...")
+        return await asyncio.to_thread(upload_to_supabase_storage, audio_path, save_id)
+
+async def publish_renditions(audio_path, save_id):
+    """
+    Encode, upload and record the configured renditions of `audio_path`.
+    Best effort: a failure is logged and the save still gets its MP3.
+    """
+    with stage("renditions"):
+        try:
+            audio_renditions = await asyncio.to_thread(encode_renditions, audio_path)
+            if not audio_renditions:
+                return []
+            published = await asyncio.to_thread(upload_renditions, audio_renditions, save_id)
+            await asyncio.to_thread(update_save_renditions, save_id, published)
+            metrics.count("tts", "renditions", bytes=sum(r["size_bytes"] for r in audio_renditions))
+            log(f"  Published renditions: {', '.join(r['name'] for r in published)}")
+            return published
+        except Exception as e:
+            metrics.fail("tts", "renditions")
+            log(f"  Renditions failed: {e}", "error")
+            return []
+
+async def chunk_audio(chunk):
+    """Return the MP3 bytes for one chunk, through the clip cache."""
+    with stage("synthesize"):
+        data = await synthesize_bytes(chunk, VOICE, rate=RATE, volume=VOLUME, cache=CLIP_CACHE)
+    metrics.count("tts", "synthesize", bytes=len(data), words=len(chunk.split()))
+    return data
+
+async def stream_audio(text):
+    """
+    Yield MP3 bytes for `text` chunk by chunk, in reading order.
+
+    Up to CHUNK_CONCURRENCY chunks are synthesized ahead of the one being
+    yielded, which bounds memory to a few chunks of audio.
+    """
+    remaining = iter(split_text(text))
+    tasks = deque(asyncio.create_task(chunk_audio(c)) for c in islice(remaining, CHUNK_CONCURRENCY))
+    try:
+        while tasks:
+            data = await tasks.popleft()
+            nxt = next(remaining, None)
+            if nxt is not None:
+                tasks.append(asyncio.create_task(chunk_audio(nxt)))
+            yield data
+    finally:
+        for task in tasks:
+            task.cancel()
+
+class TimedUpload(ResumableUpload):
+    """A resumable upload that adds up the time spent sending chunks."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seconds = 0.0
+
+    def send_chunk(self, data, final=False):
+        started = time.perf_counter()
+        try:
+            return super().send_chunk(data, final)
+        finally:
+            self.seconds += time.perf_counter() - started
 
-    # Return the public URL
-    public_url = f"{SUPABASE_URL}/storage/v1/object/public/{STORAGE_BUCKET}/{filename}"
-    return public_url
+async def stream_to_supabase_storage(text, save_id):
+    """Synthesize and upload in one pass, holding at most a few chunks in memory."""
+    filename = f"{save_id}.mp3"
+    # An upload left by an earlier attempt is only resumed for the same text and voice
+    upload = TimedUpload(SUPABASE_URL, SUPABASE_KEY, STORAGE_BUCKET, filename, session=client.session,
+                         fingerprint=clip_key(text, VOICE, RATE, VOLUME))
+    # Only chunk sends count as upload time; chunk_audio times synthesis
+    try:
+        size = await upload_stream(upload, stream_audio(text))
+    except Exception:
+        metrics.observe_stage("tts", "upload", upload.seconds, failed=True)
+        raise
+    metrics.observe_stage("tts", "upload", upload.seconds)
+    metrics.count("tts", "upload", bytes=size)
+    log(f"  Streamed {size / 1024 / 1024:.1f} MB to storage")
+    return client.public_url(STORAGE_BUCKET, filename)
 
 def update_save_audio_url(save_id, audio_url):
     """Update the save with the audio URL."""
-    url = f"{SUPABASE_URL}/rest/v1/saves?id=eq.{save_id}"
-    headers = get_headers()
-    headers["Prefer"] = "return=representation"
-
-    response = requests.patch(url, headers=headers, json={"audio_url": audio_url})
+    if USE_LEASES:
+        if not complete_save(save_id, audio_url):
+            raise Exception("Lease lost before completion; another worker owns this save")
+        return
+
+    response = client.patch(
+        "/rest/v1/saves",
+        params={"id": f"eq.{save_id}"},
+        json={"audio_url": audio_url},
+        headers={"Prefer": "return=representation"}
+    )
 
     if response.status_code not in [200, 204]:
         raise Exception(f"Error updating save: {response.text}")
 
-def process_save(save):
+def audio_duration(path):
+    """Seconds of audio in an MP3, from its frame headers (0 if unreadable)."""
+    try:
+        return index_file(path).duration
+    except (Mp3Error, OSError, ValueError):
+        return 0
+
+async def report_failure(save_id, error):
+    """Hand a failed save back to the queue so it is retried with a limit."""
+    if USE_LEASES:
+        await asyncio.to_thread(fail_save, save_id, error)
+
+async def process_save(save):
     """Process a single save: extract text, generate audio, upload."""
+    with jsonlog.context(save_id=save["id"]):
+        return await _process_save(save)
+
+async def _process_save(save):
     save_id = save["id"]
     title = save.get("title", "Untitled")[:50]
 
     log(f"Processing: {title}")
 
     # Extract text
-    text = extract_text_for_tts(save)
-    word_count = len(text.split())
-    log(f"  Text: {word_count} words")
+    with stage("clean"):
+        text = extract_text_for_tts(save)
+        word_count = len(text.split())
+        log(f"  Text: {word_count} words")
+    metrics.count("tts", "clean", bytes=len(text.encode("utf-8")), words=word_count)
 
     if word_count < 20:
         log(f"  Skipping - too short")
+        SAVES.inc(result="skipped")
+        if USE_LEASES:
+            await asyncio.to_thread(complete_save, save_id)
         return False
 
+    if STREAM_UPLOADS:
+        try:
+            # Synthesis and upload overlap; each is timed on its own below
+            with jsonlog.context(stage="upload"):
+                log(f"  Streaming audio with {VOICE} to Supabase Storage...")
+                audio_url = await stream_to_supabase_storage(text, save_id)
+
+            with stage("update"):
+                log(f"  Updating save record...")
+                await asyncio.to_thread(update_save_audio_url, save_id, audio_url)
+
+            log(f"  Done! {audio_url}")
+            SAVES.inc(result="done")
+            return True
+
+        except Exception as e:
+            log(f"  Error: {e}", "error")
+            SAVES.inc(result="failed")
+            await report_failure(save_id, e)
+            return False
+
     with tempfile.TemporaryDirectory() as tmpdir:
         audio_path = os.path.join(tmpdir, f"{save_id}.mp3")
 
         try:
             # Generate audio
-            log(f"  Generating audio with {VOICE}...")
-            asyncio.run(generate_audio(text, audio_path))
+            with stage("synthesize"):
+                log(f"  Generating audio with {VOICE}...")
+                await generate_audio(text, audio_path)
 
             # Check file size
             file_size = os.path.getsize(audio_path)
+            metrics.count("tts", "synthesize", bytes=file_size, words=word_count,
+                          audio_seconds=await asyncio.to_thread(audio_duration, audio_path))
             log(f"  Audio file: {file_size / 1024 / 1024:.1f} MB")
 
-            # Upload to storage
-            log(f"  Uploading to Supabase Storage...")
-            audio_url = upload_to_supabase_storage(audio_path, save_id)
+            # Upload to storage (blocking HTTP runs off the event loop) while
+            # the cheaper renditions are encoded in worker processes
+            audio_url, _ = await asyncio.gather(
+                upload_audio(audio_path, save_id),
+                publish_renditions(audio_path, save_id),
+            )
+            metrics.count("tts", "upload", bytes=file_size)
 
             # Update save
-            log(f"  Updating save record...")
-            update_save_audio_url(save_id, audio_url)
+            with stage("update"):
+                log(f"  Updating save record...")
+                await asyncio.to_thread(update_save_audio_url, save_id, audio_url)
 
             log(f"  Done! {audio_url}")
+            SAVES.inc(result="done")
             return True
 
         except Exception as e:
-            log(f"  Error: {e}")
+            log(f"  Error: {e}", "error")
+            SAVES.inc(result="failed")
+            await report_failure(save_id, e)
             return False
 
-def main():
-    """Main loop."""
+def update_queue_gauges(queue, in_flight):
+    QUEUE_DEPTH.set(queue.qsize())
+    IN_FLIGHT.set(len(in_flight))
+
+async def worker(queue, in_flight, retry_after):
+    """Pull saves off the queue until cancelled."""
+    while True:
+        save = await queue.get()
+        update_queue_gauges(queue, in_flight)
+        try:
+            ok = await process_save(save)
+            if not ok:
+                # Don't hand a failing save straight back to the poller
+                retry_after[save["id"]] = time.monotonic() + CHECK_INTERVAL
+        except Exception as e:
+            log(f"Error in worker: {e}", "error")
+            await report_failure(save["id"], e)
+            retry_after[save["id"]] = time.monotonic() + CHECK_INTERVAL
+        finally:
+            in_flight.discard(save["id"])
+            update_queue_gauges(queue, in_flight)
+            queue.task_done()
+
+async def heartbeat(in_flight):
+    """Periodically renew the leases on every save we hold (queued or running)."""
+    while True:
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        if not in_flight:
+            continue
+        held = set(in_flight)
+        still_held = await asyncio.to_thread(heartbeat_leases, held)
+        for save_id in held - still_held:
+            log(f"Lost lease on save {save_id}", "error")
+
+async def process_batch(saves):
+    """Process a batch of saves with at most MAX_WORKERS in flight."""
+    semaphore = asyncio.Semaphore(MAX_WORKERS)
+
+    async def run(save):
+        async with semaphore:
+            return await process_save(save)
+
+    return await asyncio.gather(*(run(save) for save in saves))
+
+async def backfill():
+    """Drain the whole pending backlog at full speed, then exit."""
+    queue = asyncio.Queue(maxsize=MAX_WORKERS)
+    in_flight = set()
+    retry_after = {}
+    workers = [
+        asyncio.create_task(worker(queue, in_flight, retry_after))
+        for _ in range(MAX_WORKERS)
+    ]
+    if USE_LEASES:
+        workers.append(asyncio.create_task(heartbeat(in_flight)))
+
+    rows = iter_claimed_saves() if USE_LEASES else iter_pending_saves()
+    count = 0
+    metrics_server = await start_metrics_server()
+    try:
+        while True:
+            # Pages are fetched lazily as workers free up queue slots
+            save = await asyncio.to_thread(next, rows, None)
+            if save is None:
+                break
+            in_flight.add(save["id"])
+            await queue.put(save)
+            update_queue_gauges(queue, in_flight)
+            count += 1
+        await queue.join()
+    finally:
+        if metrics_server:
+            await metrics_server.stop()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    log(f"Backfill complete: {count} saves processed, {len(retry_after)} failed")
+
+async def start_metrics_server():
+    """Serve /metrics when METRICS_PORT is set (0 picks a free port); returns the server or None."""
+    if METRICS_PORT is None:
+        return None
+    server = metrics.MetricsServer(METRICS_HOST, METRICS_PORT)
+    await server.start()
+    log(f"Metrics: http://{server.host}:{server.port}/metrics")
+    return server
+
+def build_triggers():
+    """Trigger sources enabled in config."""
+    triggers = []
+    if WEBHOOK_PORT:
+        triggers.append(WebhookTrigger(WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_SECRET))
+    if DATABASE_URL:
+        trigger = ListenNotifyTrigger(DATABASE_URL)
+        trigger.on_error = lambda e: log(f"LISTEN connection error: {e}", "error")
+        triggers.append(trigger)
+    return triggers
+
+async def main(triggers=None):
+    """Main loop: one poller feeding a bounded pool of workers."""
     log("=" * 50)
     log("Stash TTS Generator started")
     log(f"Voice: {VOICE}")
     log(f"Check interval: {CHECK_INTERVAL}s")
+    log(f"Workers: {MAX_WORKERS}")
+    if USE_LEASES:
+        log(f"Worker ID: {WORKER_ID} (lease {LEASE_SECONDS}s)")
     log("=" * 50)
 
-    while True:
-        try:
-            pending = get_pending_saves()
-
-            if pending:
-                log(f"Found {len(pending)} saves to process")
-                for save in pending:
-                    process_save(save)
-                    time.sleep(2)  # Small delay between saves
-            else:
-                log("No saves pending audio generation")
-
-        except Exception as e:
-            log(f"Error in main loop: {e}")
+    # Bounded so the poller only fetches more work once a worker is free
+    queue = asyncio.Queue(maxsize=MAX_WORKERS)
+    in_flight = set()
+    retry_after = {}
+    workers = [
+        asyncio.create_task(worker(queue, in_flight, retry_after))
+        for _ in range(MAX_WORKERS)
+    ]
+    if USE_LEASES:
+        workers.append(asyncio.create_task(heartbeat(in_flight)))
+
+    metrics_server = await start_metrics_server()
+    triggers = build_triggers() if triggers is None else triggers
+    wakeup = Wakeup()
+    for trigger in triggers:
+        await trigger.start(wakeup)
+        log(f"Wakeup source: {type(trigger).__name__}")
+
+    # With a wakeup source, polling is only a safety net and can back off further
+    max_interval = IDLE_POLL_INTERVAL if triggers else CHECK_INTERVAL
+    poller = AdaptivePoller(MIN_POLL_INTERVAL, max_interval)
 
-        time.sleep(CHECK_INTERVAL)
+    try:
+        while True:
+            fetched = 0
+            try:
+                now = time.monotonic()
+                for save_id, until in list(retry_after.items()):
+                    if until <= now:
+                        del retry_after[save_id]
+
+                exclude = in_flight | set(retry_after)
+                pending = await asyncio.to_thread(get_work, exclude)
+                fetched = len(pending)
+
+                if pending:
+                    log(f"Found {len(pending)} saves to process")
+                    for save in pending:
+                        in_flight.add(save["id"])
+                        await queue.put(save)
+                        update_queue_gauges(queue, in_flight)
+                elif not in_flight:
+                    log("No saves pending audio generation")
+
+            except Exception as e:
+                log(f"Error in main loop: {e}", "error")
+
+            # Full batch: poll again at once. Otherwise wait for a wakeup or
+            # the (exponentially growing) idle interval, whichever is first.
+            delay = poller.next_delay(BATCH_SIZE, fetched)
+            if delay:
+                reasons = await wakeup.wait(delay)
+                if reasons:
+                    log(f"Woken by {reasons[0]}" + (f" (+{len(reasons) - 1} more)" if len(reasons) > 1 else ""))
+                    poller.reset()
+    finally:
+        if metrics_server:
+            await metrics_server.stop()
+        for trigger in triggers:
+            await trigger.stop()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
 
 if __name__ == "__main__":
+    configure_logging()
+
     # Check for single-run mode
     if len(sys.argv) > 1 and sys.argv[1] == "--once":
         log("Running once...")
-        pending = get_pending_saves()
+        pending = get_work()
         if pending:
             log(f"Found {len(pending)} saves to process")
-            for save in pending:
-                process_save(save)
+            asyncio.run(process_batch(pending))
         else:
             log("No saves pending")
         sys.exit(0)
 
+    # Backfill mode: page through the entire backlog once
+    if len(sys.argv) > 1 and sys.argv[1] == "--backfill":
+        log("Backfilling all pending saves...")
+        asyncio.run(backfill())
+        sys.exit(0)
+
     # Normal daemon mode
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
         log("TTS Generator stopped")
         sys.exit(0)
@@ -803,7 +803,7 @@ class StashApp {
       // Audio is ready - show player
       audioPlayer.classList.remove('hidden');
       audioGenerating.classList.add('hidden');
-      this.initAudio(save.audio_url);
+      this.initAudio(this.pickAudioUrl(save));
     } else if (save.content && save.content.length > 100 && !save.highlight) {
       // Content exists but no audio yet - show generating indicator
       audioPlayer.classList.add('hidden');
@@ -873,6 +873,16 @@ class StashApp {
   }
 
   // Audio player methods
+
+  // Smallest rendition this browser can play, else the original MP3
+  pickAudioUrl(save) {
+    const probe = document.createElement('audio');
+    const playable = (save.audio_renditions || [])
+      .filter(r => r.url && probe.canPlayType && probe.canPlayType(r.mime) !== '')
+      .sort((a, b) => a.size_bytes - b.size_bytes);
+    return playable.length ? playable[0].url : save.audio_url;
+  }
+
   async initAudio(url) {
     this.stopAudio();
 